@@ -0,0 +1,191 @@
+"""
+批量操作工具类 - 按接口能力分批或并发执行大量商品、订单、标签操作
+
+- 接口支持批量的操作（打标签、解绑标签）按 (类型, 店铺, 标签) 分组，每满 chunk_size 个发一次批量请求
+- 其他操作（更新商品、切换状态、删除订单等）逐个调用对应的 *_actions 函数，由有界线程池并发执行
+- 操作可以是生成器，执行器边读边提交，同时在途的请求数不超过并发数的两倍
+- 返回成功数、失败数、吞吐量，以及每个失败操作和原因；批量请求失败时，其中每个操作都记为失败
+- purge_shop 按业务规则（先订单、再商品、最后店铺）删除临时店铺及其全部数据
+
+分批大小默认 DEFAULT_CHUNK_SIZE，可以用 run_perf.py batch-tag 测出的建议值覆盖。
+"""
+
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+# 添加当前目录到 sys.path，以便导入 conftest
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from admin import order_actions, product_actions, shop_actions, tag_actions
+from perf.load_generator import suppress_stdout
+
+
+# 批量打标签的默认分批大小
+DEFAULT_CHUNK_SIZE = 100
+
+# 默认并发数
+DEFAULT_CONCURRENCY = 8
+
+# 一个操作：kind 为操作类型，target_id 为商品或订单ID，params 为对应 *_actions 函数的其余参数
+BulkOperation = namedtuple("BulkOperation", "kind target_id shop_id params", defaults=(None,))
+
+# 逐个执行的操作：类型 -> (令牌, 操作) -> 是否成功
+SINGLE_HANDLERS = {
+    "update_product": lambda token, op: product_actions.update_product(
+        token, op.target_id, op.shop_id, **(op.params or {})),
+    "toggle_product_status": lambda token, op: product_actions.toggle_product_status(
+        token, op.target_id, op.shop_id, **(op.params or {})),
+    "delete_product": lambda token, op: product_actions.delete_product(token, op.target_id, op.shop_id),
+    "update_order": lambda token, op: order_actions.update_order(
+        token, op.target_id, op.shop_id, **(op.params or {})),
+    "toggle_order_status": lambda token, op: order_actions.toggle_order_status(
+        token, op.target_id, op.shop_id, **(op.params or {})),
+    "delete_order": lambda token, op: order_actions.delete_order(token, op.target_id, op.shop_id),
+    "delete_tag": lambda token, op: tag_actions.delete_tag(token, op.target_id, op.shop_id),
+}
+
+# 接口支持批量的操作：类型 -> (令牌, 商品ID列表, 标签ID, 店铺ID) -> 是否成功
+BATCH_HANDLERS = {
+    "tag_product": lambda *args: tag_actions.batch_tag_products(*args),
+    "untag_product": lambda *args: tag_actions.batch_untag_products(*args),
+}
+
+
+def _run_single(admin_token, ops):
+    op = ops[0]
+    return SINGLE_HANDLERS[op.kind](admin_token, op)
+
+
+def _run_batch(admin_token, ops):
+    op = ops[0]
+    product_ids = [str(item.target_id) for item in ops]
+    return BATCH_HANDLERS[op.kind](admin_token, product_ids, op.params["tag_id"], op.shop_id)
+
+
+def print_progress(done, failed, elapsed, stream=None):
+    """默认的进度输出"""
+    rate = done / elapsed if elapsed > 0 else 0.0
+    print(f"  已完成 {done} 项，失败 {failed} 项，{rate:.1f} 项/秒", file=stream or sys.stdout, flush=True)
+
+
+def run_bulk(admin_token, operations, concurrency=DEFAULT_CONCURRENCY, chunk_size=DEFAULT_CHUNK_SIZE,
+             progress=print_progress, progress_every=100, quiet=True):
+    """执行一批操作
+
+    Args:
+        admin_token: 管理员令牌
+        operations: BulkOperation 的可迭代对象，可以是生成器
+        concurrency: 同时执行的请求数
+        chunk_size: 批量操作每个请求包含的商品数
+        progress: 进度回调 (已完成数, 失败数, 已用秒数, 输出流)，None 表示不输出
+        progress_every: 每完成多少项调用一次进度回调，结束时再调用一次
+        quiet: 屏蔽各 *_actions 函数逐个打印的结果
+
+    Returns:
+        dict: {"total", "succeeded", "failed", "requests", "elapsed_s", "items_per_second",
+               "by_kind": {类型: {"succeeded", "failed"}}, "failures": [{"operation", "error"}]}
+    """
+    stream = sys.stdout
+    report = {"total": 0, "succeeded": 0, "failed": 0, "requests": 0, "by_kind": {}, "failures": []}
+    buffers = {}
+    pending = {}
+    next_progress = progress_every
+    started = time.perf_counter()
+
+    def collect(futures):
+        nonlocal next_progress
+        for future in futures:
+            ops, error = pending.pop(future), None
+            try:
+                if not future.result():
+                    error = "请求失败"
+            except Exception as exc:
+                error = f"{type(exc).__name__}: {exc}"
+            report["requests"] += 1
+            for op in ops:
+                counts = report["by_kind"].setdefault(op.kind, {"succeeded": 0, "failed": 0})
+                if error:
+                    counts["failed"] += 1
+                    report["failed"] += 1
+                    report["failures"].append({"operation": op, "error": error})
+                else:
+                    counts["succeeded"] += 1
+                    report["succeeded"] += 1
+            done = report["succeeded"] + report["failed"]
+            if progress and done >= next_progress:
+                progress(done, report["failed"], time.perf_counter() - started, stream)
+                next_progress = (done // progress_every + 1) * progress_every
+
+    def submit(executor, func, ops):
+        if len(pending) >= concurrency * 2:
+            collect(wait(pending, return_when=FIRST_COMPLETED).done)
+        pending[executor.submit(func, admin_token, ops)] = ops
+
+    with suppress_stdout(quiet), ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for op in operations:
+            report["total"] += 1
+            if op.kind in BATCH_HANDLERS:
+                group = (op.kind, str(op.shop_id), (op.params or {})["tag_id"])
+                buffer = buffers.setdefault(group, [])
+                buffer.append(op)
+                if len(buffer) >= chunk_size:
+                    submit(executor, _run_batch, buffers.pop(group))
+            elif op.kind in SINGLE_HANDLERS:
+                submit(executor, _run_single, [op])
+            else:
+                raise ValueError(f"不支持的批量操作类型: {op.kind}")
+        for buffer in buffers.values():
+            submit(executor, _run_batch, buffer)
+        collect(wait(pending).done)
+
+    elapsed = time.perf_counter() - started
+    if progress and report["total"] % progress_every:
+        progress(report["total"], report["failed"], elapsed, stream)
+    report["elapsed_s"] = round(elapsed, 3)
+    report["items_per_second"] = round(report["total"] / elapsed, 1) if elapsed > 0 else None
+    return report
+
+
+def format_bulk_report(report, max_failures=20):
+    """格式化执行结果和前 max_failures 个失败操作"""
+    lines = [f"共 {report['total']} 项，成功 {report['succeeded']}，失败 {report['failed']}，"
+             f"{report['requests']} 个请求，用时 {report['elapsed_s']}s，{report['items_per_second']} 项/秒"]
+    for kind, counts in report["by_kind"].items():
+        lines.append(f"  {kind}: 成功 {counts['succeeded']}，失败 {counts['failed']}")
+    for item in report["failures"][:max_failures]:
+        op = item["operation"]
+        lines.append(f"  ✗ {op.kind} {op.target_id}（店铺 {op.shop_id}）: {item['error']}")
+    if len(report["failures"]) > max_failures:
+        lines.append(f"  ... 另有 {len(report['failures']) - max_failures} 项失败")
+    return "\n".join(lines)
+
+
+def purge_shop(admin_token, shop_id, concurrency=DEFAULT_CONCURRENCY, page_size=100, quiet=True):
+    """删除店铺及其全部数据
+
+    后端只允许删除没有订单的商品、没有商品的店铺（见 BUSINESS_FLOW_README.md），
+    因此依次删除订单、商品、标签，最后删除店铺。每一类反复读取第一页并删除，直到列表为空；
+    某一页一个都删不掉时停止，避免死循环。
+
+    Returns:
+        bool: 店铺是否删除成功，失败时店铺和剩余数据保留
+    """
+    listings = (
+        ("delete_order", order_actions.get_order_list),
+        ("delete_product", product_actions.get_product_list),
+        ("delete_tag", tag_actions.get_tag_list),
+    )
+    with suppress_stdout(quiet):
+        for kind, get_list in listings:
+            while True:
+                items = get_list(admin_token, shop_id, page=1, page_size=page_size)
+                if not items:
+                    break
+                report = run_bulk(admin_token, (BulkOperation(kind, item.get("id"), shop_id) for item in items),
+                                  concurrency=concurrency, progress=None, quiet=quiet)
+                if not report["succeeded"]:
+                    break
+        return shop_actions.delete_shop(admin_token, shop_id)
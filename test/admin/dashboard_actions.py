@@ -0,0 +1,38 @@
+"""
+数据看板操作工具类 - 提供数据看板相关的业务操作函数
+"""
+
+import requests
+import sys
+from pathlib import Path
+
+# 添加当前目录到 sys.path，以便导入 conftest
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from conftest import API_BASE_URL, make_request_with_retry
+
+
+def get_dashboard_stats(admin_token, shop_id, period="week"):
+    """获取数据看板统计
+
+    Args:
+        admin_token: 管理员令牌
+        shop_id: 店铺ID
+        period: 统计周期（week/month/year）
+
+    Returns:
+        dict: 统计数据（包含 orderStats/productStats/userStats），失败返回None
+    """
+    url = f"{API_BASE_URL}/admin/dashboard/stats"
+    params = {"shop_id": str(shop_id), "period": period}
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    def request_func():
+        return requests.get(url, params=params, headers=headers)
+
+    response = make_request_with_retry(request_func)
+    if response.status_code == 200:
+        data = response.json()
+        return data.get("data", data)
+    print(f"[FAIL] 获取数据看板统计失败，状态码: {response.status_code}, 响应: {response.text}")
+    return None
@@ -156,7 +156,7 @@ def get_product_detail(admin_token, product_id, shop_id):
     return None
 
 
-def update_product(admin_token, product_id, shop_id, name=None, price=None):
+def update_product(admin_token, product_id, shop_id, name=None, price=None, stock=None):
     """更新商品信息
 
     Args:
@@ -165,6 +165,7 @@ def update_product(admin_token, product_id, shop_id, name=None, price=None):
         shop_id: 店铺ID
         name: 新的商品名称
         price: 新的商品价格
+        stock: 新的商品库存（0 也会提交）
 
     Returns:
         bool: 是否更新成功
@@ -176,6 +177,8 @@ def update_product(admin_token, product_id, shop_id, name=None, price=None):
         payload["name"] = name
     if price:
         payload["price"] = price
+    if stock is not None:
+        payload["stock"] = stock
 
     headers = {"Authorization": f"Bearer {admin_token}"}
 
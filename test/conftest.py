@@ -1,6 +1,7 @@
 import os
 import pytest
 import requests
+import threading
 import time
 from datetime import datetime
 from dotenv import load_dotenv
@@ -13,22 +14,54 @@ load_dotenv()
 
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8080/api/order-ease/v1")
 
-def make_request_with_retry(request_func, max_retries=10, initial_wait=1, backoff_factor=2):
+# 429 默认最大重试次数，压测时会临时设为 0，让限流直接体现在结果中
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "10"))
+
+# 记录每个线程最近一次请求的最终响应，供压测工具判定操作工具类的调用结果
+_request_context = threading.local()
+
+def get_last_response():
+    """获取当前线程最近一次 make_request_with_retry 返回的响应，没有则返回None"""
+    return getattr(_request_context, "last_response", None)
+
+def clear_last_response():
+    """清除当前线程记录的最近一次响应"""
+    _request_context.last_response = None
+
+# 请求监听器：每次实际发出的请求（包括 429 重试）返回后调用，供调用次数统计等工具使用
+_request_listeners = []
+
+def add_request_listener(listener):
+    """注册请求监听器，listener 接收 requests.Response 和 retry（该响应为 429 且随后会重试）"""
+    if listener not in _request_listeners:
+        _request_listeners.append(listener)
+
+def remove_request_listener(listener):
+    """移除请求监听器"""
+    if listener in _request_listeners:
+        _request_listeners.remove(listener)
+
+def make_request_with_retry(request_func, max_retries=None, initial_wait=1, backoff_factor=2):
     """
     执行请求，如果遇到429则等待后重试（最多重试max_retries次）
     
     Args:
         request_func: 请求函数
-        max_retries: 最大重试次数
+        max_retries: 最大重试次数，默认使用 RATE_LIMIT_MAX_RETRIES
         initial_wait: 初始等待时间（秒）
         backoff_factor: 退避因子，每次重试等待时间乘以这个因子
     """
+    if max_retries is None:
+        max_retries = RATE_LIMIT_MAX_RETRIES
     retry_count = 0
     wait_time = initial_wait
     
     while True:
         response = request_func()
-        if response.status_code == 429 and retry_count < max_retries:
+        retry = response.status_code == 429 and retry_count < max_retries
+        for listener in list(_request_listeners):
+            listener(response, retry)
+        if retry:
             print(f"[WARN] 请求过于频繁（429），等待 {wait_time} 秒后重试（第 {retry_count + 1}/{max_retries} 次）")
             time.sleep(wait_time)
             retry_count += 1
@@ -36,6 +69,7 @@ def make_request_with_retry(request_func, max_retries=10, initial_wait=1, backof
         else:
             if retry_count > 0:
                 print(f"[OK] 重试完成，最终状态码: {response.status_code}")
+            _request_context.last_response = response
             return response
 
 def assert_response_status(response, expected_status, message=None):
@@ -605,3 +639,37 @@ def pytest_runtest_teardown(item, nextitem):
         
         # 清理记录
         del _test_start_times[item.nodeid]
+
+
+# 按测试统计的 HTTP 调用次数（使用 --call-report 时记录）
+_test_call_counts = {}
+
+def pytest_addoption(parser):
+    """注册命令行选项"""
+    parser.addoption("--call-report", default=None,
+                     help="按测试统计 HTTP 调用次数和传输字节数，并将 JSON 报告写入该路径")
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    """使用 --call-report 时统计测试函数本身发出的请求（不含 fixture）"""
+    if not item.config.getoption("--call-report"):
+        yield
+        return
+    from perf.call_budget import trace_calls
+
+    with trace_calls() as counter:
+        yield
+    _test_call_counts[item.nodeid] = counter.summary()
+
+def pytest_sessionfinish(session, exitstatus):
+    """写出按测试统计的调用次数报告"""
+    report_path = session.config.getoption("--call-report")
+    if report_path and _test_call_counts:
+        import json
+        from pathlib import Path
+
+        path = Path(report_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(_test_call_counts, f, ensure_ascii=False, indent=2)
+        print(f"\n调用次数报告已保存: {path}（{len(_test_call_counts)} 个测试）")
@@ -11,13 +11,14 @@ class FrontendProductHelper:
     """前端商品辅助类 - 提供静态方法"""
 
     @staticmethod
-    def get_product_list(token, page=1, page_size=10):
+    def get_product_list(token, page=1, page_size=10, shop_id=None):
         """测试获取商品列表
 
         Args:
             token: 认证token
             page: 页码
             page_size: 每页大小
+            shop_id: 店铺ID，不传时不限定店铺
 
         Returns:
             response: HTTP响应对象
@@ -27,6 +28,8 @@ class FrontendProductHelper:
             "page": page,
             "pageSize": page_size
         }
+        if shop_id is not None:
+            params["shop_id"] = str(shop_id)
         headers = {"Authorization": f"Bearer {token}"}
 
         def request_func():
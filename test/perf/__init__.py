@@ -0,0 +1 @@
+# Perf package
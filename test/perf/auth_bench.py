@@ -0,0 +1,264 @@
+"""
+登录认证压测 - 测量各类登录接口的吞吐和延迟，以及登录风暴对下单流量的影响
+
+/login 在测试套件中被调用二十多次，/user/login、临时令牌登录也出现在每次会话开始时。
+密码哈希使登录成为 CPU 密集型请求，在 2 核机器上尤其明显。本模块：
+
+- 对管理员、商家、前端用户、临时令牌四类登录，逐级提高并发（闭环）测量吞吐和延迟
+- 按比例混入错误凭据（取自 auth/test_password_change_final.py 的密码序列），
+  错误凭据请求以返回 400/401/403 计为成功
+- 先单独运行下单负载作为基线，再叠加登录风暴，对比下单流量的吞吐、p99 和容器 CPU，
+  得出登录风暴占用的 CPU 余量
+"""
+
+import math
+import os
+import random
+import sys
+import time
+from fractions import Fraction
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from conftest import API_BASE_URL, make_request_with_retry
+from config.test_data import test_data
+from admin import shop_actions as admin_shop_actions
+from admin import user_actions as admin_user_actions
+from auth.test_password_change_final import TestPasswordChangeFinal
+from frontend.test_auth import FrontendAuthHelper
+from shop_owner import shop_actions as shop_owner_shop_actions
+from perf.load_generator import Operation, run_blended, run_closed_loop
+from perf.soak import ResourceMonitor
+from perf.user_pool import register_identity
+
+
+# 错误凭据请求的预期状态码
+REJECTED_STATUS = (400, 401, 403)
+
+# 管理员错误密码：密码修改流程中用过的旧密码和错误密码
+INVALID_ADMIN_PASSWORDS = (
+    "WrongPassword123",
+    TestPasswordChangeFinal.FIRST_NEW_PASSWORD,
+    TestPasswordChangeFinal.SECOND_NEW_PASSWORD,
+)
+
+# 登录类型，对应 auth_operations 返回的键
+LOGIN_KINDS = ("admin", "shop_owner", "user", "temp_token")
+
+DEFAULT_AUTH_LEVELS = (1, 2, 4, 8, 16)
+
+
+def login_request(username: str, password: str) -> requests.Response:
+    """通用登录接口（管理员和商家），返回响应对象"""
+    url = f"{API_BASE_URL}/login"
+    payload = {"username": username, "password": password}
+
+    def request_func():
+        return requests.post(url, json=payload)
+
+    return make_request_with_retry(request_func)
+
+
+def invalid_admin_login(username: str) -> requests.Response:
+    """使用随机一个错误密码登录管理员账号"""
+    return login_request(username, random.choice(INVALID_ADMIN_PASSWORDS))
+
+
+def prepare_auth_context(admin_token, password: str = "Admin@123456") -> Optional[Dict[str, Any]]:
+    """准备登录压测所需的账号：新建一个店铺（含店主账号）、注册一个前端用户、获取临时令牌
+
+    Returns:
+        上下文字典，失败返回None；结束后调用 cleanup_auth_context 删除前端用户和店铺
+    """
+    suffix = test_data.generate_unique_suffix()
+    owner_username = f"perf_owner_{suffix}"
+    shop_id = admin_shop_actions.create_shop(
+        admin_token, name=f"Perf Auth Shop {suffix}", owner_username=owner_username, owner_password=password,
+    )
+    if not shop_id:
+        return None
+
+    user_username = f"perf_user_{os.urandom(4).hex()}"
+    user = register_identity(user_username, password)
+    if user is None:
+        admin_shop_actions.delete_shop(admin_token, shop_id)
+        return None
+
+    temp = admin_shop_actions.get_shop_temp_token(admin_token, shop_id) or {}
+    credentials = test_data.get_admin_credentials()
+    return {
+        "admin_username": credentials["username"],
+        "admin_password": credentials["password"],
+        "shop_id": shop_id,
+        "owner_username": owner_username,
+        "owner_password": password,
+        "user_id": user.user_id,
+        "user_username": user_username,
+        "user_password": password,
+        "temp_token": temp.get("token"),
+    }
+
+
+def cleanup_auth_context(admin_token, context: Dict[str, Any]) -> bool:
+    """删除 prepare_auth_context 注册的前端用户和创建的店铺
+
+    Returns:
+        两者是否都删除成功
+    """
+    user_deleted = admin_user_actions.delete_user(admin_token, context["user_id"])
+    return admin_shop_actions.delete_shop(admin_token, context["shop_id"]) and bool(user_deleted)
+
+
+def auth_operations(context: Dict[str, Any], invalid_ratio: float = 0.2) -> Dict[str, List[Operation]]:
+    """按登录类型构造操作，每类包含正确凭据和错误凭据两个操作
+
+    Args:
+        context: prepare_auth_context 的返回值
+        invalid_ratio: 错误凭据请求所占比例
+
+    Returns:
+        {登录类型: [正确凭据操作, 错误凭据操作]}，没有临时令牌时不含 temp_token
+    """
+    valid_weight, invalid_weight = 1 - invalid_ratio, invalid_ratio
+    operations = {
+        "admin": [
+            Operation("auth.admin.login", partial(login_request, context["admin_username"], context["admin_password"]),
+                      weight=valid_weight),
+            Operation("auth.admin.login.invalid", partial(invalid_admin_login, context["admin_username"]),
+                      weight=invalid_weight, expected_status=REJECTED_STATUS),
+        ],
+        "shop_owner": [
+            Operation("auth.shopOwner.login", partial(login_request, context["owner_username"], context["owner_password"]),
+                      weight=valid_weight),
+            Operation("auth.shopOwner.login.invalid",
+                      partial(login_request, context["owner_username"], "WrongPassword123"),
+                      weight=invalid_weight, expected_status=REJECTED_STATUS),
+        ],
+        "user": [
+            Operation("auth.user.login",
+                      partial(FrontendAuthHelper.frontend_user_login, context["user_username"], context["user_password"]),
+                      weight=valid_weight),
+            Operation("auth.user.login.invalid",
+                      partial(FrontendAuthHelper.frontend_user_login, context["user_username"], "WrongPassword123"),
+                      weight=invalid_weight, expected_status=REJECTED_STATUS),
+        ],
+    }
+    if context.get("temp_token"):
+        operations["temp_token"] = [
+            Operation("auth.shop.temp_login",
+                      partial(shop_owner_shop_actions.temp_login, context["shop_id"], context["temp_token"]),
+                      weight=valid_weight),
+            Operation("auth.shop.temp_login.invalid",
+                      partial(shop_owner_shop_actions.temp_login, context["shop_id"], "000000"),
+                      weight=invalid_weight, expected_status=REJECTED_STATUS),
+        ]
+    return {kind: [op for op in ops if op.weight > 0] for kind, ops in operations.items()}
+
+
+def weighted_sequence(operations: Sequence[Operation], max_length: int = 10) -> List[Operation]:
+    """把带权重的操作展开成均匀交错的序列，供按顺序轮流执行的闭环压测使用
+
+    例如权重 0.8 / 0.2 展开为 4 个正确凭据操作中间穿插 1 个错误凭据操作。
+    """
+    total = sum(op.weight for op in operations)
+    shares = [Fraction(op.weight / total).limit_denominator(max_length) for op in operations]
+    length = 1
+    for share in shares:
+        length = length * share.denominator // math.gcd(length, share.denominator)
+    slots = []
+    for index, (op, share) in enumerate(zip(operations, shares)):
+        count = int(share * length)
+        slots.extend(((i + 0.5) / count, index, op) for i in range(count))
+    return [op for _, _, op in sorted(slots, key=lambda slot: slot[:2])]
+
+
+def benchmark_logins(operations_by_kind: Dict[str, List[Operation]], levels: Sequence[int] = DEFAULT_AUTH_LEVELS,
+                     duration: float = 10.0, cooldown: float = 2.0) -> Dict[str, List[Dict[str, Any]]]:
+    """对每类登录逐级提高并发，测量吞吐和延迟
+
+    Returns:
+        {登录类型: [run_closed_loop 汇总, ...]}，每个汇总的 operations 中可分别查看正确/错误凭据
+    """
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    for kind, operations in operations_by_kind.items():
+        sequence = weighted_sequence(operations)
+        results[kind] = []
+        for concurrency in sorted(levels):
+            summary = run_closed_loop(sequence, concurrency, duration)
+            results[kind].append(summary)
+            print(f"{kind:<11} 并发 {concurrency:>3}: 吞吐={summary['throughput']:.2f}/s, "
+                  f"p50={summary['naive_ms']['p50']:.1f}ms, p99={summary['naive_ms']['p99']:.1f}ms, "
+                  f"错误率={summary['error_rate']:.2%}")
+            if cooldown > 0:
+                time.sleep(cooldown)
+    return results
+
+
+def _monitored_run(groups, duration, max_workers, cpu_sampler):
+    """运行一个阶段，同时采样容器 CPU（若提供采样器）"""
+    if cpu_sampler is None:
+        return run_blended(groups, duration, max_workers=max_workers), None
+    with ResourceMonitor(cpu_sampler) as monitor:
+        summaries = run_blended(groups, duration, max_workers=max_workers)
+    return summaries, monitor.summary()
+
+
+def measure_login_headroom(ordering_operations: Sequence[Operation], login_operations: Sequence[Operation],
+                           ordering_rate: float, login_rate: float, duration: float = 60.0,
+                           cpu_sampler=None, max_workers: int = 128, cooldown: float = 10.0) -> Dict[str, Any]:
+    """测量登录风暴对下单流量的影响
+
+    先以 ordering_rate 单独运行下单负载（基线），再以相同速率叠加 login_rate 的登录请求（风暴）。
+
+    Returns:
+        {"baseline": {"ordering", "cpu"}, "storm": {"ordering", "login", "cpu"}, "impact": {...}}
+    """
+    baseline, baseline_cpu = _monitored_run(
+        {"ordering": (ordering_operations, ordering_rate)}, duration, max_workers, cpu_sampler)
+    if cooldown > 0:
+        time.sleep(cooldown)
+    storm, storm_cpu = _monitored_run(
+        {"ordering": (ordering_operations, ordering_rate), "login": (login_operations, login_rate)},
+        duration, max_workers, cpu_sampler)
+
+    base, loaded = baseline["ordering"], storm["ordering"]
+    impact = {
+        "ordering_throughput_drop": round(1 - loaded["throughput"] / base["throughput"], 4) if base["throughput"] else None,
+        "ordering_p99_increase_ms": round(loaded["corrected_ms"]["p99"] - base["corrected_ms"]["p99"], 3),
+        "ordering_error_rate_increase": round(loaded["error_rate"] - base["error_rate"], 4),
+        "cpu_increase": round(storm_cpu["mean"] - baseline_cpu["mean"], 2) if baseline_cpu and storm_cpu else None,
+    }
+    return {
+        "config": {"ordering_rate": ordering_rate, "login_rate": login_rate, "duration": duration},
+        "baseline": {"ordering": base, "cpu": baseline_cpu},
+        "storm": {"ordering": loaded, "login": storm["login"], "cpu": storm_cpu},
+        "impact": impact,
+    }
+
+
+def format_auth_report(report: Dict[str, Any]) -> str:
+    """格式化登录压测结果"""
+    lines = [f"{'登录类型':<12}{'并发':>6}{'吞吐':>10}{'p50':>10}{'p99':>10}{'错误率':>9}"]
+    for kind, levels in report.get("throughput", {}).items():
+        for level in levels:
+            lines.append(f"{kind:<12}{level['concurrency']:>6}{level['throughput']:>10.2f}"
+                         f"{level['naive_ms']['p50']:>10.1f}{level['naive_ms']['p99']:>10.1f}{level['error_rate']:>9.2%}")
+
+    headroom = report.get("headroom")
+    if headroom:
+        base, storm, impact = headroom["baseline"], headroom["storm"], headroom["impact"]
+        lines.append("")
+        lines.append(f"下单基线:   吞吐={base['ordering']['throughput']:.2f}/s, p99={base['ordering']['corrected_ms']['p99']:.1f}ms"
+                     + (f", CPU={base['cpu']['mean']:.1f}%" if base["cpu"] else ""))
+        lines.append(f"登录风暴中: 吞吐={storm['ordering']['throughput']:.2f}/s, p99={storm['ordering']['corrected_ms']['p99']:.1f}ms"
+                     + (f", CPU={storm['cpu']['mean']:.1f}%" if storm["cpu"] else "")
+                     + f"；登录 p99={storm['login']['corrected_ms']['p99']:.1f}ms")
+        if impact["ordering_throughput_drop"] is not None:
+            lines.append(f"下单吞吐下降 {impact['ordering_throughput_drop']:.1%}，p99 增加 {impact['ordering_p99_increase_ms']:.1f}ms"
+                         + (f"，CPU 增加 {impact['cpu_increase']:.1f}%" if impact["cpu_increase"] is not None else ""))
+    return "\n".join(lines)
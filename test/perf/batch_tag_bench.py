@@ -0,0 +1,209 @@
+"""
+批量打标签规模测试 - 以 1 到 10000 个商品ID调用 /admin/tag/batch-tag、/shopOwner/tag/batch-tag，确定客户端分批大小
+
+admin/tag_actions.py 和 shop_owner/tag_actions.py 的 batch_tag_products 每次只打几个商品，
+debug_batch_tag.py 也说明这条路径出过问题（商品ID的序列化）。本模块：
+
+- 每个批量大小、每次重复使用新建的标签，保证每次都是真正的写入
+- 记录延迟、每个商品的平均耗时和请求体大小
+- 打完后从本批商品中抽样调用 /admin/tag/bound-tags，确认标签确实绑定到了每个抽到的商品
+- 找出延迟上限内、全部成功且抽样全部绑定的最大批量，作为客户端分批大小的建议
+"""
+
+import random
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from conftest import API_BASE_URL
+from admin import product_actions as admin_product_actions
+from perf.load_generator import summarize_latencies
+
+
+DEFAULT_BATCH_SIZES = (1, 10, 100, 1000, 10000)
+
+# 默认延迟上限（毫秒），按 p95 判断
+DEFAULT_LATENCY_BOUND_MS = 2000.0
+
+# 单个请求的超时时间（秒），大批量可能远超延迟上限
+DEFAULT_TIMEOUT = 120.0
+
+# 与 tag_actions 一致：商家端点的 tag_id 为整数，商品ID一律为字符串（雪花ID超出 JSON 数字精度）
+BatchTarget = namedtuple("BatchTarget", "name path token int_tag_id")
+
+
+def batch_targets(admin_token, shop_owner_token: Optional[str] = None) -> Dict[str, BatchTarget]:
+    """管理员和商家（提供令牌时）的批量打标签端点"""
+    targets = {"admin": BatchTarget("admin", "/admin/tag/batch-tag", admin_token, False)}
+    if shop_owner_token:
+        targets["shop_owner"] = BatchTarget("shop_owner", "/shopOwner/tag/batch-tag", shop_owner_token, True)
+    return targets
+
+
+def create_products(admin_token, shop_id, count: int, concurrency: int = 8) -> List:
+    """并行创建商品，返回成功创建的商品ID"""
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        product_ids = executor.map(lambda _: admin_product_actions.create_product(admin_token, shop_id), range(count))
+        return [product_id for product_id in product_ids if product_id]
+
+
+def tag_batch(target: BatchTarget, product_ids: Sequence, tag_id, shop_id, timeout: float = DEFAULT_TIMEOUT,
+              base_url: str = API_BASE_URL) -> Dict[str, Any]:
+    """发送一次批量打标签请求
+
+    不经过 make_request_with_retry：429 不重试，超时和连接错误记为 "error"。
+
+    Returns:
+        {"status", "elapsed_ms", "request_bytes"}
+    """
+    payload = {
+        "product_ids": [str(product_id) for product_id in product_ids],
+        "tag_id": int(tag_id) if target.int_tag_id else tag_id,
+        "shop_id": str(shop_id),
+    }
+    headers = {"Authorization": f"Bearer {target.token}"}
+    request = requests.Request("POST", f"{base_url}{target.path}", json=payload, headers=headers).prepare()
+    started = time.perf_counter()
+    try:
+        with requests.Session() as session:
+            status = session.send(request, timeout=timeout).status_code
+    except requests.RequestException:
+        status = "error"
+    return {
+        "status": status,
+        "elapsed_ms": (time.perf_counter() - started) * 1000,
+        "request_bytes": len(request.body or b""),
+    }
+
+
+def verify_applied(admin_token, product_ids: Sequence, tag_id, shop_id, samples: int, rng: random.Random,
+                   base_url: str = API_BASE_URL) -> Dict[str, Any]:
+    """抽样确认标签已绑定到商品
+
+    Returns:
+        {"sampled", "applied", "missing": [未绑定的商品ID]}
+    """
+    url = f"{base_url}/admin/tag/bound-tags"
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    sample = rng.sample(list(product_ids), min(samples, len(product_ids)))
+    missing = []
+    with requests.Session() as session:
+        for product_id in sample:
+            response = session.get(url, params={"product_id": str(product_id), "shop_id": str(shop_id)}, headers=headers)
+            tags = (response.json().get("tags") or []) if response.status_code == 200 else []
+            if str(tag_id) not in {str(tag.get("id") or tag.get("ID")) for tag in tags}:
+                missing.append(product_id)
+    return {"sampled": len(sample), "applied": len(sample) - len(missing), "missing": missing}
+
+
+def benchmark_batch_sizes(targets: Mapping[str, BatchTarget], admin_token, shop_id, product_ids: Sequence,
+                          new_tag: Callable[[], Any], sizes: Sequence[int] = DEFAULT_BATCH_SIZES,
+                          repeats: int = 3, samples: int = 20, timeout: float = DEFAULT_TIMEOUT,
+                          seed: Optional[int] = None, base_url: str = API_BASE_URL) -> List[Dict[str, Any]]:
+    """按端点和批量大小测量批量打标签
+
+    Args:
+        product_ids: 可用的商品ID，超过其数量的批量大小跳过
+        new_tag: 创建一个新标签并返回ID，每次请求使用一个新标签
+
+    Returns:
+        [{"endpoint", "size", "latency_ms", "per_item_ms", "request_bytes", "status_counts",
+          "sampled", "applied", "missing"}]
+    """
+    rng = random.Random(seed)
+    rows = []
+    for target in targets.values():
+        for size in sorted(sizes):
+            if size > len(product_ids):
+                continue
+            batch = list(product_ids[:size])
+            latencies, status_counts = [], {}
+            sampled = applied = 0
+            missing = []
+            request_bytes = 0
+            for _ in range(repeats):
+                tag_id = new_tag()
+                if not tag_id:
+                    status_counts["tag_create_failed"] = status_counts.get("tag_create_failed", 0) + 1
+                    continue
+                result = tag_batch(target, batch, tag_id, shop_id, timeout=timeout, base_url=base_url)
+                request_bytes = result["request_bytes"]
+                status_counts[str(result["status"])] = status_counts.get(str(result["status"]), 0) + 1
+                latencies.append(result["elapsed_ms"])
+                if result["status"] == 200:
+                    check = verify_applied(admin_token, batch, tag_id, shop_id, samples, rng, base_url)
+                    sampled += check["sampled"]
+                    applied += check["applied"]
+                    missing.extend(check["missing"][:5])
+            latency = summarize_latencies(latencies)
+            rows.append({
+                "endpoint": target.name,
+                "size": size,
+                "latency_ms": latency,
+                "per_item_ms": round(latency["p50"] / size, 4),
+                "request_bytes": request_bytes,
+                "status_counts": status_counts,
+                "sampled": sampled,
+                "applied": applied,
+                "missing": missing[:10],
+            })
+    return rows
+
+
+def recommend_chunk_size(rows: Sequence[Dict[str, Any]], bound_ms: float = DEFAULT_LATENCY_BOUND_MS,
+                         percentile: str = "p95") -> Dict[str, Dict[str, Any]]:
+    """按端点找出延迟上限内可靠的最大批量
+
+    可靠指所有请求返回 200 且抽样的商品全部绑定了标签。
+
+    Returns:
+        {端点: {"chunk_size": 建议的分批大小（None 表示单个商品也超出上限或失败）, "latency_ms",
+                "items_per_second", "first_failure": 第一个失败或超出上限的批量大小}}
+    """
+    policy = {}
+    for endpoint in dict.fromkeys(row["endpoint"] for row in rows):
+        chosen, first_failure = None, None
+        for row in sorted((row for row in rows if row["endpoint"] == endpoint), key=lambda row: row["size"]):
+            ok = (set(row["status_counts"]) == {"200"} and row["applied"] == row["sampled"]
+                  and row["latency_ms"]["count"] and row["latency_ms"][percentile] <= bound_ms)
+            if not ok:
+                first_failure = row["size"]
+                break
+            chosen = row
+        policy[endpoint] = {
+            "chunk_size": chosen["size"] if chosen else None,
+            "latency_ms": chosen["latency_ms"][percentile] if chosen else None,
+            "items_per_second": round(chosen["size"] / chosen["latency_ms"]["p50"] * 1000, 1)
+            if chosen and chosen["latency_ms"]["p50"] else None,
+            "first_failure": first_failure,
+        }
+    return policy
+
+
+def format_batch_report(rows: Sequence[Dict[str, Any]], policy: Mapping[str, Mapping[str, Any]],
+                        bound_ms: float = DEFAULT_LATENCY_BOUND_MS) -> str:
+    """格式化各批量大小的延迟、单个商品耗时和绑定抽样，以及分批建议"""
+    lines = [f"{'端点':<12}{'批量':>7}{'p50':>10}{'p95':>10}{'每项ms':>10}{'请求体':>10}{'抽样绑定':>10}  状态"]
+    for row in rows:
+        latency = row["latency_ms"]
+        lines.append(
+            f"{row['endpoint']:<12}{row['size']:>7}{latency['p50']:>10.1f}{latency['p95']:>10.1f}"
+            f"{row['per_item_ms']:>10.3f}{row['request_bytes']:>10}{row['applied']:>5}/{row['sampled']:<4}"
+            f"  {row['status_counts']}"
+        )
+    lines.append("")
+    for endpoint, item in policy.items():
+        if item["chunk_size"]:
+            lines.append(f"{endpoint}: p95 ≤ {bound_ms:.0f}ms 的最大可靠批量 {item['chunk_size']}，"
+                         f"约 {item['items_per_second']} 项/秒"
+                         + (f"；批量 {item['first_failure']} 失败或超出上限" if item["first_failure"] else ""))
+        else:
+            lines.append(f"{endpoint}: 没有满足上限的批量（批量 {item['first_failure']} 失败或超出上限）")
+    return "\n".join(lines)
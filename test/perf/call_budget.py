@@ -0,0 +1,290 @@
+"""
+接口调用预算 - 统计每个测试和每个用户旅程的 HTTP 调用次数与传输字节数，与预算文件比较
+
+后台商品列表需要为每个商品调用 /admin/tag/bound-tags、/admin/product/image、/admin/product/detail，
+前端菜单页也要逐个获取商品详情。客户端的调用次数随商品数成倍增长（接口层面的 N+1），
+这类回归不会让单个接口变慢，却会成倍增加后端负载。本模块：
+
+- 通过 conftest.add_request_listener 监听 make_request_with_retry 发出的每个请求
+- trace_calls() 统计一段代码内的调用次数、请求/响应字节数，并按端点（路径中的ID归一化为 {id}）分组；
+  429 重试单独计入 retries，不计入调用次数和字节数，限流不会让旅程看起来超出预算
+- journey(name) 声明一个用户旅程，结束时与预算文件 call_budgets.json 比较，超出则抛出 BudgetExceeded
+- JOURNEYS 定义需要守住预算的旅程；run_perf.py call-budget 运行全部旅程，--update 更新预算文件
+- 运行 pytest 时加 --call-report PATH，按测试输出调用次数报告
+"""
+
+import json
+import re
+import sys
+import threading
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import conftest
+from conftest import API_BASE_URL
+from admin import order_actions as admin_order_actions
+from admin import product_actions as admin_product_actions
+from admin import tag_actions as admin_tag_actions
+from frontend.test_product import FrontendProductHelper
+from frontend.test_shop import FrontendShopHelper
+
+
+# 检入仓库的预算文件
+BUDGET_PATH = Path(__file__).parent / "call_budgets.json"
+
+# 字节数随测试数据略有波动，超过预算的该比例才判定为超出
+DEFAULT_BYTE_TOLERANCE = 0.2
+
+CallRecord = namedtuple("CallRecord", "method endpoint status request_bytes response_bytes")
+
+# 纯数字或较长的十六进制/UUID 路径段视为资源ID
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F-]{16,})$")
+_API_PREFIX = urlsplit(API_BASE_URL).path.rstrip("/")
+
+
+class BudgetExceeded(AssertionError):
+    """用户旅程的调用次数或传输字节数超出预算"""
+
+
+def normalize_endpoint(url: str) -> str:
+    """去掉 API 前缀和查询参数，路径中的ID替换为 {id}"""
+    path = urlsplit(url).path
+    if _API_PREFIX and path.startswith(_API_PREFIX):
+        path = path[len(_API_PREFIX):]
+    return "/".join("{id}" if _ID_SEGMENT.match(segment) else segment for segment in path.split("/")) or "/"
+
+
+def _body_size(body) -> int:
+    if body is None:
+        return 0
+    try:
+        return len(body)
+    except TypeError:
+        return 0
+
+
+def record_from_response(response: requests.Response) -> CallRecord:
+    """从响应中提取调用记录，响应字节数优先使用 Content-Length（压缩后的传输大小）"""
+    request = response.request
+    length = response.headers.get("Content-Length")
+    return CallRecord(
+        method=request.method if request is not None else "GET",
+        endpoint=normalize_endpoint(response.url or (request.url if request is not None else "")),
+        status=response.status_code,
+        request_bytes=_body_size(request.body) if request is not None else 0,
+        response_bytes=int(length) if length and length.isdigit() else len(response.content),
+    )
+
+
+class CallCounter:
+    """线程安全的调用计数器"""
+
+    def __init__(self):
+        self.calls = 0
+        self.retries = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self._endpoints: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, record: CallRecord, retry: bool = False):
+        with self._lock:
+            if retry:
+                self.retries += 1
+                return
+            self.calls += 1
+            self.request_bytes += record.request_bytes
+            self.response_bytes += record.response_bytes
+            self._endpoints[f"{record.method} {record.endpoint}"] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Returns: {"calls", "retries", "bytes", "request_bytes", "response_bytes", "endpoints": {"方法 端点": 次数}}"""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "bytes": self.request_bytes + self.response_bytes,
+                "request_bytes": self.request_bytes,
+                "response_bytes": self.response_bytes,
+                "endpoints": dict(self._endpoints.most_common()),
+            }
+
+
+# 当前活动的计数器；监听器只在有活动计数器时注册，不统计时没有额外开销
+_active: List[CallCounter] = []
+_active_lock = threading.Lock()
+
+
+def _on_response(response: requests.Response, retry: bool = False):
+    record = record_from_response(response)
+    with _active_lock:
+        counters = list(_active)
+    for counter in counters:
+        counter.add(record, retry)
+
+
+@contextmanager
+def trace_calls():
+    """统计代码块内（包括其启动的线程）经 make_request_with_retry 发出的请求
+
+    可以嵌套，外层计数器同样包含内层的调用。
+    """
+    counter = CallCounter()
+    with _active_lock:
+        _active.append(counter)
+        conftest.add_request_listener(_on_response)
+    try:
+        yield counter
+    finally:
+        with _active_lock:
+            _active.remove(counter)
+            if not _active:
+                conftest.remove_request_listener(_on_response)
+
+
+def load_budgets(path=BUDGET_PATH) -> Dict[str, Any]:
+    """读取预算文件，不存在时返回空预算"""
+    path = Path(path)
+    if not path.exists():
+        return {"byte_tolerance": DEFAULT_BYTE_TOLERANCE, "journeys": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_budgets(budgets: Dict[str, Any], path=BUDGET_PATH) -> Path:
+    path = Path(path)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(budgets, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+    return path
+
+
+def check_budget(name: str, summary: Dict[str, Any], budgets: Dict[str, Any]) -> List[str]:
+    """与预算比较
+
+    调用次数必须不超过预算；字节数允许超出 byte_tolerance。未登记预算的旅程不检查。
+
+    Returns:
+        超出预算的说明列表，为空表示在预算内
+    """
+    budget = budgets.get("journeys", {}).get(name)
+    if not budget:
+        return []
+    violations = []
+    if budget.get("calls") is not None and summary["calls"] > budget["calls"]:
+        violations.append(f"{name}: 调用次数 {summary['calls']} 超出预算 {budget['calls']}")
+    tolerance = budgets.get("byte_tolerance", DEFAULT_BYTE_TOLERANCE)
+    if budget.get("bytes") is not None and summary["bytes"] > budget["bytes"] * (1 + tolerance):
+        violations.append(f"{name}: 传输 {summary['bytes']} 字节超出预算 {budget['bytes']}（容差 {tolerance:.0%}）")
+    return violations
+
+
+@contextmanager
+def journey(name: str, budgets: Optional[Dict[str, Any]] = None):
+    """声明一个用户旅程：统计代码块内的调用，结束时与预算比较，超出抛出 BudgetExceeded
+
+    Args:
+        name: 旅程名称，对应预算文件 journeys 中的键
+        budgets: 预算，默认读取 BUDGET_PATH
+    """
+    with trace_calls() as counter:
+        yield counter
+    summary = counter.summary()
+    violations = check_budget(name, summary, budgets if budgets is not None else load_budgets())
+    if violations:
+        endpoints = "，".join(f"{endpoint} ×{count}" for endpoint, count in summary["endpoints"].items())
+        raise BudgetExceeded("；".join(violations) + f"\n调用明细: {endpoints}")
+
+
+def admin_product_catalog(context: Dict[str, Any]):
+    """后台商品管理页：商品列表，然后逐个获取商品详情、已绑定标签和商品图片"""
+    admin_token, shop_id = context["admin_token"], context["shop_id"]
+    products = admin_product_actions.get_product_list(admin_token, shop_id, page=1, page_size=context["products"])
+    for product in products:
+        admin_product_actions.get_product_detail(admin_token, product["id"], shop_id)
+        admin_tag_actions.get_bound_tags(admin_token, product["id"], shop_id)
+        if product.get("image_url"):
+            admin_product_actions.get_product_image(admin_token, product["image_url"], shop_id)
+
+
+def frontend_menu_page(context: Dict[str, Any]):
+    """前端菜单页：店铺详情、店铺标签、商品列表，然后逐个获取商品详情"""
+    token, shop_id = context["user_token"], context["shop_id"]
+    FrontendShopHelper.get_shop_detail(shop_id, token)
+    FrontendShopHelper.get_shop_tags(shop_id, token)
+    response = FrontendProductHelper.get_product_list(token, page=1, page_size=context["products"], shop_id=shop_id)
+    products = []
+    if response.status_code == 200:
+        data = response.json()
+        products = data.get("data", data.get("products", data.get("list", []))) or []
+    for product in products:
+        FrontendProductHelper.get_product_detail(product["id"], shop_id, token)
+
+
+def admin_order_round_trip(context: Dict[str, Any]):
+    """后台下单往返：创建订单 → 查询详情 → 删除订单"""
+    admin_token, shop_id = context["admin_token"], context["shop_id"]
+    items = [{"product_id": str(context["product_id"]), "quantity": 1, "price": 100}]
+    order_id = admin_order_actions.create_order(admin_token, shop_id, context["user_id"], items)
+    if order_id:
+        admin_order_actions.get_order_detail(admin_token, order_id, shop_id)
+        admin_order_actions.delete_order(admin_token, order_id, shop_id)
+
+
+# 受预算约束的用户旅程：名称 → 接收上下文（令牌、店铺ID、商品数等）的函数
+JOURNEYS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "admin.product_catalog": admin_product_catalog,
+    "frontend.menu_page": frontend_menu_page,
+    "admin.order_round_trip": admin_order_round_trip,
+}
+
+
+def run_journeys(context: Dict[str, Any], names=None, budgets: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """运行用户旅程并与预算比较
+
+    Returns:
+        {旅程名: {"calls", "bytes", ..., "endpoints", "violations": [...]}}
+    """
+    budgets = budgets if budgets is not None else load_budgets()
+    results = {}
+    for name in names or JOURNEYS:
+        with trace_calls() as counter:
+            JOURNEYS[name](context)
+        summary = counter.summary()
+        summary["violations"] = check_budget(name, summary, budgets)
+        results[name] = summary
+    return results
+
+
+def update_budgets(budgets: Dict[str, Any], results: Dict[str, Any]) -> Dict[str, Any]:
+    """以本次测量值作为新的预算"""
+    updated = dict(budgets)
+    updated["journeys"] = dict(budgets.get("journeys", {}))
+    for name, summary in results.items():
+        updated["journeys"][name] = {"calls": summary["calls"], "bytes": summary["bytes"]}
+    return updated
+
+
+def format_budget_report(results: Dict[str, Any], budgets: Dict[str, Any]) -> str:
+    """格式化旅程调用统计与预算对比"""
+    lines = [f"{'旅程':<26}{'调用':>6}{'预算':>6}{'字节':>10}{'预算':>10}  结果"]
+    for name, summary in results.items():
+        budget = budgets.get("journeys", {}).get(name, {})
+        lines.append(
+            f"{name:<26}{summary['calls']:>6}{str(budget.get('calls', '-')):>6}"
+            f"{summary['bytes']:>10}{str(budget.get('bytes', '-')):>10}  {'超出' if summary['violations'] else '通过'}"
+        )
+        for endpoint, count in summary["endpoints"].items():
+            lines.append(f"    {endpoint} ×{count}")
+        if summary.get("retries"):
+            lines.append(f"    429 重试 {summary['retries']} 次（不计入调用和字节）")
+        for violation in summary["violations"]:
+            lines.append(f"    ⚠ {violation}")
+    return "\n".join(lines)
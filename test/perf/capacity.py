@@ -0,0 +1,251 @@
+"""
+容量探测 - 在给定 p99 SLO 下寻找最大可持续吞吐(RPS)
+
+tiny.md 中的容器限额（应用 1.5 CPU / 700MB，MySQL 0.5 CPU / 800MB）需要用实测的吞吐拐点来验证。
+本模块基于开环负载生成器逐点施压，每个点判断是否满足：
+
+- 校正延迟 p99 不超过 SLO
+- 错误率（含429限流）不超过阈值
+- 实际成功吞吐不低于目标速率的一定比例
+
+搜索方式：
+- step: 从起始速率按固定增量爬升，直到首次违约
+- binary: 先倍增找到违约上界，再在最后达标点与违约点之间二分
+
+找到候选值后以更长时间复测确认，复测失败则按比例回退后再次确认。
+每个测试点都会保存下来，形成“延迟-负载曲线”，便于比较不同部署配置。
+"""
+
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf.load_generator import OpenLoopLoadGenerator, Operation
+
+
+class CapacityFinder:
+    """容量探测器"""
+
+    def __init__(self, generator, slo_p99_ms: float = 500.0, max_error_rate: float = 0.01,
+                 min_throughput_ratio: float = 0.9, step_duration: float = 20.0,
+                 confirm_duration: float = 60.0, cooldown: float = 5.0):
+        """
+        Args:
+            generator: 具有 run(profile) 方法的负载生成器，通常为 OpenLoopLoadGenerator
+            slo_p99_ms: 校正延迟 p99 上限（毫秒）
+            max_error_rate: 允许的最大错误率
+            min_throughput_ratio: 成功吞吐至少达到目标速率的比例
+            step_duration: 每个测试点的持续时间（秒）
+            confirm_duration: 复测持续时间（秒）
+            cooldown: 测试点之间的冷却时间（秒），让服务端恢复
+        """
+        self.generator = generator
+        self.slo_p99_ms = slo_p99_ms
+        self.max_error_rate = max_error_rate
+        self.min_throughput_ratio = min_throughput_ratio
+        self.step_duration = step_duration
+        self.confirm_duration = confirm_duration
+        self.cooldown = cooldown
+        self.curve: List[Dict[str, Any]] = []
+
+    def check(self, rate: float, report: Dict[str, Any], duration: Optional[float] = None) -> Optional[str]:
+        """判断测试点是否达标
+
+        没有发出请求的操作（如客户端缓存命中，见 load_generator.NotSent）同样完成了到达的负载，
+        与成功吞吐一起和目标速率比较。
+
+        Args:
+            duration: 测试点的持续时间，默认 step_duration
+
+        Returns:
+            违约原因，达标返回None
+        """
+        overall = report["overall"]
+        if overall["error_rate"] > self.max_error_rate:
+            return f"错误率 {overall['error_rate']:.2%} 超过 {self.max_error_rate:.2%}"
+        p99 = overall["corrected_ms"]["p99"]
+        if p99 > self.slo_p99_ms:
+            return f"p99 {p99:.1f}ms 超过 SLO {self.slo_p99_ms:g}ms"
+        throughput = overall["throughput"] + overall.get("not_sent", 0) / (duration or self.step_duration)
+        if throughput < rate * self.min_throughput_ratio:
+            return f"吞吐 {throughput:.2f} 低于目标 {rate:g} 的 {self.min_throughput_ratio:.0%}"
+        return None
+
+    def measure(self, rate: float, duration: Optional[float] = None, phase: str = "search") -> Dict[str, Any]:
+        """在指定速率下施压一次并记录到曲线
+
+        Returns:
+            曲线点字典
+        """
+        if self.curve and self.cooldown > 0:
+            time.sleep(self.cooldown)
+        duration = duration or self.step_duration
+        report = self.generator.run((rate, duration))
+        overall = report["overall"]
+        reason = self.check(rate, report, duration)
+        point = {
+            "phase": phase,
+            "target_rate": rate,
+            "duration": duration,
+            "throughput": overall["throughput"],
+            "not_sent": overall.get("not_sent", 0),
+            "error_rate": overall["error_rate"],
+            "naive_ms": overall["naive_ms"],
+            "corrected_ms": overall["corrected_ms"],
+            "status_counts": overall["status_counts"],
+            "passed": reason is None,
+            "reason": reason,
+        }
+        self.curve.append(point)
+        status = "✓" if reason is None else "✗"
+        print(f"{status} [{phase}] {rate:g} rps: p99={overall['corrected_ms']['p99']:.1f}ms, "
+              f"错误率={overall['error_rate']:.2%}, 吞吐={overall['throughput']:.2f}"
+              + (f" ({reason})" if reason else ""))
+        return point
+
+    def step_search(self, start_rate: float, increment: float, max_rate: float) -> Optional[float]:
+        """按固定增量爬升，返回最后一个达标速率"""
+        last_good = None
+        rate = start_rate
+        while rate <= max_rate:
+            if not self.measure(rate)["passed"]:
+                break
+            last_good = rate
+            rate += increment
+        return last_good
+
+    def binary_search(self, start_rate: float, max_rate: float, tolerance: float = 0.05) -> Optional[float]:
+        """倍增找上界后二分，返回最后一个达标速率
+
+        Args:
+            tolerance: 上下界相对差距小于该值时停止
+        """
+        low, high = None, None
+        rate = start_rate
+        while rate <= max_rate:
+            if self.measure(rate)["passed"]:
+                low = rate
+                rate *= 2
+            else:
+                high = rate
+                break
+        if low is None:
+            return None
+        if high is None:
+            return low
+
+        while (high - low) / low > tolerance:
+            mid = round((low + high) / 2, 2)
+            if self.measure(mid)["passed"]:
+                low = mid
+            else:
+                high = mid
+        return low
+
+    def confirm(self, rate: float, backoff: float = 0.9, max_attempts: int = 3) -> Optional[float]:
+        """以更长时间复测候选速率，失败则回退
+
+        Returns:
+            复测通过的速率，全部失败返回None
+        """
+        for _ in range(max_attempts):
+            if self.measure(rate, self.confirm_duration, phase="confirm")["passed"]:
+                return rate
+            rate = round(rate * backoff, 2)
+        return None
+
+    def find(self, mode: str = "binary", start_rate: float = 1.0, max_rate: float = 500.0,
+             increment: float = 5.0, tolerance: float = 0.05, confirm: bool = True) -> Dict[str, Any]:
+        """执行容量探测
+
+        Args:
+            mode: "step" 或 "binary"
+            start_rate: 起始速率
+            max_rate: 最大探测速率
+            increment: step 模式的速率增量
+            tolerance: binary 模式的停止精度
+            confirm: 是否对候选值复测确认
+
+        Returns:
+            {"mode", "slo", "candidate_rps", "max_sustainable_rps", "confirmed", "curve"}
+        """
+        self.curve = []
+        if mode == "step":
+            candidate = self.step_search(start_rate, increment, max_rate)
+        elif mode == "binary":
+            candidate = self.binary_search(start_rate, max_rate, tolerance)
+        else:
+            raise ValueError(f"未知的探测模式: {mode}")
+
+        sustainable = candidate
+        if candidate is not None and confirm:
+            sustainable = self.confirm(candidate)
+
+        return {
+            "mode": mode,
+            "slo": {
+                "p99_ms": self.slo_p99_ms,
+                "max_error_rate": self.max_error_rate,
+                "min_throughput_ratio": self.min_throughput_ratio,
+            },
+            "candidate_rps": candidate,
+            "max_sustainable_rps": sustainable,
+            "confirmed": confirm and sustainable is not None,
+            "curve": sorted(self.curve, key=lambda p: (p["target_rate"], p["phase"])),
+        }
+
+
+def find_capacity(mixes: Dict[str, Sequence[Operation]], label: str = "default", max_workers: int = 128,
+                  **options) -> Dict[str, Any]:
+    """对多个负载组合分别探测容量
+
+    Args:
+        mixes: 负载组合名 → 操作列表
+        label: 部署配置标签，例如 "tiny-1.5cpu-700m"，用于之后的比较
+        max_workers: 负载生成器最大并发线程数
+        **options: CapacityFinder 构造参数与 find() 参数
+
+    Returns:
+        {"label", "created_at", "mixes": {组合名: find() 结果}}
+    """
+    finder_keys = {"slo_p99_ms", "max_error_rate", "min_throughput_ratio",
+                   "step_duration", "confirm_duration", "cooldown"}
+    finder_options = {k: v for k, v in options.items() if k in finder_keys}
+    find_options = {k: v for k, v in options.items() if k not in finder_keys}
+
+    result = {"label": label, "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "mixes": {}}
+    for name, operations in mixes.items():
+        print(f"\n========== 容量探测: {name} ==========")
+        finder = CapacityFinder(OpenLoopLoadGenerator(operations, max_workers=max_workers), **finder_options)
+        result["mixes"][name] = finder.find(**find_options)
+        print(f"→ {name} 最大可持续吞吐: {result['mixes'][name]['max_sustainable_rps']} rps")
+    return result
+
+
+def load_capacity_report(path) -> Dict[str, Any]:
+    """读取保存的容量报告"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_capacity_reports(reports: Sequence[Dict[str, Any]]) -> str:
+    """比较不同部署配置的容量报告
+
+    Returns:
+        每个负载组合一行、每个配置一列的文本表格，数值为最大可持续吞吐
+    """
+    labels = [r["label"] for r in reports]
+    mixes = sorted({name for r in reports for name in r["mixes"]})
+    lines = [f"{'负载组合':<16}" + "".join(f"{label:>20}" for label in labels)]
+    for mix in mixes:
+        cells = []
+        for report in reports:
+            rps = report["mixes"].get(mix, {}).get("max_sustainable_rps")
+            cells.append(f"{rps:>20g}" if rps is not None else f"{'-':>20}")
+        lines.append(f"{mix:<16}" + "".join(cells))
+    return "\n".join(lines)
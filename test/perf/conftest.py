@@ -0,0 +1,31 @@
+"""
+压测工具测试共用 fixture
+"""
+
+import threading
+from http.server import HTTPServer, ThreadingHTTPServer
+
+import pytest
+
+
+@pytest.fixture
+def local_server():
+    """本地 HTTP 服务 fixture - 返回 start(handler, threaded=False)
+
+    每次调用 start 在随机端口启动一个服务并返回 http://127.0.0.1:<port>；
+    threaded 为 True 时使用 ThreadingHTTPServer 并发处理请求。
+    测试结束时停止所有服务并关闭监听套接字。
+    """
+    servers = []
+
+    def start(handler, threaded=False):
+        server_class = ThreadingHTTPServer if threaded else HTTPServer
+        httpd = server_class(("127.0.0.1", 0), handler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        servers.append(httpd)
+        return f"http://127.0.0.1:{httpd.server_port}"
+
+    yield start
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
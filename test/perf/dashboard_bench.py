@@ -0,0 +1,207 @@
+"""
+数据看板统计开销 - 按统计周期和订单规模测量 /admin/dashboard/stats、/shopOwner/dashboard/stats 的延迟
+
+admin/test_dashboard.py 只检查各统计周期能返回 200。本模块回答两个问题：
+
+- 服务端是否缓存统计结果：同一请求连续调用，比较首次（冷）和后续（热）的延迟；
+  再新建一个订单后重新请求，统计结果不变说明返回的是缓存
+- 统计是否每次请求都扫描整个订单表：店铺订单逐级填充到 1万 / 10万 / 100万（见 order_seed.py），
+  在对数坐标上拟合热延迟与订单数的斜率，接近 1 表示延迟与订单数成正比
+
+填充的订单都落在填充当天，week / month / year 覆盖的订单相同，周期之间的差异只反映查询本身的写法。
+"""
+
+import math
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from conftest import API_BASE_URL
+from perf.load_generator import summarize_latencies
+from perf.soak import linear_trend
+
+
+DEFAULT_DATASET_SIZES = (10_000, 100_000, 1_000_000)
+
+# 热请求中位延迟低于冷请求该比例时视为可能有缓存
+DEFAULT_CACHE_RATIO = 0.5
+
+# 对数斜率分级：不低于 LINEAR_SLOPE 视为与订单数成正比，低于 FLAT_SLOPE 视为与订单数无关
+LINEAR_SLOPE = 0.7
+FLAT_SLOPE = 0.2
+
+StatsTarget = namedtuple("StatsTarget", "role period path params token")
+
+
+def stats_targets(admin_token, shop_id, shop_owner_token: Optional[str] = None,
+                  periods: Sequence[str] = ("week", "month", "year")) -> List[StatsTarget]:
+    """管理员和商家（提供令牌时）在各统计周期的看板统计请求"""
+    targets = []
+    for period in periods:
+        targets.append(StatsTarget("admin", period, "/admin/dashboard/stats",
+                                   {"shop_id": str(shop_id), "period": period}, admin_token))
+        if shop_owner_token:
+            targets.append(StatsTarget("shop_owner", period, "/shopOwner/dashboard/stats",
+                                       {"period": period}, shop_owner_token))
+    return targets
+
+
+def fetch_stats(target: StatsTarget, session: requests.Session, base_url: str = API_BASE_URL) -> Dict[str, Any]:
+    """请求一次统计
+
+    不经过 make_request_with_retry：429 不重试，直接体现在状态码中。
+
+    Returns:
+        {"status", "elapsed_ms", "body"}，非 200 时 body 为 None
+    """
+    headers = {"Authorization": f"Bearer {target.token}"}
+    started = time.perf_counter()
+    response = session.get(f"{base_url}{target.path}", params=target.params, headers=headers)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    body = response.json() if response.status_code == 200 else None
+    return {"status": response.status_code, "elapsed_ms": elapsed_ms, "body": body}
+
+
+def measure_stats(target: StatsTarget, repeats: int = 5, mutate: Optional[Callable[[], Any]] = None,
+                  cache_ratio: float = DEFAULT_CACHE_RATIO, base_url: str = API_BASE_URL) -> Dict[str, Any]:
+    """连续请求同一统计，测量冷/热延迟并检测缓存
+
+    Args:
+        repeats: 首次请求之后的热请求次数
+        mutate: 热请求之后调用（例如新建一个订单），再请求一次比较统计结果是否变化
+        cache_ratio: 热请求中位延迟低于冷请求该比例时标记 warm_speedup
+
+    Returns:
+        {"role", "period", "status", "cold_ms", "warm_ms": 延迟百分位, "warm_ratio",
+         "warm_speedup", "stale_after_write": 写入后统计未变化（None 表示未检查）, "cached"}
+    """
+    with requests.Session() as session:
+        cold = fetch_stats(target, session, base_url)
+        warm = [fetch_stats(target, session, base_url) for _ in range(repeats)]
+        stale = None
+        if mutate is not None and cold["body"] is not None:
+            mutate()
+            after = fetch_stats(target, session, base_url)
+            if after["body"] is not None:
+                stale = after["body"] == warm[-1]["body"] if warm else after["body"] == cold["body"]
+
+    warm_ms = summarize_latencies([result["elapsed_ms"] for result in warm])
+    ratio = round(warm_ms["p50"] / cold["elapsed_ms"], 4) if warm and cold["elapsed_ms"] else None
+    speedup = ratio is not None and ratio < cache_ratio
+    failed = [result["status"] for result in [cold] + warm if result["status"] != 200]
+    return {
+        "role": target.role,
+        "period": target.period,
+        "status": failed[0] if failed else 200,
+        "cold_ms": round(cold["elapsed_ms"], 3),
+        "warm_ms": warm_ms,
+        "warm_ratio": ratio,
+        "warm_speedup": speedup,
+        "stale_after_write": stale,
+        # 写入后结果不变是缓存的直接证据；未检查时退而以冷热延迟差判断
+        "cached": stale if stale is not None else speedup,
+    }
+
+
+def run_dashboard_benchmark(targets: Sequence[StatsTarget], sizes: Sequence[int],
+                            prepare_size: Callable[[int], Optional[int]], repeats: int = 5,
+                            mutate: Optional[Callable[[], Any]] = None,
+                            base_url: str = API_BASE_URL) -> List[Dict[str, Any]]:
+    """按订单规模从小到大测量各统计请求
+
+    Args:
+        sizes: 目标订单数
+        prepare_size: 把店铺订单填充到给定规模，返回实际订单数（None 时按目标数记录）
+
+    Returns:
+        [measure_stats 的结果，加上 "target_orders" 和 "orders"]
+    """
+    rows = []
+    for size in sorted(sizes):
+        orders = prepare_size(size)
+        for target in targets:
+            row = measure_stats(target, repeats=repeats, mutate=mutate, base_url=base_url)
+            row.update({"target_orders": size, "orders": orders if orders is not None else size})
+            rows.append(row)
+    return rows
+
+
+def analyze_scaling(rows: Sequence[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """按角色和周期拟合热延迟随订单数的增长
+
+    Returns:
+        {"admin.week": {"orders": [...], "p50_ms": [...], "log_slope", "r2", "growth",
+                        "scaling": "linear"|"sublinear"|"flat", "cached", "per_request"}}
+        growth 为最大规模相对最小规模的延迟倍数；per_request 为 true 表示没有缓存且延迟与订单数成正比，
+        即每次请求都对整个订单表重新计算
+    """
+    series: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        if row["status"] == 200:
+            series.setdefault(f"{row['role']}.{row['period']}", []).append(row)
+
+    analysis = {}
+    for name, points in series.items():
+        points = sorted(points, key=lambda row: row["orders"])
+        orders = [row["orders"] for row in points]
+        p50 = [row["warm_ms"]["p50"] for row in points]
+        usable = [(n, ms) for n, ms in zip(orders, p50) if n > 0 and ms > 0]
+        trend = linear_trend([math.log10(n) for n, _ in usable], [math.log10(ms) for _, ms in usable])
+        slope = trend["slope"] if len(usable) > 1 else None
+        if slope is None:
+            scaling = None
+        elif slope >= LINEAR_SLOPE:
+            scaling = "linear"
+        elif slope >= FLAT_SLOPE:
+            scaling = "sublinear"
+        else:
+            scaling = "flat"
+        cached = any(row["cached"] for row in points)
+        analysis[name] = {
+            "orders": orders,
+            "p50_ms": p50,
+            "log_slope": round(slope, 3) if slope is not None else None,
+            "r2": round(trend["r2"], 3) if slope is not None else None,
+            "growth": round(p50[-1] / p50[0], 2) if len(p50) > 1 and p50[0] else None,
+            "scaling": scaling,
+            "cached": cached,
+            "per_request": scaling == "linear" and not cached,
+        }
+    return analysis
+
+
+def format_scaling_chart(analysis: Dict[str, Dict[str, Any]], width: int = 40) -> str:
+    """以横向条形图展示各统计请求的热延迟随订单数的增长"""
+    peak = max((ms for item in analysis.values() for ms in item["p50_ms"]), default=0.0)
+    lines = []
+    for name, item in analysis.items():
+        lines.append(f"{name}  斜率 {item['log_slope']}  {item['scaling'] or '-'}"
+                     f"{'  缓存' if item['cached'] else ''}{'  ⚠ 每次请求全表计算' if item['per_request'] else ''}")
+        for orders, ms in zip(item["orders"], item["p50_ms"]):
+            bar = "█" * max(1, round(ms / peak * width)) if peak else ""
+            lines.append(f"  {orders:>9} 单 {bar} {ms:.1f}ms")
+    return "\n".join(lines)
+
+
+def format_dashboard_report(rows: Sequence[Dict[str, Any]], analysis: Dict[str, Dict[str, Any]]) -> str:
+    """格式化各规模的冷/热延迟、缓存判断和增长图"""
+    lines = [f"{'订单数':>10}  {'统计':<18}{'状态':>6}{'冷':>10}{'热p50':>10}{'热p95':>10}{'热/冷':>8}  缓存"]
+    for row in rows:
+        stale = row["stale_after_write"]
+        cache = "是" if row["cached"] else "否"
+        if stale is not None:
+            cache += "（写入后未变化）" if stale else "（写入后已更新）"
+        lines.append(
+            f"{row['orders']:>10}  {row['role'] + '.' + row['period']:<18}{row['status']:>6}"
+            f"{row['cold_ms']:>10.1f}{row['warm_ms']['p50']:>10.1f}{row['warm_ms']['p95']:>10.1f}"
+            f"{row['warm_ratio'] if row['warm_ratio'] is not None else '-':>8}  {cache}"
+        )
+    lines.append("")
+    lines.append(format_scaling_chart(analysis))
+    return "\n".join(lines)
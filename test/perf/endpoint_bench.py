@@ -0,0 +1,198 @@
+"""
+GET 端点自动基准 - 按 OpenAPI / Swagger 文档为每个 GET 端点生成请求模板并统一测量
+
+压测脚本此前都按端点手写。本模块读取后端的 Swagger 文档（或仓库中保存的副本），对每个 GET 端点：
+
+- 按参数名填入真实ID：shop_id / product_id / order_id / user_id / tag_id 取自店铺中已有的数据，
+  名为 id 的参数按路径中的实体（/admin/product/... → 商品ID）确定；page、pageSize 等取固定值；
+  其余参数可以用 --param 指定
+- 必填参数无法确定、或没有对应身份的令牌时跳过该端点并给出原因，可选参数能确定时一并填入
+- 每个模板先预热，再顺序请求固定次数，报告延迟百分位和状态码
+- 结果写入结果存储，与上一次相比延迟增长超过阈值的端点单独列出
+
+新增端点只要出现在文档中就会自动纳入测量。
+"""
+
+import re
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from conftest import API_BASE_URL
+from admin import order_actions as admin_order_actions
+from admin import tag_actions as admin_tag_actions
+from perf import workloads
+from perf.load_generator import summarize_latencies
+from perf.results_store import ResultsStore
+from perf.slow_fuzz import DEFAULT_TIMEOUT, send_input
+
+
+DEFAULT_WARMUP = 3
+
+DEFAULT_ITERATIONS = 20
+
+# p50 相对上一次增长超过该比例时列出
+DEFAULT_GROWTH_THRESHOLD = 0.2
+
+# 与参数名无关的固定取值，参数名忽略大小写和下划线
+FIXED_VALUES = {"page": 1, "pagesize": 10, "limit": 10, "size": 10}
+
+# 路径中可以确定 id 参数所指实体的片段
+ENTITIES = ("product", "order", "user", "tag", "shop")
+
+
+def _normalize(name: str) -> str:
+    return name.replace("_", "").replace("-", "").lower()
+
+
+def build_id_context(admin_token, shop_id) -> Dict[str, Any]:
+    """从店铺中已有的数据取各实体的第一个ID，没有数据的实体不包含在内"""
+    orders = admin_order_actions.get_order_list(admin_token, shop_id, page=1, page_size=1)
+    tags = admin_tag_actions.get_tag_list(admin_token, shop_id, page=1, page_size=1)
+    context = {
+        "shop_id": shop_id,
+        "product_id": workloads.get_first_product_id(admin_token, shop_id),
+        "user_id": workloads.get_first_user_id(admin_token),
+        "order_id": orders[0].get("id") if orders else None,
+        "tag_id": tags[0].get("id") if tags else None,
+    }
+    return {key: value for key, value in context.items() if value is not None}
+
+
+def resolve_parameter(name: str, path: str, context: Mapping[str, Any],
+                      overrides: Optional[Mapping[str, Any]] = None) -> Any:
+    """确定参数的取值，无法确定时返回None
+
+    优先级：overrides → 固定取值 → 上下文中的同名ID → id 参数按路径中的实体；
+    ID 一律转为字符串（雪花ID超出 JSON 数字精度）
+    """
+    key = _normalize(name)
+    for candidate, value in (overrides or {}).items():
+        if _normalize(candidate) == key:
+            return value
+    if key in FIXED_VALUES:
+        return FIXED_VALUES[key]
+    for candidate, value in context.items():
+        if _normalize(candidate) == key:
+            return str(value)
+    if key == "id":
+        segments = [_normalize(segment) for segment in re.split(r"[/{}]", path) if segment]
+        for segment in segments:
+            for entity in ENTITIES:
+                # 精确匹配（含复数），避免 shopOwner 被当作 shop
+                if segment in (entity, f"{entity}s") and f"{entity}_id" in context:
+                    return str(context[f"{entity}_id"])
+    return None
+
+
+def build_templates(operations: Sequence, context_for: Callable[[str], Optional[Mapping[str, Any]]],
+                    overrides: Optional[Mapping[str, Any]] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+    """为每个端点生成请求模板
+
+    Args:
+        operations: schemathesis 的端点
+        context_for: 路径 -> ID 上下文，None 表示没有对应身份
+
+    Returns:
+        (模板 [{"method", "path", "path_parameters", "query", "body"}],
+         跳过的端点 [{"endpoint", "reason"}])
+    """
+    templates, skipped = [], []
+    for operation in operations:
+        endpoint = f"{operation.method.upper()} {operation.path}"
+        context = context_for(operation.path)
+        if context is None:
+            skipped.append({"endpoint": endpoint, "reason": "没有对应身份的令牌"})
+            continue
+        template = {"method": operation.method.upper(), "path": operation.path,
+                    "path_parameters": {}, "query": {}, "body": None}
+        missing = []
+        for parameter in operation.iter_parameters():
+            if parameter.location not in ("path", "query"):
+                continue
+            value = resolve_parameter(parameter.name, operation.path, context, overrides)
+            if value is None:
+                if parameter.is_required:
+                    missing.append(parameter.name)
+                continue
+            location = "path_parameters" if parameter.location == "path" else "query"
+            template[location][parameter.name] = value
+        if missing:
+            skipped.append({"endpoint": endpoint, "reason": f"无法确定必填参数: {', '.join(missing)}"})
+        else:
+            templates.append(template)
+    return templates, skipped
+
+
+def benchmark_templates(templates: Sequence[Dict[str, Any]], token_for: Callable[[str], Optional[str]],
+                        warmup: int = DEFAULT_WARMUP, iterations: int = DEFAULT_ITERATIONS,
+                        base_url: str = API_BASE_URL, timeout: float = DEFAULT_TIMEOUT) -> List[Dict[str, Any]]:
+    """逐个模板预热后顺序请求 iterations 次
+
+    Returns:
+        [{"endpoint", "input", "status_counts", "ok", "latency_ms"}]，ok 为全部请求返回 2xx
+    """
+    rows = []
+    with requests.Session() as session:
+        for template in templates:
+            token = token_for(template["path"])
+            for _ in range(warmup):
+                send_input(session, template, token, base_url, timeout)
+            latencies, status_counts = [], {}
+            for _ in range(iterations):
+                status, elapsed_ms = send_input(session, template, token, base_url, timeout)
+                latencies.append(elapsed_ms)
+                status_counts[str(status)] = status_counts.get(str(status), 0) + 1
+            rows.append({
+                "endpoint": f"{template['method']} {template['path']}",
+                "input": template,
+                "status_counts": status_counts,
+                "ok": all(status.startswith("2") for status in status_counts),
+                "latency_ms": summarize_latencies(latencies),
+            })
+    return rows
+
+
+def store_endpoint_results(store: ResultsStore, rows: Sequence[Dict[str, Any]], label: str = "default",
+                           threshold: float = DEFAULT_GROWTH_THRESHOLD) -> List[Dict[str, Any]]:
+    """将结果写入结果存储，并与上一次记录比较
+
+    Returns:
+        p50 增长超过 threshold 的端点：[{"endpoint", "p50", "growth"}]
+    """
+    slower = []
+    for row in rows:
+        if not row["ok"]:
+            continue
+        dimensions = {"endpoint": row["endpoint"]}
+        latency = row["latency_ms"]
+        store.record("endpoint", dimensions, {"p50": latency["p50"], "p95": latency["p95"], "p99": latency["p99"]},
+                     label=label)
+        growth = store.growth("endpoint", dimensions, "p50", label=label)
+        if growth is not None and growth > threshold:
+            slower.append({"endpoint": row["endpoint"], "p50": latency["p50"], "growth": growth})
+    return slower
+
+
+def format_endpoint_report(rows: Sequence[Dict[str, Any]], skipped: Sequence[Dict[str, str]] = (),
+                           slower: Sequence[Dict[str, Any]] = ()) -> str:
+    """按 p50 从高到低格式化各端点的延迟，以及跳过的端点和变慢的端点"""
+    lines = [f"{'端点':<52}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  状态"]
+    for row in sorted(rows, key=lambda row: row["latency_ms"]["p50"], reverse=True):
+        latency = row["latency_ms"]
+        mark = "" if row["ok"] else "  ⚠"
+        lines.append(f"{row['endpoint']:<52}{latency['p50']:>9.1f}{latency['p95']:>9.1f}{latency['p99']:>9.1f}"
+                     f"{latency['max']:>9.1f}  {row['status_counts']}{mark}")
+    if skipped:
+        lines.append("")
+        lines.append(f"跳过 {len(skipped)} 个端点:")
+        lines.extend(f"  {item['endpoint']}: {item['reason']}" for item in skipped)
+    if slower:
+        lines.append("")
+        lines.append("相比上一次变慢的端点:")
+        lines.extend(f"  {item['endpoint']}: p50 {item['p50']}ms，增长 {item['growth']:.0%}" for item in slower)
+    return "\n".join(lines)
@@ -0,0 +1,317 @@
+"""
+HTTP 缓存语义 - 解析 Cache-Control / ETag / Last-Modified，按 RFC 9111 判断新鲜度和条件请求
+
+供图片缓存检查（image_cache.py）等模块按浏览器的方式判断响应能否复用。
+HttpCache 是负载生成器使用的浏览器式私有缓存：真实顾客不会每次浏览都重新获取店铺详情和标签，
+不模拟缓存会高估服务端负载。ClientCaches 为每个模拟用户维护一个缓存，并按端点统计
+浏览次数（原始请求率）和实际发出的请求（缓存修正后的请求率）。
+"""
+
+import re
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, Union
+
+import requests
+from requests.models import PreparedRequest
+from requests.structures import CaseInsensitiveDict
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from conftest import make_request_with_retry
+
+# 启发式新鲜度：无显式过期信息时，取 (Date - Last-Modified) 的 10%，与浏览器一致
+HEURISTIC_FRACTION = 0.1
+
+# 每个模拟用户的缓存上限（字节），与移动端浏览器为单个站点保留的内存缓存量级相当
+DEFAULT_CACHE_BYTES = 2 * 1024 * 1024
+
+_DIRECTIVE = re.compile(r'\s*([!#$%&\'*+.^_`|~0-9A-Za-z-]+)\s*(?:=\s*("(?:[^"\\]|\\.)*"|[^,\s]*))?\s*(?:,|$)')
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Union[bool, str, int]]:
+    """解析 Cache-Control 头
+
+    指令名转为小写；无值指令为 True，数值指令（如 max-age）转为 int，其余保留字符串。
+    """
+    directives: Dict[str, Union[bool, str, int]] = {}
+    if not value:
+        return directives
+    for match in _DIRECTIVE.finditer(value):
+        name, argument = match.group(1).lower(), match.group(2)
+        if argument is None:
+            directives[name] = True
+            continue
+        argument = argument.strip('"')
+        directives[name] = int(argument) if argument.isdigit() else argument
+    return directives
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness_lifetime(headers: Mapping[str, str]) -> Dict[str, Optional[float]]:
+    """计算私有缓存（浏览器）的新鲜期
+
+    Returns:
+        {"lifetime": 秒数, "source": "max-age" | "expires" | "heuristic" | None}；
+        no-store / no-cache 或无法判断时 lifetime 为 0
+    """
+    directives = parse_cache_control(headers.get("Cache-Control"))
+    if "no-store" in directives or "no-cache" in directives:
+        return {"lifetime": 0.0, "source": None}
+    if isinstance(directives.get("max-age"), int):
+        return {"lifetime": float(directives["max-age"]), "source": "max-age"}
+
+    date = _parse_http_date(headers.get("Date"))
+    expires = headers.get("Expires")
+    if expires is not None:
+        expires_at = _parse_http_date(expires)
+        # 无法解析的 Expires（如 "0"）视为已过期
+        if expires_at is None or date is None:
+            return {"lifetime": 0.0, "source": "expires"}
+        return {"lifetime": max(0.0, expires_at - date), "source": "expires"}
+
+    last_modified = _parse_http_date(headers.get("Last-Modified"))
+    if date is not None and last_modified is not None and date > last_modified:
+        return {"lifetime": (date - last_modified) * HEURISTIC_FRACTION, "source": "heuristic"}
+    return {"lifetime": 0.0, "source": None}
+
+
+def is_storable(status_code: int, headers: Mapping[str, str]) -> bool:
+    """判断响应能否存入私有缓存"""
+    if status_code not in (200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501):
+        return False
+    return "no-store" not in parse_cache_control(headers.get("Cache-Control"))
+
+
+def conditional_headers(headers: Mapping[str, str]) -> Dict[str, str]:
+    """根据缓存响应的校验器构造条件请求头（If-None-Match / If-Modified-Since）"""
+    conditional = {}
+    if headers.get("ETag"):
+        conditional["If-None-Match"] = headers["ETag"]
+    if headers.get("Last-Modified"):
+        conditional["If-Modified-Since"] = headers["Last-Modified"]
+    return conditional
+
+
+def _response_size(response: requests.Response) -> int:
+    """缓存条目占用的近似字节数：响应体 + 响应头"""
+    return len(response.content) + sum(len(name) + len(value) for name, value in response.headers.items())
+
+
+class HttpCache:
+    """浏览器式私有缓存
+
+    按 URL 和 Vary 指定的请求头区分变体；新鲜期内直接复用，过期后带校验器发条件请求，
+    304 时刷新条目。条目总大小超过 max_bytes 时按最近最少使用淘汰。
+    同一模拟用户的请求可能来自不同线程，所有操作加锁。
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES, clock: Callable[[], float] = time.monotonic):
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.size = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        # URL → 最近一次响应的 Vary 请求头名称
+        self._vary: Dict[str, Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _key(self, url: str, request_headers: Mapping[str, str]) -> Tuple:
+        headers = CaseInsensitiveDict(request_headers)
+        return (url,) + tuple((name, headers.get(name)) for name in self._vary.get(url, ()))
+
+    def lookup(self, url: str, request_headers: Mapping[str, str]) -> Optional[Dict[str, Any]]:
+        """查找与请求匹配的缓存条目，命中时标记为最近使用"""
+        with self._lock:
+            key = self._key(url, request_headers)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        return self.clock() - entry["stored_at"] + entry["age"] < entry["lifetime"]
+
+    def store(self, url: str, request_headers: Mapping[str, str], response: requests.Response) -> bool:
+        """存入响应，不可缓存或超过上限的响应不存，并移除同一变体的旧条目
+
+        Returns:
+            是否已存入
+        """
+        vary = tuple(sorted(name.strip().lower() for name in response.headers.get("Vary", "").split(",")
+                            if name.strip()))
+        with self._lock:
+            self._discard(self._key(url, request_headers))
+            size = _response_size(response)
+            if "*" in vary or not is_storable(response.status_code, response.headers) or size > self.max_bytes:
+                return False
+            if self._vary.get(url) != vary:
+                # Vary 变化后旧变体的键无法再匹配，一并移除
+                for key in [key for key in self._entries if key[0] == url]:
+                    self._discard(key)
+                self._vary[url] = vary
+            self._entries[self._key(url, request_headers)] = self._entry(response.headers, response, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted["size"]
+                self.evictions += 1
+            return True
+
+    def refresh(self, entry: Dict[str, Any], not_modified: requests.Response):
+        """用 304 响应的头更新条目并重新计算新鲜期"""
+        with self._lock:
+            headers = CaseInsensitiveDict(entry["headers"])
+            headers.update(not_modified.headers)
+            entry.update(self._entry(headers, entry["response"], entry["size"]))
+
+    def _entry(self, headers: Mapping[str, str], response: requests.Response, size: int) -> Dict[str, Any]:
+        age = headers.get("Age")
+        return {
+            "response": response,
+            "headers": dict(headers),
+            "size": size,
+            "stored_at": self.clock(),
+            "age": int(age) if age and age.isdigit() else 0,
+            "lifetime": freshness_lifetime(headers)["lifetime"],
+        }
+
+    def _discard(self, key: Tuple):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry["size"]
+
+    def get(self, url: str, params: Optional[Mapping[str, Any]] = None,
+            headers: Optional[Mapping[str, str]] = None) -> Tuple[requests.Response, str]:
+        """经缓存发出 GET 请求
+
+        Returns:
+            (响应, 结果)，结果为 "fresh"（未发请求）、"not_modified"（304 后复用）或 "miss"（完整下载）；
+            前两种返回缓存中的响应对象
+        """
+        prepared = PreparedRequest()
+        prepared.prepare_url(url, params)
+        full_url = prepared.url
+        headers = dict(headers or {})
+
+        entry = self.lookup(full_url, headers)
+        if entry is not None and self.is_fresh(entry):
+            return entry["response"], "fresh"
+        request_headers = dict(headers, **conditional_headers(entry["headers"])) if entry else headers
+
+        def request_func():
+            return requests.get(full_url, headers=request_headers)
+
+        response = make_request_with_retry(request_func)
+        if entry is not None and response.status_code == 304:
+            self.refresh(entry, response)
+            return entry["response"], "not_modified"
+        self.store(full_url, headers, response)
+        return response, "miss"
+
+
+class ClientCaches:
+    """压测客户端缓存：每个模拟用户一个 HttpCache，按端点统计浏览次数和实际请求
+
+    enabled 为 False 时每次浏览都直接请求服务端，只做统计，用于与开启缓存的场景对比。
+    """
+
+    def __init__(self, enabled: bool = True, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self._caches: Dict[Any, HttpCache] = {}
+        self._counters: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+
+    def cache_for(self, user) -> HttpCache:
+        with self._lock:
+            if user not in self._caches:
+                self._caches[user] = HttpCache(self.max_bytes)
+            return self._caches[user]
+
+    def get(self, user, endpoint: str, url: str, params: Optional[Mapping[str, Any]] = None,
+            headers: Optional[Mapping[str, str]] = None) -> requests.Response:
+        """以某个模拟用户的身份浏览一次端点
+
+        Args:
+            user: 模拟用户标识（如用户ID）
+            endpoint: 统计用的端点名称
+        """
+        return self.browse(user, endpoint, url, params, headers)[0]
+
+    def browse(self, user, endpoint: str, url: str, params: Optional[Mapping[str, Any]] = None,
+               headers: Optional[Mapping[str, str]] = None) -> Tuple[requests.Response, str]:
+        """同 get，同时返回缓存结果 "fresh" / "not_modified" / "miss"（含义见 HttpCache.get）"""
+        if self.enabled:
+            response, outcome = self.cache_for(user).get(url, params, headers)
+        else:
+            response = make_request_with_retry(lambda: requests.get(url, params=params, headers=headers))
+            outcome = "miss"
+        with self._lock:
+            self._counters.setdefault(endpoint, Counter())[outcome] += 1
+        return response, outcome
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        """按端点汇总原始请求率和缓存修正后的请求率
+
+        Returns:
+            {"enabled", "users", "cached_bytes", "evictions",
+             "endpoints": {端点: {"views", "requests", "fresh", "not_modified", "miss",
+                                  "raw_rps", "adjusted_rps", "full_rps", "avoided_ratio"}}}
+        """
+        with self._lock:
+            counters = {endpoint: Counter(counter) for endpoint, counter in self._counters.items()}
+            caches = list(self._caches.values())
+        endpoints = {}
+        for endpoint, counter in sorted(counters.items()):
+            views = sum(counter.values())
+            sent = views - counter["fresh"]
+            endpoints[endpoint] = {
+                "views": views,
+                "requests": sent,
+                "fresh": counter["fresh"],
+                "not_modified": counter["not_modified"],
+                "miss": counter["miss"],
+                "raw_rps": round(views / elapsed, 3) if elapsed > 0 else 0.0,
+                "adjusted_rps": round(sent / elapsed, 3) if elapsed > 0 else 0.0,
+                "full_rps": round(counter["miss"] / elapsed, 3) if elapsed > 0 else 0.0,
+                "avoided_ratio": round(counter["fresh"] / views, 4) if views else 0.0,
+            }
+        return {
+            "enabled": self.enabled,
+            "users": len(caches),
+            "cached_bytes": sum(cache.size for cache in caches),
+            "evictions": sum(cache.evictions for cache in caches),
+            "endpoints": endpoints,
+        }
+
+
+def format_cache_summary(summary: Dict[str, Any]) -> str:
+    """格式化客户端缓存统计：每个端点的原始请求率和缓存修正后的请求率"""
+    state = "开启" if summary["enabled"] else "关闭"
+    lines = [
+        f"客户端缓存: {state}，{summary['users']} 个用户缓存，共 {summary['cached_bytes'] / 1024:.1f}KB，"
+        f"淘汰 {summary['evictions']} 次",
+        f"{'端点':<22}{'浏览':>7}{'请求':>7}{'304':>6}{'原始rps':>10}{'修正rps':>10}{'完整rps':>10}{'免请求':>8}",
+    ]
+    for endpoint, row in summary["endpoints"].items():
+        lines.append(
+            f"{endpoint:<22}{row['views']:>7}{row['requests']:>7}{row['not_modified']:>6}"
+            f"{row['raw_rps']:>10.2f}{row['adjusted_rps']:>10.2f}{row['full_rps']:>10.2f}{row['avoided_ratio']:>8.1%}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,211 @@
+"""
+图片接口缓存检查 - 校验缓存相关响应头、条件请求，并估算回访顾客负载下浪费的带宽
+
+前端流程会反复获取 /product/image、/shop/image、/admin/product/image 和 /user/avatar，
+而 frontend/test_frontend_flow.py 只检查状态码 200。本模块：
+
+- 检查 ETag / Last-Modified / Cache-Control 响应头，列出缺失或削弱缓存的问题
+- 带 If-None-Match 和 If-Modified-Since 重放请求，确认服务端能否返回 304
+- 模拟回访顾客：每位顾客按虚拟时间多次访问同一批图片，按当前响应头决定
+  直接使用本地缓存、发条件请求还是重新下载，统计 304 比例、节省和浪费的字节数
+"""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from conftest import API_BASE_URL, make_request_with_retry
+from perf.http_cache import conditional_headers, freshness_lifetime, is_storable, parse_cache_control
+
+
+# 图片端点：名称 → 路径
+IMAGE_ENDPOINTS = {
+    "product.image": "/product/image",
+    "shop.image": "/shop/image",
+    "admin.product.image": "/admin/product/image",
+    "user.avatar": "/user/avatar",
+}
+
+
+class ImageTarget:
+    """一张待检查的图片：端点、图片路径参数，以及需要鉴权时的令牌和店铺ID"""
+
+    def __init__(self, endpoint: str, path: str, token: Optional[str] = None, shop_id=None,
+                 base_url: str = API_BASE_URL):
+        if endpoint not in IMAGE_ENDPOINTS:
+            raise ValueError(f"未知的图片端点: {endpoint}，可选: {', '.join(IMAGE_ENDPOINTS)}")
+        self.endpoint = endpoint
+        self.path = path
+        self.token = token
+        self.shop_id = shop_id
+        self.base_url = base_url
+
+    def __repr__(self):
+        return f"ImageTarget({self.endpoint!r}, {self.path!r})"
+
+    def fetch(self, extra_headers: Optional[Mapping[str, str]] = None) -> requests.Response:
+        """获取图片，extra_headers 用于附加条件请求头"""
+        url = f"{self.base_url}{IMAGE_ENDPOINTS[self.endpoint]}"
+        params = {"path": self.path}
+        if self.shop_id is not None:
+            params["shop_id"] = self.shop_id
+        headers = dict(extra_headers or {})
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+
+        def request_func():
+            return requests.get(url, params=params, headers=headers, allow_redirects=False)
+
+        return make_request_with_retry(request_func)
+
+
+def inspect_cache_headers(headers: Mapping[str, str]) -> Dict[str, Any]:
+    """检查一次图片响应的缓存相关响应头
+
+    Returns:
+        {"etag", "last_modified", "cache_control", "freshness", "issues": [问题描述, ...]}
+    """
+    cache_control = parse_cache_control(headers.get("Cache-Control"))
+    freshness = freshness_lifetime(headers)
+    issues = []
+    if not headers.get("ETag") and not headers.get("Last-Modified"):
+        issues.append("缺少 ETag 和 Last-Modified，无法发起条件请求")
+    if not headers.get("Cache-Control"):
+        issues.append("缺少 Cache-Control，浏览器只能使用启发式缓存" if freshness["source"] == "heuristic"
+                      else "缺少 Cache-Control")
+    if "no-store" in cache_control:
+        issues.append("Cache-Control 包含 no-store，图片每次都要重新下载")
+    elif headers.get("Cache-Control") and freshness["lifetime"] == 0:
+        issues.append("新鲜期为 0，每次访问都需要向服务端校验")
+    if headers.get("Vary") == "*":
+        issues.append("Vary: * 使响应无法复用")
+    return {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "cache_control": cache_control,
+        "freshness": freshness,
+        "issues": issues,
+    }
+
+
+def check_conditional_requests(target: ImageTarget) -> Dict[str, Any]:
+    """获取一次图片并检查响应头，再分别带 If-None-Match / If-Modified-Since 重放
+
+    Returns:
+        {"endpoint", "status", "bytes", "headers": inspect_cache_headers 结果,
+         "if_none_match": 状态码或None, "if_modified_since": 状态码或None, "supports_304": bool}
+    """
+    response = target.fetch()
+    result = {
+        "endpoint": target.endpoint,
+        "status": response.status_code,
+        "bytes": len(response.content),
+        "headers": inspect_cache_headers(response.headers),
+        "if_none_match": None,
+        "if_modified_since": None,
+    }
+    if response.status_code == 200:
+        for header, key in (("If-None-Match", "if_none_match"), ("If-Modified-Since", "if_modified_since")):
+            conditional = conditional_headers(response.headers)
+            if header in conditional:
+                result[key] = target.fetch({header: conditional[header]}).status_code
+    result["supports_304"] = 304 in (result["if_none_match"], result["if_modified_since"])
+    return result
+
+
+def _simulate_customer(targets: Sequence[ImageTarget], visits: int, visit_interval: float) -> Dict[str, int]:
+    """模拟一位回访顾客：按虚拟时间依次访问，浏览器按响应头决定是否复用缓存"""
+    cache: Dict[int, Dict[str, Any]] = {}
+    stats = {"views": 0, "requests": 0, "full": 0, "not_modified": 0, "fresh_hits": 0,
+             "bytes": 0, "bytes_saved": 0, "ideal_bytes": 0, "errors": 0}
+    downloaded = set()
+    for visit in range(visits):
+        now = visit * visit_interval
+        for index, target in enumerate(targets):
+            stats["views"] += 1
+            entry = cache.get(index)
+            if entry and now - entry["stored_at"] < entry["lifetime"]:
+                stats["fresh_hits"] += 1
+                stats["bytes_saved"] += entry["size"]
+                continue
+
+            stats["requests"] += 1
+            response = target.fetch(conditional_headers(entry["headers"]) if entry else None)
+            if response.status_code == 304 and entry:
+                stats["not_modified"] += 1
+                stats["bytes_saved"] += entry["size"]
+                entry["stored_at"] = now
+                continue
+            if response.status_code != 200:
+                stats["errors"] += 1
+                continue
+            size = len(response.content)
+            stats["full"] += 1
+            stats["bytes"] += size
+            if index not in downloaded:
+                # 理想情况下每张图片只需下载一次
+                downloaded.add(index)
+                stats["ideal_bytes"] += size
+            if is_storable(response.status_code, response.headers):
+                cache[index] = {
+                    "headers": dict(response.headers),
+                    "size": size,
+                    "stored_at": now,
+                    "lifetime": freshness_lifetime(response.headers)["lifetime"],
+                }
+    return stats
+
+
+def simulate_returning_customers(targets: Sequence[ImageTarget], customers: int = 20, visits: int = 5,
+                                 visit_interval: float = 600.0, concurrency: int = 4) -> Dict[str, Any]:
+    """模拟回访顾客负载，估算当前缓存响应头浪费的带宽
+
+    每位顾客有独立的浏览器缓存，间隔 visit_interval 秒（虚拟时间，不实际等待）访问一次全部图片。
+    理想情况（图片不可变、长期缓存）下每位顾客每张图片只下载一次，超出部分即为浪费。
+
+    Returns:
+        {"customers", "visits", "views", "requests", "full", "not_modified", "fresh_hits",
+         "not_modified_rate", "bytes", "bytes_saved", "ideal_bytes", "wasted_bytes", "errors"}
+    """
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="customer") as executor:
+        results = list(executor.map(lambda _: _simulate_customer(targets, visits, visit_interval), range(customers)))
+
+    totals: Dict[str, Any] = {key: sum(r[key] for r in results) for key in results[0]} if results else {}
+    totals.update({
+        "customers": customers,
+        "visits": visits,
+        "visit_interval": visit_interval,
+        "not_modified_rate": round(totals["not_modified"] / totals["requests"], 4) if totals.get("requests") else 0.0,
+        "wasted_bytes": totals.get("bytes", 0) - totals.get("ideal_bytes", 0),
+    })
+    return totals
+
+
+def format_cache_report(checks: Sequence[Dict[str, Any]], simulation: Optional[Dict[str, Any]] = None) -> str:
+    """格式化缓存检查和回访模拟结果"""
+    lines = [f"{'端点':<22}{'状态':>6}{'大小':>9}{'ETag':>6}{'LM':>5}{'新鲜期(s)':>11}{'INM':>6}{'IMS':>6}"]
+    for check in checks:
+        headers = check["headers"]
+        lines.append(
+            f"{check['endpoint']:<22}{check['status']:>6}{check['bytes']:>9}"
+            f"{'有' if headers['etag'] else '无':>6}{'有' if headers['last_modified'] else '无':>5}"
+            f"{headers['freshness']['lifetime']:>11g}{str(check['if_none_match'] or '-'):>6}"
+            f"{str(check['if_modified_since'] or '-'):>6}"
+        )
+        for issue in headers["issues"]:
+            lines.append(f"    ⚠ {issue}")
+    if simulation:
+        lines.append("")
+        lines.append(f"回访模拟: {simulation['customers']} 位顾客 × {simulation['visits']} 次访问，"
+                     f"间隔 {simulation['visit_interval']:g}s")
+        lines.append(f"  图片浏览 {simulation['views']} 次，实际请求 {simulation['requests']} 次，"
+                     f"完整下载 {simulation['full']} 次，304 {simulation['not_modified']} 次"
+                     f"（{simulation['not_modified_rate']:.1%}），本地缓存命中 {simulation['fresh_hits']} 次")
+        lines.append(f"  传输 {simulation['bytes'] / 1024:.1f}KB，节省 {simulation['bytes_saved'] / 1024:.1f}KB，"
+                     f"理想 {simulation['ideal_bytes'] / 1024:.1f}KB，浪费 {simulation['wasted_bytes'] / 1024:.1f}KB")
+    return "\n".join(lines)
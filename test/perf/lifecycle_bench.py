@@ -0,0 +1,240 @@
+"""
+订单生命周期吞吐 - 按店铺配置的订单状态流转，多个商家会话并发推进订单直到终态
+
+shop_owner/shop_actions.update_order_status_flow 配置状态流转，shop_owner/order_actions.toggle_order_status
+推进订单状态。本模块：
+
+- 为店铺配置一条多步的状态流转（默认 pending → processing → shipping → completed(10)），
+  每个状态沿第一个动作走到下一个状态
+- 多个商家会话（各自登录的令牌和连接）从同一批"热点"订单中随机挑选，按本地账本中的当前状态发出下一步请求
+- 热点订单数越少，多个会话同时推进同一订单的冲突越多
+- 本地账本记录每个订单的状态和进入该状态的时间：响应返回时账本已被其他会话推进，
+  或被拒绝时同一订单还有其他会话的请求未返回，即为冲突；
+  冲突被拒绝（非 200）是正确行为，冲突仍返回 200 说明接口接受了过期的状态变更
+- 报告每秒成功的状态变更数、冲突率，以及每一步的请求延迟和停留时间（进入状态到离开状态）
+- 结束后可以抽样读取订单详情，确认服务端状态与账本一致
+"""
+
+import random
+import sys
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from conftest import API_BASE_URL
+from perf.load_generator import summarize_latencies
+
+
+DEFAULT_STATUS_FLOW = [
+    {"value": 1, "label": "pending", "type": "normal", "isFinal": False,
+     "actions": [{"name": "accept", "nextStatus": 2, "nextStatusLabel": "processing"}]},
+    {"value": 2, "label": "processing", "type": "normal", "isFinal": False,
+     "actions": [{"name": "ship", "nextStatus": 3, "nextStatusLabel": "shipping"}]},
+    {"value": 3, "label": "shipping", "type": "normal", "isFinal": False,
+     "actions": [{"name": "complete", "nextStatus": 10, "nextStatusLabel": "completed"}]},
+    {"value": 10, "label": "completed", "type": "normal", "isFinal": True, "actions": []},
+]
+
+# 同一订单连续失败（非冲突）超过该次数后不再推进
+DEFAULT_MAX_ERRORS = 3
+
+# 单个请求的超时时间（秒）
+DEFAULT_TIMEOUT = 30.0
+
+# 账本中的一个订单：当前状态、进入该状态的时间、连续失败次数
+OrderState = namedtuple("OrderState", "status entered_at errors")
+
+
+def flow_transitions(statuses: Sequence[Mapping[str, Any]]) -> Dict[int, int]:
+    """状态流转中每个非终态状态沿第一个动作到达的下一个状态"""
+    return {
+        status["value"]: status["actions"][0]["nextStatus"]
+        for status in statuses if not status.get("isFinal") and status.get("actions")
+    }
+
+
+def send_transition(session: requests.Session, token, shop_id, order_id, next_status,
+                    timeout: float = DEFAULT_TIMEOUT, base_url: str = API_BASE_URL):
+    """发送一次状态变更，与 toggle_order_status 的请求一致，但不重试 429
+
+    Returns:
+        (状态码或 "error", 毫秒)
+    """
+    payload = {"id": str(order_id), "shop_id": str(shop_id), "next_status": next_status}
+    started = time.perf_counter()
+    try:
+        status = session.put(f"{base_url}/shopOwner/order/toggle-status", json=payload,
+                             headers={"Authorization": f"Bearer {token}"}, timeout=timeout).status_code
+    except requests.RequestException:
+        status = "error"
+    return status, (time.perf_counter() - started) * 1000
+
+
+def run_lifecycle(tokens: Sequence, shop_id, order_ids: Sequence, transitions: Mapping[int, int],
+                  initial_status: int = 1, hot_orders: Optional[int] = None, max_seconds: float = 300.0,
+                  max_errors: int = DEFAULT_MAX_ERRORS, seed: Optional[int] = None,
+                  timeout: float = DEFAULT_TIMEOUT, base_url: str = API_BASE_URL) -> Dict[str, Any]:
+    """每个令牌一个会话线程，并发把订单推进到终态
+
+    Args:
+        tokens: 商家令牌，每个令牌一个会话
+        order_ids: 处于 initial_status 的订单
+        transitions: flow_transitions 的结果
+        hot_orders: 会话同时挑选的未完成订单数，默认会话数的两倍
+        max_seconds: 运行时间上限
+        max_errors: 同一订单连续失败的次数上限
+
+    Returns:
+        {"sessions", "orders", "elapsed_s", "transitions_per_second", "attempts", "applied", "conflicts",
+         "conflict_rate", "accepted_stale", "errors", "completed_orders", "stuck_orders", "ledger",
+         "transitions": {"a->b": {...}}}
+    """
+    hot_orders = hot_orders or 2 * len(tokens)
+    lock = threading.Lock()
+    started = time.perf_counter()
+    # 订单在运行开始时同时进入初始状态
+    ledger = {order_id: OrderState(initial_status, started, 0) for order_id in order_ids}
+    active = [order_id for order_id in order_ids if initial_status in transitions]
+    stuck = []
+    stats = {}
+    in_flight = {}
+    deadline = started + max_seconds
+
+    def record(key):
+        return stats.setdefault(key, {"attempts": 0, "applied": 0, "rejected_stale": 0, "accepted_stale": 0,
+                                      "errors": 0, "latency": [], "time_in_state": []})
+
+    def session_worker(token, rng):
+        with requests.Session() as session:
+            while time.perf_counter() < deadline:
+                with lock:
+                    if not active:
+                        return
+                    order_id = rng.choice(active[:hot_orders])
+                    current = ledger[order_id]
+                    in_flight[order_id] = in_flight.get(order_id, 0) + 1
+                next_status = transitions[current.status]
+                status, elapsed_ms = send_transition(session, token, shop_id, order_id, next_status,
+                                                     timeout=timeout, base_url=base_url)
+                now = time.perf_counter()
+                with lock:
+                    item = record(f"{current.status}->{next_status}")
+                    item["attempts"] += 1
+                    item["latency"].append(elapsed_ms)
+                    latest = ledger[order_id]
+                    in_flight[order_id] -= 1
+                    if latest.status != current.status or latest.entered_at != current.entered_at:
+                        # 其他会话已先推进了这个订单
+                        item["accepted_stale" if status == 200 else "rejected_stale"] += 1
+                    elif status != 200 and in_flight[order_id]:
+                        # 同一订单还有其他会话的请求未返回，服务端可能已先处理了那个请求
+                        item["rejected_stale"] += 1
+                    elif status == 200:
+                        item["applied"] += 1
+                        item["time_in_state"].append((now - latest.entered_at) * 1000)
+                        ledger[order_id] = OrderState(next_status, now, 0)
+                        if next_status not in transitions:
+                            active.remove(order_id)
+                    else:
+                        item["errors"] += 1
+                        ledger[order_id] = latest._replace(errors=latest.errors + 1)
+                        if latest.errors + 1 >= max_errors:
+                            active.remove(order_id)
+                            stuck.append(order_id)
+
+    rngs = random.Random(seed)
+    threads = [threading.Thread(target=session_worker, args=(token, random.Random(rngs.random())), daemon=True)
+               for token in tokens]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    totals = {key: sum(item[key] for item in stats.values())
+              for key in ("attempts", "applied", "rejected_stale", "accepted_stale", "errors")}
+    conflicts = totals["rejected_stale"] + totals["accepted_stale"]
+    return {
+        "sessions": len(tokens),
+        "orders": len(order_ids),
+        "hot_orders": hot_orders,
+        "elapsed_s": round(elapsed, 3),
+        "transitions_per_second": round(totals["applied"] / elapsed, 2) if elapsed else None,
+        "attempts": totals["attempts"],
+        "applied": totals["applied"],
+        "conflicts": conflicts,
+        "conflict_rate": round(conflicts / totals["attempts"], 4) if totals["attempts"] else 0.0,
+        "accepted_stale": totals["accepted_stale"],
+        "errors": totals["errors"],
+        "completed_orders": sum(1 for state in ledger.values() if state.status not in transitions),
+        "stuck_orders": stuck,
+        "ledger": {str(order_id): state.status for order_id, state in ledger.items()},
+        "transitions": {
+            key: {
+                **{name: value for name, value in item.items() if name not in ("latency", "time_in_state")},
+                "latency_ms": summarize_latencies(item["latency"]),
+                "time_in_state_ms": summarize_latencies(item["time_in_state"]),
+            }
+            for key, item in stats.items()
+        },
+    }
+
+
+def _order_status(body) -> Optional[int]:
+    data = body.get("data", body) if isinstance(body, dict) else {}
+    status = data.get("status", data.get("Status")) if isinstance(data, dict) else None
+    return int(status) if status is not None else None
+
+
+def verify_states(token, shop_id, ledger: Mapping[str, int], samples: int = 50, seed: Optional[int] = None,
+                  base_url: str = API_BASE_URL) -> Dict[str, Any]:
+    """抽样读取订单详情，与账本中的状态对比
+
+    Returns:
+        {"sampled", "mismatched": [{"order_id", "expected", "actual"}]}
+    """
+    rng = random.Random(seed)
+    sample = rng.sample(sorted(ledger), min(samples, len(ledger)))
+    mismatched = []
+    with requests.Session() as session:
+        for order_id in sample:
+            response = session.get(f"{base_url}/shopOwner/order/detail", params={"id": order_id, "shop_id": str(shop_id)},
+                                   headers={"Authorization": f"Bearer {token}"})
+            actual = _order_status(response.json()) if response.status_code == 200 else None
+            if actual != ledger[order_id]:
+                mismatched.append({"order_id": order_id, "expected": ledger[order_id], "actual": actual})
+    return {"sampled": len(sample), "mismatched": mismatched}
+
+
+def format_lifecycle_report(report: Mapping[str, Any], verification: Optional[Mapping[str, Any]] = None) -> str:
+    """格式化吞吐、冲突率和每一步的延迟、停留时间"""
+    lines = [
+        f"{report['sessions']} 个会话、{report['orders']} 个订单（热点 {report['hot_orders']} 个），"
+        f"用时 {report['elapsed_s']}s，{report['transitions_per_second']} 次状态变更/秒",
+        f"请求 {report['attempts']} 次，成功 {report['applied']}，冲突 {report['conflicts']}"
+        f"（{report['conflict_rate']:.1%}，其中接口接受了过期变更 {report['accepted_stale']} 次），失败 {report['errors']}",
+        f"完成 {report['completed_orders']} 个订单，放弃 {len(report['stuck_orders'])} 个",
+        "",
+        f"{'状态变更':<10}{'请求':>7}{'成功':>7}{'冲突':>7}{'延迟p50':>10}{'延迟p95':>10}{'停留p50':>10}{'停留p95':>10}",
+    ]
+    for key, item in report["transitions"].items():
+        latency, dwell = item["latency_ms"], item["time_in_state_ms"]
+        lines.append(
+            f"{key:<10}{item['attempts']:>7}{item['applied']:>7}{item['rejected_stale'] + item['accepted_stale']:>7}"
+            f"{latency['p50']:>10.1f}{latency['p95']:>10.1f}{dwell['p50']:>10.1f}{dwell['p95']:>10.1f}"
+        )
+    if report["accepted_stale"]:
+        lines.append("")
+        lines.append("⚠ 接口接受了基于过期状态的变更，订单状态可能被回退或重复推进")
+    if verification is not None:
+        lines.append("")
+        lines.append(f"抽样核对 {verification['sampled']} 个订单，{len(verification['mismatched'])} 个与账本不一致")
+        for item in verification["mismatched"][:10]:
+            lines.append(f"  ✗ 订单 {item['order_id']}: 账本 {item['expected']}，服务端 {item['actual']}")
+    return "\n".join(lines)
@@ -0,0 +1,548 @@
+"""
+开环负载生成器 - 按固定到达率调度请求，并校正协调遗漏(coordinated omission)
+
+ConcurrencyTestMixin.test_concurrent_requests 属于闭环压测：上一个请求变慢会推迟下一个请求，
+服务端变慢时发出的请求反而变少，尾延迟因此被掩盖。本模块预先计算到达时间表，
+按时间表发送请求，与响应快慢无关，并同时记录两种延迟：
+
+- 朴素延迟(naive)：从请求实际开始执行到返回的耗时，即闭环工具看到的延迟
+- 校正延迟(corrected)：从计划发送时间到返回的耗时，包含客户端排队等待的时间
+
+速率曲线由多个 (rate, duration) 阶段组成，例如 [(5, 30), (10, 30), (20, 30)]
+表示 5 rps 持续 30 秒，再 10 rps 持续 30 秒，最后 20 rps 持续 30 秒。
+
+另提供 run_closed_loop，用于需要固定在途请求数的探测场景。
+"""
+
+import io
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Collection, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import requests
+
+# 添加上级目录到 sys.path，以便导入 conftest
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import conftest
+
+
+# 报告中输出的百分位
+PERCENTILES = (50, 90, 95, 99, 99.9)
+
+# 单个请求样本：阶段序号、操作名、计划发送时间、实际开始时间、完成时间、是否成功、状态码
+Sample = namedtuple("Sample", ["step", "operation", "intended", "started", "finished", "ok", "status"])
+
+
+class Operation:
+    """压测操作定义 - 一个无参可调用对象及其在混合负载中的权重
+
+    func 可以是返回 requests.Response 的 request_func，
+    也可以是用 functools.partial 绑定好参数的操作工具类函数。
+    expected_status 用于本应被拒绝的请求（如错误密码登录），
+    指定后只有这些状态码计为成功。
+    """
+
+    def __init__(self, name: str, func: Callable[[], Any], weight: float = 1.0,
+                 expected_status: Optional[Collection[int]] = None):
+        self.name = name
+        self.func = func
+        self.weight = weight
+        self.expected_status = expected_status
+
+    def __repr__(self):
+        return f"Operation({self.name!r}, weight={self.weight})"
+
+
+class NotSent:
+    """操作没有发出请求时的返回值，例如客户端缓存直接命中
+
+    本地命中的耗时不是服务端延迟，计入会拉低延迟分位数，因此压测循环不为其记录样本；
+    命中次数由操作自行统计（见 http_cache.ClientCaches.summary）。
+    """
+
+    def __init__(self, result: Any = None):
+        self.result = result
+
+
+def percentile(sorted_values: Sequence[float], p: float) -> float:
+    """计算百分位数（线性插值）
+
+    Args:
+        sorted_values: 已升序排列的数值
+        p: 百分位，取值 0-100
+
+    Returns:
+        百分位数值，空序列返回0
+    """
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * p / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def summarize_latencies(latencies_ms: Sequence[float]) -> Dict[str, float]:
+    """汇总延迟样本（毫秒）
+
+    Returns:
+        包含 count/min/mean/max 以及 PERCENTILES 中各百分位的字典
+    """
+    values = sorted(latencies_ms)
+    summary = {
+        "count": len(values),
+        "min": round(values[0], 3) if values else 0.0,
+        "mean": round(sum(values) / len(values), 3) if values else 0.0,
+        "max": round(values[-1], 3) if values else 0.0,
+    }
+    for p in PERCENTILES:
+        summary[f"p{p:g}"] = round(percentile(values, p), 3)
+    return summary
+
+
+def is_success(result: Any) -> bool:
+    """根据操作返回值判断是否成功
+
+    - requests.Response: 状态码小于400视为成功
+    - bool: 直接使用（操作工具类多以 True/False 表示成败）
+    - None: 失败（操作工具类失败时多返回 None）
+    - 其他值（ID、列表、字典等）: 成功
+    """
+    if isinstance(result, requests.Response):
+        return result.status_code < 400
+    if isinstance(result, bool):
+        return result
+    return result is not None
+
+
+def normalize_profile(profile) -> List[Tuple[float, float]]:
+    """将速率曲线规范化为 [(rate, duration), ...]
+
+    Args:
+        profile: 单个 (rate, duration) 或它们组成的列表
+
+    Returns:
+        阶段列表
+    """
+    if isinstance(profile, tuple) and len(profile) == 2 and not isinstance(profile[0], (tuple, list)):
+        profile = [profile]
+    steps = [(float(rate), float(duration)) for rate, duration in profile]
+    for rate, duration in steps:
+        if rate <= 0 or duration <= 0:
+            raise ValueError(f"速率和持续时间必须大于0: rate={rate}, duration={duration}")
+    return steps
+
+
+class _NullWriter(io.TextIOBase):
+    """丢弃所有输出的写入器"""
+
+    def write(self, text):
+        return len(text)
+
+
+@contextmanager
+def suppress_stdout(enabled: bool = True):
+    """压测期间屏蔽操作工具类的打印输出，避免打印本身影响发送节奏"""
+    if not enabled:
+        yield
+        return
+    original = sys.stdout
+    sys.stdout = _NullWriter()
+    try:
+        yield
+    finally:
+        sys.stdout = original
+
+
+@contextmanager
+def rate_limit_retries(max_retries: Optional[int]):
+    """临时修改 make_request_with_retry 的429重试次数
+
+    压测时通常设为0：429 应计入结果，而不是在操作内部退避重试，
+    否则操作工具类内部又变成了闭环。
+    """
+    if max_retries is None:
+        yield
+        return
+    previous = conftest.RATE_LIMIT_MAX_RETRIES
+    conftest.RATE_LIMIT_MAX_RETRIES = max_retries
+    try:
+        yield
+    finally:
+        conftest.RATE_LIMIT_MAX_RETRIES = previous
+
+
+def execute_operation(operation: Operation) -> Tuple[bool, Optional[int]]:
+    """执行一次操作并判定结果
+
+    有 make_request_with_retry 记录的最终响应时，成功需要状态码正常且返回值不表示失败：
+    操作工具类在 2xx 响应体不符合预期或后续步骤失败时返回 False/None，同样计为失败；
+    返回空列表等其他值只看状态码。指定 expected_status 的操作只看状态码。
+
+    Returns:
+        (是否成功, 状态码)，发生异常时状态码为None；操作返回 NotSent 时为 (None, None)，不记录样本
+    """
+    conftest.clear_last_response()
+    try:
+        result = operation.func()
+    except Exception:
+        return False, None
+    if isinstance(result, NotSent):
+        return None, None
+
+    response = result if isinstance(result, requests.Response) else conftest.get_last_response()
+    if response is not None:
+        if operation.expected_status is not None:
+            return response.status_code in operation.expected_status, response.status_code
+        ok = response.status_code < 400
+        if not isinstance(result, requests.Response):
+            ok = ok and is_success(result)
+        return ok, response.status_code
+    return is_success(result), None
+
+
+def blend_operations(groups: Sequence[Tuple[Sequence[Operation], float]]) -> List[Operation]:
+    """按目标速率合并多组操作，用于在同一个开环生成器中叠加不同负载
+
+    每组内部保持原有权重比例，组间权重按速率缩放。以总速率运行合并后的操作时，
+    各组的期望到达速率即为指定的速率，报告中可按操作名分别查看各组结果。
+
+    Args:
+        groups: [(操作列表, 该组速率), ...]
+
+    Returns:
+        重新设置权重后的操作列表
+    """
+    blended = []
+    for operations, rate in groups:
+        total = sum(op.weight for op in operations)
+        if total <= 0 or rate <= 0:
+            continue
+        for op in operations:
+            blended.append(Operation(op.name, op.func, op.weight * rate / total, op.expected_status))
+    return blended
+
+
+class OpenLoopLoadGenerator:
+    """开环负载生成器
+
+    按速率曲线生成计划发送时间，由调度线程准时提交到线程池；
+    线程池满时请求在队列中等待，这段等待会计入校正延迟。
+    """
+
+    def __init__(self, operations: Sequence[Operation] = (), max_workers: int = 64, seed: Optional[int] = None,
+                 quiet: bool = True, rate_limit_max_retries: Optional[int] = 0):
+        """
+        Args:
+            operations: 操作列表，按 weight 加权随机选择；只使用 replay 时可以为空
+            max_workers: 最大并发执行线程数
+            seed: 随机种子，便于复现操作序列
+            quiet: 是否屏蔽操作工具类的打印输出
+            rate_limit_max_retries: 压测期间429重试次数，None表示保持默认
+        """
+        self.operations = list(operations)
+        self.weights = [op.weight for op in self.operations]
+        self.max_workers = max_workers
+        self.quiet = quiet
+        self.rate_limit_max_retries = rate_limit_max_retries
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._on_sample: Callable[[Sample], None] = lambda sample: None
+        # 返回 NotSent 的操作次数，按 (阶段序号, 操作名) 计数
+        self._not_sent: Counter = Counter()
+
+    def _run_one(self, step: int, operation: Operation, intended: float):
+        started = time.perf_counter()
+        ok, status = execute_operation(operation)
+        finished = time.perf_counter()
+        if ok is None:
+            with self._lock:
+                self._not_sent[(step, operation.name)] += 1
+            return
+        self._on_sample(Sample(step, operation.name, intended, started, finished, ok, status))
+
+    def _plan(self, steps: List[Tuple[float, float]]) -> Iterator[Tuple[int, float, Operation]]:
+        """按速率曲线生成 (阶段序号, 相对开始时间的计划偏移, 操作)，操作按权重随机选择"""
+        if not self.operations:
+            raise ValueError("按速率曲线运行至少需要一个操作")
+
+        def generate():
+            step_start = 0.0
+            for index, (rate, duration) in enumerate(steps):
+                count = int(round(rate * duration))
+                interval = 1.0 / rate
+                for i in range(count):
+                    operation = self._random.choices(self.operations, weights=self.weights)[0]
+                    yield index, step_start + i * interval, operation
+                step_start += duration
+
+        return generate()
+
+    def _schedule(self, executor: ThreadPoolExecutor, plan: Iterable[Tuple[int, float, Operation]], run_start: float):
+        """按时间表提交请求；调度本身落后时不补偿间隔，计划时间保持不变"""
+        for index, offset, operation in plan:
+            intended = run_start + offset
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(self._run_one, index, operation, intended)
+
+    def _execute(self, plan: Iterable[Tuple[int, float, Operation]],
+                 on_sample: Callable[[Sample], None]) -> Tuple[float, float]:
+        """按时间表执行压测，返回 (开始时间, 结束时间)"""
+        self._on_sample = on_sample
+        self._not_sent = Counter()
+        with rate_limit_retries(self.rate_limit_max_retries), suppress_stdout(self.quiet):
+            executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="open-loop")
+            run_start = time.perf_counter()
+            try:
+                self._schedule(executor, plan, run_start)
+            finally:
+                executor.shutdown(wait=True)
+            run_end = time.perf_counter()
+        return run_start, run_end
+
+    def run(self, profile) -> Dict[str, Any]:
+        """执行压测
+
+        Args:
+            profile: 速率曲线，(rate, duration) 或其列表
+
+        Returns:
+            压测报告字典，结构见 build_report
+        """
+        steps = normalize_profile(profile)
+        samples: List[Sample] = []
+
+        def collect(sample: Sample):
+            with self._lock:
+                samples.append(sample)
+
+        run_start, run_end = self._execute(self._plan(steps), collect)
+        return build_report(samples, steps, run_start, run_end, self._not_sent)
+
+    def stream(self, profile, on_sample: Callable[[Sample], None]) -> float:
+        """执行压测但不保留样本，每个样本完成后交给 on_sample 处理
+
+        用于长时间运行的场景，由调用方自行聚合，避免保存全部样本。
+        on_sample 在工作线程中调用，需要自行保证线程安全。
+
+        Returns:
+            实际耗时（秒）
+        """
+        run_start, run_end = self._execute(self._plan(normalize_profile(profile)), on_sample)
+        return run_end - run_start
+
+    def replay(self, arrivals: Iterable[Tuple[float, Operation]],
+               on_sample: Callable[[Sample], None]) -> Tuple[float, float]:
+        """按给定的到达时间表执行，而不是按速率曲线生成
+
+        用于突发（如令牌集中刷新）或回放真实流量等无法用固定速率描述的场景，
+        构造时传入的 operations 不参与选择。
+
+        Args:
+            arrivals: (相对开始时间的偏移秒数, 操作)，需按偏移升序
+            on_sample: 样本回调，在工作线程中调用
+
+        Returns:
+            (开始时间, 结束时间)，与样本中的时间戳同为 time.perf_counter()
+        """
+        return self._execute(((0, offset, operation) for offset, operation in arrivals), on_sample)
+
+
+def run_blended(groups: Dict[str, Tuple[Sequence[Operation], float]], duration: float, max_workers: int = 64,
+                seed: Optional[int] = None, **generator_options) -> Dict[str, Dict[str, Any]]:
+    """在同一个开环生成器中按各自速率叠加多组负载，并分组汇总
+
+    Args:
+        groups: {组名: (操作列表, 该组速率)}，不同组的操作名不能重复
+        duration: 持续时间（秒）
+
+    Returns:
+        {组名: 汇总字段}，字段同 build_report 的 overall
+    """
+    owner = {}
+    for group, (operations, _) in groups.items():
+        for op in operations:
+            if owner.setdefault(op.name, group) != group:
+                raise ValueError(f"操作名在多个组中重复: {op.name}")
+    samples: Dict[str, List[Sample]] = {group: [] for group in groups}
+    lock = threading.Lock()
+
+    def collect(sample: Sample):
+        with lock:
+            samples[owner[sample.operation]].append(sample)
+
+    total_rate = sum(rate for _, rate in groups.values())
+    generator = OpenLoopLoadGenerator(blend_operations(list(groups.values())), max_workers=max_workers,
+                                      seed=seed, **generator_options)
+    generator.stream((total_rate, duration), collect)
+    return {group: summarize_samples(group_samples, duration) for group, group_samples in samples.items()}
+
+
+def run_closed_loop(operations: Sequence[Operation], concurrency: int, duration: float,
+                    quiet: bool = True, rate_limit_max_retries: Optional[int] = 0) -> Dict[str, Any]:
+    """固定并发的闭环压测：concurrency 个线程各自循环执行操作，持续 duration 秒
+
+    与开环生成器互补，用于需要精确控制在途请求数的场景（如连接池耗尽探测）。
+    闭环下没有计划发送时间，朴素延迟与校正延迟相同。
+
+    Args:
+        operations: 操作列表，每个线程从不同偏移开始轮流执行
+        concurrency: 并发线程数（即在途请求数上限）
+        duration: 持续时间（秒）
+
+    Returns:
+        汇总字典，字段同 build_report 的 overall，另含 concurrency
+    """
+    if not operations:
+        raise ValueError("至少需要一个操作")
+    samples: List[Sample] = []
+    not_sent: Counter = Counter()
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency + 1)
+    deadline = [0.0]
+
+    def worker(offset: int):
+        barrier.wait()
+        i = offset
+        local = []
+        local_not_sent = Counter()
+        while time.perf_counter() < deadline[0]:
+            operation = operations[i % len(operations)]
+            i += 1
+            started = time.perf_counter()
+            ok, status = execute_operation(operation)
+            if ok is None:
+                local_not_sent[operation.name] += 1
+                continue
+            local.append(Sample(0, operation.name, started, started, time.perf_counter(), ok, status))
+        with lock:
+            samples.extend(local)
+            not_sent.update(local_not_sent)
+
+    with rate_limit_retries(rate_limit_max_retries), suppress_stdout(quiet):
+        threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        start = time.perf_counter()
+        deadline[0] = start + duration
+        barrier.wait()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+    summary = summarize_samples(samples, elapsed, sum(not_sent.values()))
+    summary["concurrency"] = concurrency
+    summary["elapsed"] = round(elapsed, 3)
+    summary["operations"] = {
+        name: summarize_samples([s for s in samples if s.operation == name], elapsed, not_sent[name])
+        for name in sorted({s.operation for s in samples} | set(not_sent))
+    }
+    return summary
+
+
+def summarize_samples(samples: Sequence[Sample], duration: float, not_sent: int = 0) -> Dict[str, Any]:
+    """汇总一组样本：成功率、吞吐、朴素延迟与校正延迟
+
+    not_sent 为同一时段内返回 NotSent、没有样本的操作次数，单独列出，不计入发送数、吞吐和延迟。
+    """
+    succeeded = sum(1 for s in samples if s.ok)
+    status_counts: Dict[str, int] = {}
+    for s in samples:
+        key = str(s.status) if s.status is not None else "error"
+        status_counts[key] = status_counts.get(key, 0) + 1
+    return {
+        "sent": len(samples),
+        "not_sent": not_sent,
+        "succeeded": succeeded,
+        "failed": len(samples) - succeeded,
+        "error_rate": round((len(samples) - succeeded) / len(samples), 4) if samples else 0.0,
+        "throughput": round(succeeded / duration, 3) if duration > 0 else 0.0,
+        "status_counts": status_counts,
+        "naive_ms": summarize_latencies([(s.finished - s.started) * 1000 for s in samples]),
+        "corrected_ms": summarize_latencies([(s.finished - s.intended) * 1000 for s in samples]),
+    }
+
+
+def build_report(samples: Sequence[Sample], steps: List[Tuple[float, float]],
+                 run_start: float, run_end: float,
+                 not_sent: Optional[Mapping[Tuple[int, str], int]] = None) -> Dict[str, Any]:
+    """根据样本生成报告
+
+    Args:
+        not_sent: 返回 NotSent 的操作次数，{(阶段序号, 操作名): 次数}
+
+    Returns:
+        {
+            "steps": [{"target_rate", "duration", ...汇总字段}],
+            "operations": {操作名: 汇总字段},
+            "overall": 汇总字段 + "elapsed"
+        }
+    """
+    not_sent = not_sent or {}
+    report = {"steps": [], "operations": {}, "overall": {}}
+    for index, (rate, duration) in enumerate(steps):
+        step_samples = [s for s in samples if s.step == index]
+        step_not_sent = sum(count for (step, _), count in not_sent.items() if step == index)
+        summary = summarize_samples(step_samples, duration, step_not_sent)
+        summary.update({"target_rate": rate, "duration": duration})
+        report["steps"].append(summary)
+
+    total_duration = sum(duration for _, duration in steps)
+    names = sorted({s.operation for s in samples} | {name for _, name in not_sent})
+    for name in names:
+        op_not_sent = sum(count for (_, op_name), count in not_sent.items() if op_name == name)
+        report["operations"][name] = summarize_samples([s for s in samples if s.operation == name], total_duration,
+                                                       op_not_sent)
+
+    report["overall"] = summarize_samples(samples, total_duration, sum(not_sent.values()))
+    report["overall"]["elapsed"] = round(run_end - run_start, 3)
+    return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """将报告格式化为便于阅读的文本表格"""
+    lines = [
+        f"{'阶段':<6}{'目标rps':>9}{'发送':>7}{'失败':>6}{'吞吐':>9}"
+        f"{'p50(朴素)':>12}{'p99(朴素)':>12}{'p50(校正)':>12}{'p99(校正)':>12}"
+    ]
+    for index, step in enumerate(report["steps"]):
+        lines.append(
+            f"{index:<6}{step['target_rate']:>9g}{step['sent']:>7}{step['failed']:>6}{step['throughput']:>9.2f}"
+            f"{step['naive_ms']['p50']:>12.1f}{step['naive_ms']['p99']:>12.1f}"
+            f"{step['corrected_ms']['p50']:>12.1f}{step['corrected_ms']['p99']:>12.1f}"
+        )
+    lines.append("")
+    lines.append(f"{'操作':<32}{'发送':>7}{'失败':>6}{'p99(朴素)':>12}{'p99(校正)':>12}")
+    for name, op in report["operations"].items():
+        lines.append(
+            f"{name:<32}{op['sent']:>7}{op['failed']:>6}"
+            f"{op['naive_ms']['p99']:>12.1f}{op['corrected_ms']['p99']:>12.1f}"
+        )
+    not_sent = report["overall"].get("not_sent")
+    if not_sent:
+        lines.append("")
+        lines.append(f"未发出请求的操作（如客户端缓存命中）: {not_sent} 次，不计入发送数、吞吐和延迟")
+    return "\n".join(lines)
+
+
+def save_report(report: Dict[str, Any], path) -> Path:
+    """将报告保存为JSON文件
+
+    Returns:
+        保存的文件路径
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
@@ -0,0 +1,313 @@
+"""
+访问日志回放 - 按 HAProxy HTTP 日志的真实流量回放到测试环境，并与日志中的服务端耗时对比
+
+docs/haproxy 中 HAProxy 以 option httplog 记录每个请求，是生产流量最完整的记录。本模块：
+
+- 逐行流式解析 HAProxy HTTP 日志（支持 syslog 前缀和 .gz 文件），只取 API 路径下的请求，
+  默认只回放 GET（日志中没有请求体），登录、退出、刷新令牌等会改变身份的请求跳过
+- 日志中的生产ID在测试环境中不存在：按参数名（shop_id、product_id、id + 路径中的实体等）
+  和路径中的数字段，把ID稳定地映射到测试店铺中已有的ID，同一个日志ID总是映射到同一个测试ID，
+  保持原始流量的重复访问模式
+- 令牌按路径选择：/admin 用管理员令牌，/shopOwner 用店主令牌，其余前端请求按客户端IP
+  稳定地分配用户池中的身份
+- 按日志中的到达时间回放：speed=1 为原速，N 为 N 倍速，0 为尽快发送（在途请求数受线程数限制）
+- 报告每个端点回放的延迟与日志中服务端耗时（Tr）的对比、状态码与日志不一致的次数，
+  以及调度落后于计划的程度（落后说明客户端跟不上目标速率，结果偏乐观）
+
+回放延迟包含网络和客户端开销，日志中的 Tr 只包含服务端处理时间，两者比较看倍数和趋势。
+"""
+
+import calendar
+import gzip
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import namedtuple
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from conftest import API_BASE_URL
+from admin import order_actions as admin_order_actions
+from admin import product_actions as admin_product_actions
+from admin import tag_actions as admin_tag_actions
+from admin import user_actions as admin_user_actions
+from perf.endpoint_bench import resolve_parameter
+from perf.load_generator import OpenLoopLoadGenerator, Operation, Sample, summarize_latencies
+
+
+DEFAULT_SPEED = 1.0
+
+DEFAULT_METHODS = ("GET",)
+
+# 路径包含这些关键字的请求会改变身份或令牌，不回放
+DEFAULT_EXCLUDE = ("login", "logout", "refresh-token", "password")
+
+# 每个实体的ID池大小
+DEFAULT_POOL_SIZE = 50
+
+# 单个请求的超时时间（秒）
+DEFAULT_TIMEOUT = 30.0
+
+# option httplog 格式：client:port [accept_date] frontend backend/server TR/Tw/Tc/Tr/Ta status bytes ... "request"
+LOG_PATTERN = re.compile(
+    r"(?P<client>\S+):\d+ \[(?P<accept_date>[^\]]+)\] \S+ \S+/\S+ "
+    r"(?P<timers>[+\-\d]+(?:/[+\-\d]+){4}) (?P<status>-?\d+) [+\d]+ .*?\"(?P<request>[^\"]*)\""
+)
+
+MONTHS = {name: index for index, name in enumerate(calendar.month_abbr) if name}
+
+# 一条回放请求：日志时间戳（秒）、客户端IP、方法、API 基础路径之后的路径、查询参数、
+# 日志中的状态码、服务端耗时 Tr（毫秒，未到达服务端为None）
+LogEntry = namedtuple("LogEntry", "timestamp client method path query status server_ms")
+
+
+def parse_accept_date(text: str) -> float:
+    """解析 HAProxy 的 accept_date（19/Oct/2026:10:00:01.123），返回秒；只用于计算相对间隔，忽略时区"""
+    date, _, clock = text.partition(":")
+    day, month, year = date.split("/")
+    hms, _, fraction = clock.partition(".")
+    hour, minute, second = (int(part) for part in hms.split(":"))
+    seconds = calendar.timegm((int(year), MONTHS[month], int(day), hour, minute, second, 0, 0, 0))
+    return seconds + (int(fraction) / 10 ** len(fraction) if fraction else 0.0)
+
+
+def parse_line(line: str, base_path: str) -> Optional[LogEntry]:
+    """解析一行日志，不是 HTTP 日志或不在 API 基础路径下时返回None"""
+    match = LOG_PATTERN.search(line)
+    if not match:
+        return None
+    parts = match.group("request").split()
+    if len(parts) < 2:
+        return None
+    url = urlsplit(parts[1])
+    if not url.path.startswith(base_path + "/"):
+        return None
+    server_ms = int(match.group("timers").split("/")[3].lstrip("+"))
+    return LogEntry(
+        timestamp=parse_accept_date(match.group("accept_date")),
+        client=match.group("client"),
+        method=parts[0].upper(),
+        path=url.path[len(base_path):],
+        query=parse_qsl(url.query, keep_blank_values=True),
+        status=int(match.group("status")),
+        server_ms=server_ms if server_ms >= 0 else None,
+    )
+
+
+def open_log(path) -> Iterator[str]:
+    """逐行读取日志文件，.gz 文件直接解压读取"""
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", errors="replace") as handle:
+        yield from handle
+
+
+def iter_log_entries(lines: Iterable[str], base_url: str = API_BASE_URL, methods: Sequence[str] = DEFAULT_METHODS,
+                     include: Optional[str] = None, exclude: Sequence[str] = DEFAULT_EXCLUDE,
+                     limit: Optional[int] = None, stats: Optional[Dict[str, int]] = None) -> Iterator[LogEntry]:
+    """流式解析并筛选日志
+
+    Args:
+        stats: 传入时累计 lines / unparsed / filtered / replayed 计数
+    """
+    base_path = urlsplit(base_url).path.rstrip("/")
+    methods = {method.upper() for method in methods}
+    pattern = re.compile(include) if include else None
+    stats = stats if stats is not None else {}
+    for key in ("lines", "unparsed", "filtered", "replayed"):
+        stats.setdefault(key, 0)
+    for line in lines:
+        if limit is not None and stats["replayed"] >= limit:
+            return
+        stats["lines"] += 1
+        entry = parse_line(line, base_path)
+        if entry is None:
+            stats["unparsed"] += 1
+            continue
+        if (entry.method not in methods or any(word in entry.path for word in exclude)
+                or (pattern and not pattern.search(entry.path))):
+            stats["filtered"] += 1
+            continue
+        stats["replayed"] += 1
+        yield entry
+
+
+def normalize_endpoint(method: str, path: str) -> str:
+    """用于分组的端点名，路径中的数字段替换为 {id}"""
+    segments = ["{id}" if segment.isdigit() else segment for segment in path.split("/")]
+    return f"{method} {'/'.join(segments)}"
+
+
+def build_id_pools(admin_token, shop_id, size: int = DEFAULT_POOL_SIZE) -> Dict[str, List[str]]:
+    """从测试店铺中取各实体的ID池，没有数据的实体不包含在内"""
+    pools = {
+        "shop_id": [shop_id],
+        "product_id": [item.get("id") for item in
+                       admin_product_actions.get_product_list(admin_token, shop_id, page=1, page_size=size) or []],
+        "order_id": [item.get("id") for item in
+                     admin_order_actions.get_order_list(admin_token, shop_id, page=1, page_size=size) or []],
+        "user_id": [item.get("id") for item in admin_user_actions.get_user_list(admin_token, page=1, page_size=size) or []],
+        "tag_id": [item.get("id") for item in
+                   admin_tag_actions.get_tag_list(admin_token, shop_id, page=1, page_size=size) or []],
+    }
+    return {key: [str(value) for value in values if value] for key, values in pools.items() if any(values)}
+
+
+def _mapped_context(pools: Mapping[str, Sequence[str]], logged) -> Dict[str, str]:
+    # crc32 在不同进程间稳定（hash() 对字符串是随机化的），同一个日志ID总是取到同一个测试ID
+    index = zlib.crc32(str(logged).encode())
+    return {key: pool[index % len(pool)] for key, pool in pools.items() if pool}
+
+
+def substitute_ids(path: str, query: Sequence[Tuple[str, str]],
+                   pools: Mapping[str, Sequence[str]]) -> Tuple[str, List[Tuple[str, str]]]:
+    """把路径中的数字段和名称以 id 结尾的查询参数映射到测试ID，无法确定实体时保留原值"""
+    segments = path.split("/")
+    for index, segment in enumerate(segments):
+        if segment.isdigit() and index > 0:
+            value = resolve_parameter("id", f"/{segments[index - 1]}", _mapped_context(pools, segment))
+            segments[index] = value if value is not None else segment
+    mapped = []
+    for name, value in query:
+        if name.replace("_", "").lower().endswith("id") and value:
+            value = resolve_parameter(name, path, _mapped_context(pools, value)) or value
+        mapped.append((name, value))
+    return "/".join(segments), mapped
+
+
+def make_token_resolver(admin_token=None, shop_owner_token=None,
+                        identities: Sequence = ()) -> Callable[[str, str], Optional[str]]:
+    """按路径选择令牌：/admin 管理员，/shopOwner 店主，其余按客户端IP稳定地分配用户池中的身份"""
+    identities = list(identities)
+
+    def token_for(path: str, client: str) -> Optional[str]:
+        if path.startswith("/admin"):
+            return admin_token
+        if path.startswith("/shopOwner"):
+            return shop_owner_token
+        if identities:
+            return identities[zlib.crc32(client.encode()) % len(identities)].token
+        return None
+
+    return token_for
+
+
+def _send(local: threading.local, url: str, params, token, timeout: float, expected_status: int,
+          mismatches: Dict[str, int], endpoint: str, lock: threading.Lock):
+    session = getattr(local, "session", None)
+    if session is None:
+        session = local.session = requests.Session()
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    response = session.get(url, params=params, headers=headers, timeout=timeout)
+    if response.status_code != expected_status:
+        with lock:
+            mismatches[endpoint] = mismatches.get(endpoint, 0) + 1
+    return response
+
+
+def replay_log(entries: Iterable[LogEntry], token_for: Callable[[str, str], Optional[str]],
+               pools: Mapping[str, Sequence[str]], speed: float = DEFAULT_SPEED, max_workers: int = 64,
+               base_url: str = API_BASE_URL, timeout: float = DEFAULT_TIMEOUT) -> Dict[str, Any]:
+    """按日志中的到达间隔回放请求
+
+    Args:
+        entries: iter_log_entries 的结果，按时间顺序
+        token_for: (路径, 客户端IP) -> 令牌
+        pools: build_id_pools 的结果
+        speed: 回放倍速，0 表示尽快发送
+        max_workers: 最大并发线程数；尽快发送时在途请求不超过其两倍
+
+    Returns:
+        {"speed", "requests", "elapsed_s", "log_span_s", "schedule_lag_ms",
+         "endpoints": {端点: {"count", "logged_ms", "replay_ms", "corrected_ms", "status_counts", "status_mismatches"}}}
+    """
+    local = threading.local()
+    lock = threading.Lock()
+    logged: Dict[str, List[float]] = {}
+    samples: Dict[str, List[Sample]] = {}
+    mismatches: Dict[str, int] = {}
+    span = [None, None]
+    # 尽快发送时限制在途请求数，避免一次性把整个日志排进线程池队列
+    in_flight = threading.BoundedSemaphore(max_workers * 2) if speed <= 0 else None
+
+    def arrivals():
+        started = None
+        for entry in entries:
+            if span[0] is None:
+                span[0] = entry.timestamp
+            span[1] = entry.timestamp
+            if in_flight is not None:
+                in_flight.acquire()
+                started = started if started is not None else time.perf_counter()
+                offset = time.perf_counter() - started
+            else:
+                offset = (entry.timestamp - span[0]) / speed
+            endpoint = normalize_endpoint(entry.method, entry.path)
+            if entry.server_ms is not None:
+                logged.setdefault(endpoint, []).append(float(entry.server_ms))
+            path, query = substitute_ids(entry.path, entry.query, pools)
+            func = partial(_send, local, f"{base_url}{path}", query, token_for(entry.path, entry.client), timeout,
+                           entry.status, mismatches, endpoint, lock)
+            yield offset, Operation(endpoint, func)
+
+    def collect(sample: Sample):
+        with lock:
+            samples.setdefault(sample.operation, []).append(sample)
+        if in_flight is not None:
+            in_flight.release()
+
+    generator = OpenLoopLoadGenerator(max_workers=max_workers)
+    run_start, run_end = generator.replay(arrivals(), collect)
+
+    endpoints = {}
+    for endpoint in sorted(set(logged) | set(samples)):
+        items = samples.get(endpoint, [])
+        status_counts: Dict[str, int] = {}
+        for sample in items:
+            key = str(sample.status) if sample.status is not None else "error"
+            status_counts[key] = status_counts.get(key, 0) + 1
+        endpoints[endpoint] = {
+            "count": len(items),
+            "logged_ms": summarize_latencies(logged.get(endpoint, [])),
+            "replay_ms": summarize_latencies([(s.finished - s.started) * 1000 for s in items]),
+            "corrected_ms": summarize_latencies([(s.finished - s.intended) * 1000 for s in items]),
+            "status_counts": status_counts,
+            "status_mismatches": mismatches.get(endpoint, 0),
+        }
+    all_samples = [sample for items in samples.values() for sample in items]
+    return {
+        "speed": speed,
+        "requests": len(all_samples),
+        "elapsed_s": round(run_end - run_start, 3),
+        "log_span_s": round(span[1] - span[0], 3) if span[0] is not None else 0.0,
+        "schedule_lag_ms": summarize_latencies([(s.started - s.intended) * 1000 for s in all_samples]),
+        "endpoints": endpoints,
+    }
+
+
+def format_replay_report(report: Mapping[str, Any], stats: Optional[Mapping[str, int]] = None) -> str:
+    """按回放 p99 与日志 p99 的倍数从高到低格式化各端点"""
+    speed = f"{report['speed']:g}x" if report["speed"] > 0 else "尽快发送"
+    lines = [f"回放 {report['requests']} 个请求（{speed}），日志跨度 {report['log_span_s']}s，"
+             f"用时 {report['elapsed_s']}s，调度落后 p99 {report['schedule_lag_ms']['p99']:.1f}ms"]
+    if stats:
+        lines.append(f"日志 {stats['lines']} 行，无法解析 {stats['unparsed']}，筛除 {stats['filtered']}")
+    lines.append("")
+    lines.append(f"{'端点':<48}{'请求':>7}{'日志p50':>10}{'回放p50':>10}{'日志p99':>10}{'回放p99':>10}"
+                 f"{'p99倍数':>9}{'状态不一致':>11}")
+
+    def ratio(item):
+        return item["replay_ms"]["p99"] / item["logged_ms"]["p99"] if item["logged_ms"]["p99"] else 0.0
+
+    for endpoint, item in sorted(report["endpoints"].items(), key=lambda pair: ratio(pair[1]), reverse=True):
+        logged, replayed = item["logged_ms"], item["replay_ms"]
+        lines.append(f"{endpoint:<48}{item['count']:>7}{logged['p50']:>10.1f}{replayed['p50']:>10.1f}"
+                     f"{logged['p99']:>10.1f}{replayed['p99']:>10.1f}{ratio(item):>8.1f}x{item['status_mismatches']:>11}")
+    return "\n".join(lines)
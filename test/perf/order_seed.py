@@ -0,0 +1,116 @@
+"""
+订单数据填充 - 通过管理员接口批量创建订单，把店铺的订单表填充到指定规模
+
+高级搜索和数据看板的开销与订单表大小有关，只有在万级到百万级订单上测量才有意义。
+接口不允许指定创建时间，填充的订单都落在填充当天；需要跨度更长的数据时应在部署侧导入。
+
+- 先查询店铺现有订单数，只补足差额，可以分多次逐级填充（1万 → 10万 → 100万）
+- 订单在多个用户、商品之间轮换，并按比例切换到不同状态，让状态和用户筛选有区分度
+- 并行创建，定期打印进度
+"""
+
+import itertools
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from conftest import API_BASE_URL, make_request_with_retry
+from admin import order_actions as admin_order_actions
+from perf.load_generator import suppress_stdout
+
+
+# 填充的订单按顺序轮换切换到这些状态，None 表示保持创建时的状态
+DEFAULT_SEED_STATUSES = (None, None, 2, 10)
+
+
+def count_orders(admin_token, shop_id) -> Optional[int]:
+    """查询店铺的订单总数，接口未返回 total 时返回None"""
+    url = f"{API_BASE_URL}/admin/order/list"
+    params = {"page": 1, "pageSize": 1, "shop_id": str(shop_id)}
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    def request_func():
+        return requests.get(url, params=params, headers=headers)
+
+    response = make_request_with_retry(request_func)
+    if response.status_code != 200:
+        return None
+    total = response.json().get("total")
+    return int(total) if total is not None else None
+
+
+def print_progress(done, total, elapsed, stream=None):
+    """默认的进度输出"""
+    rate = done / elapsed if elapsed > 0 else 0.0
+    print(f"  已创建 {done}/{total}，{rate:.0f} 单/秒", file=stream or sys.stdout, flush=True)
+
+
+def seed_orders(admin_token, shop_id, target: int, user_ids: Sequence, product_ids: Sequence,
+                statuses: Sequence[Optional[int]] = DEFAULT_SEED_STATUSES, concurrency: int = 16,
+                progress: Optional[Callable] = print_progress, progress_every: int = 1000) -> int:
+    """把店铺订单数补足到 target
+
+    Args:
+        target: 目标订单总数
+        user_ids: 下单用户，轮换使用
+        product_ids: 商品，轮换使用
+        statuses: 创建后切换到的状态，按顺序轮换
+        concurrency: 并行创建数
+        progress: 进度回调 (已创建数, 需创建数, 已用秒数, 输出流)，None 表示不输出
+        progress_every: 每创建多少个订单调用一次进度回调
+
+    Returns:
+        本次成功创建的订单数
+    """
+    if not user_ids or not product_ids:
+        raise ValueError("填充订单至少需要一个用户和一个商品")
+    existing = count_orders(admin_token, shop_id) or 0
+    missing = max(0, target - existing)
+    if not missing:
+        print(f"店铺已有 {existing} 个订单，无需填充")
+        return 0
+
+    print(f"店铺已有 {existing} 个订单，填充 {missing} 个，目标 {target}")
+    plan = list(itertools.product(user_ids, product_ids, statuses))
+    counter = itertools.count()
+    created = [0]
+    lock = threading.Lock()
+    # 创建期间屏蔽逐个订单的打印，进度输出到屏蔽前的 stdout
+    stream = sys.stdout
+    started = time.perf_counter()
+
+    def worker():
+        # 每个线程从共享计数器领取序号，不会为百万级订单一次性创建任务对象
+        while True:
+            with lock:
+                index = next(counter)
+            if index >= missing:
+                return
+            user_id, product_id, status = plan[index % len(plan)]
+            items = [{"product_id": str(product_id), "quantity": 1 + index % 3, "price": 100}]
+            order_id = admin_order_actions.create_order(admin_token, shop_id, user_id, items)
+            if not order_id:
+                continue
+            if status is not None:
+                admin_order_actions.toggle_order_status(admin_token, order_id, shop_id, status)
+            with lock:
+                created[0] += 1
+                done = created[0]
+            if progress and done % progress_every == 0:
+                progress(done, missing, time.perf_counter() - started, stream)
+
+    with suppress_stdout():
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    print(f"✓ 填充完成，创建 {created[0]} 个订单，用时 {time.perf_counter() - started:.0f} 秒")
+    return created[0]
@@ -0,0 +1,223 @@
+"""
+页面级负载指标 - 像浏览器一样并行发出一个页面需要的全部请求，测量页面就绪时间和关键路径
+
+前端菜单页需要 /shop/detail、/shop/image、/shop/{shop_id}/tags、/product/list 和若干 /product/image，
+frontend/test_frontend_flow.py 逐个发出这些请求，只能得到单个接口的延迟。本模块：
+
+- 按依赖关系调度：没有依赖的请求立即并行发出，店铺图片等店铺详情返回后、商品图片等商品列表返回后才发出
+- 每个主机的连接数受限（默认 6，与浏览器的 HTTP/1.1 限制一致），超出的请求排队等待
+- 页面就绪时间为第一个请求开始到最后一个请求结束；沿依赖链回溯得到关键路径
+- PageRecorder 汇总页面就绪时间百分位、关键请求分布和每个端点的延迟
+"""
+
+import sys
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from conftest import API_BASE_URL
+from perf.load_generator import Operation, summarize_latencies
+
+
+# 浏览器对同一主机的 HTTP/1.1 并发连接数
+DEFAULT_CONNECTIONS_PER_HOST = 6
+
+# 页面中的一个请求：name 在页面内唯一，同一端点的多个请求以 "端点#序号" 区分
+PageRequest = namedtuple("PageRequest", "name path params auth depends_on")
+
+
+def endpoint_of(name: str) -> str:
+    """去掉请求名中的序号，得到端点名"""
+    return name.split("#", 1)[0]
+
+
+def menu_page_requests(shop_id, shop_image: Optional[str] = None, product_images: Sequence[str] = (),
+                       page_size: int = 10) -> List[PageRequest]:
+    """前端菜单页的请求，参数与 frontend/test_frontend_flow.py 一致
+
+    图片地址来自对应的详情/列表响应，因此图片请求依赖店铺详情或商品列表。
+
+    Args:
+        shop_id: 店铺ID
+        shop_image: 店铺图片路径，为空时不请求店铺图片
+        product_images: 商品图片路径，每个路径一个请求
+        page_size: 商品列表每页数量
+    """
+    page = [
+        PageRequest("shop.detail", "/shop/detail", {"shop_id": shop_id}, True, ()),
+        PageRequest("shop.tags", f"/shop/{shop_id}/tags", None, True, ()),
+        PageRequest("product.list", "/product/list", {"page": 1, "pageSize": page_size, "shop_id": str(shop_id)},
+                    True, ()),
+    ]
+    if shop_image:
+        page.append(PageRequest("shop.image", "/shop/image", {"path": shop_image}, False, ("shop.detail",)))
+    for index, path in enumerate(product_images, 1):
+        page.append(PageRequest(f"product.image#{index}", "/product/image", {"path": path}, False, ("product.list",)))
+    return page
+
+
+def _critical_path(page_requests: Sequence[PageRequest], timings: Dict[str, Dict[str, Any]]) -> List[str]:
+    """从最后结束的请求沿最晚结束的依赖回溯"""
+    by_name = {request.name: request for request in page_requests}
+    name = max(timings, key=lambda n: timings[n]["end_ms"])
+    path = [name]
+    while by_name[name].depends_on:
+        name = max(by_name[name].depends_on, key=lambda n: timings[n]["end_ms"])
+        path.append(name)
+    return path[::-1]
+
+
+def load_page(page_requests: Sequence[PageRequest], token: Optional[str] = None, base_url: str = API_BASE_URL,
+              connections_per_host: int = DEFAULT_CONNECTIONS_PER_HOST) -> Dict[str, Any]:
+    """像浏览器一样加载一个页面
+
+    每次加载使用独立的会话（相当于一个新标签页），同一主机的在途请求不超过 connections_per_host。
+    请求失败不重试，依赖失败的请求不发出。
+
+    Returns:
+        {"ok", "page_ready_ms", "critical_path": [请求名], "critical_request",
+         "requests": {请求名: {"status", "queued_ms", "start_ms", "end_ms", "bytes"}}}，
+        时间均相对页面开始加载的时刻
+    """
+    if not page_requests:
+        raise ValueError("页面至少需要一个请求")
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=connections_per_host)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # 页面的所有请求都发往同一个 API 主机
+    connection_limit = threading.BoundedSemaphore(connections_per_host)
+    done = {request.name: threading.Event() for request in page_requests}
+    timings: Dict[str, Dict[str, Any]] = {}
+    page_start = time.perf_counter()
+
+    def elapsed_ms():
+        return round((time.perf_counter() - page_start) * 1000, 3)
+
+    def fetch(request: PageRequest):
+        try:
+            for dependency in request.depends_on:
+                done[dependency].wait()
+            queued = elapsed_ms()
+            if any(timings.get(dependency, {}).get("status") != 200 for dependency in request.depends_on):
+                timings[request.name] = {"status": None, "queued_ms": queued, "start_ms": queued,
+                                         "end_ms": queued, "bytes": 0}
+                return
+            headers = {"Authorization": f"Bearer {token}"} if request.auth and token else {}
+            status, size = None, 0
+            with connection_limit:
+                started = elapsed_ms()
+                try:
+                    response = session.get(f"{base_url}{request.path}", params=request.params, headers=headers,
+                                           allow_redirects=False)
+                    status, size = response.status_code, len(response.content)
+                except requests.RequestException:
+                    pass
+                timings[request.name] = {"status": status, "queued_ms": queued, "start_ms": started,
+                                         "end_ms": elapsed_ms(), "bytes": size}
+        finally:
+            done[request.name].set()
+
+    with session, ThreadPoolExecutor(max_workers=len(page_requests), thread_name_prefix="page") as executor:
+        list(executor.map(fetch, page_requests))
+
+    critical_path = _critical_path(page_requests, timings)
+    return {
+        "ok": all(timing["status"] == 200 for timing in timings.values()),
+        "page_ready_ms": max(timing["end_ms"] for timing in timings.values()),
+        "critical_path": critical_path,
+        "critical_request": critical_path[-1],
+        "requests": timings,
+    }
+
+
+class PageRecorder:
+    """线程安全地收集页面加载结果并汇总"""
+
+    def __init__(self):
+        self._pages: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._pages)
+
+    def record(self, page: Dict[str, Any]):
+        with self._lock:
+            self._pages.append(page)
+
+    def summary(self) -> Dict[str, Any]:
+        """汇总页面就绪时间和各端点延迟
+
+        Returns:
+            {"pages", "ok", "failed", "page_ready_ms": 延迟汇总（仅成功的页面）,
+             "critical_requests": {端点: 成为关键请求的比例},
+             "endpoints": {端点: {"count", "failed", "latency_ms", "queued_ms"}}}
+        """
+        with self._lock:
+            pages = list(self._pages)
+        succeeded = [page for page in pages if page["ok"]]
+        critical = Counter(endpoint_of(page["critical_request"]) for page in succeeded)
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for page in pages:
+            for name, timing in page["requests"].items():
+                grouped.setdefault(endpoint_of(name), []).append(timing)
+        return {
+            "pages": len(pages),
+            "ok": len(succeeded),
+            "failed": len(pages) - len(succeeded),
+            "page_ready_ms": summarize_latencies([page["page_ready_ms"] for page in succeeded]),
+            "critical_requests": {endpoint: round(count / len(succeeded), 4)
+                                  for endpoint, count in critical.most_common()},
+            "endpoints": {
+                endpoint: {
+                    "count": len(timings),
+                    "failed": sum(1 for timing in timings if timing["status"] != 200),
+                    "latency_ms": summarize_latencies([t["end_ms"] - t["start_ms"] for t in timings]),
+                    "queued_ms": summarize_latencies([t["start_ms"] - t["queued_ms"] for t in timings]),
+                }
+                for endpoint, timings in sorted(grouped.items())
+            },
+        }
+
+
+def customer_page_load(user_pool, page_requests: Sequence[PageRequest], recorder: PageRecorder,
+                       connections_per_host: int = DEFAULT_CONNECTIONS_PER_HOST) -> bool:
+    """以用户池中的一个顾客身份加载页面并记录结果"""
+    with user_pool.identity() as identity:
+        page = load_page(page_requests, identity.token, connections_per_host=connections_per_host)
+    recorder.record(page)
+    return page["ok"]
+
+
+def menu_page_operation(user_pool, page_requests: Sequence[PageRequest], recorder: PageRecorder,
+                        connections_per_host: int = DEFAULT_CONNECTIONS_PER_HOST) -> Operation:
+    """将菜单页加载包装为压测操作，操作延迟即为页面就绪时间（含取出顾客身份）"""
+    return Operation(
+        "user.menu_page",
+        lambda: customer_page_load(user_pool, page_requests, recorder, connections_per_host),
+    )
+
+
+def format_page_report(summary: Dict[str, Any]) -> str:
+    """格式化页面加载汇总"""
+    ready = summary["page_ready_ms"]
+    lines = [
+        f"页面加载 {summary['pages']} 次，成功 {summary['ok']}，失败 {summary['failed']}",
+        f"页面就绪: p50={ready['p50']:.1f}ms  p95={ready['p95']:.1f}ms  p99={ready['p99']:.1f}ms  max={ready['max']:.1f}ms",
+        "关键请求: " + ("，".join(f"{endpoint} {share:.0%}" for endpoint, share in summary["critical_requests"].items())
+                    or "-"),
+        "",
+        f"{'端点':<16}{'请求':>7}{'失败':>6}{'p50':>10}{'p95':>10}{'排队p95':>10}",
+    ]
+    for endpoint, row in summary["endpoints"].items():
+        lines.append(f"{endpoint:<16}{row['count']:>7}{row['failed']:>6}{row['latency_ms']['p50']:>10.1f}"
+                     f"{row['latency_ms']['p95']:>10.1f}{row['queued_ms']['p95']:>10.1f}")
+    return "\n".join(lines)
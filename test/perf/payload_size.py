@@ -0,0 +1,229 @@
+"""
+响应体大小和压缩检查 - 按端点和分页大小记录原始大小与压缩后大小，估算受限链路上节省的传输时间
+
+目前不清楚 /admin/order/list、/product/list、/admin/dashboard/stats 的响应会有多大，
+也不清楚 HAProxy 或 Go 服务是否压缩响应。本模块：
+
+- 对每个端点和分页大小（看板统计为统计周期）分别以 Accept-Encoding: identity / gzip / br 请求，
+  读取未解码的传输字节，记录服务端实际使用的 Content-Encoding
+- 在本地以 gzip 和 brotli 压缩原始响应体，得到开启压缩后可以达到的大小
+- 按受限链路带宽估算传输时间：当前实际节省的时间和开启压缩后可以节省的时间
+- 结果写入 results_store，与上一次比较，标记响应体膨胀
+"""
+
+import gzip
+import sys
+import time
+import zlib
+from collections import namedtuple
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import requests
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，未安装时跳过 br 的本地压缩和解码
+    brotli = None
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from conftest import API_BASE_URL
+from perf.results_store import ResultsStore
+
+
+ENCODINGS = ("identity", "gzip", "br")
+
+DEFAULT_PAGE_SIZES = (10, 50, 100)
+
+DASHBOARD_PERIODS = ("week", "month", "year")
+
+# 受限链路：名称 → 下行带宽（bit/s），取浏览器开发者工具的网络限速预设
+THROTTLED_LINKS = {
+    "slow-3g": 400e3,
+    "fast-3g": 1.6e6,
+    "4g": 9e6,
+}
+
+# 与反向代理常用配置相当的压缩级别
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# 响应体相对上一次增长超过该比例时标记为膨胀
+DEFAULT_GROWTH_THRESHOLD = 0.2
+
+PayloadTarget = namedtuple("PayloadTarget", "endpoint variant path params token")
+
+
+def payload_targets(admin_token, shop_id, user_token: Optional[str] = None,
+                    page_sizes: Sequence[int] = DEFAULT_PAGE_SIZES,
+                    periods: Sequence[str] = DASHBOARD_PERIODS) -> List[PayloadTarget]:
+    """需要检查的端点：后台订单列表、后台商品列表、前端商品列表按分页大小，看板统计按统计周期"""
+    targets = []
+    for page_size in page_sizes:
+        params = {"page": 1, "pageSize": page_size, "shop_id": str(shop_id)}
+        variant = f"pageSize={page_size}"
+        targets.append(PayloadTarget("admin.order.list", variant, "/admin/order/list", params, admin_token))
+        targets.append(PayloadTarget("admin.product.list", variant, "/admin/product/list", params, admin_token))
+        if user_token:
+            targets.append(PayloadTarget("product.list", variant, "/product/list", params, user_token))
+    for period in periods:
+        targets.append(PayloadTarget("admin.dashboard.stats", f"period={period}", "/admin/dashboard/stats",
+                                     {"shop_id": str(shop_id), "period": period}, admin_token))
+    return targets
+
+
+def compress(body: bytes, encoding: str) -> Optional[bytes]:
+    """以 gzip 或 br 压缩，br 不可用时返回 None"""
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY) if brotli else None
+    return body
+
+
+def decode_body(data: bytes, content_encoding: str) -> bytes:
+    """按 Content-Encoding 解码传输字节"""
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding in ("", "identity"):
+        return data
+    if encoding in ("gzip", "x-gzip"):
+        return zlib.decompress(data, 16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return zlib.decompress(data)
+    if encoding == "br" and brotli:
+        return brotli.decompress(data)
+    raise ValueError(f"无法解码的 Content-Encoding: {content_encoding}")
+
+
+def fetch_raw(target: PayloadTarget, encoding: str, base_url: str = API_BASE_URL) -> Dict[str, Any]:
+    """以指定的 Accept-Encoding 请求，读取未解码的传输字节
+
+    不经过 make_request_with_retry：429 不重试，直接体现在状态码中。
+    只有 identity 请求需要原始响应体，其余编码只统计传输字节，不解码（未安装 brotli 时也能测量 br）。
+
+    Returns:
+        {"status", "content_encoding", "wire_bytes", "body", "elapsed_ms"}，非 identity 请求的 body 为 None
+    """
+    headers = {"Accept-Encoding": encoding}
+    if target.token:
+        headers["Authorization"] = f"Bearer {target.token}"
+    started = time.perf_counter()
+    with requests.get(f"{base_url}{target.path}", params=target.params, headers=headers, stream=True) as response:
+        wire = response.raw.read(decode_content=False)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        content_encoding = response.headers.get("Content-Encoding", "identity")
+        return {
+            "status": response.status_code,
+            "content_encoding": content_encoding,
+            "wire_bytes": len(wire),
+            "body": decode_body(wire, content_encoding) if encoding == "identity" else None,
+            "elapsed_ms": round(elapsed_ms, 3),
+        }
+
+
+def measure_payload(target: PayloadTarget, encodings: Sequence[str] = ENCODINGS,
+                    base_url: str = API_BASE_URL) -> Dict[str, Any]:
+    """测量一个端点的原始大小、各编码下的传输大小，以及本地压缩可达到的大小
+
+    Returns:
+        {"endpoint", "variant", "status", "raw_bytes", "wire_bytes": {编码: 字节},
+         "served_encoding": {请求的编码: 实际 Content-Encoding}, "compressed_by_server",
+         "potential_bytes": {"gzip", "br"}}
+    """
+    plain = fetch_raw(target, "identity", base_url)
+    row = {
+        "endpoint": target.endpoint,
+        "variant": target.variant,
+        "status": plain["status"],
+        "raw_bytes": len(plain["body"]),
+        "wire_bytes": {"identity": plain["wire_bytes"]},
+        "served_encoding": {"identity": plain["content_encoding"]},
+    }
+    for encoding in encodings:
+        if encoding == "identity":
+            continue
+        served = fetch_raw(target, encoding, base_url)
+        row["wire_bytes"][encoding] = served["wire_bytes"]
+        row["served_encoding"][encoding] = served["content_encoding"]
+    row["compressed_by_server"] = any(
+        encoding.lower() not in ("", "identity") for encoding in row["served_encoding"].values()
+    )
+    potential = {encoding: compress(plain["body"], encoding) for encoding in ("gzip", "br")}
+    row["potential_bytes"] = {encoding: len(data) if data is not None else None for encoding, data in potential.items()}
+    return row
+
+
+def transfer_ms(size: int, bandwidth_bps: float) -> float:
+    """在给定带宽下传输 size 字节所需的毫秒数（不含往返延迟）"""
+    return size * 8 / bandwidth_bps * 1000
+
+
+def transfer_savings(row: Dict[str, Any], links: Mapping[str, float] = THROTTLED_LINKS) -> Dict[str, Dict[str, float]]:
+    """估算受限链路上的传输时间
+
+    Returns:
+        {链路: {"identity_ms": 不压缩, "served_ms": 服务端实际最小传输, "potential_ms": 开启压缩后,
+                "saved_ms": 当前已节省, "potential_saved_ms": 开启压缩后可节省}}
+    """
+    identity = row["wire_bytes"]["identity"]
+    served = min(row["wire_bytes"].values())
+    potential = min([identity] + [size for size in row["potential_bytes"].values() if size is not None])
+    savings = {}
+    for link, bandwidth in links.items():
+        identity_ms = transfer_ms(identity, bandwidth)
+        served_ms = transfer_ms(served, bandwidth)
+        potential_ms = transfer_ms(potential, bandwidth)
+        savings[link] = {
+            "identity_ms": round(identity_ms, 2),
+            "served_ms": round(served_ms, 2),
+            "potential_ms": round(potential_ms, 2),
+            "saved_ms": round(identity_ms - served_ms, 2),
+            "potential_saved_ms": round(identity_ms - potential_ms, 2),
+        }
+    return savings
+
+
+def store_payload_results(store: ResultsStore, rows: Sequence[Dict[str, Any]], label: str = "default",
+                          threshold: float = DEFAULT_GROWTH_THRESHOLD) -> List[Dict[str, Any]]:
+    """将结果写入结果存储，并与上一次记录比较，非 200 的响应（错误体的大小没有意义）不记录
+
+    Returns:
+        原始大小增长超过 threshold 的端点：[{"endpoint", "variant", "raw_bytes", "growth"}]
+    """
+    bloated = []
+    for row in rows:
+        if row["status"] != 200:
+            continue
+        dimensions = {"endpoint": row["endpoint"], "variant": row["variant"]}
+        metrics = {"raw_bytes": row["raw_bytes"], "status": row["status"],
+                   "compressed_by_server": row["compressed_by_server"]}
+        metrics.update({f"wire_{encoding}": size for encoding, size in row["wire_bytes"].items()})
+        metrics.update({f"potential_{encoding}": size for encoding, size in row["potential_bytes"].items()})
+        store.record("payload", dimensions, metrics, label=label)
+        growth = store.growth("payload", dimensions, "raw_bytes", label=label)
+        if growth is not None and growth > threshold:
+            bloated.append({**dimensions, "raw_bytes": row["raw_bytes"], "growth": growth})
+    return bloated
+
+
+def format_payload_report(rows: Sequence[Dict[str, Any]], link: str = "fast-3g",
+                          bloated: Sequence[Dict[str, Any]] = ()) -> str:
+    """格式化响应体大小报告，传输时间按指定的受限链路估算"""
+    lines = [f"{'端点':<24}{'参数':<15}{'原始':>9}{'gzip':>9}{'br':>9}{'服务端':>8}"
+             f"{'可压缩至':>10}{link + '不压缩':>12}{'可节省':>10}"]
+    for row in rows:
+        wire = row["wire_bytes"]
+        potential = [size for size in row["potential_bytes"].values() if size is not None]
+        savings = transfer_savings(row, {link: THROTTLED_LINKS[link]})[link]
+        lines.append(
+            f"{row['endpoint']:<24}{row['variant']:<15}{row['raw_bytes']:>9}"
+            f"{wire.get('gzip', '-'):>9}{wire.get('br', '-'):>9}{'压缩' if row['compressed_by_server'] else '未压缩':>8}"
+            f"{min(potential) if potential else '-':>10}{savings['identity_ms']:>10.1f}ms{savings['potential_saved_ms']:>8.1f}ms"
+        )
+    if bloated:
+        lines.append("")
+        for item in bloated:
+            lines.append(f"⚠ {item['endpoint']} {item['variant']} 响应体较上次增长 {item['growth']:.0%}"
+                         f"（{item['raw_bytes']} 字节）")
+    return "\n".join(lines)
@@ -0,0 +1,139 @@
+"""
+连接池耗尽探测 - 验证 deploy/config/my.cnf 的 max_connections / max_user_connections
+
+my.cnf 为节省内存把 max_connections 设为 50、max_user_connections 设为 40，
+Go 应用的数据库连接池要在这些连接槽位中竞争。本模块逐级提高慢请求
+（高级搜索订单、全年数据看板统计）的在途并发数，越过 40-50 的区间，
+找出开始出现错误或排队延迟的并发拐点，用实测结果代替 my.cnf 头部注释里的估算。
+
+拐点判定：
+- 错误拐点：错误率首次超过阈值（状态码分布可区分 429 限流和 5xx）
+- 排队拐点：p50 延迟首次超过基线（最低并发级别）的 latency_factor 倍
+- 吞吐平台：并发继续增加，但吞吐增长不足 plateau_gain
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf.load_generator import Operation, run_closed_loop
+
+
+# 默认并发级别，在 max_user_connections=40 和 max_connections=50 附近加密
+DEFAULT_CONCURRENCY_LEVELS = (5, 10, 20, 30, 35, 40, 45, 50, 55, 60, 70, 80)
+
+# 仓库内 MySQL 配置文件路径
+MY_CNF_PATH = Path(__file__).parent.parent.parent / "deploy" / "config" / "my.cnf"
+
+
+def read_mysql_connection_limits(path=MY_CNF_PATH) -> Dict[str, Optional[int]]:
+    """读取 my.cnf 中的连接数配置
+
+    Returns:
+        {"max_connections": int|None, "max_user_connections": int|None}
+    """
+    limits = {"max_connections": None, "max_user_connections": None}
+    try:
+        text = Path(path).read_text(encoding="utf-8")
+    except FileNotFoundError:
+        print(f"[WARN] 未找到 MySQL 配置文件: {path}")
+        return limits
+    for key in limits:
+        match = re.search(rf"^\s*{key}\s*=\s*(\d+)", text, re.MULTILINE)
+        if match:
+            limits[key] = int(match.group(1))
+    return limits
+
+
+def find_knee(levels: Sequence[Dict[str, Any]], max_error_rate: float = 0.01,
+              latency_factor: float = 2.0, plateau_gain: float = 0.05) -> Dict[str, Optional[int]]:
+    """根据各并发级别的结果寻找拐点
+
+    Args:
+        levels: run_closed_loop 返回的汇总列表，按并发升序
+        max_error_rate: 错误率阈值
+        latency_factor: p50 相对基线的倍数阈值
+        plateau_gain: 吞吐相对此前最大值的最小增幅
+
+    Returns:
+        {"error_knee", "queueing_knee", "throughput_plateau", "knee"}，未出现则为None；
+        knee 取三者中最小的并发数
+    """
+    result = {"error_knee": None, "queueing_knee": None, "throughput_plateau": None}
+    if not levels:
+        result["knee"] = None
+        return result
+
+    if levels[0]["error_rate"] > max_error_rate:
+        result["error_knee"] = levels[0]["concurrency"]
+    baseline = levels[0]["naive_ms"]["p50"]
+    best_throughput = levels[0]["throughput"]
+    for level in levels[1:]:
+        concurrency = level["concurrency"]
+        if result["error_knee"] is None and level["error_rate"] > max_error_rate:
+            result["error_knee"] = concurrency
+        if result["queueing_knee"] is None and baseline > 0 and level["naive_ms"]["p50"] > baseline * latency_factor:
+            result["queueing_knee"] = concurrency
+        if result["throughput_plateau"] is None and level["throughput"] < best_throughput * (1 + plateau_gain):
+            result["throughput_plateau"] = concurrency
+        best_throughput = max(best_throughput, level["throughput"])
+
+    found = [v for v in result.values() if v is not None]
+    result["knee"] = min(found) if found else None
+    return result
+
+
+def probe_connection_pool(operations: Sequence[Operation], levels: Sequence[int] = DEFAULT_CONCURRENCY_LEVELS,
+                          duration: float = 15.0, cooldown: float = 5.0, stop_on_error_rate: float = 0.5,
+                          **knee_options) -> Dict[str, Any]:
+    """逐级提高并发执行慢请求，寻找连接池拐点
+
+    Args:
+        operations: 慢请求操作列表，见 workloads.slow_query_operations
+        levels: 并发级别（升序）
+        duration: 每个级别持续时间（秒）
+        cooldown: 级别之间的冷却时间（秒），让连接释放
+        stop_on_error_rate: 错误率超过该值后不再继续加压
+        **knee_options: 传给 find_knee 的阈值参数
+
+    Returns:
+        {"mysql_limits", "levels", "knee"}
+    """
+    results: List[Dict[str, Any]] = []
+    for index, concurrency in enumerate(sorted(levels)):
+        if index > 0 and cooldown > 0:
+            time.sleep(cooldown)
+        summary = run_closed_loop(operations, concurrency, duration)
+        results.append(summary)
+        print(f"并发 {concurrency:>3}: 吞吐={summary['throughput']:.2f}/s, "
+              f"p50={summary['naive_ms']['p50']:.1f}ms, p99={summary['naive_ms']['p99']:.1f}ms, "
+              f"错误率={summary['error_rate']:.2%}, 状态码={summary['status_counts']}")
+        if summary["error_rate"] > stop_on_error_rate:
+            print(f"[WARN] 错误率超过 {stop_on_error_rate:.0%}，停止加压")
+            break
+
+    return {
+        "mysql_limits": read_mysql_connection_limits(),
+        "levels": results,
+        "knee": find_knee(results, **knee_options),
+    }
+
+
+def format_probe_report(report: Dict[str, Any]) -> str:
+    """格式化探测结果，并与 my.cnf 配置对比"""
+    knee = report["knee"]
+    limits = report["mysql_limits"]
+    lines = [
+        f"my.cnf: max_connections={limits['max_connections']}, max_user_connections={limits['max_user_connections']}",
+        f"错误拐点: {knee['error_knee']}, 排队拐点: {knee['queueing_knee']}, 吞吐平台: {knee['throughput_plateau']}",
+    ]
+    if knee["knee"] is None:
+        lines.append("在测试的并发范围内未发现拐点")
+    elif limits["max_user_connections"]:
+        relation = "低于" if knee["knee"] < limits["max_user_connections"] else "不低于"
+        lines.append(f"拐点并发 {knee['knee']} {relation} max_user_connections={limits['max_user_connections']}")
+    return "\n".join(lines)
@@ -0,0 +1,326 @@
+"""
+看板统计参考实现 - 从 /admin/data/export 导出的 ZIP 独立计算订单、商品、用户统计，与 /admin/dashboard/stats 对比
+
+在百万级订单上校验看板数字，逐行用 Python 累加太慢。本模块：
+
+- 把导出 ZIP 流式下载到临时文件，逐个成员按块读取 CSV（或 JSON 数组），只保留需要的列，
+  转为 NumPy 列数组；百万订单在 2GB 主机上占用几十 MB
+- 用 bincount / unique 一次计算所有店铺在某个统计周期内的统计
+- 将接口返回的 orderStats / productStats / userStats 与参考值按字段对比，键名忽略大小写和下划线
+
+导出文件的表名和列名以别名匹配（orders / order_items / products / users / product_tags）。统计周期按截至当前时间的
+滚动窗口（7 / 30 / 365 天）计算，时间戳按本地时间解析、忽略时区；与接口的周期定义不同时，
+对比结果中会表现为按周期变化的差异。
+"""
+
+import csv
+import io
+import json
+import shutil
+import sys
+import tempfile
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from conftest import API_BASE_URL
+
+
+# 统计周期：名称 → 滚动窗口天数
+PERIOD_DAYS = {"week": 7, "month": 30, "year": 365}
+
+# 每次转为数组的行数
+CHUNK_ROWS = 200_000
+
+# 表名别名（已去掉下划线并转为小写）
+TABLE_ALIASES = {
+    "orders": ("orders", "order"),
+    "order_items": ("orderitems", "orderitem"),
+    "products": ("products", "product"),
+    "users": ("users", "user"),
+    "product_tags": ("producttags", "producttag"),
+}
+
+# 各表需要的列：列 → (类型, 别名)
+TABLE_COLUMNS = {
+    "orders": {
+        "id": ("int", ("id",)),
+        "shop_id": ("int", ("shopid",)),
+        "user_id": ("int", ("userid",)),
+        "total": ("float", ("totalprice", "totalamount", "total", "amount")),
+        "status": ("int", ("status",)),
+        "created_at": ("time", ("createdat", "createtime")),
+    },
+    "order_items": {
+        "order_id": ("int", ("orderid",)),
+        "product_id": ("int", ("productid",)),
+        "quantity": ("int", ("quantity",)),
+    },
+    "products": {
+        "id": ("int", ("id",)),
+        "shop_id": ("int", ("shopid",)),
+        "status": ("str", ("status",)),
+    },
+    "users": {
+        "id": ("int", ("id",)),
+        "created_at": ("time", ("createdat", "createtime")),
+    },
+    "product_tags": {
+        "product_id": ("int", ("productid",)),
+        "tag_id": ("int", ("tagid",)),
+    },
+}
+
+# 对比数值时允许的误差（金额的浮点累加顺序不同）
+DEFAULT_TOLERANCE = 0.01
+
+
+def _normalize(name: str) -> str:
+    return name.replace("_", "").replace("-", "").lower()
+
+
+def _table_of(member: str) -> Optional[str]:
+    """按成员文件名识别表，例如 data/order_items.csv → order_items"""
+    stem = _normalize(Path(member).stem)
+    for table, aliases in TABLE_ALIASES.items():
+        if stem in aliases:
+            return table
+    return None
+
+
+def _to_array(values: List[str], kind: str) -> np.ndarray:
+    """把一块字符串转为数组，数值列的空值按 0 处理，时间列的空值按 NaT 处理"""
+    if kind == "time":
+        # 只取到秒，"2024-03-10 12:00:00+08:00" 与 "2024-03-10T12:00:00Z" 都转为 2024-03-10T12:00:00
+        text = np.char.replace(np.array(values, dtype="U19"), " ", "T")
+        text[text == ""] = "NaT"
+        return text.astype("datetime64[s]")
+    text = np.array(values, dtype=str)
+    if kind == "str":
+        return text
+    text[text == ""] = "0"
+    # ID 为雪花ID，超出 float64 的精度，整数列直接按 int64 解析
+    return text.astype(np.int64 if kind == "int" else np.float64)
+
+
+def _read_rows(rows: Iterable[Sequence[str]], header: Sequence[str], table: str) -> Dict[str, np.ndarray]:
+    """按块读取行，只保留需要的列"""
+    columns = TABLE_COLUMNS[table]
+    positions = {_normalize(name): index for index, name in enumerate(header)}
+    selected = {}
+    for column, (kind, aliases) in columns.items():
+        index = next((positions[alias] for alias in aliases if alias in positions), None)
+        if index is not None:
+            selected[column] = (index, kind)
+
+    chunks: Dict[str, List[np.ndarray]] = {column: [] for column in selected}
+    buffers: Dict[str, List[str]] = {column: [] for column in selected}
+
+    def flush():
+        for column, (_, kind) in selected.items():
+            if buffers[column]:
+                chunks[column].append(_to_array(buffers[column], kind))
+                buffers[column] = []
+
+    count = 0
+    for row in rows:
+        for column, (index, _) in selected.items():
+            buffers[column].append(row[index] if index < len(row) else "")
+        count += 1
+        if count % CHUNK_ROWS == 0:
+            flush()
+    flush()
+    return {
+        column: np.concatenate(parts) if parts else _to_array([], selected[column][1])
+        for column, parts in chunks.items()
+    }
+
+
+def load_export(path) -> Dict[str, Dict[str, np.ndarray]]:
+    """读取导出 ZIP，返回 {表: {列: 数组}}，缺少的表或列不出现在结果中"""
+    tables = {}
+    with zipfile.ZipFile(path) as archive:
+        for member in archive.namelist():
+            table = _table_of(member)
+            if table is None or table in tables:
+                continue
+            with archive.open(member) as raw:
+                if member.lower().endswith(".json"):
+                    records = json.load(raw)
+                    if isinstance(records, dict):
+                        records = records.get("data", [])
+                    header = list(records[0]) if records else []
+                    rows = (["" if record.get(name) is None else str(record.get(name)) for name in header]
+                            for record in records)
+                    tables[table] = _read_rows(rows, header, table)
+                else:
+                    reader = csv.reader(io.TextIOWrapper(raw, encoding="utf-8-sig", newline=""))
+                    header = next(reader, [])
+                    tables[table] = _read_rows(reader, header, table)
+    return tables
+
+
+def download_export(admin_token, directory=None, base_url: str = API_BASE_URL) -> Path:
+    """把导出 ZIP 流式写入临时文件，不在内存中保留整个文件"""
+    url = f"{base_url}/admin/data/export"
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    handle = tempfile.NamedTemporaryFile(suffix=".zip", dir=directory, delete=False)
+    with handle, requests.get(url, headers=headers, stream=True) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        shutil.copyfileobj(response.raw, handle, length=1024 * 1024)
+    return Path(handle.name)
+
+
+def _per_shop(shop_index: np.ndarray, shops: int, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    return np.bincount(shop_index, weights=weights, minlength=shops)
+
+
+def _distinct_per_shop(shop_index: np.ndarray, keys: np.ndarray, shops: int):
+    """每个店铺的不同键数，以及出现超过一次的键数"""
+    if not len(keys):
+        return np.zeros(shops, dtype=np.int64), np.zeros(shops, dtype=np.int64)
+    pairs, counts = np.unique(np.stack([shop_index, keys]), axis=1, return_counts=True)
+    return _per_shop(pairs[0], shops), _per_shop(pairs[0][counts > 1], shops)
+
+
+def compute_reference(tables: Mapping[str, Mapping[str, np.ndarray]], period: str,
+                      now: Optional[datetime] = None) -> Dict[int, Dict[str, Dict[str, Any]]]:
+    """计算所有店铺在统计周期内的参考统计
+
+    Returns:
+        {店铺ID: {"orderStats": {"totalOrders", "totalAmount", "averageAmount", "statusCounts"},
+                  "productStats": {"totalProducts", "soldQuantity", "productsSold"},
+                  "userStats": {"totalUsers", "newUsers", "activeUsers", "repeatUsers"}}}
+    """
+    now64 = np.datetime64(now or datetime.now(), "s")
+    since = now64 - np.timedelta64(PERIOD_DAYS[period], "D")
+    orders = tables.get("orders", {})
+    items = tables.get("order_items", {})
+    products = tables.get("products", {})
+    users = tables.get("users", {})
+    if not {"id", "shop_id", "created_at"} <= set(orders):
+        raise ValueError("导出文件缺少订单表或订单的 id / shop_id / created_at 列")
+
+    shop_ids = np.unique(np.concatenate([orders["shop_id"], products.get("shop_id", np.empty(0, np.int64))]))
+    shops = len(shop_ids)
+
+    in_period = (orders["created_at"] >= since) & (orders["created_at"] <= now64)
+    order_shop = np.searchsorted(shop_ids, orders["shop_id"])
+    shop_index = order_shop[in_period]
+
+    total_orders = _per_shop(shop_index, shops)
+    amounts = orders["total"][in_period] if "total" in orders else np.zeros(len(shop_index))
+    total_amount = _per_shop(shop_index, shops, amounts)
+    status_counts = {}
+    if "status" in orders:
+        statuses = orders["status"][in_period]
+        for status in np.unique(statuses):
+            status_counts[int(status)] = _per_shop(shop_index[statuses == status], shops)
+    active_users, repeat_users = _distinct_per_shop(
+        shop_index, orders["user_id"][in_period] if "user_id" in orders else np.empty(0, np.int64), shops)
+
+    # 订单明细按订单ID关联到周期内的订单
+    sold_quantity = np.zeros(shops)
+    products_sold = np.zeros(shops, dtype=np.int64)
+    if "order_id" in items and len(orders["id"]):
+        order = np.argsort(orders["id"])
+        sorted_ids = orders["id"][order]
+        position = np.clip(np.searchsorted(sorted_ids, items["order_id"]), 0, len(sorted_ids) - 1)
+        matched = sorted_ids[position] == items["order_id"]
+        item_order = order[position[matched]]
+        keep = in_period[item_order]
+        item_shop = order_shop[item_order][keep]
+        if "quantity" in items:
+            sold_quantity = _per_shop(item_shop, shops, items["quantity"][matched][keep].astype(np.float64))
+        if "product_id" in items:
+            products_sold, _ = _distinct_per_shop(item_shop, items["product_id"][matched][keep], shops)
+
+    total_products = _per_shop(np.searchsorted(shop_ids, products["shop_id"]), shops) \
+        if "shop_id" in products else np.zeros(shops, dtype=np.int64)
+    total_users = len(users.get("id", ()))
+    user_created = users.get("created_at")
+    new_users = int(((user_created >= since) & (user_created <= now64)).sum()) if user_created is not None else None
+
+    reference = {}
+    for index, shop_id in enumerate(shop_ids):
+        count = int(total_orders[index])
+        amount = round(float(total_amount[index]), 2)
+        reference[int(shop_id)] = {
+            "orderStats": {
+                "totalOrders": count,
+                "totalAmount": amount,
+                "averageAmount": round(amount / count, 2) if count else 0.0,
+                "statusCounts": {str(status): int(values[index]) for status, values in status_counts.items()},
+            },
+            "productStats": {
+                "totalProducts": int(total_products[index]),
+                "soldQuantity": int(sold_quantity[index]),
+                "productsSold": int(products_sold[index]),
+            },
+            "userStats": {
+                "totalUsers": total_users,
+                "newUsers": new_users,
+                "activeUsers": int(active_users[index]),
+                "repeatUsers": int(repeat_users[index]),
+            },
+        }
+    return reference
+
+
+def flatten_numbers(data: Any, prefix: str = "") -> Dict[str, float]:
+    """展开嵌套字典中的数值，键为归一化后的路径，例如 orderstats.totalorders"""
+    flat = {}
+    if isinstance(data, Mapping):
+        for key, value in data.items():
+            flat.update(flatten_numbers(value, f"{prefix}.{_normalize(str(key))}" if prefix else _normalize(str(key))))
+    elif isinstance(data, bool) or data is None:
+        pass
+    elif isinstance(data, (int, float)):
+        flat[prefix] = float(data)
+    return flat
+
+
+def diff_stats(endpoint: Mapping[str, Any], reference: Mapping[str, Any],
+               tolerance: float = DEFAULT_TOLERANCE) -> Dict[str, Any]:
+    """按字段对比接口统计和参考统计
+
+    Returns:
+        {"matched": [字段], "mismatched": [{"field", "endpoint", "reference"}],
+         "endpoint_only": [字段], "reference_only": [字段]}
+    """
+    endpoint_flat = flatten_numbers({key: value for key, value in endpoint.items()
+                                     if _normalize(key) in ("orderstats", "productstats", "userstats")})
+    reference_flat = flatten_numbers(reference)
+    matched, mismatched = [], []
+    for field in sorted(set(endpoint_flat) & set(reference_flat)):
+        actual, expected = endpoint_flat[field], reference_flat[field]
+        if abs(actual - expected) <= max(tolerance, abs(expected) * 1e-9):
+            matched.append(field)
+        else:
+            mismatched.append({"field": field, "endpoint": actual, "reference": expected})
+    return {
+        "matched": matched,
+        "mismatched": mismatched,
+        "endpoint_only": sorted(set(endpoint_flat) - set(reference_flat)),
+        "reference_only": sorted(set(reference_flat) - set(endpoint_flat)),
+    }
+
+
+def format_diff_report(results: Mapping[str, Mapping[str, Any]]) -> str:
+    """格式化各周期的对比结果"""
+    lines = []
+    for period, diff in results.items():
+        lines.append(f"{period}: 一致 {len(diff['matched'])}，不一致 {len(diff['mismatched'])}，"
+                     f"仅接口 {len(diff['endpoint_only'])}，仅参考 {len(diff['reference_only'])}")
+        for item in diff["mismatched"]:
+            lines.append(f"  ✗ {item['field']}: 接口 {item['endpoint']:g}，参考 {item['reference']:g}")
+        if diff["endpoint_only"]:
+            lines.append(f"  未校验的接口字段: {', '.join(diff['endpoint_only'])}")
+    return "\n".join(lines)
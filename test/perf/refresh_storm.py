@@ -0,0 +1,206 @@
+"""
+令牌刷新风暴模拟 - 大量客户端同时到期时 /admin/refresh-token 的集中刷新
+
+管理员和商家令牌按 config.yaml 在 7200 秒后过期。如果大批客户端在同一时刻获得令牌，
+它们会在同一时刻到期并集中刷新。本模块：
+
+- 并行预先签发一批令牌（令牌池）
+- 在 jitter 秒的时间窗口内均匀随机地发出全部刷新请求，jitter=0 即同时刷新
+- 刷新期间以固定速率运行后台浏览流量，对比刷新窗口内外的浏览延迟
+
+比较不同 jitter 下的刷新延迟和浏览流量 p99 增量，可以判断客户端是否需要随机提前刷新，
+以及随机窗口至少要多大。
+"""
+
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from conftest import API_BASE_URL, make_request_with_retry
+from perf.load_generator import OpenLoopLoadGenerator, Operation, Sample, summarize_samples
+
+
+# 各角色的刷新接口
+REFRESH_ENDPOINTS = {
+    "admin": "/admin/refresh-token",
+    "shop": "/shop/refresh-token",
+}
+
+DEFAULT_JITTERS = (0.0, 5.0, 30.0)
+
+
+def mint_tokens(login_func: Callable[[], Optional[str]], count: int, concurrency: int = 8) -> List[str]:
+    """并行调用登录函数签发一批令牌
+
+    Args:
+        login_func: 无参登录函数，返回令牌或None
+        count: 令牌数量
+        concurrency: 并行登录线程数
+
+    Returns:
+        成功签发的令牌列表（可能少于 count）
+    """
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="mint") as executor:
+        tokens = list(executor.map(lambda _: login_func(), range(count)))
+    minted = [token for token in tokens if token]
+    if len(minted) < count:
+        print(f"[WARN] 仅签发了 {len(minted)}/{count} 个令牌")
+    return minted
+
+
+class TokenPool:
+    """令牌池：刷新成功后用新令牌替换旧令牌，保证多轮风暴使用的都是有效令牌"""
+
+    def __init__(self, tokens: Sequence[str], role: str = "admin"):
+        if role not in REFRESH_ENDPOINTS:
+            raise ValueError(f"未知的令牌角色: {role}，可选: {', '.join(REFRESH_ENDPOINTS)}")
+        self.tokens = list(tokens)
+        self.url = f"{API_BASE_URL}{REFRESH_ENDPOINTS[role]}"
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def refresh(self, index: int) -> requests.Response:
+        """刷新第 index 个令牌，成功时替换为新令牌"""
+        headers = {"Authorization": f"Bearer {self.tokens[index]}"}
+
+        def request_func():
+            return requests.post(self.url, headers=headers)
+
+        response = make_request_with_retry(request_func)
+        if response.status_code == 200:
+            token = response.json().get("token")
+            if token:
+                self.tokens[index] = token
+        return response
+
+    def refresh_operation(self, index: int) -> Operation:
+        """刷新第 index 个令牌的压测操作"""
+        return Operation("token.refresh", lambda: self.refresh(index))
+
+
+def build_storm_arrivals(pool: TokenPool, read_operations: Sequence[Operation], read_rate: float,
+                         storm_start: float, jitter: float, settle: float,
+                         rng: Optional[random.Random] = None) -> List[tuple]:
+    """构造一轮风暴的到达时间表
+
+    浏览流量从 0 开始按 read_rate 匀速到达，持续到风暴结束后 settle 秒；
+    每个令牌的刷新在 [storm_start, storm_start + jitter] 内均匀随机到达。
+
+    Returns:
+        按偏移排序的 (偏移秒数, 操作) 列表
+    """
+    rng = rng or random.Random()
+    arrivals = [(storm_start + rng.uniform(0, jitter), pool.refresh_operation(i)) for i in range(len(pool))]
+    if read_operations and read_rate > 0:
+        weights = [op.weight for op in read_operations]
+        total = storm_start + jitter + settle
+        for i in range(int(total * read_rate)):
+            arrivals.append((i / read_rate, rng.choices(read_operations, weights=weights)[0]))
+    arrivals.sort(key=lambda arrival: arrival[0])
+    return arrivals
+
+
+def summarize_storm(samples: Sequence[Sample], run_start: float, storm_start: float,
+                    storm_end: float) -> Dict[str, Any]:
+    """按刷新请求、风暴前浏览、风暴中浏览三组汇总样本
+
+    风暴窗口为 [storm_start, storm_end)，以计划发送时间划分浏览请求。
+    """
+    refreshes = [s for s in samples if s.operation == "token.refresh"]
+    reads = [s for s in samples if s.operation != "token.refresh"]
+    before = [s for s in reads if s.intended - run_start < storm_start]
+    during = [s for s in reads if storm_start <= s.intended - run_start < storm_end]
+    window = max(storm_end - storm_start, 1e-3)
+    return {
+        "refresh": summarize_samples(refreshes, window),
+        "reads_before": summarize_samples(before, storm_start),
+        "reads_during": summarize_samples(during, window),
+    }
+
+
+def run_refresh_storm(pool: TokenPool, read_operations: Sequence[Operation] = (), read_rate: float = 5.0,
+                      jitters: Sequence[float] = DEFAULT_JITTERS, warmup: float = 10.0, settle: float = 5.0,
+                      cooldown: float = 10.0, max_workers: int = 256, seed: Optional[int] = None) -> Dict[str, Any]:
+    """对每个 jitter 运行一轮刷新风暴
+
+    Args:
+        pool: 令牌池，每轮刷新全部令牌
+        read_operations: 后台浏览流量的操作
+        read_rate: 后台浏览速率(rps)
+        jitters: 刷新分散窗口（秒）列表
+        warmup: 风暴前的纯浏览时间（秒），作为浏览延迟基线
+        settle: 风暴结束后继续浏览的时间（秒）
+        cooldown: 两轮之间的冷却时间（秒）
+        max_workers: 最大并发线程数，应不小于令牌数以免客户端自身成为瓶颈
+
+    Returns:
+        {"config", "rounds": [{"jitter", "refresh", "reads_before", "reads_during", "read_p99_increase_ms"}]}
+    """
+    rng = random.Random(seed)
+    rounds = []
+    for index, jitter in enumerate(jitters):
+        if index > 0 and cooldown > 0:
+            time.sleep(cooldown)
+        arrivals = build_storm_arrivals(pool, read_operations, read_rate, warmup, jitter, settle, rng)
+        samples: List[Sample] = []
+        lock = threading.Lock()
+
+        def collect(sample: Sample):
+            with lock:
+                samples.append(sample)
+
+        generator = OpenLoopLoadGenerator(max_workers=max_workers)
+        run_start, _ = generator.replay(arrivals, collect)
+        # 风暴窗口至少覆盖最后一个刷新请求完成的时刻
+        refresh_done = max((s.finished - run_start for s in samples if s.operation == "token.refresh"),
+                           default=warmup + jitter)
+        result = summarize_storm(samples, run_start, warmup, max(warmup + jitter, refresh_done))
+        result["jitter"] = jitter
+        result["read_p99_increase_ms"] = round(
+            result["reads_during"]["corrected_ms"]["p99"] - result["reads_before"]["corrected_ms"]["p99"], 3)
+        rounds.append(result)
+        print(f"jitter={jitter:>5g}s: 刷新 {result['refresh']['sent']} 次，"
+              f"刷新 p99={result['refresh']['corrected_ms']['p99']:.1f}ms，错误率={result['refresh']['error_rate']:.2%}，"
+              f"浏览 p99 增加 {result['read_p99_increase_ms']:.1f}ms")
+
+    return {
+        "config": {"tokens": len(pool), "read_rate": read_rate, "warmup": warmup, "settle": settle},
+        "rounds": rounds,
+    }
+
+
+def recommend_jitter(report: Dict[str, Any], max_read_p99_increase_ms: float = 100.0,
+                     max_refresh_error_rate: float = 0.0) -> Optional[float]:
+    """返回满足浏览 p99 增量和刷新错误率要求的最小 jitter，都不满足时返回None"""
+    for result in sorted(report["rounds"], key=lambda r: r["jitter"]):
+        if (result["read_p99_increase_ms"] <= max_read_p99_increase_ms
+                and result["refresh"]["error_rate"] <= max_refresh_error_rate):
+            return result["jitter"]
+    return None
+
+
+def format_storm_report(report: Dict[str, Any], max_read_p99_increase_ms: float = 100.0) -> str:
+    """格式化刷新风暴结果"""
+    lines = [f"令牌数: {report['config']['tokens']}，后台浏览速率: {report['config']['read_rate']} rps",
+             f"{'jitter(s)':>10}{'刷新p50':>10}{'刷新p99':>10}{'刷新错误率':>11}{'浏览p99(前)':>13}{'浏览p99(中)':>13}"]
+    for result in report["rounds"]:
+        lines.append(f"{result['jitter']:>10g}{result['refresh']['corrected_ms']['p50']:>10.1f}"
+                     f"{result['refresh']['corrected_ms']['p99']:>10.1f}{result['refresh']['error_rate']:>11.2%}"
+                     f"{result['reads_before']['corrected_ms']['p99']:>13.1f}{result['reads_during']['corrected_ms']['p99']:>13.1f}")
+    recommended = recommend_jitter(report, max_read_p99_increase_ms)
+    if recommended is None:
+        lines.append(f"所有 jitter 下浏览 p99 增量都超过 {max_read_p99_increase_ms:g}ms 或刷新出现错误，需要更大的随机提前刷新窗口")
+    elif recommended == 0:
+        lines.append("同时刷新对浏览流量影响在阈值内，客户端无需随机提前刷新")
+    else:
+        lines.append(f"建议客户端在到期前随机提前至少 {recommended:g} 秒刷新")
+    return "\n".join(lines)
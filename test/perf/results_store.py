@@ -0,0 +1,94 @@
+"""
+结果存储 - 以 JSON Lines 追加保存各次性能测量的结果，用于跟踪趋势
+
+每条记录包含时间戳、类别（如 payload）、部署标签、标识维度（如端点和分页大小）和测量值。
+文件只追加不改写，可以直接提交到结果分支或由 CI 归档；series() 按类别和维度取出某个测量值的历史序列，
+growth() 比较最新值与基线，用于发现响应体膨胀等缓慢退化。
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+
+# 默认结果文件
+DEFAULT_STORE_PATH = Path("perf_results") / "results.jsonl"
+
+
+class ResultsStore:
+    """JSON Lines 结果文件，一行一条记录"""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, dimensions: Mapping[str, Any], metrics: Mapping[str, Any],
+               label: str = "default", timestamp: Optional[float] = None) -> Dict[str, Any]:
+        """追加一条记录
+
+        Args:
+            kind: 结果类别，如 "payload"
+            dimensions: 标识维度，如 {"endpoint": "admin.order.list", "variant": "pageSize=100"}
+            metrics: 测量值
+            label: 部署配置标签
+            timestamp: 记录时间，默认当前时间
+        """
+        entry = {
+            "timestamp": round(timestamp if timestamp is not None else time.time(), 3),
+            "kind": kind,
+            "label": label,
+            "dimensions": dict(dimensions),
+            "metrics": dict(metrics),
+        }
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        return entry
+
+    def entries(self, kind: Optional[str] = None, label: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """按时间顺序逐条读取记录，跳过无法解析的行（如写入中断留下的半行）"""
+        if not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if (kind is None or entry["kind"] == kind) and (label is None or entry["label"] == label):
+                    yield entry
+
+    def series(self, kind: str, dimensions: Mapping[str, Any], metric: str,
+               label: Optional[str] = None) -> List[Tuple[float, Any]]:
+        """取出某个测量值的历史序列
+
+        Returns:
+            [(时间戳, 值), ...]，按记录顺序
+        """
+        return [
+            (entry["timestamp"], entry["metrics"][metric])
+            for entry in self.entries(kind, label)
+            if entry["dimensions"] == dict(dimensions) and entry["metrics"].get(metric) is not None
+        ]
+
+    def growth(self, kind: str, dimensions: Mapping[str, Any], metric: str, label: Optional[str] = None,
+               baseline: str = "previous") -> Optional[float]:
+        """最新值相对基线的增幅（0.2 表示增长 20%）
+
+        Args:
+            baseline: "previous" 与上一次比较，"first" 与最早的记录比较
+
+        Returns:
+            增幅，记录不足两条或基线为 0 时返回 None
+        """
+        values = [value for _, value in self.series(kind, dimensions, metric, label)]
+        if len(values) < 2:
+            return None
+        reference = values[-2] if baseline == "previous" else values[0]
+        if not reference:
+            return None
+        return round((values[-1] - reference) / reference, 4)
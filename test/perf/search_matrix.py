@@ -0,0 +1,243 @@
+"""
+高级搜索查询矩阵 - 对 /admin/order/advance-search 按筛选条件的组合测量延迟，找出需要索引的组合
+
+admin/test_order_advanced.py 只检查几种筛选参数能被接受。本模块在大订单表上
+（先用 run_perf.py seed-orders 填充）对以下维度做组合：
+
+- 店铺：不限 / 指定店铺
+- 状态：不限 / 单个状态 / 多个状态
+- 日期范围：不限 / 最近1天 / 7天 / 30天 / 365天
+- 用户：不限 / 指定用户
+- 分页：首页小分页、首页大分页、深分页
+
+每个组合重复请求若干次，记录延迟百分位和命中总数，按中位延迟排序；相对无筛选基线明显变慢的组合
+给出建议的复合索引列（等值条件在前、日期范围在后），深分页提示改用游标分页。
+"""
+
+import itertools
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from conftest import API_BASE_URL
+from perf.load_generator import summarize_latencies
+
+
+# 日期参数格式
+DATE_FORMAT = "%Y-%m-%d"
+
+# 日期范围：名称 → 天数，None 表示不限
+DATE_RANGES = {"any": None, "1d": 1, "7d": 7, "30d": 30, "365d": 365}
+
+# 分页：名称 → (页码, 每页数量)
+PAGINATIONS = {"first10": (1, 10), "first100": (1, 100), "deep": (50, 20)}
+
+# 比无筛选基线慢该倍数以上的组合视为需要优化
+DEFAULT_SLOW_FACTOR = 2.0
+
+# 筛选条件对应的订单表列，用于给出索引建议
+_COLUMNS = {"shop": "shop_id", "user": "user_id", "status": "status", "date": "created_at"}
+
+
+def build_matrix(shop_id, user_id=None, statuses: Sequence[int] = (1, 2, 10),
+                 date_ranges: Optional[Sequence[str]] = None,
+                 paginations: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """生成筛选条件的全组合
+
+    Returns:
+        [{"shop", "status", "date", "user", "page"}]，值为该维度的取值名称
+    """
+    status_options = ["any"]
+    if statuses:
+        status_options.append("one")
+        if len(statuses) > 1:
+            status_options.append("many")
+    dimensions = [
+        ["any", "shop"],
+        status_options,
+        list(date_ranges or DATE_RANGES),
+        ["any", "user"] if user_id else ["any"],
+        list(paginations or PAGINATIONS),
+    ]
+    return [
+        {"shop": shop, "status": status, "date": date, "user": user, "page": page}
+        for shop, status, date, user, page in itertools.product(*dimensions)
+    ]
+
+
+def combination_name(combo: Dict[str, Any]) -> str:
+    """组合的可读名称，例如 shop+status=many+date=7d+page=deep"""
+    parts = []
+    for key in ("shop", "user"):
+        if combo[key] != "any":
+            parts.append(key)
+    if combo["status"] != "any":
+        parts.append(f"status={combo['status']}")
+    if combo["date"] != "any":
+        parts.append(f"date={combo['date']}")
+    parts.append(f"page={combo['page']}")
+    return "+".join(parts)
+
+
+def build_payload(combo: Dict[str, Any], shop_id, user_id=None, statuses: Sequence[int] = (1, 2, 10),
+                  now: Optional[datetime] = None) -> Dict[str, Any]:
+    """将组合转为请求体，字段与 admin_order_actions.advance_search_order 一致"""
+    page, page_size = PAGINATIONS[combo["page"]]
+    payload = {"page": page, "pageSize": page_size}
+    if combo["shop"] == "shop":
+        payload["shop_id"] = str(shop_id)
+    if combo["user"] == "user":
+        payload["user_id"] = str(user_id)
+    if combo["status"] == "one":
+        payload["status"] = [statuses[0]]
+    elif combo["status"] == "many":
+        payload["status"] = list(statuses)
+    days = DATE_RANGES[combo["date"]]
+    if days:
+        now = now or datetime.now()
+        payload["start_date"] = (now - timedelta(days=days)).strftime(DATE_FORMAT)
+        payload["end_date"] = (now + timedelta(days=1)).strftime(DATE_FORMAT)
+    return payload
+
+
+def suggest_index(combo: Dict[str, Any]) -> List[str]:
+    """建议的复合索引列：等值条件（店铺、用户、状态）在前，日期范围在后"""
+    columns = [_COLUMNS[key] for key in ("shop", "user", "status") if combo[key] != "any"]
+    if combo["date"] != "any":
+        columns.append(_COLUMNS["date"])
+    return columns
+
+
+def run_search_matrix(admin_token, shop_id, user_id=None, statuses: Sequence[int] = (1, 2, 10),
+                      repeats: int = 5, sample: Optional[int] = None, seed: Optional[int] = None,
+                      base_url: str = API_BASE_URL, **matrix_options) -> List[Dict[str, Any]]:
+    """按组合测量高级搜索延迟
+
+    组合按轮次交错执行（每轮每个组合请求一次，顺序随机），避免数据库缓存预热只偏向先测的组合。
+    不经过 make_request_with_retry：429 不重试，计为失败。只有 200 响应计入延迟。
+
+    Args:
+        repeats: 每个组合的请求次数
+        sample: 只随机抽取该数量的组合
+        matrix_options: 传给 build_matrix 的 date_ranges / paginations
+
+    Returns:
+        按中位延迟降序排列：[{"name", "combination", "payload", "latency_ms", "total", "failed", "index"}]
+    """
+    rng = random.Random(seed)
+    combos = build_matrix(shop_id, user_id, statuses, **matrix_options)
+    if sample and sample < len(combos):
+        combos = rng.sample(combos, sample)
+    now = datetime.now()
+    payloads = [build_payload(combo, shop_id, user_id, statuses, now) for combo in combos]
+    latencies: List[List[float]] = [[] for _ in combos]
+    totals: List[Optional[int]] = [None] * len(combos)
+    failed = [0] * len(combos)
+
+    url = f"{base_url}/admin/order/advance-search"
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    with requests.Session() as session:
+        for _ in range(repeats):
+            order = list(range(len(combos)))
+            rng.shuffle(order)
+            for index in order:
+                started = time.perf_counter()
+                try:
+                    response = session.post(url, json=payloads[index], headers=headers)
+                except requests.RequestException:
+                    failed[index] += 1
+                    continue
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if response.status_code != 200:
+                    # 429 和错误响应很快返回，计入延迟会让失败的组合显得更快
+                    failed[index] += 1
+                    continue
+                latencies[index].append(elapsed_ms)
+                if totals[index] is None:
+                    totals[index] = response.json().get("total")
+
+    rows = [
+        {
+            "name": combination_name(combo),
+            "combination": combo,
+            "payload": payload,
+            "latency_ms": summarize_latencies(samples),
+            "total": total,
+            "failed": failures,
+            "index": suggest_index(combo),
+        }
+        for combo, payload, samples, total, failures in zip(combos, payloads, latencies, totals, failed)
+    ]
+    rows.sort(key=lambda row: row["latency_ms"]["p50"], reverse=True)
+    return rows
+
+
+def analyze_matrix(rows: Sequence[Dict[str, Any]], slow_factor: float = DEFAULT_SLOW_FACTOR) -> Dict[str, Any]:
+    """与无筛选基线比较，找出慢组合并汇总索引建议
+
+    基线为不带任何筛选、首页小分页的组合；不在矩阵中时使用所有组合的最小中位延迟。
+
+    Returns:
+        {"baseline_ms", "slow": [慢组合名称], "indexes": {"列1,列2": 受益的慢组合数},
+         "deep_pagination_ratio": 深分页与对应首页分页的平均中位延迟比,
+         "dimension_effect": {维度取值: 含该取值的组合的平均中位延迟}}
+    """
+    by_name = {row["name"]: row for row in rows}
+    baseline_row = by_name.get("page=first10")
+    baseline = baseline_row["latency_ms"]["p50"] if baseline_row else min(
+        (row["latency_ms"]["p50"] for row in rows), default=0.0
+    )
+    slow = [row for row in rows if baseline and row["latency_ms"]["p50"] > baseline * slow_factor]
+    indexes: Dict[str, int] = {}
+    for row in slow:
+        if row["index"]:
+            key = ",".join(row["index"])
+            indexes[key] = indexes.get(key, 0) + 1
+
+    effect: Dict[str, List[float]] = {}
+    for row in rows:
+        for dimension, value in row["combination"].items():
+            effect.setdefault(f"{dimension}={value}", []).append(row["latency_ms"]["p50"])
+
+    deep_ratios = []
+    for row in rows:
+        if row["combination"]["page"] == "deep":
+            first = by_name.get(row["name"].replace("page=deep", "page=first10"))
+            if first and first["latency_ms"]["p50"]:
+                deep_ratios.append(row["latency_ms"]["p50"] / first["latency_ms"]["p50"])
+
+    return {
+        "baseline_ms": baseline,
+        "slow": [row["name"] for row in slow],
+        "indexes": dict(sorted(indexes.items(), key=lambda item: item[1], reverse=True)),
+        "deep_pagination_ratio": round(sum(deep_ratios) / len(deep_ratios), 3) if deep_ratios else None,
+        "dimension_effect": {key: round(sum(values) / len(values), 3) for key, values in sorted(effect.items())},
+    }
+
+
+def format_matrix_report(rows: Sequence[Dict[str, Any]], analysis: Dict[str, Any], top: int = 20) -> str:
+    """格式化最慢的组合和索引建议"""
+    lines = [f"无筛选基线 p50: {analysis['baseline_ms']:.1f}ms，慢组合 {len(analysis['slow'])}/{len(rows)}", "",
+             f"{'组合':<44}{'p50':>9}{'p95':>9}{'max':>9}{'命中':>9}{'失败':>6}  建议索引"]
+    for row in rows[:top]:
+        latency = row["latency_ms"]
+        lines.append(
+            f"{row['name']:<44}{latency['p50']:>9.1f}{latency['p95']:>9.1f}{latency['max']:>9.1f}"
+            f"{str(row['total'] if row['total'] is not None else '-'):>9}{row['failed']:>6}"
+            f"  {'(' + ', '.join(row['index']) + ')' if row['name'] in analysis['slow'] and row['index'] else ''}"
+        )
+    if analysis["indexes"]:
+        lines.append("")
+        lines.append("建议在部署侧评估的索引（按受益的慢组合数排序）：")
+        for columns, count in analysis["indexes"].items():
+            lines.append(f"  orders({columns})  ← {count} 个慢组合")
+    if analysis["deep_pagination_ratio"] and analysis["deep_pagination_ratio"] > DEFAULT_SLOW_FACTOR:
+        lines.append(f"深分页平均比首页慢 {analysis['deep_pagination_ratio']:.1f} 倍，考虑以游标（created_at, id）代替 OFFSET")
+    return "\n".join(lines)
@@ -0,0 +1,317 @@
+"""
+搜索结果校验索引 - 从导出数据在本地建立倒排索引，批量校验高级搜索和标签商品查询的结果
+
+在大数据量上逐个核对 /admin/order/advance-search、/admin/tag/online-products 的结果，
+以前只能反复翻页抓取接口。本模块从 /admin/data/export 的导出数据（读取见 reference_stats.py）建立一次索引：
+
+- 订单按创建时间排序，按店铺、用户、状态建立倒排表（有序的位置数组）；日期范围对应一段连续的位置，
+  查询时从最短的倒排表出发过滤，不扫描整个订单表
+- 标签 → 商品、商品 → 标签映射，以及商品的店铺和上架状态
+
+每轮随机生成上千个查询：订单查询比较接口的 total，结果不超过一页时再比较订单ID集合；
+标签查询比较已上架商品集合和商品已绑定的标签集合。导出与校验之间有写入时结果会不一致，应在静止的数据上运行。
+"""
+
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Set
+
+import numpy as np
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from conftest import API_BASE_URL
+from perf.search_matrix import DATE_FORMAT
+
+
+# 结果数不超过该值时比较订单ID集合，否则只比较总数
+DEFAULT_FULL_CHECK_LIMIT = 100
+
+# 随机日期范围的天数
+QUERY_DAYS = (1, 7, 30, 365)
+
+
+class SearchIndex:
+    """订单倒排索引和标签映射
+
+    日期条件按天解释：start_date 当天 0 点起，到 end_date 当天结束（含）；服务端解释不同时，
+    不一致会集中出现在带日期条件的查询上。
+    """
+
+    def __init__(self, tables: Mapping[str, Mapping[str, np.ndarray]]):
+        orders = tables.get("orders", {})
+        if not {"id", "shop_id", "created_at"} <= set(orders):
+            raise ValueError("导出文件缺少订单表或订单的 id / shop_id / created_at 列")
+        order = np.argsort(orders["created_at"], kind="stable")
+        self.order_ids = orders["id"][order]
+        self.created = orders["created_at"][order]
+        self.shop = orders["shop_id"][order]
+        self.user = orders["user_id"][order] if "user_id" in orders else np.zeros(len(order), np.int64)
+        self.status = orders["status"][order] if "status" in orders else np.zeros(len(order), np.int64)
+        self.by_shop = self._postings(self.shop)
+        self.by_user = self._postings(self.user)
+        self.by_status = self._postings(self.status)
+        # 店铺 + 状态的组合倒排表，最常见的组合查询只需截取和计数。
+        # 雪花ID接近 int64 上限，组合键用店铺和状态的稠密编号计算，不能直接乘店铺ID
+        shop_values, shop_codes = np.unique(self.shop, return_inverse=True)
+        status_values, status_codes = np.unique(self.status, return_inverse=True)
+        combined = self._postings(shop_codes.astype(np.int64) * len(status_values) + status_codes)
+        self.by_shop_status = {
+            (int(shop_values[key // len(status_values)]), int(status_values[key % len(status_values)])): positions
+            for key, positions in combined.items()
+        }
+
+        products = tables.get("products", {})
+        self.product_shop: Dict[int, int] = {}
+        self.product_status: Dict[int, str] = {}
+        if {"id", "shop_id"} <= set(products):
+            self.product_shop = dict(zip(products["id"].tolist(), products["shop_id"].tolist()))
+        if {"id", "status"} <= set(products):
+            self.product_status = dict(zip(products["id"].tolist(), products["status"].tolist()))
+
+        self.tag_products: Dict[int, Set[int]] = {}
+        self.product_tags: Dict[int, Set[int]] = {}
+        relations = tables.get("product_tags", {})
+        if {"product_id", "tag_id"} <= set(relations):
+            for product_id, tag_id in zip(relations["product_id"].tolist(), relations["tag_id"].tolist()):
+                self.tag_products.setdefault(tag_id, set()).add(product_id)
+                self.product_tags.setdefault(product_id, set()).add(tag_id)
+
+    @staticmethod
+    def _postings(values: np.ndarray) -> Dict[int, np.ndarray]:
+        """值 → 有序的位置数组"""
+        if not len(values):
+            return {}
+        order = np.argsort(values, kind="stable")
+        keys, starts = np.unique(values[order], return_index=True)
+        return {int(key): positions for key, positions in zip(keys, np.split(order, starts[1:]))}
+
+    def __len__(self):
+        return len(self.order_ids)
+
+    def _date_span(self, start_date: Optional[str], end_date: Optional[str]):
+        low = np.searchsorted(self.created, np.datetime64(start_date, "s")) if start_date else 0
+        if end_date:
+            end = np.datetime64(end_date, "D") + np.timedelta64(1, "D")
+            high = np.searchsorted(self.created, end.astype("datetime64[s]"))
+        else:
+            high = len(self.created)
+        return low, high
+
+    def _plan(self, shop_id, user_id, statuses, low, high):
+        """选出最短的倒排表并按日期截取
+
+        Returns:
+            (位置数组片段列表, 已由该倒排表满足的条件集合)
+        """
+        empty = np.empty(0, np.int64)
+        candidates = []
+        if shop_id is not None:
+            candidates.append(({"shop"}, [self.by_shop.get(int(shop_id), empty)]))
+        if user_id is not None:
+            candidates.append(({"user"}, [self.by_user.get(int(user_id), empty)]))
+        if statuses:
+            candidates.append(({"status"}, [self.by_status.get(int(status), empty) for status in set(statuses)]))
+            if shop_id is not None:
+                candidates.append(({"shop", "status"}, [self.by_shop_status.get((int(shop_id), int(status)), empty)
+                                                        for status in set(statuses)]))
+        covered, postings = min(candidates, key=lambda item: (sum(len(part) for part in item[1]), -len(item[0])))
+        parts = [part[np.searchsorted(part, low):np.searchsorted(part, high)] for part in postings]
+        return parts, covered
+
+    @staticmethod
+    def _conditions(shop_id, user_id, statuses):
+        return {name for name, value in (("shop", shop_id), ("user", user_id), ("status", statuses or None))
+                if value is not None}
+
+    def order_positions(self, shop_id=None, user_id=None, statuses: Optional[Sequence[int]] = None,
+                        start_date: Optional[str] = None, end_date: Optional[str] = None) -> np.ndarray:
+        """满足条件的订单位置（按创建时间升序）"""
+        low, high = self._date_span(start_date, end_date)
+        if not self._conditions(shop_id, user_id, statuses):
+            return np.arange(low, high)
+
+        # 从最短的倒排表出发，先按日期截取，再用其余条件过滤
+        parts, covered = self._plan(shop_id, user_id, statuses, low, high)
+        positions = np.sort(np.concatenate(parts)) if len(parts) > 1 else parts[0]
+        if shop_id is not None and "shop" not in covered:
+            positions = positions[self.shop[positions] == int(shop_id)]
+        if user_id is not None and "user" not in covered:
+            positions = positions[self.user[positions] == int(user_id)]
+        if statuses and "status" not in covered:
+            positions = positions[np.isin(self.status[positions], [int(status) for status in statuses])]
+        return positions
+
+    def count_orders(self, shop_id=None, user_id=None, statuses: Optional[Sequence[int]] = None,
+                     start_date: Optional[str] = None, end_date: Optional[str] = None) -> int:
+        """满足条件的订单数；倒排表已满足全部条件时只做截取，不生成位置数组"""
+        low, high = self._date_span(start_date, end_date)
+        conditions = self._conditions(shop_id, user_id, statuses)
+        if not conditions:
+            return int(high - low)
+        parts, covered = self._plan(shop_id, user_id, statuses, low, high)
+        if conditions <= covered:
+            return sum(len(part) for part in parts)
+        return len(self.order_positions(shop_id, user_id, statuses, start_date, end_date))
+
+    def order_ids_for(self, **query) -> Set[int]:
+        return set(self.order_ids[self.order_positions(**query)].tolist())
+
+    def online_products(self, tag_id, shop_id) -> Set[int]:
+        """标签在店铺中关联的已上架商品"""
+        return {
+            product_id for product_id in self.tag_products.get(int(tag_id), ())
+            if self.product_shop.get(product_id) == int(shop_id) and self.product_status.get(product_id) == "online"
+        }
+
+    def bound_tags(self, product_id) -> Set[int]:
+        return set(self.product_tags.get(int(product_id), ()))
+
+
+def random_order_queries(index: SearchIndex, count: int, seed: Optional[int] = None,
+                         now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """随机生成订单查询，字段与 advance-search 的请求体一致（不含分页）
+
+    店铺、用户从索引中已有的值抽取，让大部分查询有结果；每个条件各以一半概率出现。
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    shops, users, statuses = sorted(index.by_shop), sorted(index.by_user), sorted(index.by_status)
+    queries = []
+    for _ in range(count):
+        query = {}
+        if shops and rng.random() < 0.5:
+            query["shop_id"] = rng.choice(shops)
+        if users and rng.random() < 0.5:
+            query["user_id"] = rng.choice(users)
+        if statuses and rng.random() < 0.5:
+            query["statuses"] = rng.sample(statuses, rng.randint(1, len(statuses)))
+        if rng.random() < 0.5:
+            query["start_date"] = (now - timedelta(days=rng.choice(QUERY_DAYS))).strftime(DATE_FORMAT)
+            query["end_date"] = now.strftime(DATE_FORMAT)
+        queries.append(query)
+    return queries
+
+
+def _search_payload(query: Mapping[str, Any], page: int, page_size: int) -> Dict[str, Any]:
+    payload = {"page": page, "pageSize": page_size}
+    for key in ("shop_id", "user_id"):
+        if key in query:
+            payload[key] = str(query[key])
+    if query.get("statuses"):
+        payload["status"] = list(query["statuses"])
+    for key in ("start_date", "end_date"):
+        if key in query:
+            payload[key] = query[key]
+    return payload
+
+
+def _ids(items: Iterable[Mapping[str, Any]]) -> Set[int]:
+    return {int(item.get("id") or item.get("ID")) for item in items if item.get("id") or item.get("ID")}
+
+
+def check_order_queries(index: SearchIndex, admin_token, queries: Sequence[Mapping[str, Any]],
+                        full_check_limit: int = DEFAULT_FULL_CHECK_LIMIT,
+                        base_url: str = API_BASE_URL) -> Dict[str, Any]:
+    """逐个查询比较接口结果和索引结果
+
+    Returns:
+        {"checked", "failed_requests", "mismatches": [{"query", "expected", "actual", "missing", "unexpected"}],
+         "index_us": 索引查询的平均微秒数}
+    """
+    url = f"{base_url}/admin/order/advance-search"
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    mismatches, failed, index_seconds = [], 0, 0.0
+    with requests.Session() as session:
+        for query in queries:
+            started = time.perf_counter()
+            expected = index.count_orders(**query)
+            index_seconds += time.perf_counter() - started
+            full = expected <= full_check_limit
+            response = session.post(url, json=_search_payload(query, 1, full_check_limit if full else 1),
+                                    headers=headers)
+            if response.status_code != 200:
+                failed += 1
+                continue
+            body = response.json()
+            actual = body.get("total")
+            mismatch = {"query": dict(query), "expected": expected, "actual": actual}
+            if actual != expected:
+                mismatches.append(mismatch)
+            elif full:
+                expected_ids = index.order_ids_for(**query)
+                actual_ids = _ids(body.get("data") or [])
+                if actual_ids != expected_ids:
+                    mismatch.update(missing=sorted(expected_ids - actual_ids)[:10],
+                                    unexpected=sorted(actual_ids - expected_ids)[:10])
+                    mismatches.append(mismatch)
+    return {
+        "checked": len(queries) - failed,
+        "failed_requests": failed,
+        "mismatches": mismatches,
+        "index_us": round(index_seconds / len(queries) * 1e6, 2) if queries else None,
+    }
+
+
+def check_tag_queries(index: SearchIndex, admin_token, samples: int, seed: Optional[int] = None,
+                      base_url: str = API_BASE_URL) -> Dict[str, Any]:
+    """抽样比较标签的已上架商品和商品的已绑定标签
+
+    Returns:
+        {"checked", "failed_requests", "mismatches": [{"kind", "tag_id"|"product_id", "missing", "unexpected"}]}
+    """
+    rng = random.Random(seed)
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    tags = sorted(index.tag_products)
+    products = sorted(index.product_tags)
+    mismatches, failed, checked = [], 0, 0
+    with requests.Session() as session:
+        for _ in range(samples if tags else 0):
+            tag_id = rng.choice(tags)
+            shops = {index.product_shop.get(product_id) for product_id in index.tag_products[tag_id]} - {None}
+            for shop_id in sorted(shops):
+                response = session.get(f"{base_url}/admin/tag/online-products",
+                                       params={"tag_id": tag_id, "shop_id": str(shop_id)}, headers=headers)
+                if response.status_code != 200:
+                    failed += 1
+                    continue
+                checked += 1
+                expected, actual = index.online_products(tag_id, shop_id), _ids(response.json().get("data") or [])
+                if expected != actual:
+                    mismatches.append({"kind": "online-products", "tag_id": tag_id, "shop_id": shop_id,
+                                       "missing": sorted(expected - actual)[:10],
+                                       "unexpected": sorted(actual - expected)[:10]})
+        for _ in range(samples if products else 0):
+            product_id = rng.choice(products)
+            response = session.get(f"{base_url}/admin/tag/bound-tags",
+                                   params={"product_id": product_id, "shop_id": str(index.product_shop.get(product_id))},
+                                   headers=headers)
+            if response.status_code != 200:
+                failed += 1
+                continue
+            checked += 1
+            expected, actual = index.bound_tags(product_id), _ids(response.json().get("tags") or [])
+            if expected != actual:
+                mismatches.append({"kind": "bound-tags", "product_id": product_id,
+                                   "missing": sorted(expected - actual)[:10],
+                                   "unexpected": sorted(actual - expected)[:10]})
+    return {"checked": checked, "failed_requests": failed, "mismatches": mismatches}
+
+
+def format_oracle_report(orders: Mapping[str, Any], tags: Optional[Mapping[str, Any]] = None) -> str:
+    """格式化校验结果，每类最多列出前 10 个不一致"""
+    lines = [f"订单查询: 校验 {orders['checked']}，不一致 {len(orders['mismatches'])}，"
+             f"请求失败 {orders['failed_requests']}，索引平均 {orders['index_us']}µs"]
+    for item in orders["mismatches"][:10]:
+        lines.append(f"  ✗ {item['query']}: 接口 {item['actual']}，索引 {item['expected']}"
+                     + (f"，缺少 {item['missing']}，多出 {item['unexpected']}" if "missing" in item else ""))
+    if tags is not None:
+        lines.append(f"标签查询: 校验 {tags['checked']}，不一致 {len(tags['mismatches'])}，请求失败 {tags['failed_requests']}")
+        for item in tags["mismatches"][:10]:
+            target = f"标签 {item['tag_id']}" if item["kind"] == "online-products" else f"商品 {item['product_id']}"
+            lines.append(f"  ✗ {item['kind']} {target}: 缺少 {item['missing']}，多出 {item['unexpected']}")
+    return "\n".join(lines)
@@ -0,0 +1,405 @@
+"""
+慢输入模糊测试 - 用 schemathesis 按 OpenAPI 文档为每个端点生成输入，找出响应时间异常的输入
+
+utils/base_test.py 的超长字符串、SQL 注入探测只检查状态码。本模块关注响应时间：
+
+- 从后端的 Swagger 文档（默认 /swagger/doc.json）加载全部端点，默认只测 GET，避免随机写入破坏数据
+- 每个端点由 schemathesis 生成 N 个随机输入，再按参数名补充极端值：超大 pageSize / page、
+  一万字符的搜索字符串、1970 到 2100 年的日期范围，每次只改一个参数，另加一个全部取极端值的输入
+- 超过延迟阈值的输入重复测量确认（取中位数），然后逐步简化：删除参数、字符串和列表减半、数值减半，
+  只保留仍然超过阈值的简化，得到触发慢响应的最小输入
+- 简化后的输入写入语料文件，按 方法 + 路径 + 输入 去重；之后可以回放语料作为回归检查，
+  任何输入仍超过阈值时退出码为 1
+"""
+
+import json
+import re
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+from urllib.parse import quote, urlsplit
+
+import hypothesis
+import requests
+import schemathesis
+from hypothesis import HealthCheck, Phase
+from schemathesis.types import NotSet
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from conftest import API_BASE_URL
+
+
+DEFAULT_THRESHOLD_MS = 500.0
+
+DEFAULT_EXAMPLES = 20
+
+DEFAULT_CORPUS_PATH = Path(__file__).parent / "slow_inputs.json"
+
+DEFAULT_METHODS = ("GET",)
+
+# 默认跳过会改变登录状态或账号的端点
+DEFAULT_EXCLUDE = ("logout", "password", "refresh-token", "delete")
+
+# 单个请求的超时时间（秒）
+DEFAULT_TIMEOUT = 30.0
+
+# 按参数名补充的极端值
+PAGE_SIZE_PATTERN = re.compile(r"page_?size|per_?page|limit|size", re.IGNORECASE)
+PAGE_PATTERN = re.compile(r"^(page|offset)$", re.IGNORECASE)
+START_DATE_PATTERN = re.compile(r"^(start|from|begin)(_?(date|time|at))?$", re.IGNORECASE)
+END_DATE_PATTERN = re.compile(r"^(end|to|until)(_?(date|time|at))?$", re.IGNORECASE)
+HUGE_NUMBER = 10 ** 6
+LONG_STRING = "a" * 10000
+EARLIEST_DATE, LATEST_DATE = "1970-01-01", "2100-12-31"
+
+# 输入中可以简化的部分
+LOCATIONS = ("query", "body")
+
+
+def default_schema_url(base_url: str = API_BASE_URL) -> str:
+    """后端 gin-swagger 的文档地址"""
+    parts = urlsplit(base_url)
+    return f"{parts.scheme}://{parts.netloc}/swagger/doc.json"
+
+
+def load_schema(location: str, base_url: str = API_BASE_URL):
+    """从 URL 或本地文件加载 OpenAPI / Swagger 文档"""
+    if location.startswith(("http://", "https://")):
+        return schemathesis.from_uri(location, base_url=base_url)
+    return schemathesis.from_path(location, base_url=base_url)
+
+
+def select_operations(schema, methods: Sequence[str] = DEFAULT_METHODS, include: Optional[str] = None,
+                      exclude: Sequence[str] = DEFAULT_EXCLUDE) -> List:
+    """按方法、路径正则和排除关键字筛选端点，无法解析的端点跳过"""
+    methods = {method.upper() for method in methods}
+    operations = []
+    for result in schema.get_all_operations():
+        try:
+            operation = result.ok()
+        except Exception:
+            continue
+        if operation.method.upper() not in methods:
+            continue
+        if include and not re.search(include, operation.path):
+            continue
+        if any(word in operation.path for word in exclude):
+            continue
+        operations.append(operation)
+    return operations
+
+
+def case_input(case) -> Dict[str, Any]:
+    """把 schemathesis 的 Case 转为可保存、可回放的输入"""
+    body = None if isinstance(case.body, NotSet) else case.body
+    return {
+        "method": case.operation.method.upper(),
+        "path": case.operation.path,
+        "path_parameters": dict(case.path_parameters or {}),
+        "query": dict(case.query or {}),
+        "body": body,
+    }
+
+
+def generate_inputs(operation, examples: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """由 schemathesis 为端点生成 examples 个随机输入"""
+    inputs = []
+
+    @hypothesis.settings(max_examples=examples, database=None, phases=[Phase.generate], deadline=None,
+                         suppress_health_check=list(HealthCheck))
+    @hypothesis.seed(seed)
+    @hypothesis.given(operation.as_strategy())
+    def collect(case):
+        inputs.append(case_input(case))
+
+    collect()
+    return inputs
+
+
+def _extreme_value(name: str, value: Any) -> Any:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        if PAGE_SIZE_PATTERN.search(name) or PAGE_PATTERN.search(name):
+            return HUGE_NUMBER
+        return None
+    if isinstance(value, str):
+        if START_DATE_PATTERN.search(name):
+            return EARLIEST_DATE
+        if END_DATE_PATTERN.search(name):
+            return LATEST_DATE
+        return LONG_STRING
+    return None
+
+
+def extreme_inputs(inputs: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """在参数最少的输入上逐个把参数改为极端值，另加一个全部参数取极端值的输入
+
+    参数名和类型取自所有随机输入，开始日期和结束日期同时改为最大范围。
+    """
+    if not inputs:
+        return []
+    base = min(inputs, key=lambda item: sum(len(item[loc]) for loc in LOCATIONS if isinstance(item[loc], dict)))
+    variants, combined = [], json.loads(json.dumps(base))
+    for location in LOCATIONS:
+        samples = {}
+        for item in inputs:
+            if isinstance(item[location], dict):
+                for name, value in item[location].items():
+                    samples.setdefault(name, value)
+        if not samples or not isinstance(base[location], (dict, type(None))):
+            continue
+        for name, value in samples.items():
+            extreme = _extreme_value(name, value)
+            if extreme is None:
+                continue
+            variant = json.loads(json.dumps(base))
+            variant[location] = dict(variant[location] or {}, **{name: extreme})
+            if START_DATE_PATTERN.search(name) or END_DATE_PATTERN.search(name):
+                # 日期范围的另一端一起放到最大
+                for other, other_value in samples.items():
+                    other_extreme = _extreme_value(other, other_value)
+                    if other != name and other_extreme in (EARLIEST_DATE, LATEST_DATE):
+                        variant[location][other] = other_extreme
+            variants.append(variant)
+            combined[location] = dict(combined[location] or {}, **{name: extreme})
+    if len(variants) > 1:
+        variants.append(combined)
+    return variants
+
+
+def send_input(session: requests.Session, item: Dict[str, Any], token: Optional[str] = None,
+               base_url: str = API_BASE_URL, timeout: float = DEFAULT_TIMEOUT):
+    """发送一个输入
+
+    Returns:
+        (状态码或 "error"，毫秒)
+    """
+    path = item["path"]
+    for name, value in (item.get("path_parameters") or {}).items():
+        path = path.replace("{" + name + "}", quote(str(value), safe=""))
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    kwargs = {"json": item["body"]} if item.get("body") is not None else {}
+    started = time.perf_counter()
+    try:
+        status = session.request(item["method"], f"{base_url}{path}", params=item.get("query") or None,
+                                 headers=headers, timeout=timeout, **kwargs).status_code
+    except requests.RequestException:
+        status = "error"
+    return status, (time.perf_counter() - started) * 1000
+
+
+def measure_input(session: requests.Session, item: Dict[str, Any], token: Optional[str] = None, repeats: int = 3,
+                  base_url: str = API_BASE_URL, timeout: float = DEFAULT_TIMEOUT):
+    """重复发送，返回 (最后一次的状态码, 延迟中位数)"""
+    results = [send_input(session, item, token, base_url, timeout) for _ in range(repeats)]
+    return results[-1][0], statistics.median(ms for _, ms in results)
+
+
+def _simplifications(item: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """依次产生比 item 更简单的输入：删除参数、字符串和列表减半、数值向 0 减半"""
+    for location in LOCATIONS:
+        values = item[location]
+        if not isinstance(values, dict):
+            continue
+        for name, value in values.items():
+            candidates = [None]
+            if isinstance(value, str) and len(value) > 1:
+                candidates.append(value[:len(value) // 2])
+            elif isinstance(value, list) and value:
+                candidates.append(value[:len(value) // 2])
+            elif isinstance(value, (int, float)) and not isinstance(value, bool) and abs(value) > 1:
+                candidates.append(int(value / 2) if isinstance(value, int) else value / 2)
+            for candidate in candidates:
+                simpler = dict(item, **{location: dict(values)})
+                if candidate is None:
+                    del simpler[location][name]
+                else:
+                    simpler[location][name] = candidate
+                yield simpler
+
+
+def shrink_input(item: Dict[str, Any], is_slow: Callable[[Dict[str, Any]], Optional[float]],
+                 max_steps: int = 100):
+    """贪心简化：每一步采用第一个仍然慢的简化，直到没有可用的简化或达到步数上限
+
+    Args:
+        is_slow: 输入仍超过阈值时返回延迟，否则返回None
+
+    Returns:
+        (简化后的输入, 其延迟, 采用的简化步数)
+    """
+    latency, steps = None, 0
+    while steps < max_steps:
+        for simpler in _simplifications(item):
+            result = is_slow(simpler)
+            if result is not None:
+                item, latency, steps = simpler, result, steps + 1
+                break
+        else:
+            break
+    return item, latency, steps
+
+
+def fuzz_operations(operations: Sequence, token_for: Callable[[str], Optional[str]],
+                    examples: int = DEFAULT_EXAMPLES, threshold_ms: float = DEFAULT_THRESHOLD_MS, repeats: int = 3,
+                    max_shrink_steps: int = 100, seed: Optional[int] = None, base_url: str = API_BASE_URL,
+                    timeout: float = DEFAULT_TIMEOUT) -> List[Dict[str, Any]]:
+    """逐个端点发送随机输入和极端输入，确认并简化超过阈值的输入
+
+    Args:
+        token_for: 路径 -> 令牌，例如 /admin 使用管理员令牌，/shopOwner 使用商家令牌
+
+    Returns:
+        [{"operation", "sent", "p50_ms", "max_ms", "status_counts",
+          "slow": [{"input", "status", "latency_ms", "shrunk", "shrunk_latency_ms", "steps"}]}]
+    """
+    results = []
+    with requests.Session() as session:
+        for operation in operations:
+            token = token_for(operation.path)
+            inputs = generate_inputs(operation, examples, seed)
+            inputs += extreme_inputs(inputs)
+            latencies, status_counts, slow = [], {}, []
+            for item in inputs:
+                status, elapsed_ms = send_input(session, item, token, base_url, timeout)
+                latencies.append(elapsed_ms)
+                status_counts[str(status)] = status_counts.get(str(status), 0) + 1
+                if elapsed_ms <= threshold_ms:
+                    continue
+                status, confirmed_ms = measure_input(session, item, token, repeats, base_url, timeout)
+                if confirmed_ms <= threshold_ms:
+                    continue
+
+                def is_slow(candidate):
+                    _, ms = measure_input(session, candidate, token, repeats, base_url, timeout)
+                    return ms if ms > threshold_ms else None
+
+                shrunk, shrunk_ms, steps = shrink_input(item, is_slow, max_shrink_steps)
+                slow.append({
+                    "input": item,
+                    "status": status,
+                    "latency_ms": round(confirmed_ms, 1),
+                    "shrunk": shrunk,
+                    "shrunk_latency_ms": round(shrunk_ms if shrunk_ms is not None else confirmed_ms, 1),
+                    "steps": steps,
+                })
+            results.append({
+                "operation": f"{operation.method.upper()} {operation.path}",
+                "sent": len(inputs),
+                "p50_ms": round(statistics.median(latencies), 1) if latencies else None,
+                "max_ms": round(max(latencies), 1) if latencies else None,
+                "status_counts": status_counts,
+                "slow": slow,
+            })
+    return results
+
+
+def _signature(item: Dict[str, Any]) -> str:
+    return json.dumps(item, sort_keys=True, ensure_ascii=False)
+
+
+def load_corpus(path=DEFAULT_CORPUS_PATH) -> List[Dict[str, Any]]:
+    """读取慢输入语料，文件不存在时返回空列表"""
+    path = Path(path)
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def merge_corpus(corpus: Sequence[Dict[str, Any]], results: Sequence[Dict[str, Any]],
+                 threshold_ms: float = DEFAULT_THRESHOLD_MS) -> List[Dict[str, Any]]:
+    """把简化后的慢输入加入语料，相同的输入只保留一条
+
+    Returns:
+        合并后的语料 [{"input", "latency_ms", "threshold_ms", "found_at"}]
+    """
+    merged = list(corpus)
+    seen = {_signature(entry["input"]) for entry in merged}
+    found_at = datetime.now().isoformat(timespec="seconds")
+    for result in results:
+        for item in result["slow"]:
+            signature = _signature(item["shrunk"])
+            if signature in seen:
+                continue
+            seen.add(signature)
+            merged.append({"input": item["shrunk"], "latency_ms": item["shrunk_latency_ms"],
+                           "threshold_ms": threshold_ms, "found_at": found_at})
+    return merged
+
+
+def save_corpus(corpus: Sequence[Dict[str, Any]], path=DEFAULT_CORPUS_PATH) -> Path:
+    """保存语料"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(list(corpus), f, ensure_ascii=False, indent=2)
+    return path
+
+
+def replay_corpus(corpus: Sequence[Dict[str, Any]], token_for: Callable[[str], Optional[str]],
+                  threshold_ms: Optional[float] = None, repeats: int = 3, base_url: str = API_BASE_URL,
+                  timeout: float = DEFAULT_TIMEOUT) -> List[Dict[str, Any]]:
+    """回放语料中的每个输入
+
+    Args:
+        threshold_ms: 判定阈值，默认使用每条语料记录的阈值
+
+    Returns:
+        [{"operation", "input", "status", "latency_ms", "recorded_ms", "threshold_ms", "slow"}]
+    """
+    rows = []
+    with requests.Session() as session:
+        for entry in corpus:
+            item = entry["input"]
+            status, latency = measure_input(session, item, token_for(item["path"]), repeats, base_url, timeout)
+            limit = threshold_ms if threshold_ms is not None else entry.get("threshold_ms", DEFAULT_THRESHOLD_MS)
+            rows.append({
+                "operation": f"{item['method']} {item['path']}",
+                "input": item,
+                "status": status,
+                "latency_ms": round(latency, 1),
+                "recorded_ms": entry.get("latency_ms"),
+                "threshold_ms": limit,
+                "slow": latency > limit,
+            })
+    return rows
+
+
+def _describe(item: Dict[str, Any], width: int = 80) -> str:
+    parts = {location: item[location] for location in ("path_parameters", *LOCATIONS) if item.get(location)}
+    text = json.dumps(parts, ensure_ascii=False)
+    return text if len(text) <= width else text[:width - 3] + "..."
+
+
+def format_fuzz_report(results: Sequence[Dict[str, Any]], threshold_ms: float = DEFAULT_THRESHOLD_MS) -> str:
+    """格式化每个端点的延迟和简化后的慢输入"""
+    lines = [f"{'端点':<48}{'发送':>6}{'p50':>9}{'最大':>10}{'慢输入':>8}"]
+    for result in results:
+        lines.append(f"{result['operation']:<48}{result['sent']:>6}{result['p50_ms'] or 0:>9.1f}"
+                     f"{result['max_ms'] or 0:>10.1f}{len(result['slow']):>8}")
+    slow = [(result["operation"], item) for result in results for item in result["slow"]]
+    lines.append("")
+    lines.append(f"超过 {threshold_ms:.0f}ms 的输入 {len(slow)} 个")
+    for operation, item in slow:
+        lines.append(f"  {operation}: {item['latency_ms']}ms → 简化 {item['steps']} 步后 "
+                     f"{item['shrunk_latency_ms']}ms  {_describe(item['shrunk'])}")
+    return "\n".join(lines)
+
+
+def format_replay_report(rows: Sequence[Dict[str, Any]]) -> str:
+    """格式化语料回放结果"""
+    lines = [f"{'端点':<48}{'状态':>6}{'延迟':>10}{'记录':>10}{'阈值':>8}"]
+    for row in rows:
+        mark = "✗" if row["slow"] else "✓"
+        lines.append(f"{mark} {row['operation']:<46}{row['status']!s:>6}{row['latency_ms']:>10.1f}"
+                     f"{row['recorded_ms'] or 0:>10.1f}{row['threshold_ms']:>8.0f}  {_describe(row['input'], 60)}")
+    still_slow = sum(1 for row in rows if row["slow"])
+    lines.append("")
+    lines.append(f"回放 {len(rows)} 个输入，{still_slow} 个仍超过阈值")
+    return "\n".join(lines)
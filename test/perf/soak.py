@@ -0,0 +1,446 @@
+"""
+长稳测试(soak) - 长时间固定速率运行混合负载，检测延迟漂移和内存泄漏
+
+应用容器按 tiny.md 限制在 700MB，缓慢泄漏只有运行数小时后才会暴露。本模块：
+
+- 以固定速率持续运行业务流程混合负载，按时间窗口汇总延迟百分位，不保留每个样本
+- 若本机有 Docker socket（或 docker 命令、cgroup 文件），每个窗口采样一次容器内存
+- 对窗口序列拟合线性趋势并计算单调性，标记延迟或内存的持续增长
+
+令牌有效期为 7200 秒，运行期间每隔 refresh_interval 重新构造负载（重新登录）。
+
+容器资源采样器（内存、CPU）和 ResourceMonitor 也供其他压测场景使用。
+"""
+
+import http.client
+import json
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf.load_generator import OpenLoopLoadGenerator, Operation, Sample, percentile
+
+
+DOCKER_SOCKET = "/var/run/docker.sock"
+
+# 内存单位换算，docker stats 输出形如 "123.4MiB / 700MiB"
+_MEMORY_UNITS = {
+    "b": 1, "kb": 1000, "mb": 1000 ** 2, "gb": 1000 ** 3,
+    "kib": 1024, "mib": 1024 ** 2, "gib": 1024 ** 3,
+}
+
+
+class WindowedRecorder:
+    """按时间窗口聚合样本的记录器（线程安全）
+
+    只保留当前窗口的延迟值，窗口结束后压缩成一行汇总。
+    样本按完成时间归入窗口。
+    """
+
+    def __init__(self, window_seconds: float, origin: Optional[float] = None):
+        self.window_seconds = window_seconds
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.windows: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._index = 0
+        self._latencies: List[float] = []
+        self._errors = 0
+
+    def record(self, sample: Sample):
+        index = int((sample.finished - self.origin) // self.window_seconds)
+        with self._lock:
+            while index > self._index:
+                self._flush()
+            self._latencies.append((sample.finished - sample.intended) * 1000)
+            if not sample.ok:
+                self._errors += 1
+
+    def _flush(self):
+        """关闭当前窗口（调用方需持有锁）"""
+        values = sorted(self._latencies)
+        count = len(values)
+        self.windows.append({
+            "start": round(self._index * self.window_seconds, 3),
+            "count": count,
+            "errors": self._errors,
+            "error_rate": round(self._errors / count, 4) if count else 0.0,
+            "throughput": round((count - self._errors) / self.window_seconds, 3),
+            "p50": round(percentile(values, 50), 3),
+            "p95": round(percentile(values, 95), 3),
+            "p99": round(percentile(values, 99), 3),
+            "max": round(values[-1], 3) if values else 0.0,
+        })
+        self._index += 1
+        self._latencies = []
+        self._errors = 0
+
+    def close(self) -> List[Dict[str, Any]]:
+        """关闭最后一个窗口并返回全部窗口汇总"""
+        with self._lock:
+            if self._latencies or self._errors:
+                self._flush()
+        return self.windows
+
+
+def parse_memory_size(text: str) -> Optional[int]:
+    """解析 "123.4MiB" 之类的内存大小为字节数"""
+    match = re.match(r"\s*([\d.]+)\s*([A-Za-z]+)", text)
+    if not match:
+        return None
+    unit = _MEMORY_UNITS.get(match.group(2).lower())
+    if unit is None:
+        return None
+    return int(float(match.group(1)) * unit)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """通过 unix socket 访问 Docker Engine API 的连接"""
+
+    def __init__(self, socket_path: str, timeout: float = 5.0):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def fetch_docker_stats(container: str, docker_socket: str = DOCKER_SOCKET) -> Optional[Dict[str, Any]]:
+    """通过 Docker socket 获取一次容器统计信息，不可用返回None"""
+    if not Path(docker_socket).exists():
+        return None
+    connection = _UnixHTTPConnection(docker_socket)
+    try:
+        connection.request("GET", f"/containers/{container}/stats?stream=false")
+        response = connection.getresponse()
+        if response.status != 200:
+            return None
+        return json.loads(response.read())
+    except (OSError, ValueError, http.client.HTTPException):
+        return None
+    finally:
+        connection.close()
+
+
+def _docker_stats_cli(container: str, field: str) -> Optional[str]:
+    """通过 docker stats 命令读取一个字段，例如 {{.MemUsage}}"""
+    if shutil.which("docker") is None:
+        return None
+    try:
+        output = subprocess.run(
+            ["docker", "stats", "--no-stream", "--format", field, container],
+            capture_output=True, text=True, timeout=15,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if output.returncode != 0:
+        return None
+    return output.stdout
+
+
+class ContainerMemorySampler:
+    """容器内存采样器
+
+    依次尝试：Docker socket API → docker stats 命令 → 指定的 cgroup 文件。
+    都不可用时 sample() 返回None，长稳测试只统计延迟。
+    """
+
+    def __init__(self, container: str = "orderease-app", docker_socket: str = DOCKER_SOCKET,
+                 cgroup_file: Optional[str] = None):
+        """
+        Args:
+            container: 容器名称或ID
+            docker_socket: Docker socket 路径
+            cgroup_file: cgroup 内存文件路径，例如
+                /sys/fs/cgroup/system.slice/docker-<id>.scope/memory.current
+        """
+        self.container = container
+        self.docker_socket = docker_socket
+        self.cgroup_file = cgroup_file
+
+    def available(self) -> bool:
+        """判断是否存在可用的采样方式"""
+        return self.sample() is not None
+
+    def _sample_socket(self) -> Optional[int]:
+        stats = fetch_docker_stats(self.container, self.docker_socket)
+        if stats is None:
+            return None
+        memory = stats.get("memory_stats", {})
+        usage = memory.get("usage")
+        if usage is None:
+            return None
+        # 与 docker stats 一致，扣除页缓存（cgroup v2 为 inactive_file，v1 为 total_inactive_file）
+        details = memory.get("stats", {})
+        cache = details.get("inactive_file", details.get("total_inactive_file", 0))
+        return usage - cache if cache < usage else usage
+
+    def _sample_cli(self) -> Optional[int]:
+        output = _docker_stats_cli(self.container, "{{.MemUsage}}")
+        if output is None:
+            return None
+        return parse_memory_size(output.split("/")[0])
+
+    def _sample_cgroup(self) -> Optional[int]:
+        if not self.cgroup_file:
+            return None
+        try:
+            return int(Path(self.cgroup_file).read_text().strip())
+        except (OSError, ValueError):
+            return None
+
+    def sample(self) -> Optional[int]:
+        """采样一次容器内存（字节），不可用返回None"""
+        for method in (self._sample_socket, self._sample_cli, self._sample_cgroup):
+            value = method()
+            if value is not None:
+                return value
+        return None
+
+
+class ContainerCpuSampler:
+    """容器 CPU 使用率采样器
+
+    依次尝试 Docker socket API 和 docker stats 命令，返回百分比（100 表示占满一个核）。
+    都不可用时 sample() 返回None。
+    """
+
+    def __init__(self, container: str = "orderease-app", docker_socket: str = DOCKER_SOCKET):
+        self.container = container
+        self.docker_socket = docker_socket
+
+    def available(self) -> bool:
+        """判断是否存在可用的采样方式"""
+        return self.sample() is not None
+
+    def _sample_socket(self) -> Optional[float]:
+        stats = fetch_docker_stats(self.container, self.docker_socket)
+        if stats is None:
+            return None
+        # 与 docker stats 的计算方式一致：容器CPU时间增量 / 系统CPU时间增量 × 核数
+        cpu = stats.get("cpu_stats", {})
+        precpu = stats.get("precpu_stats", {})
+        cpu_delta = cpu.get("cpu_usage", {}).get("total_usage", 0) - precpu.get("cpu_usage", {}).get("total_usage", 0)
+        system_delta = cpu.get("system_cpu_usage", 0) - precpu.get("system_cpu_usage", 0)
+        if system_delta <= 0 or cpu_delta < 0:
+            return None
+        cpus = cpu.get("online_cpus") or len(cpu.get("cpu_usage", {}).get("percpu_usage") or []) or 1
+        return cpu_delta / system_delta * cpus * 100
+
+    def _sample_cli(self) -> Optional[float]:
+        output = _docker_stats_cli(self.container, "{{.CPUPerc}}")
+        if output is None:
+            return None
+        try:
+            return float(output.strip().rstrip("%"))
+        except ValueError:
+            return None
+
+    def sample(self) -> Optional[float]:
+        """采样一次容器 CPU 使用率（%），不可用返回None"""
+        for method in (self._sample_socket, self._sample_cli):
+            value = method()
+            if value is not None:
+                return value
+        return None
+
+
+class ResourceMonitor:
+    """在后台线程中按固定间隔调用采样器，用于统计一段负载期间的资源占用
+
+    用法:
+        with ResourceMonitor(ContainerCpuSampler(), interval=2) as monitor:
+            generator.run(profile)
+        monitor.summary()  # {"samples", "mean", "max"}
+    """
+
+    def __init__(self, sampler, interval: float = 2.0):
+        self.sampler = sampler
+        self.interval = interval
+        self.values: List[float] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _loop(self):
+        while not self._stop.is_set():
+            value = self.sampler.sample()
+            if value is not None:
+                self.values.append(value)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join(timeout=30)
+        return False
+
+    def summary(self) -> Optional[Dict[str, Any]]:
+        """返回采样汇总，没有任何采样值时返回None"""
+        if not self.values:
+            return None
+        return {
+            "samples": len(self.values),
+            "mean": round(sum(self.values) / len(self.values), 2),
+            "max": round(max(self.values), 2),
+        }
+
+
+def linear_trend(xs: Sequence[float], ys: Sequence[float]) -> Dict[str, float]:
+    """最小二乘线性拟合
+
+    Returns:
+        {"slope", "intercept", "r2"}
+    """
+    n = len(xs)
+    if n < 2:
+        return {"slope": 0.0, "intercept": ys[0] if ys else 0.0, "r2": 0.0}
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    syy = sum((y - mean_y) ** 2 for y in ys)
+    slope = sxy / sxx if sxx else 0.0
+    intercept = mean_y - slope * mean_x
+    r2 = (sxy * sxy) / (sxx * syy) if sxx and syy else 0.0
+    return {"slope": slope, "intercept": intercept, "r2": r2}
+
+
+def monotonicity(ys: Sequence[float]) -> float:
+    """Kendall 单调性系数：所有点对中上升对与下降对之差的比例，取值 -1 到 1"""
+    n = len(ys)
+    if n < 2:
+        return 0.0
+    score = 0
+    for i in range(n - 1):
+        for j in range(i + 1, n):
+            if ys[j] > ys[i]:
+                score += 1
+            elif ys[j] < ys[i]:
+                score -= 1
+    return score / (n * (n - 1) / 2)
+
+
+def detect_growth(xs: Sequence[float], ys: Sequence[float], min_growth: float = 0.2,
+                  min_monotonicity: float = 0.5) -> Dict[str, Any]:
+    """判断序列是否持续增长
+
+    Args:
+        xs: 时间（秒）
+        ys: 指标值
+        min_growth: 拟合直线在整个时间跨度上的最小相对增幅
+        min_monotonicity: 最小单调性系数
+
+    Returns:
+        {"slope_per_hour", "relative_growth", "r2", "monotonicity", "growing"}
+    """
+    trend = linear_trend(xs, ys)
+    span = (xs[-1] - xs[0]) if len(xs) > 1 else 0.0
+    start_value = trend["intercept"] + trend["slope"] * xs[0] if xs else 0.0
+    relative = (trend["slope"] * span / start_value) if start_value > 0 else 0.0
+    tau = monotonicity(ys)
+    return {
+        "slope_per_hour": round(trend["slope"] * 3600, 3),
+        "relative_growth": round(relative, 4),
+        "r2": round(trend["r2"], 4),
+        "monotonicity": round(tau, 4),
+        "growing": relative >= min_growth and tau >= min_monotonicity,
+    }
+
+
+def run_soak(build_operations: Callable[[], Sequence[Operation]], rate: float, duration: float,
+             window_seconds: float = 60.0, refresh_interval: float = 3600.0,
+             memory_sampler: Optional[ContainerMemorySampler] = None, max_workers: int = 64,
+             latency_growth: float = 0.2, memory_growth: float = 0.1) -> Dict[str, Any]:
+    """执行长稳测试
+
+    Args:
+        build_operations: 构造负载的函数，每个刷新周期调用一次（可在其中重新登录）
+        rate: 固定到达速率(rps)
+        duration: 总时长（秒）
+        window_seconds: 汇总窗口长度（秒）
+        refresh_interval: 重新构造负载的间隔（秒），应小于令牌有效期
+        memory_sampler: 容器内存采样器，None 表示不采样
+        max_workers: 负载生成器最大并发线程数
+        latency_growth: 判定延迟漂移的最小相对增幅
+        memory_growth: 判定内存增长的最小相对增幅
+
+    Returns:
+        {"config", "windows", "trends"}，windows 中每个窗口含延迟百分位和 memory_bytes
+    """
+    origin = time.perf_counter()
+    recorder = WindowedRecorder(window_seconds, origin)
+    memory_samples: Dict[int, int] = {}
+    stop = threading.Event()
+
+    def sample_memory():
+        while not stop.is_set():
+            value = memory_sampler.sample()
+            if value is not None:
+                memory_samples[int((time.perf_counter() - origin) // window_seconds)] = value
+            stop.wait(window_seconds)
+
+    sampler_thread = None
+    if memory_sampler is not None:
+        sampler_thread = threading.Thread(target=sample_memory, daemon=True)
+        sampler_thread.start()
+
+    try:
+        scheduled = 0.0
+        while scheduled < duration:
+            segment = min(refresh_interval, duration - scheduled)
+            generator = OpenLoopLoadGenerator(build_operations(), max_workers=max_workers)
+            generator.stream((rate, segment), recorder.record)
+            scheduled += segment
+            print(f"长稳测试进度: {scheduled:.0f}/{duration:.0f} 秒，已完成 {len(recorder.windows)} 个窗口")
+    finally:
+        stop.set()
+        if sampler_thread is not None:
+            sampler_thread.join(timeout=30)
+
+    windows = recorder.close()
+    for index, window in enumerate(windows):
+        window["memory_bytes"] = memory_samples.get(index)
+
+    xs = [w["start"] for w in windows if w["count"]]
+    trends = {
+        "p50": detect_growth(xs, [w["p50"] for w in windows if w["count"]], latency_growth),
+        "p99": detect_growth(xs, [w["p99"] for w in windows if w["count"]], latency_growth),
+    }
+    memory_points = [(w["start"], w["memory_bytes"]) for w in windows if w["memory_bytes"] is not None]
+    if len(memory_points) >= 2:
+        trends["memory"] = detect_growth([p[0] for p in memory_points], [p[1] for p in memory_points], memory_growth)
+
+    return {
+        "config": {"rate": rate, "duration": duration, "window_seconds": window_seconds},
+        "windows": windows,
+        "trends": trends,
+    }
+
+
+def format_soak_report(report: Dict[str, Any]) -> str:
+    """格式化长稳测试结果：窗口时间序列 + 趋势判定"""
+    lines = [f"{'时间(s)':>9}{'请求':>7}{'错误':>6}{'p50':>10}{'p99':>10}{'内存(MB)':>11}"]
+    for window in report["windows"]:
+        memory = window["memory_bytes"]
+        memory_text = f"{memory / 1024 / 1024:>11.1f}" if memory is not None else f"{'-':>11}"
+        lines.append(f"{window['start']:>9.0f}{window['count']:>7}{window['errors']:>6}"
+                     f"{window['p50']:>10.1f}{window['p99']:>10.1f}{memory_text}")
+    lines.append("")
+    for name, trend in report["trends"].items():
+        flag = "⚠ 持续增长" if trend["growing"] else "✓ 平稳"
+        lines.append(f"{name:<8}{flag}  相对增幅={trend['relative_growth']:.1%}，"
+                     f"单调性={trend['monotonicity']:.2f}，斜率/小时={trend['slope_per_hour']}")
+    return "\n".join(lines)
@@ -0,0 +1,210 @@
+"""
+多租户扇出测试 - 在多个店铺上以相同的总下单负载比较均匀分布和集中到一个热点店铺
+
+其他压测都只使用一两个店铺，而生产环境托管大量店铺且流量明显倾斜。本模块：
+
+- 逐级创建店铺（例如 1 → 10 → 50 个），每个店铺 P 个商品，已创建的店铺在下一级继续使用
+- 每一级以相同的总速率运行下单往返（创建 → 详情 → 删除），分别：
+  - spread：均匀分布到所有店铺
+  - hot：全部集中到第一个店铺（各级都是同一个店铺）
+- 对比同一级两种分布的吞吐和尾延迟：热点明显更慢说明存在按店铺加锁或单店铺热点行
+- 对比各级热点店铺的延迟：单个店铺的流量不变，延迟却随店铺总数增长，说明查询扫描了所有租户的数据
+
+下单往返会删除订单，店铺之间增长的只有店铺和商品数据；需要订单规模时先用 seed-orders 填充。
+"""
+
+import itertools
+import sys
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from admin import product_actions as admin_product_actions
+from admin.bulk_actions import purge_shop
+from admin import shop_actions as admin_shop_actions
+from perf import workloads
+from perf.load_generator import OpenLoopLoadGenerator, Operation
+
+
+DISTRIBUTIONS = ("spread", "hot")
+
+# 热点的 p99 超过均匀分布的该倍数，或吞吐低于均匀分布的 (1 - 该比例) 时判定为租户内争用
+DEFAULT_CONTENTION_FACTOR = 1.5
+DEFAULT_THROUGHPUT_DROP = 0.1
+
+# 热点店铺的 p50 在最大一级相对最小一级超过该倍数时判定为跨租户扫描
+DEFAULT_SCAN_GROWTH = 1.5
+
+TenantShop = namedtuple("TenantShop", "shop_id product_ids")
+
+
+def seed_tenants(admin_token, count: int, products: int, tenants: Sequence[TenantShop] = (),
+                 concurrency: int = 8) -> List[TenantShop]:
+    """把店铺补足到 count 个，每个新店铺创建 products 个商品
+
+    Args:
+        tenants: 已创建的店铺，保留并在其后追加
+
+    Returns:
+        全部店铺，创建失败的店铺不包含在内
+    """
+    def create_tenant(_):
+        shop_id = admin_shop_actions.create_shop(admin_token)
+        if not shop_id:
+            return None
+        product_ids = [admin_product_actions.create_product(admin_token, shop_id) for _ in range(products)]
+        return TenantShop(shop_id, [product_id for product_id in product_ids if product_id])
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        created = executor.map(create_tenant, range(max(0, count - len(tenants))))
+        return list(tenants) + [tenant for tenant in created if tenant and tenant.product_ids]
+
+
+def cleanup_tenants(admin_token, tenants: Sequence[TenantShop], concurrency: int = 8) -> List[str]:
+    """删除创建的店铺，先删除下单往返残留的订单和店铺的商品，再删除店铺
+
+    Returns:
+        未能删除的店铺ID
+    """
+    return [tenant.shop_id for tenant in tenants
+            if not purge_shop(admin_token, tenant.shop_id, concurrency=concurrency)]
+
+
+def tenant_weights(distribution: str, count: int) -> List[float]:
+    """各店铺分到的负载比例"""
+    if distribution == "spread":
+        return [1.0 / count] * count
+    if distribution == "hot":
+        return [1.0] + [0.0] * (count - 1)
+    raise ValueError(f"未知的负载分布: {distribution}")
+
+
+def _rotating_round_trip(round_trip: Callable, admin_token, shop_id, user_id, products) -> Any:
+    # 在店铺的商品间轮换，避免所有订单落在同一个商品上
+    return round_trip(admin_token, shop_id, user_id, next(products))
+
+
+def tenant_operations(admin_token, tenants: Sequence[TenantShop], user_id, weights: Sequence[float],
+                      round_trip: Callable = workloads.order_round_trip) -> List[Operation]:
+    """每个店铺一个下单往返操作，权重为该店铺的负载比例，权重为 0 的店铺不参与"""
+    return [
+        Operation(f"shop{index}.order_round_trip",
+                  partial(_rotating_round_trip, round_trip, admin_token, tenant.shop_id, user_id,
+                          itertools.cycle(tenant.product_ids)),
+                  weight=weight)
+        for index, (tenant, weight) in enumerate(zip(tenants, weights)) if weight > 0
+    ]
+
+
+def _summary(report: Dict[str, Any]) -> Dict[str, Any]:
+    overall = report["overall"]
+    return {
+        "sent": overall["sent"],
+        "failed": overall["failed"],
+        "error_rate": overall["error_rate"],
+        "throughput": overall["throughput"],
+        "corrected_ms": overall["corrected_ms"],
+        "naive_ms": overall["naive_ms"],
+        "per_shop": {name: {"sent": op["sent"], "p99_ms": op["corrected_ms"]["p99"]}
+                     for name, op in report["operations"].items()},
+    }
+
+
+def run_tenant_benchmark(admin_token, tenant_counts: Sequence[int], products: int, user_id, rate: float,
+                         duration: float, distributions: Sequence[str] = DISTRIBUTIONS, max_workers: int = 64,
+                         seed: Optional[int] = None, prepare_tenants: Callable = seed_tenants,
+                         round_trip: Callable = workloads.order_round_trip) -> Dict[str, Any]:
+    """逐级创建店铺，每一级按各分布以相同总速率运行下单往返
+
+    Args:
+        tenant_counts: 店铺数的各级
+        products: 每个店铺的商品数
+        rate: 总到达速率（每秒）
+        duration: 每种分布的运行时间（秒）
+        prepare_tenants: 补足店铺的函数，默认 seed_tenants (令牌, 数量, 商品数, 已有店铺) -> 店铺列表
+
+    Returns:
+        {"tenants": [全部店铺], "rows": [{"tenants", "distribution", "rate", "duration", "sent", "failed",
+                                           "error_rate", "throughput", "corrected_ms", "naive_ms", "per_shop"}]}
+    """
+    tenants: List[TenantShop] = []
+    rows = []
+    for count in sorted(tenant_counts):
+        tenants = prepare_tenants(admin_token, count, products, tenants)
+        if len(tenants) < count:
+            print(f"⚠ 只创建了 {len(tenants)} 个店铺，目标 {count}")
+        for distribution in distributions:
+            operations = tenant_operations(admin_token, tenants, user_id,
+                                           tenant_weights(distribution, len(tenants)), round_trip)
+            generator = OpenLoopLoadGenerator(operations, max_workers=max_workers, seed=seed)
+            report = generator.run((rate, duration))
+            rows.append({"tenants": len(tenants), "distribution": distribution, "rate": rate,
+                         "duration": duration, **_summary(report)})
+            print(f"  {len(tenants)} 个店铺 / {distribution}: 吞吐 {report['overall']['throughput']}，"
+                  f"p99 {report['overall']['corrected_ms']['p99']:.1f}ms")
+    return {"tenants": tenants, "rows": rows}
+
+
+def analyze_tenants(rows: Sequence[Dict[str, Any]], contention_factor: float = DEFAULT_CONTENTION_FACTOR,
+                    throughput_drop: float = DEFAULT_THROUGHPUT_DROP,
+                    scan_growth: float = DEFAULT_SCAN_GROWTH) -> Dict[str, Any]:
+    """对比同一级的两种分布，以及各级的热点店铺
+
+    Returns:
+        {"levels": [{"tenants", "p99_ratio", "throughput_ratio", "contention"}],
+         "hot_tenants": [...], "hot_p50_ms": [...], "scan_growth", "cross_tenant_scan"}
+        p99_ratio / throughput_ratio 为 hot 相对 spread 的倍数
+    """
+    by_key = {(row["tenants"], row["distribution"]): row for row in rows}
+    levels = []
+    for count in sorted({row["tenants"] for row in rows}):
+        spread, hot = by_key.get((count, "spread")), by_key.get((count, "hot"))
+        if not spread or not hot:
+            continue
+        p99_ratio = (round(hot["corrected_ms"]["p99"] / spread["corrected_ms"]["p99"], 2)
+                     if spread["corrected_ms"]["p99"] else None)
+        throughput_ratio = round(hot["throughput"] / spread["throughput"], 3) if spread["throughput"] else None
+        levels.append({
+            "tenants": count,
+            "p99_ratio": p99_ratio,
+            "throughput_ratio": throughput_ratio,
+            "contention": count > 1 and ((p99_ratio or 0) > contention_factor
+                                         or (throughput_ratio is not None and throughput_ratio < 1 - throughput_drop)),
+        })
+
+    hot_rows = sorted((row for row in rows if row["distribution"] == "hot"), key=lambda row: row["tenants"])
+    hot_p50 = [row["corrected_ms"]["p50"] for row in hot_rows]
+    growth = round(hot_p50[-1] / hot_p50[0], 2) if len(hot_p50) > 1 and hot_p50[0] else None
+    return {
+        "levels": levels,
+        "hot_tenants": [row["tenants"] for row in hot_rows],
+        "hot_p50_ms": hot_p50,
+        "scan_growth": growth,
+        "cross_tenant_scan": growth is not None and growth > scan_growth,
+    }
+
+
+def format_tenant_report(rows: Sequence[Dict[str, Any]], analysis: Dict[str, Any]) -> str:
+    """格式化各级各分布的吞吐和延迟，以及争用和跨租户扫描的判断"""
+    lines = [f"{'店铺数':>6}  {'分布':<8}{'发送':>7}{'失败':>6}{'吞吐':>9}{'p50':>10}{'p99':>10}{'p99.9':>10}"]
+    for row in rows:
+        latency = row["corrected_ms"]
+        lines.append(
+            f"{row['tenants']:>6}  {row['distribution']:<8}{row['sent']:>7}{row['failed']:>6}{row['throughput']:>9.2f}"
+            f"{latency['p50']:>10.1f}{latency['p99']:>10.1f}{latency['p99.9']:>10.1f}"
+        )
+    lines.append("")
+    for level in analysis["levels"]:
+        verdict = "⚠ 热点店铺明显变慢，可能存在按店铺加锁或热点行" if level["contention"] else "无明显差异"
+        lines.append(f"{level['tenants']} 个店铺: 热点 / 均匀 p99 {level['p99_ratio']}x，"
+                     f"吞吐 {level['throughput_ratio']}x — {verdict}")
+    if analysis["scan_growth"] is not None:
+        verdict = ("⚠ 单店铺流量不变但延迟随店铺数增长，查询可能扫描了所有租户"
+                   if analysis["cross_tenant_scan"] else "热点店铺延迟与店铺总数无关")
+        lines.append(f"热点店铺 p50 随店铺数 {analysis['hot_tenants']}: {analysis['hot_p50_ms']}，"
+                     f"增长 {analysis['scan_growth']}x — {verdict}")
+    return "\n".join(lines)
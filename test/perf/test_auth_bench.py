@@ -0,0 +1,114 @@
+"""
+登录认证压测工具测试
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf import auth_bench
+from perf.auth_bench import cleanup_auth_context, measure_login_headroom, prepare_auth_context, weighted_sequence
+from perf.user_pool import Identity
+from perf.load_generator import Operation, blend_operations, execute_operation
+from perf.soak import ResourceMonitor
+
+
+def make_response(status_code):
+    """构造一个只有状态码的响应对象"""
+    response = requests.Response()
+    response.status_code = status_code
+    return response
+
+
+class CountingSampler:
+    """每次采样返回递增值的模拟采样器"""
+
+    def __init__(self):
+        self.value = 0.0
+
+    def sample(self):
+        self.value += 10
+        return self.value
+
+
+class TestAuthBench:
+    """登录压测逻辑测试（不依赖服务）"""
+
+    def test_expected_status_for_rejected_logins(self):
+        """测试错误凭据操作以 401 计为成功，以 200 计为失败"""
+        rejected = Operation("login.invalid", lambda: make_response(401), expected_status=(400, 401))
+        accepted = Operation("login.invalid", lambda: make_response(200), expected_status=(400, 401))
+        plain = Operation("login", lambda: make_response(401))
+
+        assert execute_operation(rejected) == (True, 401)
+        assert execute_operation(accepted) == (False, 200)
+        assert execute_operation(plain) == (False, 401)
+
+    def test_weighted_sequence_interleaves(self):
+        """测试按权重展开为均匀交错的序列"""
+        valid = Operation("valid", lambda: True, weight=0.8)
+        invalid = Operation("invalid", lambda: True, weight=0.2)
+        sequence = [op.name for op in weighted_sequence([valid, invalid])]
+
+        assert len(sequence) == 5
+        assert sequence.count("invalid") == 1
+        assert sequence[0] == "valid" and sequence[-1] == "valid"
+
+    def test_blend_operations_scales_weights_by_rate(self):
+        """测试合并后各组权重之比等于速率之比，组内比例不变"""
+        ordering = [Operation("a", lambda: True, weight=3), Operation("b", lambda: True, weight=1)]
+        login = [Operation("login", lambda: True, weight=5)]
+        blended = {op.name: op.weight for op in blend_operations([(ordering, 4), (login, 12)])}
+
+        assert blended == {"a": 3.0, "b": 1.0, "login": 12.0}
+
+    def test_resource_monitor_summary(self):
+        """测试后台采样汇总"""
+        with ResourceMonitor(CountingSampler(), interval=0.05) as monitor:
+            time.sleep(0.18)
+        summary = monitor.summary()
+        assert summary["samples"] >= 3
+        assert summary["max"] == summary["samples"] * 10
+
+    def test_headroom_reports_ordering_impact(self):
+        """测试登录风暴阶段下单流量变慢时，影响字段反映吞吐和延迟变化"""
+        storm = [False]
+
+        def ordering():
+            time.sleep(0.03 if storm[0] else 0.001)
+            return True
+
+        def login():
+            storm[0] = True
+            return True
+
+        report = measure_login_headroom(
+            [Operation("order", ordering)], [Operation("login", login)],
+            ordering_rate=50, login_rate=50, duration=0.4, max_workers=1, cooldown=0,
+        )
+
+        assert report["baseline"]["ordering"]["sent"] == 20
+        assert report["storm"]["login"]["sent"] > 0
+        assert report["baseline"]["cpu"] is None
+        assert report["impact"]["ordering_p99_increase_ms"] > 0
+
+    def test_cleanup_deletes_registered_user(self, monkeypatch):
+        """测试清理时删除注册的前端用户和店铺"""
+        deleted = []
+        monkeypatch.setattr(auth_bench.admin_shop_actions, "create_shop", lambda *args, **kwargs: "s1")
+        monkeypatch.setattr(auth_bench.admin_shop_actions, "get_shop_temp_token", lambda token, shop_id: {})
+        monkeypatch.setattr(auth_bench, "register_identity",
+                            lambda username, password: Identity("u9", username, "token", 0))
+        monkeypatch.setattr(auth_bench.admin_user_actions, "delete_user",
+                            lambda token, user_id: deleted.append(("user", user_id)) or True)
+        monkeypatch.setattr(auth_bench.admin_shop_actions, "delete_shop",
+                            lambda token, shop_id: deleted.append(("shop", shop_id)) or True)
+
+        context = prepare_auth_context("admin")
+        assert context["user_id"] == "u9"
+        assert cleanup_auth_context("admin", context)
+        assert deleted == [("user", "u9"), ("shop", "s1")]
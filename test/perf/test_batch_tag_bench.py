@@ -0,0 +1,115 @@
+"""
+批量打标签规模测试
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf.batch_tag_bench import batch_targets, benchmark_batch_sizes, format_batch_report, recommend_chunk_size
+
+
+class TagStore:
+    """模拟服务端：每个商品 1ms，超过 max_items 返回 413；drop_every 时每隔 N 个商品漏绑一个"""
+
+    def __init__(self, max_items=100, drop_every=None):
+        self.max_items = max_items
+        self.drop_every = drop_every
+        self.bound = {}
+        self.payloads = []
+        self.lock = threading.Lock()
+
+
+def make_handler(store):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            store.payloads.append(payload)
+            product_ids = payload["product_ids"]
+            if len(product_ids) > store.max_items:
+                self._reply(413, {"error": "too many"})
+                return
+            time.sleep(len(product_ids) / 1000)
+            with store.lock:
+                for index, product_id in enumerate(product_ids):
+                    if store.drop_every and index % store.drop_every == store.drop_every - 1:
+                        continue
+                    store.bound.setdefault(product_id, set()).add(str(payload["tag_id"]))
+            self._reply(200, {"message": "ok"})
+
+        def do_GET(self):
+            params = parse_qs(urlparse(self.path).query)
+            tags = store.bound.get(params["product_id"][0], set())
+            self._reply(200, {"product_id": params["product_id"][0], "tags": [{"id": tag} for tag in sorted(tags)]})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def server(local_server):
+    def start(store):
+        return local_server(make_handler(store))
+
+    return start
+
+
+def tag_counter():
+    counter = iter(range(1, 1000))
+    return lambda: next(counter)
+
+
+class TestBatchTagBench:
+    """批量大小测量、绑定抽样和分批建议测试（使用本地 HTTP 服务）"""
+
+    def test_benchmark_finds_largest_reliable_batch(self, server):
+        """测试超过服务端上限的批量被标记失败，建议为其前一个批量；商家端点的 tag_id 为整数"""
+        store = TagStore(max_items=100)
+        base_url = server(store)
+        targets = batch_targets("admin", "owner")
+        product_ids = [10**18 + n for n in range(300)]
+
+        rows = benchmark_batch_sizes(targets, "admin", 1, product_ids, tag_counter(), sizes=(1, 10, 100, 300, 1000),
+                                     repeats=2, samples=5, seed=1, base_url=base_url)
+        assert [(row["endpoint"], row["size"]) for row in rows] == [
+            ("admin", 1), ("admin", 10), ("admin", 100), ("admin", 300),
+            ("shop_owner", 1), ("shop_owner", 10), ("shop_owner", 100), ("shop_owner", 300),
+        ]
+        assert rows[2]["status_counts"] == {"200": 2} and rows[2]["applied"] == rows[2]["sampled"] == 10
+        assert rows[3]["status_counts"] == {"413": 2} and rows[3]["sampled"] == 0
+        assert all(isinstance(item, str) for item in store.payloads[0]["product_ids"])
+        assert isinstance(store.payloads[-1]["tag_id"], int)
+
+        policy = recommend_chunk_size(rows, bound_ms=5000)
+        assert policy["admin"]["chunk_size"] == 100 and policy["admin"]["first_failure"] == 300
+        assert "最大可靠批量 100" in format_batch_report(rows, policy, bound_ms=5000)
+
+    def test_partial_application_is_not_reliable(self, server):
+        """测试返回 200 但抽样发现漏绑的批量不作为建议"""
+        store = TagStore(max_items=1000, drop_every=3)
+        rows = benchmark_batch_sizes(batch_targets("admin"), "admin", 1, list(range(100, 200)), tag_counter(),
+                                     sizes=(1, 50), repeats=1, samples=50, seed=1, base_url=server(store))
+        assert rows[0]["applied"] == rows[0]["sampled"] == 1
+        assert rows[1]["status_counts"] == {"200": 1}
+        assert rows[1]["applied"] < rows[1]["sampled"] and rows[1]["missing"]
+
+        policy = recommend_chunk_size(rows)["admin"]
+        assert policy["chunk_size"] == 1 and policy["first_failure"] == 50
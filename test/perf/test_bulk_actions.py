@@ -0,0 +1,143 @@
+"""
+批量操作执行器测试
+"""
+
+import io
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from admin import bulk_actions, order_actions, product_actions, shop_actions, tag_actions
+from admin.bulk_actions import BulkOperation, format_bulk_report, purge_shop, run_bulk
+
+
+class Recorder:
+    """替代 *_actions 函数：记录调用和最大并发，按 fail 判定失败"""
+
+    def __init__(self, fail=lambda *args: False, delay=0.005):
+        self.fail = fail
+        self.delay = delay
+        self.calls = []
+        self.streams = set()
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, name):
+        def action(*args, **kwargs):
+            with self.lock:
+                self.calls.append((name, args, kwargs))
+                self.streams.add(type(sys.stdout))
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+            print(f"✓ {name}")
+            time.sleep(self.delay)
+            with self.lock:
+                self.active -= 1
+            return not self.fail(name, *args)
+        return action
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    def install(**kwargs):
+        recorder = Recorder(**kwargs)
+        monkeypatch.setattr(product_actions, "update_product", recorder("update_product"))
+        monkeypatch.setattr(order_actions, "toggle_order_status", recorder("toggle_order_status"))
+        monkeypatch.setattr(order_actions, "delete_order", recorder("delete_order"))
+        monkeypatch.setattr(tag_actions, "batch_tag_products", recorder("batch_tag_products"))
+        return recorder
+    return install
+
+
+class TestBulkActions:
+    """分批、并发上限、进度和失败记录测试（替换 *_actions 函数）"""
+
+    def test_batches_tags_and_pipelines_the_rest(self, recorder, capsys):
+        """测试打标签按店铺和标签分组分批，其他操作逐个执行且并发不超过上限"""
+        rec = recorder()
+        operations = [BulkOperation("tag_product", 10**18 + n, 1, {"tag_id": 7}) for n in range(25)]
+        operations += [BulkOperation("tag_product", n, 2, {"tag_id": 7}) for n in range(3)]
+        operations += [BulkOperation("update_product", n, 1, {"stock": 0}) for n in range(20)]
+        operations += [BulkOperation("toggle_order_status", n, 1, {"next_status": 10}) for n in range(5)]
+        progress = []
+
+        report = run_bulk("token", iter(operations), concurrency=3, chunk_size=10,
+                          progress=lambda *args: progress.append(args[0]), progress_every=10)
+
+        batches = [call for call in rec.calls if call[0] == "batch_tag_products"]
+        assert sorted((len(args[1]), args[3]) for _, args, _ in batches) == [(3, 2), (5, 1), (10, 1), (10, 1)]
+        assert all(isinstance(product_id, str) for _, args, _ in batches for product_id in args[1])
+        assert ("update_product", ("token", 0, 1), {"stock": 0}) in rec.calls
+        assert rec.max_active <= 3
+        assert report["total"] == report["succeeded"] == 53 and report["failed"] == 0
+        assert report["requests"] == 4 + 20 + 5
+        assert progress and progress == sorted(progress) and progress[-1] == 53
+        assert "✓" not in capsys.readouterr().out
+        # 输出直接丢弃，不在内存中累积
+        assert not any(issubclass(stream, io.StringIO) for stream in rec.streams)
+
+    def test_records_each_failed_item(self, recorder):
+        """测试失败的批量请求中每个商品都记为失败，单个操作的失败和异常分别记录"""
+        def fail(name, *args):
+            if name == "delete_order" and args[1] == 3:
+                raise RuntimeError("连接中断")
+            return name == "batch_tag_products" or (name == "update_product" and args[1] == 1)
+
+        recorder(fail=fail)
+        operations = [BulkOperation("tag_product", n, 1, {"tag_id": 7}) for n in range(4)]
+        operations += [BulkOperation("update_product", n, 1, {"price": 9}) for n in range(3)]
+        operations += [BulkOperation("delete_order", n, 1) for n in range(5)]
+
+        report = run_bulk("token", operations, chunk_size=100, progress=None)
+        assert report["failed"] == 6 and report["succeeded"] == 6
+        assert report["by_kind"]["tag_product"] == {"succeeded": 0, "failed": 4}
+        errors = {(item["operation"].kind, item["operation"].target_id): item["error"] for item in report["failures"]}
+        assert errors[("update_product", 1)] == "请求失败"
+        assert errors[("delete_order", 3)] == "RuntimeError: 连接中断"
+        assert "✗ delete_order 3（店铺 1）" in format_bulk_report(report)
+
+    def test_unknown_kind_is_rejected(self, recorder):
+        """测试不支持的操作类型直接报错"""
+        recorder()
+        with pytest.raises(ValueError):
+            run_bulk("token", [BulkOperation("rename_shop", 1, 1)], progress=None)
+        assert set(bulk_actions.BATCH_HANDLERS) == {"tag_product", "untag_product"}
+        assert "delete_tag" in bulk_actions.SINGLE_HANDLERS
+
+    def test_purge_shop_follows_deletion_order(self, monkeypatch):
+        """测试按订单、商品、标签、店铺的顺序删除，分页删除直到为空，后端拒绝时不死循环"""
+        shop = {"orders": list(range(250)), "products": list(range(130)), "tags": [1, 2]}
+        deleted = []
+
+        def listing(key):
+            return lambda token, shop_id, page=1, page_size=10: [{"id": n} for n in shop[key][:page_size]]
+
+        def deleter(key, allowed):
+            def delete(token, item_id, shop_id):
+                if not allowed():
+                    return False
+                shop[key].remove(item_id)
+                deleted.append(key)
+                return True
+            return delete
+
+        monkeypatch.setattr(order_actions, "get_order_list", listing("orders"))
+        monkeypatch.setattr(product_actions, "get_product_list", listing("products"))
+        monkeypatch.setattr(tag_actions, "get_tag_list", listing("tags"))
+        monkeypatch.setattr(order_actions, "delete_order", deleter("orders", lambda: True))
+        monkeypatch.setattr(product_actions, "delete_product", deleter("products", lambda: not shop["orders"]))
+        monkeypatch.setattr(tag_actions, "delete_tag", deleter("tags", lambda: True))
+        monkeypatch.setattr(shop_actions, "delete_shop", lambda token, shop_id: not shop["products"])
+
+        assert purge_shop("token", 1, concurrency=4)
+        assert deleted == ["orders"] * 250 + ["products"] * 130 + ["tags"] * 2
+
+        shop.update(orders=[], products=[1, 2])
+        monkeypatch.setattr(product_actions, "delete_product", deleter("products", lambda: False))
+        assert not purge_shop("token", 1)
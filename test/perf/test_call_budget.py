@@ -0,0 +1,161 @@
+"""
+接口调用预算测试
+"""
+
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from conftest import API_BASE_URL, make_request_with_retry
+from frontend import test_product, test_shop
+from perf.call_budget import (
+    JOURNEYS,
+    frontend_menu_page,
+    BudgetExceeded,
+    check_budget,
+    journey,
+    load_budgets,
+    normalize_endpoint,
+    trace_calls,
+)
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    """返回固定大小的响应体，/limited 路径的第一次请求返回 429"""
+
+    limited = set()
+
+    def do_GET(self):
+        if self.path.startswith("/limited") and self.path not in self.limited:
+            self.limited.add(self.path)
+            self.send_response(429)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", "100")
+        self.end_headers()
+        self.wfile.write(b"x" * 100)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StorefrontHandler(BaseHTTPRequestHandler):
+    """模拟前端店铺接口：商品列表只返回 shop_id=3 的两个商品"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        data = {}
+        if url.path == "/product/list":
+            data = {"data": [{"id": 31}, {"id": 32}] if query.get("shop_id") == "3" else []}
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def storefront_url(local_server, monkeypatch):
+    url = local_server(StorefrontHandler)
+    monkeypatch.setattr(test_product, "API_BASE_URL", url)
+    monkeypatch.setattr(test_shop, "API_BASE_URL", url)
+    return url
+
+
+@pytest.fixture
+def base_url(local_server):
+    return local_server(EchoHandler)
+
+
+def get(url):
+    return make_request_with_retry(lambda: requests.get(url))
+
+
+class TestCallBudget:
+    """调用统计和预算比较逻辑测试（使用本地 HTTP 服务）"""
+
+    def test_normalize_endpoint(self):
+        """测试去掉 API 前缀和查询参数，路径中的ID归一化"""
+        assert normalize_endpoint(f"{API_BASE_URL}/shop/123/tags?x=1") == "/shop/{id}/tags"
+        assert normalize_endpoint(f"{API_BASE_URL}/admin/tag/bound-tags") == "/admin/tag/bound-tags"
+        assert normalize_endpoint("http://h/order/0f8fad5b-d9cb-469f-a165-70867728950e") == "/order/{id}"
+
+    def test_trace_counts_calls_and_bytes(self, base_url):
+        """测试统计调用次数、请求和响应字节数，嵌套时外层包含内层"""
+        with trace_calls() as outer:
+            get(f"{base_url}/a/1")
+            with trace_calls() as inner:
+                make_request_with_retry(lambda: requests.post(f"{base_url}/b", data=b"y" * 10))
+        get(f"{base_url}/a/2")
+
+        assert outer.summary()["calls"] == 2
+        assert outer.summary()["endpoints"] == {"GET /a/{id}": 1, "POST /b": 1}
+        assert inner.summary() == {"calls": 1, "retries": 0, "bytes": 110, "request_bytes": 10, "response_bytes": 100,
+                                   "endpoints": {"POST /b": 1}}
+
+    def test_rate_limit_retries_counted_separately(self, base_url):
+        """测试 429 重试单独计数，只有最终响应计入调用次数和字节数"""
+        with trace_calls() as counter:
+            make_request_with_retry(lambda: requests.get(f"{base_url}/limited/1"), max_retries=1, initial_wait=0)
+        summary = counter.summary()
+        assert summary["calls"] == 1 and summary["retries"] == 1
+        assert summary["response_bytes"] == 100 and summary["endpoints"] == {"GET /limited/{id}": 1}
+
+    def test_trace_includes_worker_threads(self, base_url):
+        """测试代码块启动的线程发出的请求也计入"""
+        with trace_calls() as counter:
+            threads = [threading.Thread(target=get, args=(f"{base_url}/t",)) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        assert counter.summary()["calls"] == 4
+
+    def test_check_budget(self):
+        """测试调用次数严格比较，字节数允许容差，未登记的旅程不检查"""
+        budgets = {"byte_tolerance": 0.1, "journeys": {"j": {"calls": 3, "bytes": 1000}}}
+        assert check_budget("j", {"calls": 3, "bytes": 1100}, budgets) == []
+        assert len(check_budget("j", {"calls": 4, "bytes": 1101}, budgets)) == 2
+        assert check_budget("other", {"calls": 100, "bytes": 0}, budgets) == []
+
+    def test_journey_raises_when_over_budget(self, base_url):
+        """测试旅程超出预算时抛出 BudgetExceeded，并列出调用明细"""
+        budgets = {"journeys": {"chatty": {"calls": 2}}}
+        with journey("chatty", budgets):
+            get(f"{base_url}/p/1")
+            get(f"{base_url}/p/2")
+        with pytest.raises(BudgetExceeded, match=r"GET /p/\{id\} ×3"):
+            with journey("chatty", budgets):
+                for n in range(3):
+                    get(f"{base_url}/p/{n}")
+
+    def test_menu_page_lists_the_journey_shop(self, storefront_url):
+        """测试前端菜单页旅程按店铺列出商品，逐个商品的详情调用都被统计"""
+        with trace_calls() as counter:
+            frontend_menu_page({"user_token": "token", "shop_id": 3, "products": 5})
+        assert counter.summary()["endpoints"]["GET /product/detail"] == 2
+        assert counter.summary()["calls"] == 5
+
+    def test_checked_in_budgets_cover_journeys(self):
+        """测试检入的预算文件为每个旅程登记了调用次数和字节数"""
+        budgets = load_budgets()
+        assert set(budgets["journeys"]) == set(JOURNEYS)
+        assert all(budget["calls"] and budget["bytes"] for budget in budgets["journeys"].values())
@@ -0,0 +1,103 @@
+"""
+容量探测测试
+"""
+
+import itertools
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf.capacity import CapacityFinder, compare_capacity_reports
+from perf.load_generator import NotSent, OpenLoopLoadGenerator, Operation, format_report
+
+
+class FakeGenerator:
+    """模拟负载生成器：速率超过 knee 后 p99 跳升到1秒"""
+
+    def __init__(self, knee: float):
+        self.knee = knee
+        self.calls = []
+
+    def run(self, profile):
+        rate, duration = profile
+        self.calls.append((rate, duration))
+        p99 = 50.0 if rate <= self.knee else 1000.0
+        latency = {"p50": 20.0, "p99": p99}
+        return {"overall": {
+            "error_rate": 0.0,
+            "throughput": rate,
+            "naive_ms": latency,
+            "corrected_ms": latency,
+            "status_counts": {"200": int(rate * duration)},
+        }}
+
+
+class TestCapacityFinder:
+    """容量探测算法测试（使用模拟生成器，不依赖服务）"""
+
+    def test_binary_search_converges_to_knee(self):
+        """测试二分探测收敛到拐点附近，并经过复测确认"""
+        finder = CapacityFinder(FakeGenerator(knee=37), slo_p99_ms=200, cooldown=0)
+        result = finder.find(mode="binary", start_rate=1, max_rate=1000, tolerance=0.02)
+
+        assert 36 <= result["max_sustainable_rps"] <= 37
+        assert result["confirmed"] is True
+        assert any(p["phase"] == "confirm" for p in result["curve"])
+        assert any(not p["passed"] for p in result["curve"])
+        print(f"✓ 探测结果: {result['max_sustainable_rps']} rps，共 {len(result['curve'])} 个测试点")
+
+    def test_step_search_stops_at_first_breach(self):
+        """测试阶梯探测在首次违约后停止"""
+        generator = FakeGenerator(knee=12)
+        finder = CapacityFinder(generator, slo_p99_ms=200, cooldown=0)
+        result = finder.find(mode="step", start_rate=5, increment=5, max_rate=100, confirm=False)
+
+        assert result["max_sustainable_rps"] == 10
+        assert [rate for rate, _ in generator.calls] == [5, 10, 15]
+
+    def test_confirm_backs_off_when_retest_fails(self):
+        """测试复测失败时按比例回退"""
+        generator = FakeGenerator(knee=9)
+        finder = CapacityFinder(generator, slo_p99_ms=200, cooldown=0, confirm_duration=1)
+
+        assert finder.confirm(10, backoff=0.9) == 9
+        assert [rate for rate, _ in generator.calls] == [10, 9]
+
+    def test_error_rate_breach(self):
+        """测试错误率超过阈值视为违约"""
+        finder = CapacityFinder(FakeGenerator(knee=100), max_error_rate=0.01, cooldown=0)
+        report = {"overall": {"error_rate": 0.2, "throughput": 10,
+                              "corrected_ms": {"p99": 10}}}
+        assert "错误率" in finder.check(10, report)
+
+    def test_cache_hits_count_as_served_load(self):
+        """测试一半操作为缓存命中时，报告单独列出未发送数，容量判定不因吞吐减半而违约"""
+        lock = threading.Lock()
+        outcomes = itertools.cycle([NotSent(), True])
+
+        def browse():
+            with lock:
+                return next(outcomes)
+
+        generator = OpenLoopLoadGenerator([Operation("browse", browse)], max_workers=4)
+        finder = CapacityFinder(generator, slo_p99_ms=200, cooldown=0, step_duration=1.0)
+        point = finder.measure(20)
+        report = finder.generator.run((20, 1.0))
+
+        assert point["passed"] and point["not_sent"] == 10 and point["throughput"] == 10
+        assert report["overall"]["sent"] == 10 and report["overall"]["not_sent"] == 10
+        assert report["steps"][0]["not_sent"] == 10 and report["operations"]["browse"]["not_sent"] == 10
+        assert "未发出请求" in format_report(report)
+
+    def test_compare_reports(self):
+        """测试不同部署配置的容量报告比较"""
+        reports = [
+            {"label": "tiny", "mixes": {"browse": {"max_sustainable_rps": 40}}},
+            {"label": "large", "mixes": {"browse": {"max_sustainable_rps": 90},
+                                          "ordering": {"max_sustainable_rps": 30}}},
+        ]
+        table = compare_capacity_reports(reports)
+        assert "tiny" in table and "large" in table
+        assert "ordering" in table
@@ -0,0 +1,117 @@
+"""
+数据看板统计开销测试
+"""
+
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf.dashboard_bench import (
+    analyze_scaling,
+    format_dashboard_report,
+    measure_stats,
+    run_dashboard_benchmark,
+    stats_targets,
+)
+
+
+class StatsState:
+    """模拟服务端：订单数决定计算耗时，cached 时返回首次计算的结果"""
+
+    def __init__(self, cached=False):
+        self.orders = 0
+        self.cached = cached
+        self.snapshot = None
+
+
+def make_handler(state):
+    class StatsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if state.cached and state.snapshot is not None:
+                body = state.snapshot
+            else:
+                time.sleep(state.orders / 1_000_000)
+                body = json.dumps({"data": {"orderStats": {"total": state.orders}}}).encode()
+                state.snapshot = body
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StatsHandler
+
+
+@pytest.fixture
+def server(local_server):
+    def start(state):
+        return local_server(make_handler(state))
+
+    return start
+
+
+class TestDashboardBench:
+    """看板统计冷热延迟、缓存检测和规模增长分析测试（使用本地 HTTP 服务）"""
+
+    def test_targets_cover_roles_and_periods(self):
+        """测试没有商家令牌时只生成管理员统计"""
+        assert len(stats_targets("admin", 1, periods=("week", "year"))) == 2
+        targets = stats_targets("admin", 1, "owner", periods=("week",))
+        assert [(t.role, t.path, t.params) for t in targets] == [
+            ("admin", "/admin/dashboard/stats", {"shop_id": "1", "period": "week"}),
+            ("shop_owner", "/shopOwner/dashboard/stats", {"period": "week"}),
+        ]
+
+    def test_write_check_detects_cached_stats(self, server):
+        """测试新建订单后统计不变时判定为缓存，实时计算时判定为未缓存"""
+        for cached in (True, False):
+            state = StatsState(cached=cached)
+            target = stats_targets("token", 1, periods=("week",))[0]
+
+            def mutate():
+                state.orders += 1
+
+            row = measure_stats(target, repeats=2, mutate=mutate, base_url=server(state))
+            assert row["status"] == 200
+            assert row["warm_ms"]["count"] == 2
+            assert row["stale_after_write"] is cached
+            assert row["cached"] is cached
+
+    def test_scaling_marks_per_request_computation(self, server):
+        """测试延迟与订单数成正比时判定为每次请求全表计算"""
+        state = StatsState()
+        base_url = server(state)
+        targets = stats_targets("token", 1, periods=("week",))
+
+        def prepare_size(size):
+            state.orders = size
+            return size
+
+        rows = run_dashboard_benchmark(targets, [20_000, 5_000, 80_000], prepare_size, repeats=2, base_url=base_url)
+        assert [row["orders"] for row in rows] == [5_000, 20_000, 80_000]
+
+        analysis = analyze_scaling(rows)["admin.week"]
+        assert analysis["scaling"] == "linear"
+        assert analysis["per_request"]
+        assert analysis["growth"] > 4
+        assert "每次请求全表计算" in format_dashboard_report(rows, {"admin.week": analysis})
+
+    def test_flat_series_is_not_per_request(self):
+        """测试延迟不随订单数增长时判定为与规模无关"""
+        rows = [
+            {"role": "admin", "period": "year", "status": 200, "orders": orders, "cached": False,
+             "warm_ms": {"p50": 12.0}}
+            for orders in (10_000, 100_000, 1_000_000)
+        ]
+        analysis = analyze_scaling(rows)["admin.year"]
+        assert analysis["scaling"] == "flat"
+        assert not analysis["per_request"]
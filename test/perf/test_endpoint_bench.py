@@ -0,0 +1,130 @@
+"""
+GET 端点自动基准测试
+"""
+
+import json
+import sys
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import schemathesis
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf.endpoint_bench import (
+    benchmark_templates,
+    build_templates,
+    format_endpoint_report,
+    resolve_parameter,
+    store_endpoint_results,
+)
+from perf.results_store import ResultsStore
+from perf.slow_fuzz import select_operations
+
+
+def query(name, required=False, kind="string"):
+    return {"name": name, "in": "query", "type": kind, "required": required}
+
+
+def get(*parameters):
+    return {"get": {"parameters": list(parameters), "responses": {"200": {"description": "ok"}}}}
+
+
+SPEC = {
+    "swagger": "2.0",
+    "info": {"title": "OrderEase", "version": "1"},
+    "basePath": "/api/order-ease/v1",
+    "paths": {
+        "/admin/product/detail": get(query("id", True), query("shop_id", True)),
+        "/admin/order/list": get(query("page", kind="integer"), query("pageSize", kind="integer"), query("shop_id")),
+        "/admin/tag/{tagId}/products": get({"name": "tagId", "in": "path", "type": "string", "required": True}),
+        "/admin/dashboard/stats": get(query("period", True)),
+        "/shopOwner/order/list": get(query("shop_id", True)),
+        "/admin/order/delete": {"delete": {"parameters": [query("id", True)], "responses": {"200": {"description": "ok"}}}},
+    },
+}
+
+CONTEXT = {"shop_id": 1, "product_id": 10**18 + 7, "order_id": 55, "tag_id": 9}
+
+
+def make_handler(requests_seen):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            requests_seen.append((url.path, {key: values[0] for key, values in parse_qs(url.query).items()},
+                                  self.headers.get("Authorization")))
+            status = 404 if url.path.endswith("stats") else 200
+            data = json.dumps({"data": []}).encode()
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def server(local_server):
+    def start(handler):
+        return local_server(handler, threaded=True) + "/api/order-ease/v1"
+
+    return start
+
+
+class TestEndpointBench:
+    """参数取值、模板生成、测量和结果存储测试（使用本地 HTTP 服务）"""
+
+    def test_resolve_parameter(self):
+        """测试固定取值、同名ID、id 按路径实体确定，以及 overrides 优先"""
+        assert resolve_parameter("pageSize", "/admin/order/list", CONTEXT) == 10
+        assert resolve_parameter("shopId", "/admin/order/list", CONTEXT) == "1"
+        assert resolve_parameter("id", "/admin/product/detail", CONTEXT) == str(10**18 + 7)
+        assert resolve_parameter("id", "/admin/user/detail", CONTEXT) is None
+        assert resolve_parameter("period", "/admin/dashboard/stats", CONTEXT, {"period": "week"}) == "week"
+
+    def test_resolve_parameter_entity_segments(self):
+        """测试 id 只按完整的路径段（含复数）确定实体，/shopOwner 不会被当作店铺"""
+        assert resolve_parameter("id", "/shopOwner/order/detail", CONTEXT) == "55"
+        assert resolve_parameter("id", "/shopOwner/product/detail", CONTEXT) == str(10**18 + 7)
+        assert resolve_parameter("id", "/shopOwner/dashboard/stats", CONTEXT) is None
+        assert resolve_parameter("id", "/frontend/products/detail", CONTEXT) == str(10**18 + 7)
+        assert resolve_parameter("id", "/admin/tags", CONTEXT) == "9"
+        assert resolve_parameter("id", "/admin/productImage", CONTEXT) is None
+
+    def test_templates_and_benchmark(self, server, tmp_path):
+        """测试只为 GET 端点生成模板，无法确定必填参数或没有令牌的端点跳过，测量后写入结果存储"""
+        seen = []
+        base_url = server(make_handler(seen))
+        operations = select_operations(schemathesis.from_dict(SPEC, base_url=base_url))
+        context_for = lambda path: None if path.startswith("/shopOwner") else CONTEXT
+        templates, skipped = build_templates(operations, context_for)
+
+        assert sorted(template["path"] for template in templates) == [
+            "/admin/order/list", "/admin/product/detail", "/admin/tag/{tagId}/products"]
+        assert {item["endpoint"]: item["reason"] for item in skipped} == {
+            "GET /admin/dashboard/stats": "无法确定必填参数: period",
+            "GET /shopOwner/order/list": "没有对应身份的令牌",
+        }
+        detail = next(template for template in templates if template["path"] == "/admin/product/detail")
+        assert detail["query"] == {"id": str(10**18 + 7), "shop_id": "1"}
+
+        templates, _ = build_templates(operations, context_for, overrides={"period": "week"})
+        rows = benchmark_templates(templates, lambda path: "admin-token", warmup=2, iterations=5, base_url=base_url)
+        assert len(seen) == len(templates) * 7
+        assert ("/api/order-ease/v1/admin/tag/9/products", {}, "Bearer admin-token") in seen
+        by_endpoint = {row["endpoint"]: row for row in rows}
+        assert by_endpoint["GET /admin/order/list"]["latency_ms"]["count"] == 5
+        assert by_endpoint["GET /admin/order/list"]["ok"] and not by_endpoint["GET /admin/dashboard/stats"]["ok"]
+
+        store = ResultsStore(tmp_path / "results.jsonl")
+        assert store_endpoint_results(store, rows) == []
+        slower_rows = [dict(row, latency_ms=dict(row["latency_ms"], p50=row["latency_ms"]["p50"] * 3 + 1)) for row in rows]
+        slower = store_endpoint_results(store, slower_rows)
+        assert {item["endpoint"] for item in slower} == {row["endpoint"] for row in rows if row["ok"]}
+        report = format_endpoint_report(rows, skipped, slower)
+        assert "跳过 2 个端点" in report and "相比上一次变慢的端点" in report
@@ -0,0 +1,166 @@
+"""
+压测客户端缓存测试
+"""
+
+import sys
+import time
+from functools import partial
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf import workloads
+from perf.http_cache import ClientCaches, HttpCache
+from perf.load_generator import OpenLoopLoadGenerator, Operation
+from perf.user_pool import Identity, UserPool
+
+
+class JsonHandler(BaseHTTPRequestHandler):
+    """按路径返回不同缓存策略的 JSON 响应，记录收到的请求"""
+
+    requests_seen = []
+
+    def do_GET(self):
+        JsonHandler.requests_seen.append((self.path, dict(self.headers)))
+        path = self.path.split("?")[0]
+        body = f'{{"path": "{self.path}", "lang": "{self.headers.get("Accept-Language")}"}}'.encode()
+        if path == "/etag":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.send_header("ETag", '"v1"')
+                self.end_headers()
+                return
+            headers = {"Cache-Control": "no-cache", "ETag": '"v1"'}
+        elif path == "/fresh":
+            headers = {"Cache-Control": "max-age=60"}
+        elif path == "/vary":
+            headers = {"Cache-Control": "max-age=60", "Vary": "Accept-Language"}
+        else:
+            headers = {"Cache-Control": "no-store"}
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def base_url(local_server):
+    JsonHandler.requests_seen = []
+    return local_server(JsonHandler)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestHttpCache:
+    """浏览器式缓存逻辑测试（使用本地 HTTP 服务）"""
+
+    def test_fresh_entry_skips_request_until_expired(self, base_url):
+        """测试新鲜期内不发请求，过期后重新下载"""
+        clock = FakeClock()
+        cache = HttpCache(clock=clock)
+        assert cache.get(f"{base_url}/fresh", {"page": 1})[1] == "miss"
+        clock.now = 59
+        response, outcome = cache.get(f"{base_url}/fresh", {"page": 1})
+        assert outcome == "fresh"
+        assert response.json()["path"] == "/fresh?page=1"
+        assert cache.get(f"{base_url}/fresh", {"page": 2})[1] == "miss"
+        clock.now = 61
+        assert cache.get(f"{base_url}/fresh", {"page": 1})[1] == "miss"
+        assert len(JsonHandler.requests_seen) == 3
+
+    def test_no_cache_revalidates_with_etag(self, base_url):
+        """测试 no-cache 的响应每次都带 If-None-Match 校验，304 时复用缓存内容"""
+        cache = HttpCache()
+        first, outcome = cache.get(f"{base_url}/etag")
+        assert outcome == "miss"
+        response, outcome = cache.get(f"{base_url}/etag")
+        assert outcome == "not_modified"
+        assert response.json() == first.json()
+        assert JsonHandler.requests_seen[-1][1]["If-None-Match"] == '"v1"'
+
+    def test_vary_separates_variants(self, base_url):
+        """测试按 Vary 指定的请求头区分缓存变体"""
+        cache = HttpCache()
+        zh = {"Accept-Language": "zh-CN"}
+        en = {"Accept-Language": "en"}
+        assert cache.get(f"{base_url}/vary", headers=zh)[1] == "miss"
+        assert cache.get(f"{base_url}/vary", headers=en)[1] == "miss"
+        response, outcome = cache.get(f"{base_url}/vary", headers=zh)
+        assert outcome == "fresh"
+        assert response.json()["lang"] == "zh-CN"
+        assert len(cache) == 2
+
+    def test_no_store_is_not_cached(self, base_url):
+        """测试 no-store 的响应不存入缓存"""
+        cache = HttpCache()
+        cache.get(f"{base_url}/private")
+        assert cache.get(f"{base_url}/private")[1] == "miss"
+        assert len(cache) == 0
+
+    def test_lru_eviction_bounds_memory(self, base_url):
+        """测试超过内存上限时淘汰最近最少使用的条目"""
+        cache = HttpCache()
+        cache.get(f"{base_url}/fresh", {"page": 0})
+        entry_size = cache.size
+        cache.max_bytes = entry_size * 2 + entry_size // 2
+        cache.get(f"{base_url}/fresh", {"page": 1})
+        cache.get(f"{base_url}/fresh", {"page": 0})  # 标记 page=0 为最近使用
+        cache.get(f"{base_url}/fresh", {"page": 2})
+
+        assert cache.evictions == 1
+        assert cache.size <= cache.max_bytes
+        assert cache.get(f"{base_url}/fresh", {"page": 0})[1] == "fresh"
+        assert cache.get(f"{base_url}/fresh", {"page": 1})[1] == "miss"
+
+
+class TestClientCaches:
+    """按用户的缓存和原始/修正请求率统计测试"""
+
+    def test_caches_are_per_user(self, base_url):
+        """测试不同用户不共享缓存，统计区分浏览次数和实际请求"""
+        caches = ClientCaches()
+        for user in ("u1", "u2"):
+            for _ in range(3):
+                caches.get(user, "fresh", f"{base_url}/fresh")
+        summary = caches.summary(elapsed=2.0)
+        row = summary["endpoints"]["fresh"]
+        assert summary["users"] == 2
+        assert (row["views"], row["requests"], row["fresh"]) == (6, 2, 4)
+        assert row["raw_rps"] == 3.0
+        assert row["adjusted_rps"] == 1.0
+
+    def test_disabled_sends_every_view(self, base_url):
+        """测试关闭缓存时每次浏览都请求服务端"""
+        caches = ClientCaches(enabled=False)
+        for _ in range(3):
+            caches.get("u1", "fresh", f"{base_url}/fresh")
+        row = caches.summary(elapsed=1.0)["endpoints"]["fresh"]
+        assert row["raw_rps"] == row["adjusted_rps"] == 3.0
+        assert len(JsonHandler.requests_seen) == 3
+
+    def test_fresh_hits_not_sampled(self, base_url, monkeypatch):
+        """测试压测中缓存直接命中不计入延迟样本，只在缓存统计中计数"""
+        monkeypatch.setattr(workloads, "API_BASE_URL", base_url)
+        pool = UserPool([Identity("u1", "user", "token", time.time() + 3600)])
+        caches = ClientCaches()
+        operation = Operation("fresh", partial(workloads.customer_cached_get, pool, caches, "fresh", "/fresh"))
+        report = OpenLoopLoadGenerator([operation], max_workers=1).run([(20, 0.5)])
+
+        row = caches.summary(elapsed=0.5)["endpoints"]["fresh"]
+        assert (row["views"], row["requests"], row["fresh"]) == (10, 1, 9)
+        assert report["overall"]["sent"] == 1 and report["overall"]["failed"] == 0
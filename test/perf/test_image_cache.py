@@ -0,0 +1,121 @@
+"""
+图片缓存检查测试
+"""
+
+import sys
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf.http_cache import freshness_lifetime, parse_cache_control
+from perf.image_cache import ImageTarget, check_conditional_requests, inspect_cache_headers, simulate_returning_customers
+
+
+IMAGE_BODY = b"\x89PNG" + b"\0" * 2044
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    """返回固定图片，带 ETag 时支持 If-None-Match"""
+
+    cache_control = "max-age=0"
+    etag = '"v1"'
+    requests_seen = []
+
+    def do_GET(self):
+        ImageHandler.requests_seen.append(dict(self.headers))
+        if self.etag and self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(IMAGE_BODY)))
+        if self.cache_control:
+            self.send_header("Cache-Control", self.cache_control)
+        if self.etag:
+            self.send_header("ETag", self.etag)
+        self.end_headers()
+        self.wfile.write(IMAGE_BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(local_server, cache_control, etag):
+    ImageHandler.cache_control = cache_control
+    ImageHandler.etag = etag
+    ImageHandler.requests_seen = []
+    return local_server(ImageHandler)
+
+
+class TestHttpCacheSemantics:
+    """缓存响应头解析测试"""
+
+    def test_parse_cache_control(self):
+        """测试指令名小写、数值转 int、带引号的值去掉引号"""
+        directives = parse_cache_control('Public, MAX-AGE=3600, no-cache="Set-Cookie"')
+        assert directives == {"public": True, "max-age": 3600, "no-cache": "Set-Cookie"}
+        assert parse_cache_control(None) == {}
+
+    def test_freshness_lifetime_sources(self):
+        """测试 max-age 优先于 Expires，no-store 为 0，仅有 Last-Modified 时使用启发式"""
+        date = "Mon, 01 Jan 2024 00:00:00 GMT"
+        assert freshness_lifetime({"Cache-Control": "max-age=60", "Expires": "0"}) == \
+            {"lifetime": 60.0, "source": "max-age"}
+        assert freshness_lifetime({"Cache-Control": "no-store, max-age=60"})["lifetime"] == 0
+        assert freshness_lifetime({"Date": date, "Expires": "Mon, 01 Jan 2024 01:00:00 GMT"}) == \
+            {"lifetime": 3600.0, "source": "expires"}
+        assert freshness_lifetime({"Date": date, "Last-Modified": "Sun, 31 Dec 2023 14:00:00 GMT"}) == \
+            {"lifetime": 3600.0, "source": "heuristic"}
+        assert freshness_lifetime({})["source"] is None
+
+    def test_inspect_reports_missing_validators(self):
+        """测试缺少校验器和 Cache-Control 时列出问题"""
+        assert len(inspect_cache_headers({})["issues"]) == 2
+        assert inspect_cache_headers({"ETag": '"a"', "Cache-Control": "max-age=86400"})["issues"] == []
+
+
+class TestImageCacheSimulation:
+    """条件请求和回访模拟测试（使用本地 HTTP 服务）"""
+
+    def test_conditional_request_returns_304(self, local_server):
+        """测试带 If-None-Match 重放时识别出 304 支持"""
+        base_url = serve(local_server, "max-age=0", '"v1"')
+        target = ImageTarget("product.image", "a.png", base_url=base_url)
+        result = check_conditional_requests(target)
+        assert result["status"] == 200
+        assert result["bytes"] == len(IMAGE_BODY)
+        assert result["if_none_match"] == 304
+        assert result["supports_304"]
+
+    def test_revalidation_saves_bytes(self, local_server):
+        """测试新鲜期为 0 但有 ETag 时，回访只下载一次，其余为 304"""
+        base_url = serve(local_server, "max-age=0", '"v1"')
+        target = ImageTarget("shop.image", "a.png", base_url=base_url)
+        result = simulate_returning_customers([target], customers=3, visits=4, concurrency=2)
+        assert result["requests"] == 12
+        assert result["full"] == 3
+        assert result["not_modified"] == 9
+        assert result["not_modified_rate"] == 0.75
+        assert result["wasted_bytes"] == 0
+        assert result["bytes_saved"] == 9 * len(IMAGE_BODY)
+
+    def test_fresh_hits_skip_requests(self, local_server):
+        """测试新鲜期内的回访不发请求"""
+        base_url = serve(local_server, "max-age=3600", '"v1"')
+        target = ImageTarget("product.image", "a.png", base_url=base_url)
+        result = simulate_returning_customers([target], customers=2, visits=3, visit_interval=600)
+        assert result["requests"] == 2
+        assert result["fresh_hits"] == 4
+
+    def test_no_validators_wastes_bytes(self, local_server):
+        """测试没有缓存头时每次都完整下载，超出理想值的部分计为浪费"""
+        base_url = serve(local_server, None, None)
+        target = ImageTarget("product.image", "a.png", base_url=base_url)
+        result = simulate_returning_customers([target], customers=2, visits=3)
+        assert result["full"] == 6
+        assert result["not_modified"] == 0
+        assert result["wasted_bytes"] == 4 * len(IMAGE_BODY)
+        assert all("If-None-Match" not in headers for headers in ImageHandler.requests_seen)
@@ -0,0 +1,119 @@
+"""
+订单生命周期吞吐测试
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf.lifecycle_bench import (
+    DEFAULT_STATUS_FLOW,
+    flow_transitions,
+    format_lifecycle_report,
+    run_lifecycle,
+    verify_states,
+)
+
+
+class OrderStore:
+    """模拟服务端：严格模式只接受当前状态的下一步，宽松模式接受任何下一状态"""
+
+    def __init__(self, order_ids, strict=True, delay=0.003):
+        self.transitions = flow_transitions(DEFAULT_STATUS_FLOW)
+        self.status = {str(order_id): 1 for order_id in order_ids}
+        self.strict = strict
+        self.delay = delay
+        self.lock = threading.Lock()
+
+
+def make_handler(store):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_PUT(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(store.delay)
+            with store.lock:
+                current = store.status[payload["id"]]
+                if store.strict and store.transitions.get(current) != payload["next_status"]:
+                    self._reply(409, {"error": "invalid transition"})
+                    return
+                store.status[payload["id"]] = payload["next_status"]
+            self._reply(200, {"message": "ok"})
+
+        def do_GET(self):
+            order_id = parse_qs(urlparse(self.path).query)["id"][0]
+            self._reply(200, {"data": {"id": order_id, "status": store.status[order_id]}})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def server(local_server):
+    def start(store):
+        return local_server(make_handler(store), threaded=True)
+
+    return start
+
+
+class TestLifecycleBench:
+    """状态流转解析、并发推进和冲突统计测试（使用本地 HTTP 服务）"""
+
+    def test_flow_transitions(self):
+        """测试每个非终态状态沿第一个动作到达下一个状态"""
+        assert flow_transitions(DEFAULT_STATUS_FLOW) == {1: 2, 2: 3, 3: 10}
+
+    def test_sessions_complete_orders_and_count_conflicts(self, server):
+        """测试多个会话争用少量热点订单时，全部订单走到终态，冲突被拒绝且与服务端状态一致"""
+        order_ids = [10**18 + n for n in range(6)]
+        store = OrderStore(order_ids)
+        base_url = server(store)
+        report = run_lifecycle(["a", "b", "c", "d"], 1, order_ids, flow_transitions(DEFAULT_STATUS_FLOW),
+                               hot_orders=1, seed=1, base_url=base_url)
+
+        assert report["completed_orders"] == 6 and report["stuck_orders"] == []
+        assert report["applied"] == 18 and report["errors"] == 0
+        assert report["conflicts"] > 0 and report["accepted_stale"] == 0
+        assert report["attempts"] == report["applied"] + report["conflicts"]
+        assert set(report["transitions"]) == {"1->2", "2->3", "3->10"}
+        assert report["transitions"]["3->10"]["time_in_state_ms"]["count"] == 6
+
+        verification = verify_states("a", 1, report["ledger"], samples=6, base_url=base_url)
+        assert verification == {"sampled": 6, "mismatched": []}
+        assert "6 个订单（热点 1 个）" in format_lifecycle_report(report, verification)
+
+    def test_accepted_stale_updates_are_flagged(self, server):
+        """测试接口接受过期状态变更时记为 accepted_stale 并在报告中提示"""
+        order_ids = list(range(1, 4))
+        store = OrderStore(order_ids, strict=False, delay=0.01)
+        report = run_lifecycle(["a", "b", "c", "d"], 1, order_ids, flow_transitions(DEFAULT_STATUS_FLOW),
+                               hot_orders=1, seed=2, base_url=server(store))
+        assert report["completed_orders"] == 3
+        assert report["accepted_stale"] > 0
+        assert "接受了基于过期状态的变更" in format_lifecycle_report(report)
+
+    def test_failing_orders_are_abandoned(self, server):
+        """测试同一订单连续失败达到上限后不再推进"""
+        store = OrderStore([1, 2])
+        store.transitions = {}
+        report = run_lifecycle(["a"], 1, [1, 2], flow_transitions(DEFAULT_STATUS_FLOW), max_errors=2,
+                               base_url=server(store))
+        assert sorted(report["stuck_orders"]) == [1, 2] and report["errors"] == 4
+        assert report["completed_orders"] == 0
@@ -0,0 +1,133 @@
+"""
+开环负载生成器测试
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import conftest
+from perf.load_generator import (
+    OpenLoopLoadGenerator,
+    Operation,
+    execute_operation,
+    normalize_profile,
+    percentile,
+    summarize_latencies,
+)
+from perf import workloads
+
+
+class TestLatencyMath:
+    """延迟统计计算测试"""
+
+    def test_percentile_interpolation(self):
+        """测试百分位线性插值"""
+        values = [10, 20, 30, 40, 50]
+        assert percentile(values, 0) == 10
+        assert percentile(values, 50) == 30
+        assert percentile(values, 100) == 50
+        assert percentile(values, 75) == 40
+        assert percentile([], 99) == 0.0
+
+    def test_summarize_latencies(self):
+        """测试延迟汇总字段"""
+        summary = summarize_latencies([5, 1, 3])
+        assert summary["count"] == 3
+        assert summary["min"] == 1
+        assert summary["max"] == 5
+        assert summary["p50"] == 3
+        assert "p99.9" in summary
+
+    def test_normalize_profile(self):
+        """测试速率曲线规范化"""
+        assert normalize_profile((5, 10)) == [(5.0, 10.0)]
+        assert normalize_profile([(1, 2), (3, 4)]) == [(1.0, 2.0), (3.0, 4.0)]
+        with pytest.raises(ValueError):
+            normalize_profile([(0, 10)])
+
+
+class TestOpenLoopSchedule:
+    """开环调度测试（使用本地模拟操作，不依赖服务）"""
+
+    def test_sends_planned_count_per_step(self):
+        """测试每个阶段按 rate * duration 发送请求"""
+        generator = OpenLoopLoadGenerator([Operation("noop", lambda: True)], max_workers=4)
+        report = generator.run([(20, 0.5), (40, 0.5)])
+
+        assert [step["sent"] for step in report["steps"]] == [10, 20]
+        assert report["overall"]["failed"] == 0
+        print(f"✓ 两个阶段分别发送 {report['steps'][0]['sent']} / {report['steps'][1]['sent']} 个请求")
+
+    def test_corrected_latency_exposes_queueing(self):
+        """测试服务变慢时校正延迟包含排队时间，而朴素延迟不包含"""
+        def slow_operation():
+            time.sleep(0.05)
+            return True
+
+        # 单线程处理 40 rps、每次 50ms 的请求，必然排队
+        generator = OpenLoopLoadGenerator([Operation("slow", slow_operation)], max_workers=1)
+        report = generator.run((40, 0.5))
+
+        naive = report["overall"]["naive_ms"]
+        corrected = report["overall"]["corrected_ms"]
+        assert naive["p99"] < 100, f"朴素延迟应接近服务时间: {naive}"
+        assert corrected["p99"] > naive["p99"] * 2, f"校正延迟应显著高于朴素延迟: {corrected}"
+        print(f"✓ 朴素 p99={naive['p99']}ms，校正 p99={corrected['p99']}ms")
+
+    def test_failures_and_exceptions_counted(self):
+        """测试失败返回值和异常都计为失败"""
+        def raise_error():
+            raise ConnectionError("boom")
+
+        operations = [
+            Operation("none", lambda: None),
+            Operation("false", lambda: False),
+            Operation("raise", raise_error),
+        ]
+        report = OpenLoopLoadGenerator(operations, max_workers=4, seed=1).run((30, 0.2))
+
+        assert report["overall"]["sent"] == 6
+        assert report["overall"]["succeeded"] == 0
+        assert report["overall"]["error_rate"] == 1.0
+
+    def test_helper_failure_overrides_recorded_status(self):
+        """测试记录了 2xx 响应时，操作工具类返回 False/None 仍计为失败，空列表按状态码计为成功"""
+        class Response(requests.Response):
+            def __init__(self, status_code):
+                super().__init__()
+                self.status_code = status_code
+
+        def helper(status, result):
+            def func():
+                conftest.make_request_with_retry(lambda: Response(status), max_retries=0)
+                return result
+            return func
+
+        assert execute_operation(Operation("bad-body", helper(200, None))) == (False, 200)
+        assert execute_operation(Operation("follow-up", helper(200, False))) == (False, 200)
+        assert execute_operation(Operation("empty-list", helper(200, []))) == (True, 200)
+        assert execute_operation(Operation("server-error", helper(500, {"id": 1}))) == (False, 500)
+        assert execute_operation(Operation("rejected", helper(401, None), expected_status=(401,))) == (True, 401)
+
+
+class TestOpenLoopAgainstApi:
+    """针对真实接口的开环压测冒烟测试"""
+
+    def test_admin_read_workload(self, admin_token, test_shop_id):
+        """测试以低速率对管理员浏览负载压测"""
+        if not admin_token or not test_shop_id:
+            pytest.skip("缺少管理员令牌或店铺ID")
+
+        operations = workloads.admin_read_operations(admin_token, test_shop_id)
+        report = OpenLoopLoadGenerator(operations, max_workers=8, seed=42).run((2, 3))
+
+        assert report["overall"]["sent"] == 6
+        assert set(report["operations"]) <= {op.name for op in operations}
+        print(f"✓ 开环压测完成，成功 {report['overall']['succeeded']}/{report['overall']['sent']}，"
+              f"校正 p99: {report['overall']['corrected_ms']['p99']}ms")
@@ -0,0 +1,143 @@
+"""
+访问日志回放测试
+"""
+
+import gzip
+import json
+import sys
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf.log_replay import (
+    format_replay_report,
+    iter_log_entries,
+    make_token_resolver,
+    normalize_endpoint,
+    open_log,
+    parse_accept_date,
+    replay_log,
+    substitute_ids,
+)
+from perf.user_pool import Identity
+
+
+BASE = "/api/order-ease/v1"
+
+
+def log_line(second, path, status=200, tr=12, method="GET", client="10.0.0.1", prefix=""):
+    return (f'{prefix}{client}:51234 [19/Oct/2026:10:00:{second:06.3f}] https_front~ app_backend/app1 '
+            f'0/0/1/{tr}/{tr + 1} {status} 512 - - ---- 3/3/1/1/0 0/0 "{method} {BASE}{path} HTTP/1.1"\n')
+
+
+POOLS = {"shop_id": ["1"], "product_id": ["101", "102", "103"], "tag_id": ["9"]}
+
+
+@pytest.fixture
+def server(local_server):
+    seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            seen.append((url.path, {key: values[0] for key, values in parse_qs(url.query).items()},
+                         self.headers.get("Authorization")))
+            status = 404 if url.path.endswith("missing") else 200
+            data = json.dumps({"data": []}).encode()
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return local_server(Handler, threaded=True) + BASE, seen
+
+
+class TestLogReplay:
+    """日志解析、ID映射和按到达间隔回放测试（使用本地 HTTP 服务）"""
+
+    def test_parse_and_filter_lines(self):
+        """测试解析原始格式和带 syslog 前缀的日志，非 API 路径、写请求和登录请求被筛除"""
+        lines = [
+            log_line(1.5, "/admin/order/list?shop_id=77&page=2"),
+            log_line(2.25, "/product/detail?id=5", tr=-1, prefix="Oct 19 10:00:02 lb haproxy[42]: "),
+            log_line(3, "/admin/product/update", method="PUT"),
+            log_line(4, "/login"),
+            'not a haproxy line\n',
+            '10.0.0.1:1 [19/Oct/2026:10:00:05.000] f b/s 0/0/0/1/1 200 10 - - ---- 1/1/1/1/0 0/0 "GET /index.html HTTP/1.1"\n',
+        ]
+        stats = {}
+        entries = list(iter_log_entries(lines, base_url=f"http://lb{BASE}", stats=stats))
+        assert [entry.path for entry in entries] == ["/admin/order/list", "/product/detail"]
+        assert entries[0].query == [("shop_id", "77"), ("page", "2")] and entries[0].server_ms == 12
+        assert entries[1].server_ms is None
+        assert entries[1].timestamp - entries[0].timestamp == pytest.approx(0.75)
+        assert stats == {"lines": 6, "unparsed": 2, "filtered": 2, "replayed": 2}
+
+        assert len(list(iter_log_entries(lines, base_url=f"http://lb{BASE}", limit=1))) == 1
+        assert parse_accept_date("01/Jan/1970:00:00:01.5") == 1.5
+
+    def test_open_gzip_log(self, tmp_path):
+        """测试直接读取 .gz 日志"""
+        path = tmp_path / "haproxy.log.gz"
+        with gzip.open(path, "wt") as handle:
+            handle.write(log_line(1, "/admin/order/list"))
+        assert len(list(iter_log_entries(open_log(path), base_url=f"http://lb{BASE}"))) == 1
+
+    def test_substitute_ids_is_stable(self):
+        """测试同一个日志ID总是映射到同一个测试ID，路径中的数字段按前一段确定实体"""
+        path, query = substitute_ids("/admin/tag/123/products", [("id", "555"), ("product_id", "555"),
+                                                                 ("shop_id", "77"), ("page", "2")], POOLS)
+        assert path == "/admin/tag/9/products"
+        assert query[0] == ("id", "9") and query[2:] == [("shop_id", "1"), ("page", "2")]
+        assert query[1][1] in POOLS["product_id"]
+        assert substitute_ids("/product/detail", [("id", "555")], POOLS)[1] == [("id", query[1][1])]
+        assert substitute_ids("/order/detail", [("id", "8")], POOLS)[1] == [("id", "8")]
+        assert normalize_endpoint("GET", "/admin/tag/123/products") == "GET /admin/tag/{id}/products"
+
+    def test_token_resolver(self):
+        """测试按路径和客户端IP选择令牌"""
+        identities = [Identity(str(n), f"u{n}", f"user-{n}", 0) for n in range(4)]
+        token_for = make_token_resolver("admin", "owner", identities)
+        assert token_for("/admin/order/list", "1.1.1.1") == "admin"
+        assert token_for("/shopOwner/order/list", "1.1.1.1") == "owner"
+        assert token_for("/product/list", "1.1.1.1") == token_for("/order/list", "1.1.1.1")
+        assert make_token_resolver()("/product/list", "1.1.1.1") is None
+
+    def test_replay_keeps_inter_arrival_timing(self, server):
+        """测试按倍速保持到达间隔，请求带上映射后的ID和令牌，并统计状态码不一致"""
+        base_url, seen = server
+        lines = [log_line(0, "/admin/product/detail?id=42&shop_id=77"),
+                 log_line(0.2, "/admin/missing"),
+                 log_line(0.6, "/product/detail?id=42", client="10.0.0.9")]
+        entries = iter_log_entries(lines, base_url=base_url)
+        report = replay_log(entries, make_token_resolver("admin", None, [Identity("1", "u", "user", 0)]), POOLS,
+                            speed=2, base_url=base_url)
+
+        assert report["requests"] == 3 and report["log_span_s"] == pytest.approx(0.6)
+        assert report["elapsed_s"] >= 0.3
+        paths = {path: (params, auth) for path, params, auth in seen}
+        product = paths[f"{BASE}/admin/product/detail"]
+        assert product[0]["shop_id"] == "1" and product[0]["id"] in POOLS["product_id"] and product[1] == "Bearer admin"
+        assert paths[f"{BASE}/product/detail"] == ({"id": product[0]["id"]}, "Bearer user")
+
+        missing = report["endpoints"]["GET /admin/missing"]
+        assert missing["status_mismatches"] == 1 and missing["status_counts"] == {"404": 1}
+        assert report["endpoints"]["GET /admin/product/detail"]["logged_ms"]["p50"] == 12
+        assert "GET /admin/missing" in format_replay_report(report, {"lines": 3, "unparsed": 0, "filtered": 0})
+
+    def test_replay_as_fast_as_possible(self, server):
+        """测试 speed=0 时忽略日志间隔尽快发送"""
+        base_url, seen = server
+        lines = [log_line(second, "/admin/order/list") for second in range(0, 50, 5)]
+        report = replay_log(iter_log_entries(lines, base_url=base_url), make_token_resolver("admin"), POOLS,
+                            speed=0, max_workers=2, base_url=base_url)
+        assert report["requests"] == 10 and len(seen) == 10
+        assert report["log_span_s"] == 45 and report["elapsed_s"] < 5
+        assert "尽快发送" in format_replay_report(report)
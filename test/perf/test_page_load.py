@@ -0,0 +1,105 @@
+"""
+页面级负载指标测试
+"""
+
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf.page_load import PageRecorder, load_page, menu_page_requests
+
+
+# 各路径的模拟处理时间（秒）
+DELAYS = {"/shop/detail": 0.05, "/shop/tags": 0.01, "/product/list": 0.1, "/shop/image": 0.01, "/product/image": 0.03}
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """按路径延迟返回，记录最大在途请求数"""
+
+    failing = set()
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        key = "/shop/tags" if path.endswith("/tags") else path
+        with SlowHandler.lock:
+            SlowHandler.in_flight += 1
+            SlowHandler.max_in_flight = max(SlowHandler.max_in_flight, SlowHandler.in_flight)
+        time.sleep(DELAYS.get(key, 0))
+        with SlowHandler.lock:
+            SlowHandler.in_flight -= 1
+        status = 500 if key in SlowHandler.failing else 200
+        self.send_response(status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def base_url(local_server):
+    SlowHandler.failing = set()
+    SlowHandler.max_in_flight = 0
+    return local_server(SlowHandler, threaded=True)
+
+
+class TestPageLoad:
+    """页面加载调度测试（使用本地 HTTP 服务）"""
+
+    def test_menu_page_dependencies(self):
+        """测试图片请求依赖对应的详情/列表请求"""
+        page = {request.name: request for request in menu_page_requests(1, "shop.png", ["a.png", "b.png"])}
+        assert set(page) == {"shop.detail", "shop.tags", "product.list", "shop.image",
+                             "product.image#1", "product.image#2"}
+        assert page["shop.image"].depends_on == ("shop.detail",)
+        assert page["product.image#2"].depends_on == ("product.list",)
+        assert not page["product.image#1"].auth
+
+    def test_parallel_load_and_critical_path(self, base_url):
+        """测试请求并行发出，页面就绪时间接近关键路径而不是各请求之和，关键路径为商品列表 → 商品图片"""
+        page = menu_page_requests(1, "shop.png", ["a.png", "b.png", "c.png"])
+        result = load_page(page, token="t", base_url=base_url)
+
+        assert result["ok"]
+        assert result["critical_path"][0] == "product.list"
+        assert result["critical_request"].startswith("product.image#")
+        assert 130 <= result["page_ready_ms"] < 250
+        timings = result["requests"]
+        assert all(timings[f"product.image#{n}"]["queued_ms"] >= timings["product.list"]["end_ms"] for n in (1, 2, 3))
+
+    def test_connection_limit(self, base_url):
+        """测试同一主机的在途请求不超过连接数限制，超出的请求排队"""
+        page = menu_page_requests(1, None, [f"{n}.png" for n in range(8)])
+        result = load_page(page, base_url=base_url, connections_per_host=2)
+        assert SlowHandler.max_in_flight <= 2
+        assert max(t["start_ms"] - t["queued_ms"] for t in result["requests"].values()) > 0
+
+    def test_failed_dependency_skips_images(self, base_url):
+        """测试商品列表失败时不请求商品图片，页面计为失败"""
+        SlowHandler.failing = {"/product/list"}
+        result = load_page(menu_page_requests(1, None, ["a.png"]), base_url=base_url)
+        assert not result["ok"]
+        assert result["requests"]["product.list"]["status"] == 500
+        assert result["requests"]["product.image#1"]["status"] is None
+
+    def test_recorder_summary(self, base_url):
+        """测试汇总页面就绪百分位、关键请求比例和按端点合并的延迟"""
+        recorder = PageRecorder()
+        page = menu_page_requests(1, "shop.png", ["a.png", "b.png"])
+        for _ in range(3):
+            recorder.record(load_page(page, base_url=base_url))
+        summary = recorder.summary()
+        assert (summary["pages"], summary["ok"]) == (3, 3)
+        assert summary["page_ready_ms"]["count"] == 3
+        assert summary["critical_requests"] == {"product.image": 1.0}
+        assert summary["endpoints"]["product.image"]["count"] == 6
@@ -0,0 +1,126 @@
+"""
+响应体大小和压缩检查测试
+"""
+
+import gzip
+import json
+import sys
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf import payload_size
+from perf.payload_size import (
+    PayloadTarget,
+    measure_payload,
+    payload_targets,
+    store_payload_results,
+    transfer_ms,
+    transfer_savings,
+)
+from perf.results_store import ResultsStore
+
+
+class ListHandler(BaseHTTPRequestHandler):
+    """返回 pageSize 条记录的 JSON 列表，客户端接受 gzip 时压缩；/brotli 路径在客户端接受 br 时声明 br 编码"""
+
+    def do_GET(self):
+        page_size = int(self.path.split("pageSize=")[1].split("&")[0]) if "pageSize=" in self.path else 10
+        body = json.dumps({"data": [{"id": n, "name": f"商品 {n}", "description": "x" * 50}
+                                    for n in range(page_size)]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        elif self.path.startswith("/brotli") and "br" in self.headers.get("Accept-Encoding", ""):
+            body = body[:40]
+            self.send_header("Content-Encoding", "br")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def base_url(local_server):
+    return local_server(ListHandler)
+
+
+class TestPayloadSize:
+    """响应体测量和结果存储测试（使用本地 HTTP 服务）"""
+
+    def test_targets_cover_page_sizes_and_periods(self):
+        """测试按分页大小和统计周期生成检查目标，没有前端令牌时跳过前端商品列表"""
+        targets = payload_targets("admin", 1, page_sizes=(10, 100), periods=("week",))
+        assert {(t.endpoint, t.variant) for t in targets} == {
+            ("admin.order.list", "pageSize=10"), ("admin.order.list", "pageSize=100"),
+            ("admin.product.list", "pageSize=10"), ("admin.product.list", "pageSize=100"),
+            ("admin.dashboard.stats", "period=week"),
+        }
+        assert len(payload_targets("admin", 1, "user", page_sizes=(10,), periods=())) == 3
+
+    def test_measure_records_wire_and_raw_sizes(self, base_url):
+        """测试记录未解码的传输字节、服务端编码和本地可压缩大小"""
+        target = PayloadTarget("product.list", "pageSize=50", "/product/list", {"pageSize": 50}, "token")
+        row = measure_payload(target, encodings=("identity", "gzip", "br"), base_url=base_url)
+
+        assert row["status"] == 200
+        assert row["wire_bytes"]["identity"] == row["raw_bytes"]
+        assert row["wire_bytes"]["gzip"] < row["raw_bytes"] / 3
+        assert row["wire_bytes"]["br"] == row["raw_bytes"]
+        assert row["served_encoding"] == {"identity": "identity", "gzip": "gzip", "br": "identity"}
+        assert row["compressed_by_server"]
+        assert row["potential_bytes"]["gzip"] < row["raw_bytes"]
+
+    def test_measure_br_without_brotli(self, base_url, monkeypatch):
+        """测试未安装 brotli 时服务端返回 br 也能测量：只解码 identity 响应"""
+        monkeypatch.setattr(payload_size, "brotli", None)
+        target = PayloadTarget("product.list", "pageSize=10", "/brotli", {"pageSize": 10}, None)
+        row = measure_payload(target, encodings=("identity", "br"), base_url=base_url)
+        assert row["served_encoding"]["br"] == "br" and row["wire_bytes"]["br"] == 40
+        assert row["potential_bytes"]["br"] is None and row["raw_bytes"] > 40
+
+    def test_transfer_savings(self):
+        """测试按带宽换算传输时间和节省的时间"""
+        assert transfer_ms(200_000, 1.6e6) == 1000.0
+        row = {"wire_bytes": {"identity": 200_000, "gzip": 200_000}, "potential_bytes": {"gzip": 40_000, "br": None}}
+        savings = transfer_savings(row, {"fast-3g": 1.6e6})["fast-3g"]
+        assert savings["identity_ms"] == 1000.0
+        assert savings["saved_ms"] == 0
+        assert savings["potential_saved_ms"] == 800.0
+
+    def test_results_store_series_and_growth(self, tmp_path):
+        """测试结果存储追加记录、按维度取序列并计算增幅，跳过损坏的行"""
+        store = ResultsStore(tmp_path / "results.jsonl")
+        dims = {"endpoint": "admin.order.list", "variant": "pageSize=10"}
+        store.record("payload", dims, {"raw_bytes": 1000}, timestamp=1)
+        store.record("payload", {"endpoint": "other", "variant": "x"}, {"raw_bytes": 5}, timestamp=2)
+        with open(store.path, "a", encoding="utf-8") as f:
+            f.write('{"broken": ')
+            f.write("\n")
+        store.record("payload", dims, {"raw_bytes": 1500}, timestamp=3)
+
+        assert store.series("payload", dims, "raw_bytes") == [(1, 1000), (3, 1500)]
+        assert store.growth("payload", dims, "raw_bytes") == 0.5
+        assert store.growth("payload", {"endpoint": "other", "variant": "x"}, "raw_bytes") is None
+
+    def test_store_flags_bloat(self, tmp_path):
+        """测试响应体较上次增长超过阈值时标记，按标签区分部署配置"""
+        store = ResultsStore(tmp_path / "results.jsonl")
+        row = {"endpoint": "product.list", "variant": "pageSize=10", "status": 200, "raw_bytes": 1000,
+               "compressed_by_server": False, "wire_bytes": {"identity": 1000}, "potential_bytes": {"gzip": 300}}
+        assert store_payload_results(store, [row], label="tiny") == []
+        assert store_payload_results(store, [dict(row, raw_bytes=1100)], label="tiny") == []
+        bloated = store_payload_results(store, [dict(row, raw_bytes=1500)], label="tiny")
+        assert [(item["endpoint"], item["growth"]) for item in bloated] == [("product.list", 0.3636)]
+        assert store_payload_results(store, [dict(row, raw_bytes=5000)], label="large") == []
+
+        assert store_payload_results(store, [dict(row, status=500, raw_bytes=90)], label="tiny") == []
+        assert store.series("payload", {"endpoint": "product.list", "variant": "pageSize=10"}, "raw_bytes",
+                            label="tiny")[-1][1] == 1500
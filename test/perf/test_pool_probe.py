@@ -0,0 +1,78 @@
+"""
+连接池耗尽探测测试
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf.load_generator import Operation, run_closed_loop
+from perf.pool_probe import find_knee, read_mysql_connection_limits
+
+
+def make_level(concurrency, throughput, p50, error_rate=0.0):
+    """构造一个并发级别的汇总结果"""
+    return {
+        "concurrency": concurrency,
+        "throughput": throughput,
+        "error_rate": error_rate,
+        "naive_ms": {"p50": p50, "p99": p50 * 2},
+    }
+
+
+class TestPoolProbe:
+    """连接池探测逻辑测试（不依赖服务）"""
+
+    def test_read_limits_from_repo_my_cnf(self):
+        """测试读取仓库内 my.cnf 的连接数配置"""
+        limits = read_mysql_connection_limits()
+        assert limits["max_connections"] == 50
+        assert limits["max_user_connections"] == 40
+
+    def test_find_knee_queueing_and_plateau(self):
+        """测试在连接池饱和后识别排队拐点和吞吐平台"""
+        levels = [
+            make_level(10, 100, 100),
+            make_level(20, 195, 102),
+            make_level(40, 380, 105),
+            make_level(50, 385, 130),
+            make_level(60, 386, 155),
+            make_level(80, 385, 210),
+        ]
+        knee = find_knee(levels)
+        assert knee["throughput_plateau"] == 50
+        assert knee["queueing_knee"] == 80
+        assert knee["error_knee"] is None
+        assert knee["knee"] == 50
+
+    def test_find_knee_errors(self):
+        """测试错误率超过阈值时识别错误拐点"""
+        levels = [make_level(10, 100, 100), make_level(45, 400, 110, error_rate=0.2)]
+        knee = find_knee(levels)
+        assert knee["error_knee"] == 45
+        assert knee["knee"] == 45
+
+    def test_closed_loop_caps_in_flight(self):
+        """测试闭环运行时在途请求数不超过并发数"""
+        in_flight = [0]
+        peak = [0]
+        lock = threading.Lock()
+
+        def operation():
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.01)
+            with lock:
+                in_flight[0] -= 1
+            return True
+
+        summary = run_closed_loop([Operation("sleep", operation)], concurrency=5, duration=0.3)
+        assert peak[0] == 5
+        assert summary["concurrency"] == 5
+        assert summary["failed"] == 0
+        assert summary["throughput"] > 100
+        print(f"✓ 闭环吞吐: {summary['throughput']}/s，峰值在途: {peak[0]}")
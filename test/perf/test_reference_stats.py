@@ -0,0 +1,104 @@
+"""
+看板统计参考实现测试
+"""
+
+import csv
+import io
+import json
+import sys
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf import reference_stats
+from perf.reference_stats import compute_reference, diff_stats, format_diff_report, load_export
+
+
+NOW = datetime(2024, 3, 10, 12, 0, 0)
+
+ORDERS = [
+    # id, shop_id, user_id, total_price, status, created_at
+    ("1844674407370955161", "1", "10", "20.5", "1", "2024-03-09 10:00:00"),
+    ("1844674407370955162", "1", "10", "30", "2", "2024-03-08T10:00:00+08:00"),
+    ("1844674407370955163", "1", "11", "10", "10", "2024-02-20 10:00:00"),
+    ("1844674407370955164", "2", "12", "99", "1", "2023-01-01 10:00:00"),
+]
+
+ITEMS = [
+    ("1844674407370955161", "501", "2"),
+    ("1844674407370955161", "502", "1"),
+    ("1844674407370955162", "501", "3"),
+    ("1844674407370955163", "503", "1"),
+    ("1844674407370955164", "601", "5"),
+]
+
+
+def _csv(header, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def write_export(path):
+    """按导出格式写入 ZIP：订单和明细为 CSV，商品和用户为 JSON"""
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("orders.csv", _csv(["id", "shop_id", "user_id", "total_price", "status", "created_at"], ORDERS))
+        archive.writestr("data/order_items.csv", _csv(["order_id", "product_id", "quantity"], ITEMS))
+        archive.writestr("products.json", json.dumps([{"id": 501, "shop_id": 1}, {"id": 502, "shop_id": 1},
+                                                      {"id": 503, "shop_id": 1}, {"id": 601, "shop_id": 2}]))
+        archive.writestr("users.json", json.dumps({"data": [{"id": 10, "created_at": "2024-03-05 00:00:00"},
+                                                            {"id": 11, "created_at": "2023-06-01 00:00:00"},
+                                                            {"id": 12, "created_at": None}]}))
+        archive.writestr("tags.csv", "id,name\n1,招牌\n")
+
+
+class TestReferenceStats:
+    """导出数据读取、参考统计计算和字段对比测试"""
+
+    def test_load_export_reads_needed_columns(self, tmp_path, monkeypatch):
+        """测试按块读取 CSV 和 JSON 成员，只保留需要的列，雪花ID不丢失精度"""
+        monkeypatch.setattr(reference_stats, "CHUNK_ROWS", 3)
+        path = tmp_path / "export.zip"
+        write_export(path)
+        tables = load_export(path)
+
+        assert set(tables) == {"orders", "order_items", "products", "users"}
+        assert tables["orders"]["id"][0] == 1844674407370955161
+        assert len(tables["order_items"]["order_id"]) == 5
+        assert str(tables["orders"]["created_at"][1]) == "2024-03-08T10:00:00"
+        assert str(tables["users"]["created_at"][2]) == "NaT"
+
+    def test_reference_per_shop_and_period(self, tmp_path):
+        """测试各店铺按统计周期计算订单、商品、用户统计"""
+        path = tmp_path / "export.zip"
+        write_export(path)
+        tables = load_export(path)
+
+        week = compute_reference(tables, "week", now=NOW)
+        assert week[1]["orderStats"] == {"totalOrders": 2, "totalAmount": 50.5, "averageAmount": 25.25,
+                                         "statusCounts": {"1": 1, "2": 1}}
+        assert week[1]["productStats"] == {"totalProducts": 3, "soldQuantity": 6, "productsSold": 2}
+        assert week[1]["userStats"] == {"totalUsers": 3, "newUsers": 1, "activeUsers": 1, "repeatUsers": 1}
+        assert week[2]["orderStats"]["totalOrders"] == 0
+
+        month = compute_reference(tables, "month", now=NOW)
+        assert month[1]["orderStats"]["totalOrders"] == 3
+        assert month[1]["userStats"]["activeUsers"] == 2
+        assert compute_reference(tables, "year", now=NOW)[2]["orderStats"]["totalOrders"] == 0
+
+    def test_diff_matches_fields_ignoring_case(self):
+        """测试键名忽略大小写和下划线，区分一致、不一致和单侧字段"""
+        reference = {"orderStats": {"totalOrders": 2, "totalAmount": 50.5},
+                     "userStats": {"activeUsers": 1, "newUsers": None}}
+        endpoint = {"order_stats": {"total_orders": 2, "total_amount": 50.504, "trend": [1, 2]},
+                    "userStats": {"activeUsers": 3, "growthRate": 0.2}, "updatedAt": 123}
+        diff = diff_stats(endpoint, reference)
+
+        assert diff["matched"] == ["orderstats.totalamount", "orderstats.totalorders"]
+        assert diff["mismatched"] == [{"field": "userstats.activeusers", "endpoint": 3.0, "reference": 1.0}]
+        assert diff["endpoint_only"] == ["userstats.growthrate"]
+        assert "✗ userstats.activeusers" in format_diff_report({"week": diff})
@@ -0,0 +1,83 @@
+"""
+令牌刷新风暴模拟测试
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf.load_generator import Operation
+from perf.refresh_storm import TokenPool, build_storm_arrivals, mint_tokens, recommend_jitter, run_refresh_storm
+
+
+class FakeTokenPool(TokenPool):
+    """不访问服务的令牌池：刷新请求同时在途越多越慢，模拟服务端被集中刷新拖慢"""
+
+    def __init__(self, size):
+        super().__init__([f"token-{i}" for i in range(size)])
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    def refresh(self, index):
+        with self.lock:
+            self.in_flight += 1
+            busy = self.in_flight
+        time.sleep(0.002 * busy)
+        with self.lock:
+            self.in_flight -= 1
+        self.tokens[index] = f"{self.tokens[index]}+"
+        return True
+
+
+class TestRefreshStorm:
+    """刷新风暴逻辑测试（不依赖服务）"""
+
+    def test_mint_tokens_skips_failures(self):
+        """测试并行签发令牌并丢弃失败结果"""
+        counter = iter(range(100))
+        lock = threading.Lock()
+
+        def login():
+            with lock:
+                n = next(counter)
+            return None if n % 4 == 0 else f"token-{n}"
+
+        assert len(mint_tokens(login, 20, concurrency=4)) == 15
+
+    def test_storm_arrivals_within_jitter_window(self):
+        """测试刷新请求落在 [storm_start, storm_start + jitter] 内，浏览请求匀速覆盖全程"""
+        pool = FakeTokenPool(50)
+        reads = [Operation("read", lambda: True)]
+        arrivals = build_storm_arrivals(pool, reads, read_rate=10, storm_start=2, jitter=3, settle=1)
+
+        refreshes = [offset for offset, op in arrivals if op.name == "token.refresh"]
+        read_offsets = [offset for offset, op in arrivals if op.name == "read"]
+        assert len(refreshes) == 50
+        assert all(2 <= offset <= 5 for offset in refreshes)
+        assert len(read_offsets) == 60
+        assert [offset for offset, _ in arrivals] == sorted(offset for offset, _ in arrivals)
+
+    def test_jitter_spreads_refresh_load(self):
+        """测试分散刷新后刷新延迟低于同时刷新，令牌池中的令牌被替换"""
+        pool = FakeTokenPool(40)
+        report = run_refresh_storm(pool, read_operations=[Operation("read", lambda: True)], read_rate=20,
+                                   jitters=[0, 1.0], warmup=0.325, settle=0.1, cooldown=0, seed=1)
+
+        simultaneous, spread = report["rounds"]
+        assert simultaneous["refresh"]["sent"] == 40 and spread["refresh"]["sent"] == 40
+        assert spread["refresh"]["corrected_ms"]["p99"] < simultaneous["refresh"]["corrected_ms"]["p99"]
+        assert simultaneous["reads_before"]["sent"] == 7
+        assert all(token.endswith("++") for token in pool.tokens)
+
+    def test_recommend_jitter(self):
+        """测试选择满足阈值的最小 jitter"""
+        def round_result(jitter, increase, error_rate=0.0):
+            return {"jitter": jitter, "read_p99_increase_ms": increase, "refresh": {"error_rate": error_rate}}
+
+        report = {"rounds": [round_result(0, 800), round_result(5, 90, 0.02), round_result(30, 20)]}
+        assert recommend_jitter(report, max_read_p99_increase_ms=100) == 30
+        assert recommend_jitter(report, max_read_p99_increase_ms=100, max_refresh_error_rate=0.05) == 5
+        assert recommend_jitter(report, max_read_p99_increase_ms=10) is None
@@ -0,0 +1,115 @@
+"""
+高级搜索查询矩阵和订单填充测试
+"""
+
+import json
+import sys
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf import order_seed
+from perf.search_matrix import (
+    analyze_matrix,
+    build_matrix,
+    build_payload,
+    combination_name,
+    format_matrix_report,
+    run_search_matrix,
+    suggest_index,
+)
+
+
+class SearchHandler(BaseHTTPRequestHandler):
+    """模拟高级搜索：带日期范围的请求慢 20ms，按用户筛选的请求被限流，其余立即返回"""
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if "user_id" in payload:
+            self.send_response(429)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if "start_date" in payload:
+            time.sleep(0.02)
+        body = json.dumps({"total": len(payload), "data": []}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def base_url(local_server):
+    return local_server(SearchHandler)
+
+
+class TestSearchMatrix:
+    """查询矩阵生成、分析和订单填充测试（使用本地 HTTP 服务）"""
+
+    def test_matrix_covers_all_combinations(self):
+        """测试组合数为各维度取值数之积，没有用户ID时不生成用户筛选"""
+        assert len(build_matrix(1, user_id=7)) == 2 * 3 * 5 * 2 * 3
+        assert len(build_matrix(1)) == 2 * 3 * 5 * 1 * 3
+        assert len(build_matrix(1, statuses=[1], date_ranges=["any", "7d"], paginations=["first10"])) == 2 * 2 * 2
+
+    def test_payload_and_index_for_combination(self):
+        """测试组合转为请求体，索引建议等值列在前、日期列在后"""
+        combo = {"shop": "shop", "status": "many", "date": "7d", "user": "any", "page": "deep"}
+        payload = build_payload(combo, 3, statuses=(1, 2), now=datetime(2024, 3, 10))
+        assert payload == {"page": 50, "pageSize": 20, "shop_id": "3", "status": [1, 2],
+                           "start_date": "2024-03-03", "end_date": "2024-03-11"}
+        assert combination_name(combo) == "shop+status=many+date=7d+page=deep"
+        assert suggest_index(combo) == ["shop_id", "status", "created_at"]
+        assert suggest_index({"shop": "any", "status": "any", "date": "any", "user": "any", "page": "first10"}) == []
+
+    def test_run_ranks_slow_combinations(self, base_url):
+        """测试按中位延迟排序，日期范围组合被识别为慢组合并给出索引建议"""
+        rows = run_search_matrix("token", 1, statuses=[1], repeats=2, seed=1, base_url=base_url,
+                                 date_ranges=["any", "7d"], paginations=["first10"])
+        assert len(rows) == 8
+        assert all(row["latency_ms"]["count"] == 2 and row["failed"] == 0 for row in rows)
+        assert all("date=7d" in row["name"] for row in rows[:4])
+
+        analysis = analyze_matrix(rows, slow_factor=3.0)
+        assert set(analysis["slow"]) == {row["name"] for row in rows if "date=7d" in row["name"]}
+        assert "shop_id,status,created_at" in analysis["indexes"]
+        assert analysis["dimension_effect"]["date=7d"] > analysis["dimension_effect"]["date=any"]
+        assert "orders(created_at)" in format_matrix_report(rows, analysis)
+
+    def test_failed_requests_excluded_from_latency(self, base_url):
+        """测试非 200 响应只计为失败，不计入延迟"""
+        rows = run_search_matrix("token", 1, user_id=7, statuses=[1], repeats=2, seed=1, base_url=base_url,
+                                 date_ranges=["any"], paginations=["first10"])
+        limited = [row for row in rows if row["combination"]["user"] == "user"]
+        assert limited and all(row["failed"] == 2 and row["latency_ms"]["count"] == 0 for row in limited)
+        assert all(row["latency_ms"]["count"] == 2 for row in rows if row["combination"]["user"] == "any")
+
+    def test_seed_tops_up_missing_orders(self, monkeypatch):
+        """测试只补足差额，订单在用户、商品和状态间轮换"""
+        created, toggled = [], []
+        monkeypatch.setattr(order_seed, "count_orders", lambda token, shop_id: 7)
+        monkeypatch.setattr(order_seed.admin_order_actions, "create_order",
+                            lambda token, shop_id, user_id, items: created.append((user_id, items[0]["product_id"]))
+                            or len(created))
+        monkeypatch.setattr(order_seed.admin_order_actions, "toggle_order_status",
+                            lambda token, order_id, shop_id, status: toggled.append(status))
+
+        reports = []
+        progress = lambda done, total, elapsed, stream: reports.append((done, total, stream))
+        assert order_seed.seed_orders("token", 1, 10, ["u1", "u2"], ["p1"], statuses=(None, 2), concurrency=2,
+                                      progress=progress, progress_every=1) == 3
+        assert sorted(created) == [("u1", "p1"), ("u1", "p1"), ("u2", "p1")]
+        assert toggled == [2]
+        assert sorted(done for done, _, _ in reports) == [1, 2, 3] and {total for _, total, _ in reports} == {3}
+        assert all(stream is sys.stdout for _, _, stream in reports)
+        assert order_seed.seed_orders("token", 1, 5, ["u1"], ["p1"]) == 0
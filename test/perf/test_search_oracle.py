@@ -0,0 +1,169 @@
+"""
+搜索结果校验索引测试
+"""
+
+import json
+import sys
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf.search_oracle import SearchIndex, check_order_queries, check_tag_queries, random_order_queries
+
+
+NOW = datetime(2024, 3, 10, 12, 0, 0)
+
+
+def make_tables(orders=2000, seed=0):
+    """随机订单，以及两个店铺的商品、标签关系"""
+    rng = np.random.default_rng(seed)
+    created = np.datetime64("2024-03-10T12:00:00") - rng.integers(0, 400 * 86400, orders).astype("timedelta64[s]")
+    return {
+        "orders": {
+            "id": np.arange(orders, dtype=np.int64) + 10**18,
+            "shop_id": rng.integers(1, 4, orders),
+            "user_id": rng.integers(100, 140, orders),
+            "status": rng.choice([1, 2, 10], orders),
+            "created_at": created,
+        },
+        "products": {
+            "id": np.array([501, 502, 503, 601]),
+            "shop_id": np.array([1, 1, 1, 2]),
+            "status": np.array(["online", "offline", "online", "online"]),
+        },
+        "product_tags": {
+            "product_id": np.array([501, 502, 503, 601, 501]),
+            "tag_id": np.array([7, 7, 8, 7, 8]),
+        },
+    }
+
+
+def brute_force(tables, query):
+    """逐条比较的参考结果"""
+    orders = tables["orders"]
+    keep = np.ones(len(orders["id"]), bool)
+    if "shop_id" in query:
+        keep &= orders["shop_id"] == query["shop_id"]
+    if "user_id" in query:
+        keep &= orders["user_id"] == query["user_id"]
+    if "statuses" in query:
+        keep &= np.isin(orders["status"], query["statuses"])
+    if "start_date" in query:
+        keep &= orders["created_at"] >= np.datetime64(query["start_date"], "s")
+        keep &= orders["created_at"] < np.datetime64(query["end_date"], "D") + np.timedelta64(1, "D")
+    return set(orders["id"][keep].tolist())
+
+
+def make_handler(tables, ignore_user=False):
+    """模拟接口：按参考结果返回；ignore_user 时忽略用户条件，模拟筛选缺陷"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, body):
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            query = {}
+            for key in ("shop_id", "user_id"):
+                if key in payload and not (key == "user_id" and ignore_user):
+                    query[key] = int(payload[key])
+            if "status" in payload:
+                query["statuses"] = payload["status"]
+            if "start_date" in payload:
+                query.update(start_date=payload["start_date"], end_date=payload["end_date"])
+            ids = sorted(brute_force(tables, query))
+            self._reply({"total": len(ids), "data": [{"id": str(i)} for i in ids[:payload["pageSize"]]]})
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            if url.path.endswith("online-products"):
+                # 未过滤下架商品
+                self._reply({"data": [{"id": 501}, {"id": 502}] if params["tag_id"] == "7" and params["shop_id"] == "1"
+                             else [{"id": 601}] if params["tag_id"] == "7" else [{"id": 501}, {"id": 503}]})
+            else:
+                tags = {"501": [7, 8], "502": [7], "503": [8], "601": [7]}[params["product_id"]]
+                self._reply({"product_id": params["product_id"], "tags": [{"id": tag} for tag in tags]})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def server(local_server):
+    def start(handler):
+        return local_server(handler)
+
+    return start
+
+
+class TestSearchOracle:
+    """本地索引查询和接口对比测试（使用本地 HTTP 服务）"""
+
+    def test_index_matches_brute_force(self):
+        """测试随机查询的索引结果与逐条比较一致"""
+        tables = make_tables()
+        index = SearchIndex(tables)
+        queries = random_order_queries(index, 300, seed=1, now=NOW)
+        assert any(len(query) >= 3 for query in queries)
+        for query in queries:
+            expected = brute_force(tables, query)
+            assert index.order_ids_for(**query) == expected, query
+            assert index.count_orders(**query) == len(expected), query
+
+    def test_snowflake_shop_ids(self):
+        """测试雪花ID店铺配合多个状态时组合倒排表不溢出"""
+        shops = np.array([2006633621737181184, 2006633621737181185] * 5, dtype=np.int64)
+        tables = {"orders": {
+            "id": np.arange(10, dtype=np.int64) + 10**18,
+            "shop_id": shops,
+            "status": np.array([1, 2, 3, 4, 10, 2, 3, 4, 10, 1]),
+            "created_at": np.datetime64("2024-03-10T12:00:00") - np.arange(10).astype("timedelta64[h]"),
+        }}
+        index = SearchIndex(tables)
+        assert index.count_orders(shop_id=2006633621737181184, statuses=[1]) == 1
+        assert index.count_orders(shop_id=2006633621737181184, statuses=[1, 10]) == 3
+        for shop_id in shops[:2].tolist():
+            for status in (1, 2, 3, 4, 10):
+                query = {"shop_id": shop_id, "statuses": [status]}
+                assert index.order_ids_for(**query) == brute_force(tables, query), query
+
+    def test_tag_maps(self):
+        """测试已上架商品按店铺和状态过滤，商品的已绑定标签"""
+        index = SearchIndex(make_tables(orders=10))
+        assert index.online_products(7, 1) == {501}
+        assert index.online_products(7, 2) == {601}
+        assert index.bound_tags(501) == {7, 8}
+        assert index.bound_tags(999) == set()
+
+    def test_checks_detect_endpoint_mismatches(self, server):
+        """测试接口正确时没有不一致；忽略用户条件和未过滤下架商品时被发现"""
+        tables = make_tables(orders=500)
+        index = SearchIndex(tables)
+        queries = random_order_queries(index, 60, seed=2, now=NOW)
+
+        correct = check_order_queries(index, "token", queries, base_url=server(make_handler(tables)))
+        assert correct["checked"] == 60 and correct["mismatches"] == []
+
+        buggy_url = server(make_handler(tables, ignore_user=True))
+        buggy = check_order_queries(index, "token", queries, base_url=buggy_url)
+        assert buggy["mismatches"]
+        assert all("user_id" in item["query"] for item in buggy["mismatches"])
+
+        tags = check_tag_queries(index, "token", samples=20, seed=3, base_url=buggy_url)
+        assert tags["failed_requests"] == 0
+        assert {(item["kind"], item.get("tag_id")) for item in tags["mismatches"]} == {("online-products", 7)}
+        assert tags["mismatches"][0]["unexpected"] == [502]
@@ -0,0 +1,147 @@
+"""
+慢输入模糊测试测试
+"""
+
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import schemathesis
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf.slow_fuzz import (
+    LONG_STRING,
+    extreme_inputs,
+    format_fuzz_report,
+    format_replay_report,
+    fuzz_operations,
+    load_corpus,
+    merge_corpus,
+    replay_corpus,
+    save_corpus,
+    select_operations,
+    shrink_input,
+)
+
+
+SPEC = {
+    "swagger": "2.0",
+    "info": {"title": "OrderEase", "version": "1"},
+    "basePath": "/api/order-ease/v1",
+    "paths": {
+        "/admin/order/list": {"get": {
+            "parameters": [
+                {"name": "shop_id", "in": "query", "type": "string", "required": True},
+                {"name": "page", "in": "query", "type": "integer", "minimum": 1, "maximum": 100},
+                {"name": "pageSize", "in": "query", "type": "integer", "minimum": 1, "maximum": 100},
+            ],
+            "responses": {"200": {"description": "ok"}},
+        }},
+        "/admin/order/search": {"get": {
+            "parameters": [
+                {"name": "keyword", "in": "query", "type": "string", "maxLength": 20},
+                {"name": "start_date", "in": "query", "type": "string", "maxLength": 10},
+                {"name": "end_date", "in": "query", "type": "string", "maxLength": 10},
+            ],
+            "responses": {"200": {"description": "ok"}},
+        }},
+        "/admin/order/delete": {"delete": {
+            "parameters": [{"name": "id", "in": "query", "type": "string", "required": True}],
+            "responses": {"200": {"description": "ok"}},
+        }},
+    },
+}
+
+
+def make_handler(slow_page_size=500, slow_keyword=1000, delay=0.05):
+    """模拟接口：pageSize 超过 slow_page_size 或关键字长度超过 slow_keyword 时变慢"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+            try:
+                page_size = int(params.get("pageSize", 0))
+            except ValueError:
+                page_size = 0
+            if page_size > slow_page_size or len(params.get("keyword", "")) > slow_keyword:
+                time.sleep(delay)
+            data = json.dumps({"data": []}).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def server(local_server):
+    def start(handler):
+        return local_server(handler, threaded=True) + "/api/order-ease/v1"
+
+    return start
+
+
+def operation_item(path, **query):
+    return {"method": "GET", "path": path, "path_parameters": {}, "query": query, "body": None}
+
+
+class TestSlowFuzz:
+    """极端输入、简化、模糊测试和语料回放测试（使用本地 HTTP 服务）"""
+
+    def test_extreme_inputs_per_parameter(self):
+        """测试分页参数取超大值、字符串取超长值，日期范围两端一起放到最大"""
+        inputs = [operation_item("/admin/order/search", keyword="x"),
+                  operation_item("/admin/order/search", start_date="2024-01-01", end_date="2024-01-02"),
+                  operation_item("/admin/order/list", pageSize=10, page=1, shop_id="1")]
+        variants = extreme_inputs(inputs[:2])
+        assert {"keyword": LONG_STRING} in [variant["query"] for variant in variants]
+        assert {"keyword": "x", "start_date": "1970-01-01", "end_date": "2100-12-31"} in [variant["query"] for variant in variants]
+        assert variants[-1]["query"] == {"keyword": LONG_STRING, "start_date": "1970-01-01", "end_date": "2100-12-31"}
+
+        page_variants = [variant["query"] for variant in extreme_inputs(inputs[2:])]
+        assert {"pageSize": 10 ** 6, "page": 1, "shop_id": "1"} in page_variants
+        assert {"pageSize": 10, "page": 10 ** 6, "shop_id": "1"} in page_variants
+
+    def test_shrink_keeps_slow_inputs_minimal(self):
+        """测试删除无关参数，数值减半到仍然慢的最小值"""
+        item = operation_item("/admin/order/list", pageSize=10 ** 6, page=3, shop_id="abc")
+        shrunk, latency, steps = shrink_input(item, lambda candidate: 80.0 if candidate["query"].get("pageSize", 0) > 500 else None)
+        assert shrunk["query"] == {"pageSize": 976} and latency == 80.0 and steps > 3
+
+    def test_fuzz_finds_and_replays_slow_inputs(self, server, tmp_path):
+        """测试只选中 GET 端点，找到超大 pageSize 和超长关键字两类慢输入，语料去重并回放"""
+        base_url = server(make_handler())
+        schema = schemathesis.from_dict(SPEC, base_url=base_url)
+        operations = select_operations(schema)
+        assert sorted(operation.path for operation in operations) == ["/admin/order/list", "/admin/order/search"]
+
+        results = fuzz_operations(operations, lambda path: "token", examples=5, threshold_ms=30, repeats=1,
+                                  seed=1, base_url=base_url)
+        shrunk = {result["operation"]: [item["shrunk"]["query"] for item in result["slow"]] for result in results}
+        assert shrunk["GET /admin/order/list"] and all(
+            set(query) == {"pageSize"} and 500 < query["pageSize"] <= 1000 for query in shrunk["GET /admin/order/list"])
+        assert shrunk["GET /admin/order/search"] and all(
+            set(query) == {"keyword"} and 1000 < len(query["keyword"]) <= 2000 for query in shrunk["GET /admin/order/search"])
+        assert "超过 30ms 的输入" in format_fuzz_report(results, 30)
+
+        path = tmp_path / "slow_inputs.json"
+        corpus = merge_corpus(load_corpus(path), results, threshold_ms=30)
+        assert len(corpus) == 2
+        save_corpus(merge_corpus(corpus, results, threshold_ms=30), path)
+        assert len(load_corpus(path)) == 2
+
+        still_slow = replay_corpus(load_corpus(path), lambda path: "token", repeats=1, base_url=base_url)
+        assert all(row["slow"] for row in still_slow)
+        fixed_url = server(make_handler(slow_page_size=10 ** 7, slow_keyword=10 ** 6))
+        fixed = replay_corpus(load_corpus(path), lambda path: "token", repeats=1, base_url=fixed_url)
+        assert not any(row["slow"] for row in fixed)
+        assert "0 个仍超过阈值" in format_replay_report(fixed)
@@ -0,0 +1,79 @@
+"""
+长稳测试工具测试
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf.load_generator import Operation, Sample
+from perf.soak import (
+    ContainerMemorySampler,
+    WindowedRecorder,
+    detect_growth,
+    parse_memory_size,
+    run_soak,
+)
+
+
+class StaticSampler(ContainerMemorySampler):
+    """返回逐次递增内存值的模拟采样器"""
+
+    def __init__(self):
+        super().__init__()
+        self.value = 100 * 1024 * 1024
+
+    def sample(self):
+        self.value += 10 * 1024 * 1024
+        return self.value
+
+
+class TestSoakAnalysis:
+    """窗口聚合和趋势检测测试（不依赖服务）"""
+
+    def test_windowed_recorder_compacts_samples(self):
+        """测试样本按完成时间归入窗口，窗口只保留汇总"""
+        recorder = WindowedRecorder(window_seconds=10, origin=0)
+        for i in range(30):
+            finished = i  # 每秒一个样本
+            recorder.record(Sample(0, "op", finished - 0.1, finished - 0.1, finished, i % 10 != 0, 200))
+        windows = recorder.close()
+
+        assert [w["count"] for w in windows] == [10, 10, 10]
+        assert [w["errors"] for w in windows] == [1, 1, 1]
+        assert windows[1]["start"] == 10
+        assert abs(windows[0]["p50"] - 100) < 1e-6
+
+    def test_detect_growth(self):
+        """测试持续增长与平稳序列的区分"""
+        xs = [i * 60 for i in range(60)]
+        growing = detect_growth(xs, [100 + i * 2 for i in range(60)])
+        flat = detect_growth(xs, [100 + (i % 3) for i in range(60)])
+
+        assert growing["growing"] is True
+        assert growing["monotonicity"] == 1.0
+        assert flat["growing"] is False
+
+    def test_parse_memory_size(self):
+        """测试解析 docker stats 的内存格式"""
+        assert parse_memory_size("512MiB") == 512 * 1024 * 1024
+        assert parse_memory_size("1.5GiB ") == int(1.5 * 1024 ** 3)
+        assert parse_memory_size("12kB") == 12000
+        assert parse_memory_size("N/A") is None
+
+    def test_short_soak_with_fake_workload(self):
+        """测试短时间长稳运行：分段刷新负载、窗口序列和内存趋势"""
+        builds = []
+
+        def build_operations():
+            builds.append(1)
+            return [Operation("noop", lambda: True)]
+
+        report = run_soak(build_operations, rate=40, duration=1.2, window_seconds=0.3,
+                          refresh_interval=0.6, memory_sampler=StaticSampler())
+
+        assert len(builds) == 2
+        assert sum(w["count"] for w in report["windows"]) == 48
+        assert "memory" in report["trends"]
+        assert report["trends"]["memory"]["growing"] is True
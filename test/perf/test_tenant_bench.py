@@ -0,0 +1,91 @@
+"""
+多租户扇出测试
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf import tenant_bench
+from perf.tenant_bench import (
+    TenantShop,
+    analyze_tenants,
+    cleanup_tenants,
+    format_tenant_report,
+    run_tenant_benchmark,
+    tenant_weights,
+)
+
+
+def fake_tenants(admin_token, count, products, tenants=()):
+    """不访问接口的店铺：沿用已有店铺并追加"""
+    return list(tenants) + [TenantShop(f"s{n}", [f"p{n}.{i}" for i in range(products)])
+                            for n in range(len(tenants), count)]
+
+
+class TestTenantBench:
+    """负载分布、争用和跨租户扫描判定测试（使用模拟的下单往返）"""
+
+    def test_weights(self):
+        """测试均匀分布和热点分布的负载比例"""
+        assert tenant_weights("spread", 4) == [0.25] * 4
+        assert tenant_weights("hot", 3) == [1.0, 0.0, 0.0]
+        with pytest.raises(ValueError):
+            tenant_weights("zipf", 3)
+
+    def test_per_shop_lock_is_detected(self):
+        """测试每个店铺一把锁时，集中到热点店铺的尾延迟明显高于均匀分布"""
+        locks, calls = {}, []
+
+        def round_trip(admin_token, shop_id, user_id, product_id):
+            calls.append((shop_id, product_id))
+            with locks.setdefault(shop_id, threading.Lock()):
+                time.sleep(0.03)
+            return True
+
+        result = run_tenant_benchmark("token", [4], 2, 1, rate=40, duration=1.0, seed=1,
+                                      prepare_tenants=fake_tenants, round_trip=round_trip)
+        rows = result["rows"]
+        assert [(row["tenants"], row["distribution"]) for row in rows] == [(4, "spread"), (4, "hot")]
+        assert set(rows[1]["per_shop"]) == {"shop0.order_round_trip"}
+        assert {product_id for shop_id, product_id in calls if shop_id == "s0"} == {"p0.0", "p0.1"}
+
+        analysis = analyze_tenants(rows)
+        assert analysis["levels"][0]["contention"] and analysis["levels"][0]["p99_ratio"] > 1.5
+        assert "按店铺加锁" in format_tenant_report(rows, analysis)
+
+    def test_cross_tenant_scan_is_detected(self):
+        """测试单店铺请求耗时随店铺总数增长时判定为跨租户扫描"""
+        shops = []
+
+        def prepare(admin_token, count, products, tenants=()):
+            shops[:] = fake_tenants(admin_token, count, products, tenants)
+            return list(shops)
+
+        def round_trip(admin_token, shop_id, user_id, product_id):
+            time.sleep(0.002 * len(shops))
+            return True
+
+        result = run_tenant_benchmark("token", [8, 1], 1, 1, rate=20, duration=0.5, distributions=("hot",),
+                                      prepare_tenants=prepare, round_trip=round_trip)
+        analysis = analyze_tenants(result["rows"])
+        assert analysis["hot_tenants"] == [1, 8] and analysis["levels"] == []
+        assert analysis["cross_tenant_scan"] and analysis["scan_growth"] > 3
+        assert "扫描了所有租户" in format_tenant_report(result["rows"], analysis)
+
+    def test_cleanup_purges_each_shop(self, monkeypatch):
+        """测试清理时每个店铺都连同数据一起删除，并返回未能删除的店铺"""
+        purged = []
+
+        def purge(admin_token, shop_id, concurrency=8):
+            purged.append(shop_id)
+            return shop_id != "s1"
+
+        monkeypatch.setattr(tenant_bench, "purge_shop", purge)
+        assert cleanup_tenants("token", fake_tenants("token", 3, 2)) == ["s1"]
+        assert purged == ["s0", "s1", "s2"]
@@ -0,0 +1,69 @@
+"""
+图片上传压测工具测试
+"""
+
+import sys
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf.upload_bench import CHUNK_SIZE, StreamingMultipartBody, create_upload_file
+
+
+class CaptureHandler(BaseHTTPRequestHandler):
+    """记录收到的请求头和请求体"""
+
+    captured = {}
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        CaptureHandler.captured = {"headers": dict(self.headers), "body": self.rfile.read(length)}
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestUploadBench:
+    """流式上传逻辑测试（使用本地 HTTP 服务）"""
+
+    def test_create_upload_file_sizes(self, tmp_path):
+        """测试生成的文件大小准确，并以 PNG 文件头开头"""
+        for size in (10, 1024, 3 * CHUNK_SIZE + 7):
+            path = create_upload_file(size, tmp_path)
+            assert path.stat().st_size == size
+        assert create_upload_file(1024, tmp_path).read_bytes()[:4] == b"\x89PNG"
+
+    def test_body_is_read_in_chunks(self, tmp_path):
+        """测试请求体按块产生，单块不超过块大小，总长度与 __len__ 一致"""
+        path = create_upload_file(5 * CHUNK_SIZE, tmp_path)
+        body = StreamingMultipartBody("image", path)
+        chunks = list(body)
+        assert max(len(chunk) for chunk in chunks) <= CHUNK_SIZE
+        assert sum(len(chunk) for chunk in chunks) == len(body)
+
+    def test_streamed_multipart_is_parseable(self, tmp_path, local_server):
+        """测试经 requests 发送的流式请求体带 Content-Length，且能被标准 multipart 解析"""
+        base_url = local_server(CaptureHandler)
+        path = create_upload_file(200 * 1024, tmp_path)
+        body = StreamingMultipartBody("avatar", path, filename="avatar.png")
+        response = requests.post(f"{base_url}/upload", data=body, headers={"Content-Type": body.content_type})
+
+        assert response.status_code == 200
+        captured = CaptureHandler.captured
+        assert int(captured["headers"]["Content-Length"]) == len(body)
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {captured['headers']['Content-Type']}\r\n\r\n".encode() + captured["body"]
+        )
+        parts = list(message.iter_parts())
+        assert len(parts) == 1
+        assert parts[0].get_param("name", header="content-disposition") == "avatar"
+        assert parts[0].get_filename() == "avatar.png"
+        assert parts[0].get_payload(decode=True) == path.read_bytes()
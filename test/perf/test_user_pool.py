@@ -0,0 +1,91 @@
+"""
+前端用户池测试
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from perf import user_pool
+from perf.user_pool import Identity, UserPool, build_user_pool
+
+
+def make_identity(n, ttl=7200):
+    return Identity(str(n), f"customer_{n}", f"token-{n}", int(time.time()) + ttl)
+
+
+class TestUserPool:
+    """用户池逻辑测试（不依赖服务）"""
+
+    def test_checkout_release_rotates_fifo(self):
+        """测试取出/归还按先进先出轮转，并发取出的身份互不相同"""
+        pool = UserPool([make_identity(n) for n in range(3)])
+        first, second = pool.checkout(), pool.checkout()
+        assert (first.user_id, second.user_id) == ("0", "1")
+        pool.release(first)
+        assert pool.checkout().user_id == "2"
+        assert pool.checkout().user_id == "0"
+        assert pool.checkout() is None
+        with pytest.raises(RuntimeError):
+            with pool.identity():
+                pass
+
+    def test_concurrent_identities_are_distinct(self):
+        """测试多线程同时持有的身份不重复"""
+        pool = UserPool([make_identity(n) for n in range(8)])
+        held, lock, barrier = [], threading.Lock(), threading.Barrier(8)
+
+        def worker():
+            with pool.identity() as identity:
+                with lock:
+                    held.append(identity.user_id)
+                barrier.wait()
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(held) == [str(n) for n in range(8)]
+        assert pool.available == 8
+
+    def test_save_and_load_round_trip(self, tmp_path):
+        """测试保存为紧凑 JSON 后能完整加载"""
+        path = tmp_path / "pool.json"
+        UserPool([make_identity(n) for n in range(5)], password="Secret123").save(path)
+        loaded = UserPool.load(path)
+
+        assert len(loaded) == 5
+        assert loaded.password == "Secret123"
+        assert loaded.identities()[2][:3] == ("2", "customer_2", "token-2")
+        assert "\n" not in path.read_text(encoding="utf-8")
+        assert len(UserPool.load(tmp_path / "missing.json")) == 0
+
+    def test_build_reuses_valid_and_relogins_expiring(self, tmp_path, monkeypatch):
+        """测试构建时复用有效令牌、即将过期的重新登录、不足的才注册"""
+        path = tmp_path / "pool.json"
+        UserPool([make_identity(0), make_identity(1), make_identity(2, ttl=60)]).save(path)
+        registered, relogged = [], []
+
+        def fake_register(username, password):
+            registered.append(username)
+            return Identity(str(100 + len(registered)), username, "new-token", int(time.time()) + 7200)
+
+        def fake_relogin(identity, password):
+            relogged.append(identity.user_id)
+            return identity._replace(token="fresh-token", expires_at=int(time.time()) + 7200)
+
+        monkeypatch.setattr(user_pool, "register_identity", fake_register)
+        monkeypatch.setattr(user_pool, "relogin_identity", fake_relogin)
+
+        pool = build_user_pool(5, path, concurrency=2, min_ttl=600)
+        assert len(pool) == 5
+        assert relogged == ["2"]
+        assert len(registered) == 2
+        assert len(UserPool.load(path)) == 5
+        assert not pool.expiring(600)
@@ -0,0 +1,164 @@
+"""
+工作负载模型测试
+"""
+
+import json
+import random
+import sys
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import conftest
+from perf.log_replay import make_token_resolver
+from perf.workload_model import (
+    END,
+    IdSampler,
+    covered_routes,
+    fit_model,
+    format_model_report,
+    format_synthetic_report,
+    iter_traffic,
+    load_cassette,
+    load_model,
+    record_cassette,
+    run_synthetic,
+    save_model,
+    walk_session,
+)
+
+
+BASE = "/api/order-ease/v1"
+
+ROUTES = ["GET /product/list", "GET /product/detail", "GET /shop/{id}/tags"]
+
+
+def cassette_line(timestamp, client, path):
+    return json.dumps({"timestamp": timestamp, "client": client, "method": "GET",
+                       "url": f"http://lb{BASE}{path}", "status": 200, "elapsed_ms": 5}) + "\n"
+
+
+def recorded_traffic():
+    """每个会话：商品列表 → 商品详情（热点商品 1 占多数）→ 店铺标签，思考时间 2 秒"""
+    lines, products = [], [1, 1, 1, 1, 1, 1, 2, 2, 3, 4]
+    for n, product in enumerate(products):
+        start = n * 10.0
+        client = f"c{n % 3}"
+        lines.append(cassette_line(start, client, "/product/list?page=1&pageSize=10&shop_id=77"))
+        lines.append(cassette_line(start + 2, client, f"/product/detail?id={product}&shop_id=77"))
+        lines.append(cassette_line(start + 4, client, "/shop/77/tags"))
+        lines.append(cassette_line(start + 4.5, client, "/admin/order/list"))
+    return lines
+
+
+@pytest.fixture
+def server(local_server):
+    seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            seen.append((url.path, {key: values[0] for key, values in parse_qs(url.query).items()}))
+            data = json.dumps({"data": []}).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return local_server(Handler, threaded=True) + BASE, seen
+
+
+class TestWorkloadModel:
+    """路由扫描、模型拟合、会话游走和按模型生成流量测试（使用本地 HTTP 服务）"""
+
+    def test_covered_routes(self):
+        """测试从 actions 模块和前端辅助类中扫描出路由和方法"""
+        routes = covered_routes()
+        assert {"GET /admin/product/list", "POST /admin/product/create", "GET /product/detail",
+                "GET /shop/{id}/tags", "PUT /shopOwner/order/toggle-status"} <= set(routes)
+
+    def test_fit_model(self):
+        """测试会话切分、入口与转移概率、思考时间、参数和热点倾斜"""
+        model = fit_model(load_cassette(recorded_traffic(), base_url=f"http://lb{BASE}"), routes=ROUTES,
+                          session_gap=5)
+        assert model["source"] == {"requests": 40, "modeled": 30, "dropped": 10, "sessions": 10, "span_s": 94.0}
+        assert model["start"] == {"GET /product/list": 1.0}
+        assert model["transitions"]["GET /product/list"] == {"GET /product/detail": 1.0}
+        assert model["transitions"]["GET /shop/{id}/tags"] == {END: 1.0}
+        assert model["think_time_s"]["GET /product/list"][10] == 2.0
+        assert model["session_length"][10] == 3 and model["max_session_length"] == 3
+
+        detail = model["states"]["GET /product/detail"]["params"]
+        assert detail["id"]["entity"] == "product_id" and detail["id"]["values"]["1"] == 6
+        assert detail["shop_id"] == {"values": {"77": 10}, "entity": "shop_id", "presence": 1.0}
+        assert model["states"]["GET /shop/{id}/tags"]["path"] == [{"values": {"77": 10}, "entity": "shop_id"}]
+        assert model["skew"]["product_id"] > 1 and model["skew"]["shop_id"] == 0
+        assert model["endpoint_mix"]["GET /product/detail"] == pytest.approx(1 / 3, abs=1e-3)
+        assert "最常见的转移" in format_model_report(model)
+
+    def test_walk_session_and_id_sampler(self, tmp_path):
+        """测试会话沿转移概率游走并累加思考时间，倾斜越大热点ID占比越高"""
+        model = fit_model(load_cassette(recorded_traffic(), base_url=f"http://lb{BASE}"), routes=ROUTES,
+                          session_gap=5)
+        model = load_model(save_model(model, tmp_path / "model.json"))
+        session = walk_session(model, random.Random(1))
+        assert [state for state, _ in session] == ["GET /product/list", "GET /product/detail", "GET /shop/{id}/tags"]
+        assert [offset for _, offset in session] == pytest.approx([0, 2, 4])
+
+        rng = random.Random(2)
+        slot = {"entity": "product_id", "values": {"9": 1}}
+        hot = IdSampler({"product_id": ["a", "b", "c", "d"]}, {"product_id": 2.0})
+        uniform = IdSampler({"product_id": ["a", "b", "c", "d"]}, {})
+        assert sum(hot.sample(rng, slot) == "a" for _ in range(2000)) > 1200
+        assert sum(uniform.sample(rng, slot) == "a" for _ in range(2000)) < 700
+        assert IdSampler({}, {}).sample(rng, slot) == "9"
+
+    def test_record_cassette(self, server, tmp_path):
+        """测试录制 make_request_with_retry 发出的请求，客户端按令牌区分且不保存令牌"""
+        base_url, _ = server
+        path = tmp_path / "cassette.jsonl"
+        with record_cassette(path):
+            conftest.make_request_with_retry(lambda: requests.get(f"{base_url}/product/list", params={"page": 1},
+                                                                  headers={"Authorization": "Bearer secret"}))
+            conftest.make_request_with_retry(lambda: requests.get(f"{base_url}/shop/5/tags"))
+        conftest.make_request_with_retry(lambda: requests.get(f"{base_url}/product/list"))
+
+        assert "secret" not in path.read_text()
+        entries = list(iter_traffic(path, base_url=base_url))
+        assert [(entry.path, entry.query) for entry in entries] == [("/product/list", [("page", "1")]),
+                                                                    ("/shop/5/tags", [])]
+        assert entries[0].client != "anonymous" and entries[1].client == "anonymous"
+
+    def test_haproxy_log_source(self, tmp_path):
+        """测试 HAProxy 日志同样可以作为录制流量"""
+        path = tmp_path / "haproxy.log"
+        path.write_text(f'10.0.0.1:5 [19/Oct/2026:10:00:01.000] f b/s 0/0/0/3/4 200 10 - - ---- 1/1/1/1/0 0/0 '
+                        f'"GET {BASE}/product/list?page=1 HTTP/1.1"\n')
+        model = fit_model(iter_traffic(path, base_url=f"http://lb{BASE}"), routes=ROUTES)
+        assert model["start"] == {"GET /product/list": 1.0}
+
+    def test_run_synthetic(self, server):
+        """测试按模型生成流量：请求使用ID池中的ID，端点占比接近模型"""
+        base_url, seen = server
+        model = fit_model(load_cassette(recorded_traffic(), base_url=f"http://lb{BASE}"), routes=ROUTES,
+                          session_gap=5)
+        model["think_time_s"] = {state: [0.01] * 21 for state in model["think_time_s"]}
+        pools = {"shop_id": ["1"], "product_id": ["101", "102"]}
+        report = run_synthetic(model, pools, make_token_resolver(), duration=1.0, session_rate=20, seed=3,
+                               base_url=base_url)
+
+        assert report["sessions"] > 5 and report["requests"] == 3 * report["sessions"] == len(seen)
+        assert report["overall"]["status_counts"] == {"200": report["requests"]}
+        assert {path for path, _ in seen} == {f"{BASE}/product/list", f"{BASE}/product/detail", f"{BASE}/shop/1/tags"}
+        details = [params for path, params in seen if path.endswith("detail")]
+        assert {params["id"] for params in details} <= {"101", "102"} and all(p["shop_id"] == "1" for p in details)
+        assert report["endpoints"]["GET /product/list"]["share"] == pytest.approx(1 / 3, abs=1e-3)
+        assert "模型占比" in format_synthetic_report(report)
@@ -0,0 +1,236 @@
+"""
+图片上传压测 - 以流式 multipart 请求体从磁盘上传文件，按文件大小和并发测量上传吞吐
+
+操作工具类和头像测试的上传都先把整个文件读入内存再构造 multipart 请求体，
+大文件高并发时客户端内存会先成为瓶颈。本模块：
+
+- StreamingMultipartBody 按块从磁盘读取文件，边读边发送，请求体不在内存中完整出现
+- 按文件大小（10KB 到 frontend/test_user_avatar.py 中 large_image_file 的 6MB）和并发级别扫描，
+  报告 MB/s、延迟百分位和拒绝情况（超过 5MB 的文件应被拒绝）
+- 上传端点覆盖管理员/商家的商品图片、店铺图片，以及前端用户头像
+"""
+
+import base64
+import sys
+import tempfile
+import uuid
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from conftest import API_BASE_URL, make_request_with_retry
+from perf.load_generator import Operation, run_closed_loop
+
+
+KB = 1024
+MB = 1024 * 1024
+
+# 默认文件大小：10KB 到 large_image_file 的 6MB，5MB 为头像接口的大小上限
+DEFAULT_UPLOAD_SIZES = (10 * KB, 100 * KB, 1 * MB, 5 * MB, 6 * MB)
+
+DEFAULT_UPLOAD_LEVELS = (1, 4, 8)
+
+# 上传端点：名称 → (路径, 文件字段名)
+UPLOAD_ENDPOINTS = {
+    "admin.product": ("/admin/product/upload-image", "image"),
+    "admin.shop": ("/admin/shop/upload-image", "image"),
+    "shopOwner.product": ("/shopOwner/product/upload-image", "image"),
+    "shopOwner.shop": ("/shopOwner/shop/upload-image", "image"),
+    "user.avatar": ("/user/upload-avatar", "avatar"),
+}
+
+# 最小的有效 PNG 图片（1x1 像素），与头像测试使用的相同
+_PNG_HEADER = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=="
+)
+
+# 每次从磁盘读取的块大小
+CHUNK_SIZE = 64 * KB
+
+# 测试文件默认目录
+UPLOAD_WORKDIR = Path(tempfile.gettempdir()) / "orderease_upload_bench"
+
+
+class StreamingMultipartBody:
+    """流式 multipart/form-data 请求体
+
+    实现 read() 和 __iter__()，并提供 __len__ 让 requests 设置 Content-Length，
+    http.client 发送时按块读取，文件内容不会整体读入内存。每个实例只能发送一次。
+    """
+
+    def __init__(self, field: str, path, filename: Optional[str] = None,
+                 content_type: str = "image/png", chunk_size: int = CHUNK_SIZE):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.boundary = uuid.uuid4().hex
+        filename = filename or self.path.name
+        self._preamble = (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+        self._epilogue = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self._length = len(self._preamble) + self.path.stat().st_size + len(self._epilogue)
+        self._chunks: Optional[Iterator[bytes]] = None
+        self._pending = b""
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self):
+        return self._length
+
+    def _generate(self) -> Iterator[bytes]:
+        yield self._preamble
+        with open(self.path, "rb") as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        yield self._epilogue
+
+    def __iter__(self):
+        if self._chunks is None:
+            self._chunks = self._generate()
+        return self._chunks
+
+    def read(self, size: int = -1) -> bytes:
+        """读取至多 size 字节，size 为负数时读取剩余全部（仅用于小文件调试）"""
+        chunks = iter(self)
+        buffer = self._pending
+        while size < 0 or len(buffer) < size:
+            try:
+                buffer += next(chunks)
+            except StopIteration:
+                break
+        if size < 0:
+            self._pending = b""
+            return buffer
+        self._pending = buffer[size:]
+        return buffer[:size]
+
+
+def create_upload_file(size: int, directory) -> Path:
+    """在目录中生成指定大小的测试图片（有效 PNG 头 + 填充），已存在则直接复用"""
+    path = Path(directory) / f"upload_{size}.png"
+    if path.exists() and path.stat().st_size == size:
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(_PNG_HEADER[:size])
+        remaining = size - min(size, len(_PNG_HEADER))
+        block = b"\0" * CHUNK_SIZE
+        while remaining > 0:
+            f.write(block[:remaining])
+            remaining -= min(remaining, CHUNK_SIZE)
+    return path
+
+
+def default_upload_file(size: int = 100 * KB) -> Path:
+    """上传负载使用的默认测试文件"""
+    return create_upload_file(size, UPLOAD_WORKDIR)
+
+
+def stream_upload(endpoint: str, token: str, path, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+    """以流式请求体上传文件
+
+    Args:
+        endpoint: UPLOAD_ENDPOINTS 中的名称
+        token: 对应角色的令牌
+        path: 文件路径
+        params: 查询参数，例如商品图片需要 {"id": 商品ID, "shop_id": 店铺ID}
+    """
+    route, field = UPLOAD_ENDPOINTS[endpoint]
+    url = f"{API_BASE_URL}{route}"
+
+    def request_func():
+        # 请求体只能发送一次，429 重试时需要重新构造
+        body = StreamingMultipartBody(field, path)
+        headers = {"Authorization": f"Bearer {token}", "Content-Type": body.content_type}
+        return requests.post(url, params=params, data=body, headers=headers)
+
+    return make_request_with_retry(request_func)
+
+
+def upload_targets(admin_token=None, shop_id=None, product_id=None, shop_owner_token=None,
+                   user_token=None) -> Dict[str, Dict[str, Any]]:
+    """根据可用的令牌和ID确定可压测的上传端点
+
+    Returns:
+        {端点名称: {"token", "params"}}
+    """
+    targets = {}
+    if admin_token and shop_id and product_id:
+        targets["admin.product"] = {"token": admin_token, "params": {"id": product_id, "shop_id": shop_id}}
+    if admin_token and shop_id:
+        targets["admin.shop"] = {"token": admin_token, "params": {"id": shop_id}}
+    if shop_owner_token and shop_id and product_id:
+        targets["shopOwner.product"] = {"token": shop_owner_token, "params": {"id": product_id, "shop_id": shop_id}}
+    if shop_owner_token and shop_id:
+        targets["shopOwner.shop"] = {"token": shop_owner_token, "params": {"id": shop_id}}
+    if user_token:
+        targets["user.avatar"] = {"token": user_token, "params": None}
+    return targets
+
+
+def benchmark_uploads(targets: Dict[str, Dict[str, Any]], sizes: Sequence[int] = DEFAULT_UPLOAD_SIZES,
+                      levels: Sequence[int] = DEFAULT_UPLOAD_LEVELS, duration: float = 10.0,
+                      workdir=None) -> List[Dict[str, Any]]:
+    """按端点、文件大小、并发级别扫描上传性能
+
+    Args:
+        targets: upload_targets 的返回值
+        sizes: 文件大小（字节）
+        levels: 并发级别
+        duration: 每个组合的持续时间（秒）
+        workdir: 测试文件目录，默认 UPLOAD_WORKDIR
+
+    Returns:
+        每个组合一行：{"endpoint", "size", "concurrency", "mb_per_s", "accepted", "rejected", ...汇总字段}
+    """
+    workdir = Path(workdir or UPLOAD_WORKDIR)
+    files = {size: create_upload_file(size, workdir) for size in sizes}
+    rows = []
+    for endpoint, target in targets.items():
+        for size in sizes:
+            operation = Operation(endpoint, partial(stream_upload, endpoint, target["token"], files[size], target["params"]))
+            for concurrency in levels:
+                summary = run_closed_loop([operation], concurrency, duration)
+                rejected = sum(count for status, count in summary["status_counts"].items()
+                               if status.isdigit() and 400 <= int(status) < 500)
+                summary.update({
+                    "endpoint": endpoint,
+                    "size": size,
+                    "mb_per_s": round(summary["succeeded"] * size / MB / summary["elapsed"], 3),
+                    "accepted": summary["succeeded"],
+                    "rejected": rejected,
+                })
+                rows.append(summary)
+                print(f"{endpoint:<18} {format_size(size):>7} 并发 {concurrency:>2}: {summary['mb_per_s']:.2f} MB/s, "
+                      f"p50={summary['naive_ms']['p50']:.1f}ms, p99={summary['naive_ms']['p99']:.1f}ms, "
+                      f"状态码={summary['status_counts']}")
+    return rows
+
+
+def format_size(size: int) -> str:
+    """以 KB/MB 显示文件大小"""
+    if size >= MB:
+        return f"{size / MB:g}MB"
+    return f"{size / KB:g}KB"
+
+
+def format_upload_report(rows: Sequence[Dict[str, Any]]) -> str:
+    """格式化上传压测结果"""
+    lines = [f"{'端点':<18}{'大小':>8}{'并发':>6}{'MB/s':>9}{'p50':>10}{'p99':>10}{'成功':>7}{'拒绝':>7}{'其他失败':>9}"]
+    for row in rows:
+        others = row["failed"] - row["rejected"]
+        lines.append(f"{row['endpoint']:<18}{format_size(row['size']):>8}{row['concurrency']:>6}{row['mb_per_s']:>9.2f}"
+                     f"{row['naive_ms']['p50']:>10.1f}{row['naive_ms']['p99']:>10.1f}"
+                     f"{row['accepted']:>7}{row['rejected']:>7}{others:>9}")
+    return "\n".join(lines)
@@ -0,0 +1,205 @@
+"""
+前端用户池 - 预先注册一批前端用户并保存令牌，供压测场景取用不同的顾客身份
+
+conftest.py 的 frontend_user_token 只注册并登录一个用户。真实负载需要大量不同的顾客，
+在压测过程中现场注册又会干扰测量结果。本模块：
+
+- 并行注册 N 个前端用户并登录，把用户ID和令牌保存到紧凑的 JSON 文件
+- 再次构建时复用文件中仍然有效的令牌，即将过期的只重新登录，不足的部分才注册新用户
+- 压测时以 O(1) 代价取出（checkout）和归还（release）身份，同一时刻在途的请求使用不同用户
+
+文件中保存了有效令牌，不要提交到仓库。
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.test_data import test_data
+from frontend.test_auth import FrontendAuthHelper
+
+
+# 用户池默认保存路径
+DEFAULT_POOL_PATH = Path(__file__).parent.parent / "perf_results" / "user_pool.json"
+
+# 令牌有效期（秒），与 config.yaml 的 jwt.expiration 一致，登录响应没有 expiredAt 时使用
+TOKEN_LIFETIME = 7200
+
+# 用户池文件格式版本
+POOL_FORMAT_VERSION = 1
+
+# 一个顾客身份：用户ID、用户名、令牌、令牌过期时间（Unix 时间戳）
+Identity = namedtuple("Identity", ["user_id", "username", "token", "expires_at"])
+
+
+def _login(username: str, password: str) -> Optional[tuple]:
+    """前端用户登录，返回 (用户ID, 令牌, 过期时间)，失败返回None"""
+    response = FrontendAuthHelper.frontend_user_login(username, password)
+    if response.status_code != 200:
+        print(f"[FAIL] 前端用户登录失败: {username}, 状态码: {response.status_code}, 响应: {response.text}")
+        return None
+    data = response.json()
+    token = data.get("token")
+    if not token:
+        return None
+    user_id = data.get("user", {}).get("id") or data.get("id")
+    expires_at = data.get("expiredAt") or int(time.time()) + TOKEN_LIFETIME
+    return user_id, token, int(expires_at)
+
+
+def register_identity(username: str, password: str) -> Optional[Identity]:
+    """注册一个前端用户并登录，失败返回None"""
+    response = FrontendAuthHelper.frontend_user_register(username, password)
+    if response.status_code != 200:
+        print(f"[FAIL] 前端用户注册失败: {username}, 状态码: {response.status_code}, 响应: {response.text}")
+        return None
+    data = response.json()
+    registered_id = data.get("user", {}).get("id") or data.get("id")
+    login = _login(username, password)
+    if login is None:
+        return None
+    user_id, token, expires_at = login
+    return Identity(str(user_id or registered_id), username, token, expires_at)
+
+
+def relogin_identity(identity: Identity, password: str) -> Optional[Identity]:
+    """为已注册的用户重新登录获取新令牌，失败返回None"""
+    login = _login(identity.username, password)
+    if login is None:
+        return None
+    user_id, token, expires_at = login
+    return Identity(str(user_id or identity.user_id), identity.username, token, expires_at)
+
+
+class UserPool:
+    """前端用户池
+
+    checkout() 从队首取出一个身份，release() 放回队尾，均为 O(1)；
+    身份按先进先出轮转，池中每个用户都会被均匀使用。
+    """
+
+    def __init__(self, identities: Iterable[Identity] = (), password: str = test_data.DEFAULT_PASSWORD):
+        self.password = password
+        self._available = deque(identities)
+        self._size = len(self._available)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def available(self) -> int:
+        """当前可取出的身份数量"""
+        return len(self._available)
+
+    def identities(self) -> List[Identity]:
+        """当前池中（未被取出）的全部身份"""
+        with self._lock:
+            return list(self._available)
+
+    def checkout(self) -> Optional[Identity]:
+        """取出一个身份，池为空时返回None"""
+        with self._lock:
+            return self._available.popleft() if self._available else None
+
+    def release(self, identity: Identity):
+        """归还身份"""
+        with self._lock:
+            self._available.append(identity)
+
+    @contextmanager
+    def identity(self):
+        """取出一个身份并在结束后归还；池为空时抛出 RuntimeError，压测中计为失败请求"""
+        identity = self.checkout()
+        if identity is None:
+            raise RuntimeError("用户池已耗尽，请增加用户数量或降低并发")
+        try:
+            yield identity
+        finally:
+            self.release(identity)
+
+    def expiring(self, min_ttl: float) -> List[Identity]:
+        """剩余有效期不足 min_ttl 秒的身份"""
+        deadline = time.time() + min_ttl
+        return [identity for identity in self.identities() if identity.expires_at < deadline]
+
+    def save(self, path=DEFAULT_POOL_PATH) -> Path:
+        """保存到 JSON 文件（先写临时文件再替换，避免中断时损坏已有文件）"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": POOL_FORMAT_VERSION,
+            "password": self.password,
+            "fields": list(Identity._fields),
+            "users": [list(identity) for identity in self.identities()],
+        }
+        temp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(temp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path=DEFAULT_POOL_PATH) -> "UserPool":
+        """从 JSON 文件加载，文件不存在时返回空池"""
+        path = Path(path)
+        if not path.exists():
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != POOL_FORMAT_VERSION:
+            raise ValueError(f"不支持的用户池文件版本: {data.get('version')}")
+        return cls((Identity(*user) for user in data["users"]), password=data["password"])
+
+
+def _parallel(func, items: Sequence, concurrency: int) -> List:
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="user-pool") as executor:
+        return [result for result in executor.map(func, items) if result is not None]
+
+
+def build_user_pool(count: int, path=DEFAULT_POOL_PATH, concurrency: int = 8,
+                    min_ttl: float = 1800.0, prefix: str = "perf_customer") -> UserPool:
+    """构建或补充用户池并保存
+
+    Args:
+        count: 目标用户数量
+        path: 用户池文件路径，已存在时复用其中的用户
+        concurrency: 并行注册/登录的线程数
+        min_ttl: 令牌剩余有效期低于该值（秒）时重新登录
+        prefix: 新注册用户名前缀
+
+    Returns:
+        构建好的用户池
+    """
+    existing = UserPool.load(path)
+    password = existing.password
+    expiring = set(existing.expiring(min_ttl))
+    valid = [identity for identity in existing.identities() if identity not in expiring][:count]
+
+    refreshed = []
+    if len(valid) < count and expiring:
+        stale = list(expiring)[:count - len(valid)]
+        refreshed = _parallel(lambda identity: relogin_identity(identity, password), stale, concurrency)
+        print(f"重新登录 {len(refreshed)}/{len(stale)} 个令牌即将过期的用户")
+
+    identities = valid + refreshed
+    missing = count - len(identities)
+    if missing > 0:
+        usernames = [f"{prefix}_{test_data.generate_unique_suffix()}_{i}" for i in range(missing)]
+        registered = _parallel(lambda username: register_identity(username, password), usernames, concurrency)
+        print(f"注册 {len(registered)}/{missing} 个新用户")
+        identities.extend(registered)
+
+    pool = UserPool(identities, password=password)
+    pool.save(path)
+    print(f"✓ 用户池共 {len(pool)} 个用户（复用 {len(valid)} 个），已保存: {path}")
+    return pool
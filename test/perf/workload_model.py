@@ -0,0 +1,500 @@
+"""
+工作负载模型 - 从录制的流量拟合用户旅程的马尔可夫模型，按任意规模生成统计形态相同的新流量
+
+log_replay 只能原样回放，流量规模和时长受限于日志本身。本模块：
+
+- 读取录制的流量：HAProxy HTTP 日志（解析同 log_replay），或 record_cassette 录制的 JSON Lines 磁带
+  （通过 conftest.add_request_listener 记录测试或压测过程中 make_request_with_retry 发出的每个请求）
+- 按客户端切分会话（磁带按令牌区分客户端），间隔超过 session_gap 开始新的会话
+- 只保留 actions 模块和前端辅助类调用的 GET 路由（covered_routes 扫描源码得到），
+  路径中的ID归一化为 {id}，每个路由是马尔可夫链的一个状态
+- 拟合紧凑的模型：会话入口分布、状态转移概率（含结束会话）、每个状态之后的思考时间分位数、
+  查询参数的出现概率和取值分布、每类实体ID访问的 Zipf 倾斜指数，以及录制流量的会话到达率
+- 生成时按指定的会话到达率（或录制速率的倍数）启动会话，每个会话沿马尔可夫链游走，
+  请求按思考时间排入开环负载生成器；ID从测试店铺的ID池中按拟合的倾斜指数抽取
+
+模型是普通 JSON，可以检入仓库，录制的原始流量不需要保存。
+"""
+
+import bisect
+import heapq
+import itertools
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import conftest
+from conftest import API_BASE_URL
+from perf.endpoint_bench import resolve_parameter
+from perf.load_generator import OpenLoopLoadGenerator, Operation, Sample, summarize_latencies
+from perf.log_replay import DEFAULT_EXCLUDE, LogEntry, iter_log_entries, normalize_endpoint, open_log
+
+
+MODEL_FORMAT_VERSION = 1
+
+# 同一客户端两个请求间隔超过该时间（秒）时开始新的会话
+DEFAULT_SESSION_GAP = 1800.0
+
+# 思考时间和会话长度保存的分位数个数（0、5、…、100）
+QUANTILES = 21
+
+# 每个参数保存的最常见取值个数
+TOP_VALUES = 10
+
+# 模型中会话开始和结束的伪状态
+START, END = "START", "END"
+
+# ID池的实体，与 log_replay.build_id_pools 的键一致
+ENTITY_KEYS = ("shop_id", "product_id", "order_id", "user_id", "tag_id")
+
+# actions 模块和前端辅助类
+ROUTE_SOURCES = ("admin/*_actions.py", "shop_owner/*_actions.py", "frontend/test_*.py")
+
+_URL_PATTERN = re.compile(r'f"\{API_BASE_URL\}(/[^"?]*)')
+_METHOD_PATTERN = re.compile(r"requests\.(get|post|put|delete|patch)\(")
+_PLACEHOLDER = re.compile(r"\{[^}]*\}")
+
+
+def covered_routes(root: Path = Path(__file__).parent.parent) -> List[str]:
+    """扫描 actions 模块和前端辅助类中的请求，返回 ["GET /admin/product/list", ...]
+
+    每个 url = f"{API_BASE_URL}/..." 取其后第一个 requests.<method>( 的方法，f-string 占位符归一化为 {id}。
+    """
+    routes = set()
+    for pattern in ROUTE_SOURCES:
+        for path in sorted(root.glob(pattern)):
+            source = path.read_text(encoding="utf-8")
+            for match in _URL_PATTERN.finditer(source):
+                method = _METHOD_PATTERN.search(source, match.end())
+                if method:
+                    routes.add(f"{method.group(1).upper()} {_PLACEHOLDER.sub('{id}', match.group(1))}")
+    return sorted(routes)
+
+
+def id_entity(name: str, path: str) -> Optional[str]:
+    """参数指向的实体（"product_id" 等），规则与 endpoint_bench.resolve_parameter 一致；不是ID参数时返回None"""
+    if not name.replace("_", "").replace("-", "").lower().endswith("id"):
+        return None
+    # 以实体名本身作为上下文，resolve_parameter 取到的值就是实体名
+    entity = resolve_parameter(name, path, {key: key for key in ENTITY_KEYS})
+    return entity if entity in ENTITY_KEYS else None
+
+
+@contextmanager
+def record_cassette(path):
+    """把代码块内（包括其启动的线程）经 make_request_with_retry 发出的请求录制为 JSON Lines 磁带
+
+    每行 {"timestamp", "client", "method", "url", "status", "elapsed_ms"}，client 为令牌的 crc32，
+    不保存令牌和请求体。
+    """
+    lock = threading.Lock()
+    with open(path, "a", encoding="utf-8") as handle:
+        def listener(response: requests.Response, retry: bool = False):
+            request = response.request
+            authorization = request.headers.get("Authorization", "") if request is not None else ""
+            elapsed = response.elapsed.total_seconds()
+            record = {
+                "timestamp": round(time.time() - elapsed, 6),
+                "client": f"{zlib.crc32(authorization.encode()):08x}" if authorization else "anonymous",
+                "method": request.method if request is not None else "GET",
+                "url": response.url,
+                "status": response.status_code,
+                "elapsed_ms": round(elapsed * 1000, 3),
+            }
+            with lock:
+                handle.write(json.dumps(record) + "\n")
+
+        conftest.add_request_listener(listener)
+        try:
+            yield
+        finally:
+            conftest.remove_request_listener(listener)
+
+
+def load_cassette(lines: Iterable[str], base_url: str = API_BASE_URL) -> Iterator[LogEntry]:
+    """逐行读取磁带，只保留 API 路径下的请求"""
+    base_path = urlsplit(base_url).path.rstrip("/")
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        url = urlsplit(record["url"])
+        if not url.path.startswith(base_path + "/"):
+            continue
+        yield LogEntry(record["timestamp"], record["client"], record["method"].upper(), url.path[len(base_path):],
+                       parse_qsl(url.query, keep_blank_values=True), record["status"], record.get("elapsed_ms"))
+
+
+def iter_traffic(path, base_url: str = API_BASE_URL, methods: Sequence[str] = ("GET",)) -> Iterator[LogEntry]:
+    """读取录制的流量，按首个非空行判断是磁带（JSON）还是 HAProxy 日志"""
+    lines = open_log(path)
+    first = next((line for line in lines if line.strip()), "")
+    lines = itertools.chain([first], lines)
+    if first.lstrip().startswith("{"):
+        methods = {method.upper() for method in methods}
+        return (entry for entry in load_cassette(lines, base_url)
+                if entry.method in methods and not any(word in entry.path for word in DEFAULT_EXCLUDE))
+    return iter_log_entries(lines, base_url=base_url, methods=methods)
+
+
+def _quantiles(values: Sequence[float]) -> List[float]:
+    values = sorted(values)
+    if not values:
+        return []
+    return [round(values[min(int(i * (len(values) - 1) / (QUANTILES - 1) + 0.5), len(values) - 1)], 3)
+            for i in range(QUANTILES)]
+
+
+def _sample_quantiles(rng: random.Random, quantiles: Sequence[float]) -> float:
+    """在分位数之间线性插值抽样"""
+    if not quantiles:
+        return 0.0
+    position = rng.random() * (len(quantiles) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(quantiles) - 1)
+    return quantiles[lower] + (quantiles[upper] - quantiles[lower]) * (position - lower)
+
+
+def fit_zipf(counts: Iterable[int]) -> float:
+    """按频次的秩-频次双对数线性回归拟合 Zipf 指数，少于两个不同取值时返回 0（均匀）"""
+    frequencies = sorted((count for count in counts if count > 0), reverse=True)
+    if len(frequencies) < 2:
+        return 0.0
+    xs = [math.log(rank) for rank in range(1, len(frequencies) + 1)]
+    ys = [math.log(count) for count in frequencies]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
+    return round(max(0.0, -slope), 3)
+
+
+def _normalize_distribution(counter: Mapping[str, int]) -> Dict[str, float]:
+    total = sum(counter.values())
+    return {key: round(count / total, 4) for key, count in counter.most_common()} if total else {}
+
+
+def fit_model(entries: Iterable[LogEntry], routes: Optional[Sequence[str]] = None,
+              session_gap: float = DEFAULT_SESSION_GAP) -> Dict[str, Any]:
+    """从录制的流量流式拟合马尔可夫模型
+
+    Args:
+        entries: 按时间顺序的请求（iter_traffic 的结果）
+        routes: 作为状态的路由，默认 covered_routes()；不在其中的请求丢弃
+        session_gap: 会话切分间隔（秒）
+
+    Returns:
+        模型字典：{"version", "source", "session_rate", "start", "transitions", "think_time_s",
+                   "session_length", "max_session_length", "states", "skew", "endpoint_mix"}
+    """
+    routes = set(covered_routes() if routes is None else routes)
+    open_sessions: Dict[str, Tuple[str, float, int]] = {}
+    transitions: Dict[str, Counter] = {}
+    think_times: Dict[str, List[float]] = {}
+    session_lengths: List[int] = []
+    visits: Counter = Counter()
+    slots: Dict[str, Dict[str, Any]] = {}
+    entity_counts: Dict[str, Counter] = {}
+    requests_seen = dropped = 0
+    first = last = None
+
+    def close(client):
+        state, _, length = open_sessions.pop(client)
+        transitions.setdefault(state, Counter())[END] += 1
+        session_lengths.append(length)
+
+    def observe_slot(slot: Dict[str, Any], entity: Optional[str], value: str):
+        slot.setdefault("values", Counter())[value] += 1
+        if entity:
+            slot["entity"] = entity
+            entity_counts.setdefault(entity, Counter())[value] += 1
+
+    for entry in entries:
+        requests_seen += 1
+        state = normalize_endpoint(entry.method, entry.path)
+        if state not in routes:
+            dropped += 1
+            continue
+        first = entry.timestamp if first is None else first
+        last = entry.timestamp
+        previous = open_sessions.get(entry.client)
+        if previous and entry.timestamp - previous[1] > session_gap:
+            close(entry.client)
+            previous = None
+        if previous:
+            transitions.setdefault(previous[0], Counter())[state] += 1
+            think_times.setdefault(previous[0], []).append(max(0.0, entry.timestamp - previous[1]))
+            open_sessions[entry.client] = (state, entry.timestamp, previous[2] + 1)
+        else:
+            transitions.setdefault(START, Counter())[state] += 1
+            open_sessions[entry.client] = (state, entry.timestamp, 1)
+        visits[state] += 1
+
+        info = slots.setdefault(state, {"count": 0, "path": [], "params": {}})
+        info["count"] += 1
+        segments = entry.path.split("/")
+        path_ids = [(index, segment) for index, segment in enumerate(segments) if segment.isdigit()]
+        while len(info["path"]) < len(path_ids):
+            info["path"].append({})
+        for slot, (index, segment) in zip(info["path"], path_ids):
+            observe_slot(slot, id_entity("id", f"/{segments[index - 1]}"), segment)
+        for name, value in entry.query:
+            slot = info["params"].setdefault(name, {"present": 0})
+            slot["present"] += 1
+            observe_slot(slot, id_entity(name, entry.path), value)
+
+    for client in list(open_sessions):
+        close(client)
+
+    def compact(slot: Dict[str, Any], count: int) -> Dict[str, Any]:
+        result = {"values": dict(slot["values"].most_common(TOP_VALUES))}
+        if "entity" in slot:
+            result["entity"] = slot["entity"]
+        if "present" in slot:
+            result["presence"] = round(slot["present"] / count, 4)
+        return result
+
+    span = (last - first) if first is not None else 0.0
+    return {
+        "version": MODEL_FORMAT_VERSION,
+        "source": {"requests": requests_seen, "modeled": sum(visits.values()), "dropped": dropped,
+                   "sessions": len(session_lengths), "span_s": round(span, 3)},
+        "session_rate": round(len(session_lengths) / span, 6) if span > 0 else 0.0,
+        "start": _normalize_distribution(transitions.pop(START, Counter())),
+        "transitions": {state: _normalize_distribution(counter) for state, counter in sorted(transitions.items())},
+        "think_time_s": {state: _quantiles(values) for state, values in sorted(think_times.items())},
+        "session_length": _quantiles(session_lengths),
+        "max_session_length": max(session_lengths, default=0),
+        "states": {
+            state: {"path": [compact(slot, info["count"]) for slot in info["path"]],
+                    "params": {name: compact(slot, info["count"]) for name, slot in info["params"].items()}}
+            for state, info in sorted(slots.items())
+        },
+        "skew": {entity: fit_zipf(counter.values()) for entity, counter in sorted(entity_counts.items())},
+        "endpoint_mix": _normalize_distribution(visits),
+    }
+
+
+def save_model(model: Mapping[str, Any], path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(model, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    return path
+
+
+def load_model(path) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        model = json.load(f)
+    if model.get("version") != MODEL_FORMAT_VERSION:
+        raise ValueError(f"不支持的模型格式版本: {model.get('version')}")
+    return model
+
+
+def _choose(rng: random.Random, distribution: Mapping[str, float]) -> str:
+    return rng.choices(list(distribution), weights=list(distribution.values()))[0]
+
+
+def walk_session(model: Mapping[str, Any], rng: random.Random,
+                 max_length: Optional[int] = None) -> List[Tuple[str, float]]:
+    """沿马尔可夫链生成一个会话
+
+    Returns:
+        [(状态, 距会话开始的秒数)]，长度不超过 max_length（默认录制流量中最长的会话）
+    """
+    max_length = max_length or model["max_session_length"]
+    state, offset, session = _choose(rng, model["start"]), 0.0, []
+    while True:
+        session.append((state, offset))
+        following = model["transitions"].get(state)
+        if len(session) >= max_length or not following:
+            return session
+        next_state = _choose(rng, following)
+        if next_state == END:
+            return session
+        offset += _sample_quantiles(rng, model["think_time_s"].get(state, []))
+        state = next_state
+
+
+class IdSampler:
+    """按拟合的 Zipf 指数从ID池中抽取ID，池中靠前的ID更热；池中没有该实体时使用录制的取值"""
+
+    def __init__(self, pools: Mapping[str, Sequence[str]], skew: Mapping[str, float]):
+        self.pools = {key: list(pool) for key, pool in pools.items() if pool}
+        self._cumulative = {
+            key: list(itertools.accumulate(1.0 / rank ** skew.get(key, 0.0) for rank in range(1, len(pool) + 1)))
+            for key, pool in self.pools.items()
+        }
+
+    def sample(self, rng: random.Random, slot: Mapping[str, Any]) -> str:
+        entity = slot.get("entity")
+        if entity in self.pools:
+            cumulative = self._cumulative[entity]
+            return self.pools[entity][bisect.bisect_left(cumulative, rng.random() * cumulative[-1])]
+        return _choose(rng, slot["values"])
+
+
+def build_request(model: Mapping[str, Any], state: str, ids: IdSampler,
+                  rng: random.Random) -> Tuple[str, str, List[Tuple[str, str]]]:
+    """为状态生成一个具体请求：(方法, 路径, 查询参数)"""
+    method, template = state.split(" ", 1)
+    info = model["states"][state]
+    path_slots = iter(info["path"])
+    path = "/".join(ids.sample(rng, next(path_slots)) if segment == "{id}" else segment
+                    for segment in template.split("/"))
+    query = [(name, ids.sample(rng, slot)) for name, slot in info["params"].items()
+             if rng.random() < slot.get("presence", 1.0)]
+    return method, path, query
+
+
+def _request(local: threading.local, method: str, url: str, params, token, timeout: float):
+    session = getattr(local, "session", None)
+    if session is None:
+        session = local.session = requests.Session()
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    return session.request(method, url, params=params, headers=headers, timeout=timeout)
+
+
+def synthesize_arrivals(model: Mapping[str, Any], session_rate: float, duration: float, ids: IdSampler,
+                        token_for: Callable[[str, str], Optional[str]], rng: random.Random,
+                        base_url: str = API_BASE_URL, timeout: float = 30.0,
+                        stats: Optional[Dict[str, int]] = None) -> Iterator[Tuple[float, Operation]]:
+    """按泊松过程启动会话，合并所有会话的请求，按时间顺序生成 (偏移秒数, 操作)
+
+    会话在 duration 内启动，已启动的会话走完为止；同时只保存进行中的会话。
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault("sessions", 0)
+    local = threading.local()
+    pending: List[Tuple[float, int, int, List[Tuple[str, float]]]] = []
+    counter = itertools.count()
+    next_start = rng.expovariate(session_rate) if session_rate > 0 else math.inf
+    while pending or next_start < duration:
+        if next_start < duration and (not pending or next_start <= pending[0][0]):
+            session = walk_session(model, rng)
+            number = stats["sessions"]
+            stats["sessions"] += 1
+            heapq.heappush(pending, (next_start + session[0][1], next(counter), number,
+                                     [(state, next_start + offset) for state, offset in session]))
+            next_start += rng.expovariate(session_rate)
+            continue
+        when, _, number, steps = heapq.heappop(pending)
+        state = steps[0][0]
+        method, path, query = build_request(model, state, ids, rng)
+        token = token_for(path, f"session-{number}")
+        yield when, Operation(state, partial(_request, local, method, f"{base_url}{path}", query, token, timeout))
+        if len(steps) > 1:
+            heapq.heappush(pending, (steps[1][1], next(counter), number, steps[1:]))
+
+
+def run_synthetic(model: Mapping[str, Any], pools: Mapping[str, Sequence[str]],
+                  token_for: Callable[[str, str], Optional[str]], duration: float,
+                  session_rate: Optional[float] = None, scale: float = 1.0, max_workers: int = 64,
+                  seed: Optional[int] = None, base_url: str = API_BASE_URL) -> Dict[str, Any]:
+    """按模型生成流量并驱动开环负载生成器
+
+    Args:
+        session_rate: 每秒启动的会话数，默认录制流量的会话到达率乘以 scale
+
+    Returns:
+        {"session_rate", "duration", "sessions", "requests", "elapsed_s", "overall": {...},
+         "endpoints": {状态: {"sent", "share", "model_share", "status_counts", "naive_ms", "corrected_ms"}}}
+    """
+    session_rate = session_rate if session_rate is not None else model["session_rate"] * scale
+    rng = random.Random(seed)
+    stats: Dict[str, int] = {}
+    samples: Dict[str, List[Sample]] = {}
+    lock = threading.Lock()
+
+    def collect(sample: Sample):
+        with lock:
+            samples.setdefault(sample.operation, []).append(sample)
+
+    arrivals = synthesize_arrivals(model, session_rate, duration, IdSampler(pools, model["skew"]), token_for, rng,
+                                   base_url=base_url, stats=stats)
+    run_start, run_end = OpenLoopLoadGenerator(max_workers=max_workers).replay(arrivals, collect)
+
+    def summarize(items: Sequence[Sample]) -> Dict[str, Any]:
+        status_counts: Dict[str, int] = {}
+        for sample in items:
+            key = str(sample.status) if sample.status is not None else "error"
+            status_counts[key] = status_counts.get(key, 0) + 1
+        return {
+            "sent": len(items),
+            "status_counts": status_counts,
+            "naive_ms": summarize_latencies([(s.finished - s.started) * 1000 for s in items]),
+            "corrected_ms": summarize_latencies([(s.finished - s.intended) * 1000 for s in items]),
+        }
+
+    total = sum(len(items) for items in samples.values())
+    endpoints = {}
+    for state in sorted(set(samples) | set(model["endpoint_mix"])):
+        items = samples.get(state, [])
+        endpoints[state] = {**summarize(items), "share": round(len(items) / total, 4) if total else 0.0,
+                            "model_share": model["endpoint_mix"].get(state, 0.0)}
+    return {
+        "session_rate": round(session_rate, 6),
+        "duration": duration,
+        "sessions": stats["sessions"],
+        "requests": total,
+        "elapsed_s": round(run_end - run_start, 3),
+        "overall": summarize([sample for items in samples.values() for sample in items]),
+        "endpoints": endpoints,
+    }
+
+
+def format_model_report(model: Mapping[str, Any], top: int = 10) -> str:
+    """格式化模型概要：来源、会话、端点占比、最常见的转移和实体倾斜"""
+    source = model["source"]
+    lengths = model["session_length"]
+    lines = [
+        f"请求 {source['requests']} 个，建模 {source['modeled']}，丢弃 {source['dropped']}（不在 actions 覆盖的路由中）",
+        f"会话 {source['sessions']} 个，跨度 {source['span_s']}s，到达率 {model['session_rate']}/s，"
+        f"会话长度 p50 {lengths[len(lengths) // 2] if lengths else 0}、最长 {model['max_session_length']}",
+        f"实体倾斜（Zipf 指数）: {model['skew']}",
+        "",
+        f"{'端点':<48}{'占比':>8}{'入口':>8}{'结束':>8}{'思考p50(s)':>12}",
+    ]
+    for state, share in list(model["endpoint_mix"].items())[:top]:
+        think = model["think_time_s"].get(state, [])
+        lines.append(f"{state:<48}{share:>8.1%}{model['start'].get(state, 0.0):>8.1%}"
+                     f"{model['transitions'].get(state, {}).get(END, 0.0):>8.1%}"
+                     f"{think[len(think) // 2] if think else 0.0:>12.2f}")
+    pairs = sorted(((probability * model["endpoint_mix"].get(state, 0.0), state, following)
+                    for state, targets in model["transitions"].items()
+                    for following, probability in targets.items() if following != END), reverse=True)
+    if pairs:
+        lines.append("")
+        lines.append("最常见的转移:")
+        lines.extend(f"  {state} → {following}（{model['transitions'][state][following]:.0%}）"
+                     for _, state, following in pairs[:top])
+    return "\n".join(lines)
+
+
+def format_synthetic_report(report: Mapping[str, Any]) -> str:
+    """格式化生成流量的端点占比（与模型对比）和延迟"""
+    lines = [f"会话到达率 {report['session_rate']}/s，{report['duration']}s 内启动 {report['sessions']} 个会话，"
+             f"发送 {report['requests']} 个请求，用时 {report['elapsed_s']}s",
+             f"整体 p50 {report['overall']['corrected_ms']['p50']:.1f}ms，p99 {report['overall']['corrected_ms']['p99']:.1f}ms",
+             "",
+             f"{'端点':<48}{'请求':>7}{'占比':>8}{'模型占比':>10}{'p50':>9}{'p99':>9}  状态"]
+    for state, item in sorted(report["endpoints"].items(), key=lambda pair: pair[1]["sent"], reverse=True):
+        latency = item["corrected_ms"]
+        lines.append(f"{state:<48}{item['sent']:>7}{item['share']:>8.1%}{item['model_share']:>10.1%}"
+                     f"{latency['p50']:>9.1f}{latency['p99']:>9.1f}  {item['status_counts']}")
+    return "\n".join(lines)
@@ -0,0 +1,314 @@
+"""
+压测负载定义 - 将 admin / shop_owner 操作工具类及前端辅助类包装为压测操作
+
+操作工具类函数通过 functools.partial 绑定令牌和ID后作为 Operation 的请求定义，
+压测与功能测试共用同一套请求构造逻辑。
+"""
+
+import sys
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+# 添加上级目录到 sys.path，以便导入 conftest 和操作工具类
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from conftest import API_BASE_URL, make_request_with_retry
+from config.test_data import test_data
+from admin import dashboard_actions as admin_dashboard_actions
+from admin import order_actions as admin_order_actions
+from admin import product_actions as admin_product_actions
+from admin import shop_actions as admin_shop_actions
+from admin import tag_actions as admin_tag_actions
+from admin import user_actions as admin_user_actions
+from frontend.test_order import FrontendOrderHelper
+from frontend.test_product import FrontendProductHelper
+from shop_owner import order_actions as shop_order_actions
+from shop_owner import product_actions as shop_product_actions
+from perf.http_cache import ClientCaches
+from perf.load_generator import NotSent, Operation
+from perf.page_load import PageRecorder, menu_page_operation, menu_page_requests
+from perf.upload_bench import default_upload_file, stream_upload
+
+
+def login(username: str, password: str) -> Optional[str]:
+    """通过通用登录接口获取令牌（管理员和商家）
+
+    Returns:
+        令牌，失败返回None
+    """
+    url = f"{API_BASE_URL}/login"
+    payload = {"username": username, "password": password}
+
+    def request_func():
+        return requests.post(url, json=payload)
+
+    response = make_request_with_retry(request_func)
+    if response.status_code == 200:
+        return response.json().get("token") or None
+    print(f"[FAIL] 登录失败，用户名: {username}, 状态码: {response.status_code}, 响应: {response.text}")
+    return None
+
+
+def get_admin_token() -> Optional[str]:
+    """使用测试数据中的管理员凭据登录"""
+    credentials = test_data.get_admin_credentials()
+    return login(credentials["username"], credentials["password"])
+
+
+def get_first_shop_id(admin_token) -> Optional[str]:
+    """获取第一个店铺ID，供命令行压测时默认使用"""
+    shops = admin_shop_actions.get_shop_list(admin_token, page=1, page_size=1)
+    if shops:
+        return shops[0].get("id")
+    return None
+
+
+def get_first_product_id(admin_token, shop_id) -> Optional[str]:
+    """获取店铺的第一个商品ID"""
+    products = admin_product_actions.get_product_list(admin_token, shop_id, page=1, page_size=1)
+    if products:
+        return products[0].get("id")
+    return None
+
+
+def get_first_user_id(admin_token) -> Optional[str]:
+    """获取第一个用户ID，供下单负载使用"""
+    users = admin_user_actions.get_user_list(admin_token, page=1, page_size=1)
+    if users:
+        return users[0].get("id")
+    return None
+
+
+def admin_read_operations(admin_token, shop_id, product_id=None) -> List[Operation]:
+    """管理员后台浏览负载：订单列表、商品列表、店铺详情、标签列表、商品详情"""
+    operations = [
+        Operation("admin.order.list", partial(admin_order_actions.get_order_list, admin_token, shop_id), weight=3),
+        Operation("admin.product.list", partial(admin_product_actions.get_product_list, admin_token, shop_id), weight=3),
+        Operation("admin.shop.detail", partial(admin_shop_actions.get_shop_detail, admin_token, shop_id), weight=1),
+        Operation("admin.tag.list", partial(admin_tag_actions.get_tag_list, admin_token, shop_id), weight=1),
+    ]
+    if product_id:
+        operations.append(Operation(
+            "admin.product.detail",
+            partial(admin_product_actions.get_product_detail, admin_token, product_id, shop_id),
+            weight=2,
+        ))
+    return operations
+
+
+def shop_owner_read_operations(shop_owner_token, shop_id, product_id=None) -> List[Operation]:
+    """商家后台浏览负载：订单列表、商品列表、商品详情"""
+    operations = [
+        Operation("shopOwner.order.list", partial(shop_order_actions.get_order_list, shop_owner_token, shop_id), weight=3),
+        Operation("shopOwner.product.list", partial(shop_product_actions.get_product_list, shop_owner_token, shop_id), weight=3),
+    ]
+    if product_id:
+        operations.append(Operation(
+            "shopOwner.product.detail",
+            partial(shop_product_actions.get_product_detail, shop_owner_token, product_id, shop_id),
+            weight=2,
+        ))
+    return operations
+
+
+def slow_query_operations(admin_token, shop_id) -> List[Operation]:
+    """慢查询负载：高级搜索订单（大分页）和全年数据看板统计
+
+    这两类请求在服务端占用数据库连接的时间最长，用于探测连接池耗尽。
+    """
+    return [
+        Operation(
+            "admin.order.advance_search",
+            partial(admin_order_actions.advance_search_order, admin_token, shop_id, page=1, page_size=100),
+        ),
+        Operation(
+            "admin.dashboard.stats.year",
+            partial(admin_dashboard_actions.get_dashboard_stats, admin_token, shop_id, period="year"),
+        ),
+    ]
+
+
+def order_round_trip(admin_token, shop_id, user_id, product_id) -> bool:
+    """下单往返：创建订单 → 查询详情 → 删除订单
+
+    对应业务流程测试中的下单步骤，删除订单避免压测数据不断累积。
+    """
+    items = [{"product_id": str(product_id), "quantity": 1, "price": 100}]
+    order_id = admin_order_actions.create_order(admin_token, shop_id, user_id, items)
+    if not order_id:
+        return False
+    admin_order_actions.get_order_detail(admin_token, order_id, shop_id)
+    return admin_order_actions.delete_order(admin_token, order_id, shop_id)
+
+
+def business_flow_operations(admin_token, shop_id, user_id, product_id) -> List[Operation]:
+    """业务流程混合负载：管理员浏览 + 下单往返"""
+    operations = admin_read_operations(admin_token, shop_id, product_id)
+    operations.append(Operation(
+        "admin.order.round_trip",
+        partial(order_round_trip, admin_token, shop_id, user_id, product_id),
+        weight=2,
+    ))
+    return operations
+
+
+def admin_upload_operations(admin_token, shop_id, product_id, image_path) -> List[Operation]:
+    """上传为主的管理员后台会话：上传商品图片（流式请求体）+ 商品列表/详情
+
+    与下单负载分开运行，避免大请求体的上传拖慢下单流量的测量结果。
+    """
+    return [
+        Operation(
+            "admin.product.upload_image",
+            partial(stream_upload, "admin.product", admin_token, image_path, {"id": product_id, "shop_id": shop_id}),
+            weight=2,
+        ),
+        Operation("admin.product.list", partial(admin_product_actions.get_product_list, admin_token, shop_id), weight=2),
+        Operation(
+            "admin.product.detail",
+            partial(admin_product_actions.get_product_detail, admin_token, product_id, shop_id),
+            weight=1,
+        ),
+    ]
+
+
+def customer_browse(user_pool, request: Callable[[str], Any]) -> Any:
+    """以用户池中的一个顾客身份发出请求，request 接收令牌"""
+    with user_pool.identity() as identity:
+        return request(identity.token)
+
+
+def customer_order_round_trip(user_pool, shop_id, product_id) -> bool:
+    """顾客下单往返：以一个顾客身份创建订单 → 查询详情 → 删除订单"""
+    with user_pool.identity() as identity:
+        order_id = FrontendOrderHelper.create_order(shop_id, identity.user_id, product_id, identity.token)
+        if not order_id:
+            return False
+        FrontendOrderHelper.get_order_detail(order_id, identity.token)
+        return FrontendOrderHelper.delete_order(order_id, identity.token).status_code == 200
+
+
+def customer_operations(user_pool, shop_id, product_id=None) -> List[Operation]:
+    """前端顾客负载：每个请求从用户池取出不同的顾客身份
+
+    用户池大小应不小于负载生成器的最大并发数，否则池耗尽的请求计为失败。
+    """
+    operations = [
+        Operation("user.product.list", partial(customer_browse, user_pool, FrontendProductHelper.get_product_list),
+                  weight=3),
+        Operation("user.order.list", partial(customer_browse, user_pool, FrontendOrderHelper.get_user_order_list),
+                  weight=2),
+    ]
+    if product_id:
+        operations.append(Operation(
+            "user.product.detail",
+            partial(customer_browse, user_pool, partial(FrontendProductHelper.get_product_detail, product_id, shop_id)),
+            weight=2,
+        ))
+        operations.append(Operation(
+            "user.order.round_trip", partial(customer_order_round_trip, user_pool, shop_id, product_id), weight=1,
+        ))
+    return operations
+
+
+def customer_cached_get(user_pool, client_caches: ClientCaches, endpoint: str, path: str,
+                        params: Optional[Dict[str, Any]] = None):
+    """以用户池中的一个顾客身份经该顾客的客户端缓存发出 GET 请求
+
+    缓存直接命中时没有发出请求，返回 NotSent，不计入延迟样本；命中次数见 ClientCaches.summary。
+    """
+    with user_pool.identity() as identity:
+        response, outcome = client_caches.browse(identity.user_id, endpoint, f"{API_BASE_URL}{path}", params,
+                                                 {"Authorization": f"Bearer {identity.token}"})
+    return NotSent(response) if outcome == "fresh" else response
+
+
+def storefront_operations(user_pool, shop_id, client_caches: ClientCaches) -> List[Operation]:
+    """前端店铺浏览路径：店铺详情、店铺标签、商品列表，与 frontend/test_frontend_flow.py 的请求参数一致
+
+    请求经每个顾客的客户端缓存发出；client_caches 关闭时每次浏览都请求服务端，只做统计。
+    """
+    browse = partial(customer_cached_get, user_pool, client_caches)
+    return [
+        Operation("user.shop.detail", partial(browse, "user.shop.detail", "/shop/detail", {"shop_id": shop_id}),
+                  weight=1),
+        Operation("user.shop.tags", partial(browse, "user.shop.tags", f"/shop/{shop_id}/tags"), weight=1),
+        Operation(
+            "user.product.list",
+            partial(browse, "user.product.list", "/product/list", {"page": 1, "pageSize": 10, "shop_id": str(shop_id)}),
+            weight=2,
+        ),
+    ]
+
+
+def _browse_mix(context: Dict[str, Any]) -> List[Operation]:
+    return admin_read_operations(context["admin_token"], context["shop_id"], context.get("product_id"))
+
+
+def _ordering_mix(context: Dict[str, Any]) -> List[Operation]:
+    return business_flow_operations(
+        context["admin_token"], context["shop_id"], context["user_id"], context["product_id"]
+    )
+
+
+def _slow_query_mix(context: Dict[str, Any]) -> List[Operation]:
+    return slow_query_operations(context["admin_token"], context["shop_id"])
+
+
+def _customer_mix(context: Dict[str, Any]) -> List[Operation]:
+    if not context.get("user_pool"):
+        raise ValueError("customer 负载需要用户池，请先运行 run_perf.py user-pool 并通过 --user-pool 指定")
+    return customer_operations(context["user_pool"], context["shop_id"], context.get("product_id"))
+
+
+def _storefront_mix(context: Dict[str, Any]) -> List[Operation]:
+    if not context.get("user_pool"):
+        raise ValueError("storefront 负载需要用户池，请先运行 run_perf.py user-pool 并通过 --user-pool 指定")
+    # 未指定时不启用缓存，只统计请求数
+    client_caches = context.setdefault("client_caches", ClientCaches(enabled=False))
+    return storefront_operations(context["user_pool"], context["shop_id"], client_caches)
+
+
+def _menu_page_mix(context: Dict[str, Any]) -> List[Operation]:
+    if not context.get("user_pool"):
+        raise ValueError("menu_page 负载需要用户池，请先运行 run_perf.py user-pool 并通过 --user-pool 指定")
+    page = menu_page_requests(context["shop_id"], context.get("shop_image"), context.get("product_images", ()))
+    recorder = context.setdefault("page_recorder", PageRecorder())
+    return [menu_page_operation(context["user_pool"], page, recorder)]
+
+
+def _upload_mix(context: Dict[str, Any]) -> List[Operation]:
+    return admin_upload_operations(
+        context["admin_token"], context["shop_id"], context["product_id"],
+        context.get("upload_file") or default_upload_file(),
+    )
+
+
+# 可按名称选择的负载组合，值为根据上下文（令牌、ID）构造操作列表的函数
+WORKLOAD_MIXES = {
+    "browse": _browse_mix,
+    "ordering": _ordering_mix,
+    "slow_query": _slow_query_mix,
+    "customer": _customer_mix,
+    "upload": _upload_mix,
+    "storefront": _storefront_mix,
+    "menu_page": _menu_page_mix,
+}
+
+
+def build_workload(mix: str, context: Dict[str, Any]) -> List[Operation]:
+    """按名称构造负载组合
+
+    Args:
+        mix: WORKLOAD_MIXES 中的名称
+        context: 包含 admin_token / shop_id / user_id / product_id / user_pool / client_caches 等的字典
+
+    Returns:
+        操作列表
+    """
+    if mix not in WORKLOAD_MIXES:
+        raise ValueError(f"未知的负载组合: {mix}，可选: {', '.join(WORKLOAD_MIXES)}")
+    return WORKLOAD_MIXES[mix](context)
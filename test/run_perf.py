@@ -0,0 +1,1491 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能测试命令行入口
+
+用法示例：
+    # 开环压测：5 rps 持续30秒，然后 10 rps 持续30秒
+    python run_perf.py load --profile 5:30,10:30 --output perf_results/load.json
+
+    # 容量探测：p99 SLO 为 300ms，分别探测浏览和下单负载
+    python run_perf.py capacity --mix browse,ordering --slo-p99 300 --label tiny --output perf_results/capacity_tiny.json
+
+    # 比较不同部署配置的容量报告
+    python run_perf.py capacity-compare perf_results/capacity_tiny.json perf_results/capacity_large.json
+
+    # 连接池耗尽探测：逐级提高慢请求并发，对比 my.cnf 的连接数配置
+    python run_perf.py pool-probe --levels 10,20,30,40,45,50,60 --duration 15
+
+    # 长稳测试：下单混合负载 5 rps 运行4小时，每60秒一个窗口，并采样容器内存
+    python run_perf.py soak --mix ordering --rate 5 --hours 4 --window 60 --output perf_results/soak.json
+
+    # 登录压测：四类登录逐级并发，20% 错误凭据；再测登录风暴对 5 rps 下单流量的影响
+    python run_perf.py auth --levels 1,2,4,8,16 --invalid-ratio 0.2 --ordering-rate 5 --login-rate 20 --output perf_results/auth.json
+
+    # 令牌刷新风暴：预签发500个管理员令牌，分别在 0/5/30 秒窗口内集中刷新
+    python run_perf.py refresh-storm --role admin --tokens 500 --jitters 0,5,30 --read-rate 5 --output perf_results/refresh_storm.json
+
+    # 前端用户池：预先注册1000个顾客，之后以 customer 负载做容量探测
+    python run_perf.py user-pool --count 1000
+    python run_perf.py capacity --mix customer --user-pool perf_results/user_pool.json
+
+    # 店铺浏览路径：开启客户端缓存，对比原始请求率和缓存修正后的请求率
+    python run_perf.py load --mix storefront --user-pool perf_results/user_pool.json --profile 20:60 --client-cache
+
+    # 菜单页加载：并行发出页面的全部请求，报告页面就绪时间 p95 和关键路径
+    python run_perf.py menu-page --products 8 --rate 5 --duration 60 --output perf_results/menu_page.json
+
+    # 接口调用预算：运行用户旅程并与 perf/call_budgets.json 比较，--update 以本次测量值更新预算
+    python run_perf.py call-budget
+
+    # 响应体大小和压缩：按分页大小记录原始/压缩后大小，写入结果存储并与上次比较
+    python run_perf.py payload --page-sizes 10,50,100 --user-pool perf_results/user_pool.json --label tiny
+
+    # 图片上传压测：10KB 到 6MB，并发 1/4/8；上传会话单独做容量探测
+    python run_perf.py upload --sizes 10KB,100KB,1MB,5MB,6MB --levels 1,4,8 --output perf_results/upload.json
+    python run_perf.py capacity --mix upload --slo-p99 2000 --label upload
+
+    # 图片缓存检查：校验缓存响应头和 304 支持，并模拟50位顾客每小时回访一次
+    python run_perf.py image-cache --customers 50 --visits 6 --visit-interval 3600 --output perf_results/image_cache.json
+
+    # 订单数据填充：把店铺订单逐级补足到 1万 / 10万，再跑高级搜索查询矩阵
+    python run_perf.py seed-orders --shop-id 1 --count 10000 --users 20 --products 10
+    python run_perf.py seed-orders --shop-id 1 --count 100000 --user-pool perf_results/user_pool.json
+    python run_perf.py search-matrix --shop-id 1 --repeats 5 --top 20 --output perf_results/search_matrix.json
+
+    # 数据看板统计开销：新建店铺逐级填充到 1万/10万/100万 订单，测量各周期统计的冷/热延迟和增长
+    python run_perf.py dashboard --sizes 10000,100000,1000000 --repeats 5 --output perf_results/dashboard.json
+
+    # 看板统计校验：从导出 ZIP 独立计算统计，与接口返回逐字段对比，有差异时退出码为 1
+    python run_perf.py stats-verify --shop-id 1 --periods week,month,year --output perf_results/stats_verify.json
+
+    # 搜索结果校验：从导出数据建立本地索引，随机 2000 个高级搜索查询和 200 个标签查询与接口对比
+    python run_perf.py search-oracle --queries 2000 --tag-samples 200 --seed 1 --output perf_results/search_oracle.json
+
+    # 批量打标签规模：1 到 10000 个商品，找出 p95 在 2 秒内的最大可靠批量
+    python run_perf.py batch-tag --sizes 1,10,100,1000,10000 --repeats 3 --bound-ms 2000 --output perf_results/batch_tag.json
+
+    # 订单生命周期吞吐：4 个商家会话争用 8 个热点订单，把 200 个订单推进到终态
+    python run_perf.py lifecycle --orders 200 --sessions 4 --hot-orders 8 --output perf_results/lifecycle.json
+
+    # 多租户扇出：逐级创建 1/10/50 个店铺，同样 10 rps 的下单负载分别均匀分布和集中到一个店铺
+    python run_perf.py tenants --shop-counts 1,10,50 --products 20 --rate 10 --duration 60 --output perf_results/tenants.json
+
+    # 慢输入模糊测试：按 Swagger 文档为每个 GET 端点生成输入，超过 500ms 的输入简化后加入 perf/slow_inputs.json
+    python run_perf.py fuzz-slow --examples 50 --threshold-ms 500 --seed 1 --output perf_results/fuzz_slow.json
+    python run_perf.py fuzz-slow --replay
+
+    # GET 端点自动基准：按 Swagger 文档为每个 GET 端点填入真实ID，预热 3 次后各请求 20 次
+    python run_perf.py endpoints --shop-id 1 --warmup 3 --iterations 20 --param period=week --label tiny
+
+    # HAProxy 访问日志回放：按日志到达间隔 2 倍速回放，与日志中的服务端耗时对比
+    python run_perf.py replay-log /var/log/haproxy.log --speed 2 --user-pool perf_results/user_pool.json
+
+    # 工作负载模型：从录制的流量拟合用户旅程，再按录制速率的 10 倍生成流量
+    python run_perf.py fit-model /var/log/haproxy.log --output perf_results/workload_model.json
+    python run_perf.py synthesize --model perf_results/workload_model.json --scale 10 --duration 300
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from functools import partial
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from admin import dashboard_actions as admin_dashboard_actions
+from admin.bulk_actions import purge_shop
+from admin import order_actions as admin_order_actions
+from admin import product_actions as admin_product_actions
+from admin import shop_actions as admin_shop_actions
+from admin import tag_actions as admin_tag_actions
+from admin import user_actions as admin_user_actions
+from shop_owner import shop_actions as shop_owner_shop_actions
+from config.test_data import test_data
+from perf import workloads
+from perf.batch_tag_bench import (
+    DEFAULT_BATCH_SIZES,
+    DEFAULT_LATENCY_BOUND_MS,
+    DEFAULT_TIMEOUT,
+    batch_targets,
+    benchmark_batch_sizes,
+    create_products,
+    format_batch_report,
+    recommend_chunk_size,
+)
+from perf.call_budget import (
+    BUDGET_PATH,
+    JOURNEYS,
+    format_budget_report,
+    load_budgets,
+    run_journeys,
+    save_budgets,
+    update_budgets,
+)
+from perf.capacity import compare_capacity_reports, find_capacity, load_capacity_report
+from perf.lifecycle_bench import (
+    DEFAULT_STATUS_FLOW,
+    flow_transitions,
+    format_lifecycle_report,
+    run_lifecycle,
+    verify_states,
+)
+from perf.load_generator import OpenLoopLoadGenerator, format_report, save_report, suppress_stdout
+from perf.dashboard_bench import (
+    DEFAULT_DATASET_SIZES,
+    analyze_scaling,
+    format_dashboard_report,
+    run_dashboard_benchmark,
+    stats_targets,
+)
+from perf.endpoint_bench import (
+    DEFAULT_ITERATIONS,
+    DEFAULT_WARMUP,
+    benchmark_templates,
+    build_id_context,
+    build_templates,
+    format_endpoint_report,
+    store_endpoint_results,
+)
+from perf.log_replay import (
+    DEFAULT_POOL_SIZE,
+    DEFAULT_SPEED,
+    build_id_pools,
+    format_replay_report,
+    iter_log_entries,
+    make_token_resolver,
+    open_log,
+    replay_log,
+)
+from perf.workload_model import (
+    DEFAULT_SESSION_GAP,
+    fit_model,
+    format_model_report,
+    format_synthetic_report,
+    iter_traffic,
+    load_model,
+    run_synthetic,
+    save_model,
+)
+from perf.http_cache import DEFAULT_CACHE_BYTES, ClientCaches, format_cache_summary
+from perf.image_cache import ImageTarget, check_conditional_requests, format_cache_report, simulate_returning_customers
+from perf.order_seed import count_orders, seed_orders
+from perf.page_load import (
+    DEFAULT_CONNECTIONS_PER_HOST,
+    PageRecorder,
+    format_page_report,
+    menu_page_operation,
+    menu_page_requests,
+)
+from perf.payload_size import (
+    DASHBOARD_PERIODS,
+    DEFAULT_GROWTH_THRESHOLD,
+    DEFAULT_PAGE_SIZES,
+    ENCODINGS,
+    THROTTLED_LINKS,
+    format_payload_report,
+    measure_payload,
+    payload_targets,
+    store_payload_results,
+    transfer_savings,
+)
+from perf.pool_probe import DEFAULT_CONCURRENCY_LEVELS, format_probe_report, probe_connection_pool
+from perf.auth_bench import (
+    DEFAULT_AUTH_LEVELS,
+    LOGIN_KINDS,
+    auth_operations,
+    benchmark_logins,
+    cleanup_auth_context,
+    format_auth_report,
+    measure_login_headroom,
+    prepare_auth_context,
+)
+from perf.reference_stats import (
+    DEFAULT_TOLERANCE,
+    PERIOD_DAYS,
+    compute_reference,
+    diff_stats,
+    download_export,
+    format_diff_report,
+    load_export,
+)
+from perf.results_store import DEFAULT_STORE_PATH, ResultsStore
+from perf.refresh_storm import (
+    DEFAULT_JITTERS,
+    REFRESH_ENDPOINTS,
+    TokenPool,
+    format_storm_report,
+    mint_tokens,
+    run_refresh_storm,
+)
+from perf.tenant_bench import (
+    DEFAULT_CONTENTION_FACTOR,
+    DEFAULT_SCAN_GROWTH,
+    DISTRIBUTIONS,
+    analyze_tenants,
+    cleanup_tenants,
+    format_tenant_report,
+    run_tenant_benchmark,
+    seed_tenants,
+)
+from perf.upload_bench import (
+    DEFAULT_UPLOAD_LEVELS,
+    DEFAULT_UPLOAD_SIZES,
+    UPLOAD_ENDPOINTS,
+    benchmark_uploads,
+    format_size,
+    format_upload_report,
+    stream_upload,
+    upload_targets,
+)
+from perf.user_pool import DEFAULT_POOL_PATH, UserPool, build_user_pool, register_identity
+from perf.search_oracle import (
+    DEFAULT_FULL_CHECK_LIMIT,
+    SearchIndex,
+    check_order_queries,
+    check_tag_queries,
+    format_oracle_report,
+    random_order_queries,
+)
+from perf.search_matrix import (
+    DATE_RANGES,
+    DEFAULT_SLOW_FACTOR,
+    PAGINATIONS,
+    analyze_matrix,
+    format_matrix_report,
+    run_search_matrix,
+)
+from perf.slow_fuzz import (
+    DEFAULT_CORPUS_PATH,
+    DEFAULT_EXAMPLES,
+    DEFAULT_EXCLUDE,
+    DEFAULT_THRESHOLD_MS,
+    default_schema_url,
+    format_fuzz_report,
+    format_replay_report,
+    fuzz_operations,
+    load_corpus,
+    load_schema,
+    merge_corpus,
+    replay_corpus,
+    save_corpus,
+    select_operations,
+)
+from perf.soak import ContainerCpuSampler, ContainerMemorySampler, format_soak_report, run_soak
+
+
+def parse_size(text):
+    """解析文件大小字符串，例如 10KB、1.5MB、2048"""
+    text = text.strip().upper()
+    for unit, factor in (("MB", 1024 * 1024), ("KB", 1024), ("B", 1)):
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * factor)
+    return int(text)
+
+
+def parse_profile(text):
+    """解析速率曲线字符串，格式: rate:duration[,rate:duration...]"""
+    steps = []
+    for part in text.split(","):
+        rate, duration = part.split(":")
+        steps.append((float(rate), float(duration)))
+    return steps
+
+
+def require_admin_token():
+    """登录管理员，失败时退出"""
+    admin_token = workloads.get_admin_token()
+    if not admin_token:
+        print("❌ 管理员登录失败")
+        sys.exit(1)
+    return admin_token
+
+
+def prepare_admin_context(args):
+    """登录管理员并确定压测使用的店铺ID"""
+    admin_token = require_admin_token()
+    shop_id = args.shop_id or workloads.get_first_shop_id(admin_token)
+    if not shop_id:
+        print("❌ 未找到可用的店铺")
+        sys.exit(1)
+    return admin_token, shop_id
+
+
+# 临时店铺：店铺ID、店主凭据，以及结束时需要删除的临时用户ID（调用方注册用户后加入 user_ids）
+TemporaryShop = namedtuple("TemporaryShop", "shop_id owner_username owner_password user_ids")
+
+
+@contextmanager
+def temporary_shop(admin_token):
+    """创建临时店铺，结束后按业务规则依次删除订单、商品、标签和店铺，再删除登记的临时用户"""
+    shop_data = test_data.generate_shop_data()
+    shop_id = admin_shop_actions.create_shop(
+        admin_token, name=shop_data["name"], owner_username=shop_data["owner_username"],
+        owner_password=shop_data["owner_password"],
+    )
+    if not shop_id:
+        print("❌ 创建店铺失败")
+        sys.exit(1)
+
+    shop = TemporaryShop(shop_id, shop_data["owner_username"], shop_data["owner_password"], [])
+    try:
+        yield shop
+    finally:
+        if not purge_shop(admin_token, shop_id):
+            print(f"⚠ 临时店铺 {shop_id} 未能删除，请手动清理")
+        with suppress_stdout():
+            # 用户的订单已随店铺删除
+            for user_id in shop.user_ids:
+                admin_user_actions.delete_user(admin_token, user_id)
+
+
+def prepare_workload_context(args):
+    """准备负载组合所需的上下文：管理员令牌、店铺、商品、用户ID"""
+    admin_token, shop_id = prepare_admin_context(args)
+    context = {
+        "admin_token": admin_token,
+        "shop_id": shop_id,
+        "product_id": args.product_id or workloads.get_first_product_id(admin_token, shop_id),
+        "user_id": args.user_id or workloads.get_first_user_id(admin_token),
+    }
+    if getattr(args, "user_pool", None):
+        context["user_pool"] = UserPool.load(args.user_pool)
+    if hasattr(args, "client_cache"):
+        context["client_caches"] = ClientCaches(enabled=args.client_cache, max_bytes=args.client_cache_bytes)
+    return context
+
+
+def add_client_cache_arguments(parser):
+    """客户端缓存开关，按场景启用"""
+    parser.add_argument("--client-cache", action="store_true",
+                        help="模拟浏览器缓存（Cache-Control/ETag/Vary），每个顾客独立缓存")
+    parser.add_argument("--client-cache-bytes", type=parse_size, default=DEFAULT_CACHE_BYTES,
+                        help="每个顾客缓存的内存上限，例如 2MB")
+
+
+def run_load(args):
+    """开环压测"""
+    context = prepare_workload_context(args)
+    operations = workloads.build_workload(args.mix, context)
+    generator = OpenLoopLoadGenerator(operations, max_workers=args.workers, seed=args.seed)
+
+    print(f"开始开环压测，负载: {args.mix}, 店铺ID: {context['shop_id']}, 速率曲线: {args.profile}")
+    report = generator.run(parse_profile(args.profile))
+    print(format_report(report))
+    client_caches = context["client_caches"]
+    summary = client_caches.summary(report["overall"]["elapsed"])
+    if summary["endpoints"]:
+        report["client_cache"] = summary
+        print("")
+        print(format_cache_summary(summary))
+    if context.get("page_recorder"):
+        report["page"] = context["page_recorder"].summary()
+        print("")
+        print(format_page_report(report["page"]))
+    if args.output:
+        path = save_report(report, args.output)
+        print(f"✓ 报告已保存: {path}")
+
+
+def run_capacity(args):
+    """容量探测"""
+    context = prepare_workload_context(args)
+    mixes = {name: workloads.build_workload(name, context) for name in args.mix.split(",")}
+    result = find_capacity(
+        mixes,
+        label=args.label,
+        max_workers=args.workers,
+        slo_p99_ms=args.slo_p99,
+        max_error_rate=args.max_error_rate,
+        step_duration=args.step_duration,
+        confirm_duration=args.confirm_duration,
+        mode=args.mode,
+        start_rate=args.start_rate,
+        max_rate=args.max_rate,
+        increment=args.increment,
+    )
+    print(compare_capacity_reports([result]))
+    if args.output:
+        path = save_report(result, args.output)
+        print(f"✓ 容量报告已保存: {path}")
+
+
+def run_capacity_compare(args):
+    """比较容量报告"""
+    reports = [load_capacity_report(path) for path in args.reports]
+    print(compare_capacity_reports(reports))
+
+
+def run_pool_probe(args):
+    """连接池耗尽探测"""
+    admin_token, shop_id = prepare_admin_context(args)
+    operations = workloads.slow_query_operations(admin_token, shop_id)
+    levels = [int(level) for level in args.levels.split(",")]
+    report = probe_connection_pool(
+        operations,
+        levels=levels,
+        duration=args.duration,
+        max_error_rate=args.max_error_rate,
+        latency_factor=args.latency_factor,
+    )
+    print(format_probe_report(report))
+    if args.output:
+        path = save_report(report, args.output)
+        print(f"✓ 探测报告已保存: {path}")
+
+
+def run_soak_test(args):
+    """长稳测试"""
+    def build_operations():
+        # 每个刷新周期重新登录，避免令牌过期
+        return workloads.build_workload(args.mix, prepare_workload_context(args))
+
+    sampler = None
+    if not args.no_memory:
+        sampler = ContainerMemorySampler(args.container, cgroup_file=args.cgroup_file)
+        if not sampler.available():
+            print(f"[WARN] 无法采样容器 {args.container} 的内存，仅统计延迟")
+            sampler = None
+
+    report = run_soak(
+        build_operations,
+        rate=args.rate,
+        duration=args.hours * 3600,
+        window_seconds=args.window,
+        refresh_interval=args.refresh_interval,
+        memory_sampler=sampler,
+        max_workers=args.workers,
+    )
+    print(format_soak_report(report))
+    if args.output:
+        path = save_report(report, args.output)
+        print(f"✓ 长稳测试报告已保存: {path}")
+
+
+def run_auth_benchmark(args):
+    """登录认证压测"""
+    context = prepare_workload_context(args)
+    auth_context = prepare_auth_context(context["admin_token"])
+    if not auth_context:
+        print("❌ 准备登录压测账号失败")
+        sys.exit(1)
+
+    try:
+        operations = auth_operations(auth_context, invalid_ratio=args.invalid_ratio)
+        kinds = args.kinds.split(",")
+        report = {"throughput": benchmark_logins(
+            {kind: ops for kind, ops in operations.items() if kind in kinds},
+            levels=[int(level) for level in args.levels.split(",")],
+            duration=args.duration,
+        )}
+
+        if args.login_rate > 0:
+            sampler = None if args.no_cpu else ContainerCpuSampler(args.container)
+            if sampler is not None and not sampler.available():
+                print(f"[WARN] 无法采样容器 {args.container} 的 CPU，仅对比下单流量")
+                sampler = None
+            login_ops = [op for kind in kinds for op in operations.get(kind, [])]
+            report["headroom"] = measure_login_headroom(
+                workloads.build_workload("ordering", context),
+                login_ops,
+                ordering_rate=args.ordering_rate,
+                login_rate=args.login_rate,
+                duration=args.headroom_duration,
+                cpu_sampler=sampler,
+                max_workers=args.workers,
+            )
+    finally:
+        cleanup_auth_context(context["admin_token"], auth_context)
+
+    print(format_auth_report(report))
+    if args.output:
+        path = save_report(report, args.output)
+        print(f"✓ 登录压测报告已保存: {path}")
+
+
+def run_refresh_storm_test(args):
+    """令牌刷新风暴模拟"""
+    admin_token, shop_id = prepare_admin_context(args)
+    with ExitStack() as stack:
+        if args.role == "shop":
+            # 商家令牌需要店主账号，使用临时店铺，结束后删除
+            shop = stack.enter_context(temporary_shop(admin_token))
+            login_func = partial(workloads.login, shop.owner_username, shop.owner_password)
+        else:
+            login_func = workloads.get_admin_token
+
+        print(f"签发 {args.tokens} 个{args.role}令牌...")
+        with suppress_stdout():
+            tokens = mint_tokens(login_func, args.tokens, concurrency=args.mint_concurrency)
+        if not tokens:
+            print("❌ 未能签发任何令牌")
+            sys.exit(1)
+        report = run_refresh_storm(
+            TokenPool(tokens, args.role),
+            read_operations=workloads.admin_read_operations(admin_token, shop_id),
+            read_rate=args.read_rate,
+            jitters=[float(jitter) for jitter in args.jitters.split(",")],
+            warmup=args.warmup,
+            max_workers=max(args.workers, len(tokens)),
+        )
+
+    print(format_storm_report(report, args.max_read_p99_increase))
+    if args.output:
+        path = save_report(report, args.output)
+        print(f"✓ 刷新风暴报告已保存: {path}")
+
+
+def run_user_pool(args):
+    """构建或补充前端用户池"""
+    with suppress_stdout(not args.verbose):
+        pool = build_user_pool(args.count, args.path, concurrency=args.concurrency, min_ttl=args.min_ttl)
+    print(f"✓ 用户池共 {len(pool)} 个用户，已保存: {args.path}")
+
+
+def run_upload_benchmark(args):
+    """图片上传压测"""
+    admin_token = require_admin_token()
+    # 上传会覆盖图片，使用临时创建的店铺和商品，结束后连同注册的用户一起删除
+    with temporary_shop(admin_token) as shop:
+        shop_id = shop.shop_id
+        product_id = admin_product_actions.create_product(admin_token, shop_id)
+        shop_owner_token = workloads.login(shop.owner_username, shop.owner_password)
+        user = register_identity(f"perf_upload_{test_data.generate_unique_suffix()}", test_data.DEFAULT_PASSWORD)
+        if user:
+            shop.user_ids.append(user.user_id)
+        targets = upload_targets(admin_token, shop_id, product_id, shop_owner_token, user.token if user else None)
+        endpoints = args.endpoints.split(",")
+        targets = {name: target for name, target in targets.items() if name in endpoints}
+        if not targets:
+            print("❌ 没有可用的上传端点")
+            sys.exit(1)
+        sizes = [parse_size(size) for size in args.sizes.split(",")]
+        print(f"上传端点: {', '.join(targets)}，文件大小: {', '.join(format_size(size) for size in sizes)}")
+        rows = benchmark_uploads(
+            targets,
+            sizes=sizes,
+            levels=[int(level) for level in args.levels.split(",")],
+            duration=args.duration,
+            workdir=args.workdir,
+        )
+
+    print(format_upload_report(rows))
+    if args.output:
+        path = save_report({"results": rows}, args.output)
+        print(f"✓ 上传压测报告已保存: {path}")
+
+
+def run_image_cache_check(args):
+    """图片缓存响应头和条件请求检查"""
+    admin_token = require_admin_token()
+    image_path = Path(__file__).parent / "test.png"
+    image_data = image_path.read_bytes()
+    # 与上传压测一样使用临时店铺和商品，结束后删除
+    with temporary_shop(admin_token) as shop:
+        shop_id = shop.shop_id
+        with suppress_stdout(not args.verbose):
+            product_id = admin_product_actions.create_product(admin_token, shop_id)
+            product_image = admin_product_actions.upload_product_image(admin_token, product_id, shop_id, image_data)
+            shop_image = admin_shop_actions.upload_shop_image(admin_token, shop_id, image_data)
+            user = register_identity(f"perf_cache_{test_data.generate_unique_suffix()}", test_data.DEFAULT_PASSWORD)
+            if user:
+                shop.user_ids.append(user.user_id)
+            avatar = stream_upload("user.avatar", user.token, image_path) if user else None
+
+        targets = []
+        if product_image:
+            targets.append(ImageTarget("product.image", product_image))
+            targets.append(ImageTarget("admin.product.image", product_image, token=admin_token, shop_id=shop_id))
+        if shop_image:
+            targets.append(ImageTarget("shop.image", shop_image))
+        if avatar is not None and avatar.status_code == 200:
+            filename = avatar.json()["avatar_url"].replace("/uploads/avatars/", "")
+            targets.append(ImageTarget("user.avatar", filename, token=user.token))
+        if not targets:
+            print("❌ 图片上传失败，没有可检查的图片")
+            sys.exit(1)
+
+        checks = [check_conditional_requests(target) for target in targets]
+        simulation = simulate_returning_customers(
+            targets,
+            customers=args.customers,
+            visits=args.visits,
+            visit_interval=args.visit_interval,
+            concurrency=args.concurrency,
+        )
+
+    print(format_cache_report(checks, simulation))
+    if args.output:
+        path = save_report({"checks": checks, "simulation": simulation}, args.output)
+        print(f"✓ 图片缓存报告已保存: {path}")
+
+
+def run_menu_page(args):
+    """菜单页加载压测"""
+    admin_token = require_admin_token()
+    image_data = (Path(__file__).parent / "test.png").read_bytes()
+    # 使用临时店铺，店铺和每个商品都带图片，结束后删除
+    with temporary_shop(admin_token) as shop:
+        shop_id = shop.shop_id
+        with suppress_stdout(not args.verbose):
+            shop_image = admin_shop_actions.upload_shop_image(admin_token, shop_id, image_data)
+            product_images = []
+            for _ in range(args.products):
+                product_id = admin_product_actions.create_product(admin_token, shop_id)
+                if product_id:
+                    product_images.append(
+                        admin_product_actions.upload_product_image(admin_token, product_id, shop_id, image_data)
+                    )
+            if args.user_pool:
+                user_pool = UserPool.load(args.user_pool)
+            else:
+                identities = [register_identity(f"perf_menu_{test_data.generate_unique_suffix()}",
+                                                test_data.DEFAULT_PASSWORD) for _ in range(args.customers)]
+                user_pool = UserPool([identity for identity in identities if identity])
+                shop.user_ids.extend(identity.user_id for identity in user_pool.identities())
+        if not len(user_pool):
+            print("❌ 没有可用的顾客身份")
+            sys.exit(1)
+
+        page = menu_page_requests(shop_id, shop_image, [path for path in product_images if path])
+        recorder = PageRecorder()
+        generator = OpenLoopLoadGenerator(
+            [menu_page_operation(user_pool, page, recorder, args.connections)],
+            max_workers=args.workers,
+        )
+        print(f"菜单页共 {len(page)} 个请求，每个页面最多 {args.connections} 个并行连接，"
+              f"{args.rate:g} 页/秒，持续 {args.duration:g} 秒")
+        report = generator.run([(args.rate, args.duration)])
+
+    report["page"] = recorder.summary()
+    print(format_report(report))
+    print("")
+    print(format_page_report(report["page"]))
+    if args.output:
+        path = save_report(report, args.output)
+        print(f"✓ 菜单页报告已保存: {path}")
+
+
+def run_call_budget(args):
+    """用户旅程调用预算检查"""
+    budgets = load_budgets(args.budgets)
+    products = budgets.get("products", 5)
+    admin_token = require_admin_token()
+    image_data = (Path(__file__).parent / "test.png").read_bytes()
+    # 旅程的调用次数与商品数相关，使用商品数固定的临时店铺
+    with temporary_shop(admin_token) as shop:
+        shop_id = shop.shop_id
+        with suppress_stdout(not args.verbose):
+            product_ids = []
+            for _ in range(products):
+                product_id = admin_product_actions.create_product(admin_token, shop_id)
+                if product_id:
+                    admin_product_actions.upload_product_image(admin_token, product_id, shop_id, image_data)
+                    product_ids.append(product_id)
+            user = register_identity(f"perf_budget_{test_data.generate_unique_suffix()}", test_data.DEFAULT_PASSWORD)
+            if user:
+                shop.user_ids.append(user.user_id)
+            context = {
+                "admin_token": admin_token,
+                "shop_id": shop_id,
+                "products": products,
+                "product_id": product_ids[0] if product_ids else None,
+                "user_id": user.user_id if user else workloads.get_first_user_id(admin_token),
+                "user_token": user.token if user else None,
+            }
+            names = args.journeys.split(",") if args.journeys else list(JOURNEYS)
+            results = run_journeys(context, names, budgets)
+
+    print(format_budget_report(results, budgets))
+    if args.update:
+        path = save_budgets(update_budgets(budgets, results), args.budgets)
+        print(f"✓ 预算已更新: {path}")
+    elif any(result["violations"] for result in results.values()):
+        sys.exit(1)
+
+
+def run_payload(args):
+    """响应体大小和压缩检查"""
+    admin_token, shop_id = prepare_admin_context(args)
+    user_token = None
+    if args.user_pool:
+        identity = UserPool.load(args.user_pool).checkout()
+        user_token = identity.token if identity else None
+    targets = payload_targets(
+        admin_token, shop_id, user_token,
+        page_sizes=[int(size) for size in args.page_sizes.split(",")],
+        periods=args.periods.split(","),
+    )
+    rows = []
+    for target in targets:
+        row = measure_payload(target, encodings=args.encodings.split(","))
+        row["transfer"] = transfer_savings(row)
+        rows.append(row)
+
+    bloated = store_payload_results(ResultsStore(args.store), rows, label=args.label, threshold=args.growth_threshold)
+    print(format_payload_report(rows, link=args.link, bloated=bloated))
+    print(f"✓ 结果已写入: {args.store}")
+    if args.output:
+        path = save_report({"results": rows, "bloated": bloated}, args.output)
+        print(f"✓ 响应体大小报告已保存: {path}")
+
+
+def seed_identities(admin_token, shop_id, args):
+    """确定填充订单使用的用户和商品：用户取自用户池或临时注册，商品不足时在店铺中补建"""
+    if args.user_pool:
+        user_ids = [identity.user_id for identity in UserPool.load(args.user_pool).identities()][:args.users]
+    else:
+        users = [register_identity(f"perf_seed_{test_data.generate_unique_suffix()}", test_data.DEFAULT_PASSWORD)
+                 for _ in range(args.users)]
+        user_ids = [user.user_id for user in users if user]
+    product_ids = [args.product_id] if args.product_id else []
+    while len(product_ids) < args.products:
+        product_id = admin_product_actions.create_product(admin_token, shop_id)
+        if not product_id:
+            break
+        product_ids.append(product_id)
+    return user_ids, product_ids
+
+
+def run_seed_orders(args):
+    """把店铺订单填充到指定规模"""
+    admin_token, shop_id = prepare_admin_context(args)
+    with suppress_stdout(not args.verbose):
+        user_ids, product_ids = seed_identities(admin_token, shop_id, args)
+    if not user_ids or not product_ids:
+        print("❌ 准备下单用户或商品失败")
+        sys.exit(1)
+    print(f"店铺ID: {shop_id}，用户 {len(user_ids)} 个，商品 {len(product_ids)} 个")
+    seed_orders(admin_token, shop_id, args.count, user_ids, product_ids, concurrency=args.concurrency)
+
+
+def run_search_matrix_benchmark(args):
+    """高级搜索查询矩阵"""
+    admin_token, shop_id = prepare_admin_context(args)
+    user_id = args.user_id or workloads.get_first_user_id(admin_token)
+    print(f"店铺ID: {shop_id}，订单总数: {count_orders(admin_token, shop_id)}")
+    rows = run_search_matrix(
+        admin_token, shop_id, user_id,
+        statuses=[int(status) for status in args.statuses.split(",")],
+        repeats=args.repeats,
+        sample=args.sample,
+        seed=args.seed,
+        date_ranges=args.date_ranges.split(","),
+        paginations=args.paginations.split(","),
+    )
+    analysis = analyze_matrix(rows, slow_factor=args.slow_factor)
+    print(format_matrix_report(rows, analysis, top=args.top))
+    if args.output:
+        path = save_report({"results": rows, "analysis": analysis}, args.output)
+        print(f"✓ 查询矩阵报告已保存: {path}")
+
+
+def run_dashboard(args):
+    """数据看板统计开销"""
+    admin_token = require_admin_token()
+    shop_id, owner_username, owner_password = args.shop_id, args.owner_username, args.owner_password
+    if not shop_id:
+        # 百万级订单填充耗时很长，新建的店铺默认保留，下次以 --shop-id 和店主凭据继续填充
+        shop_data = test_data.generate_shop_data()
+        owner_username, owner_password = shop_data["owner_username"], shop_data["owner_password"]
+        shop_id = admin_shop_actions.create_shop(
+            admin_token, name=shop_data["name"], owner_username=owner_username, owner_password=owner_password,
+        )
+        if not shop_id:
+            print("❌ 创建店铺失败")
+            sys.exit(1)
+        print(f"已创建看板测试店铺 {shop_id}，店主 {owner_username} / {owner_password}")
+
+    try:
+        shop_owner_token = workloads.login(owner_username, owner_password) if owner_username else None
+        if not shop_owner_token:
+            print("⚠ 未提供店主凭据或登录失败，只测量管理员统计")
+        with suppress_stdout(not args.verbose):
+            user_ids, product_ids = seed_identities(admin_token, shop_id, args)
+        if not user_ids or not product_ids:
+            print("❌ 准备下单用户或商品失败")
+            sys.exit(1)
+
+        def prepare_size(size):
+            seed_orders(admin_token, shop_id, size, user_ids, product_ids, concurrency=args.concurrency)
+            return count_orders(admin_token, shop_id)
+
+        def mutate():
+            items = [{"product_id": str(product_ids[0]), "quantity": 1, "price": 100}]
+            with suppress_stdout():
+                admin_order_actions.create_order(admin_token, shop_id, user_ids[0], items)
+
+        targets = stats_targets(admin_token, shop_id, shop_owner_token, periods=args.periods.split(","))
+        rows = run_dashboard_benchmark(
+            targets,
+            sizes=[int(size) for size in args.sizes.split(",")],
+            prepare_size=prepare_size,
+            repeats=args.repeats,
+            mutate=None if args.no_write_check else mutate,
+        )
+    finally:
+        # 订单和商品需要先删除，店铺才能删除
+        if args.cleanup and not args.shop_id and not purge_shop(admin_token, shop_id, concurrency=args.concurrency):
+            print(f"⚠ 看板测试店铺 {shop_id} 未能删除，请手动清理")
+
+    analysis = analyze_scaling(rows)
+    print(format_dashboard_report(rows, analysis))
+    if args.output:
+        path = save_report({"shop_id": shop_id, "results": rows, "scaling": analysis}, args.output)
+        print(f"✓ 看板统计报告已保存: {path}")
+
+
+def run_stats_verify(args):
+    """以导出数据校验看板统计"""
+    admin_token, shop_id = prepare_admin_context(args)
+    export_path = Path(args.export_file) if args.export_file else download_export(admin_token)
+    try:
+        started = time.perf_counter()
+        tables = load_export(export_path)
+        rows = {table: len(next(iter(columns.values()), ())) for table, columns in tables.items()}
+        print(f"已读取导出数据 {rows}，用时 {time.perf_counter() - started:.1f} 秒")
+
+        results = {}
+        for period in args.periods.split(","):
+            with suppress_stdout(not args.verbose):
+                endpoint = admin_dashboard_actions.get_dashboard_stats(admin_token, shop_id, period)
+            if endpoint is None:
+                print(f"❌ 获取 {period} 统计失败")
+                sys.exit(1)
+            reference = compute_reference(tables, period).get(int(shop_id), {})
+            results[period] = diff_stats(endpoint, reference, tolerance=args.tolerance)
+    finally:
+        if not args.export_file and not args.keep_export:
+            export_path.unlink()
+
+    print(format_diff_report(results))
+    if args.output:
+        path = save_report({"shop_id": shop_id, "results": results}, args.output)
+        print(f"✓ 统计校验报告已保存: {path}")
+    if any(diff["mismatched"] for diff in results.values()):
+        sys.exit(1)
+
+
+def run_search_oracle(args):
+    """以本地索引校验高级搜索和标签查询结果"""
+    admin_token = require_admin_token()
+    export_path = Path(args.export_file) if args.export_file else download_export(admin_token)
+    try:
+        started = time.perf_counter()
+        index = SearchIndex(load_export(export_path))
+        print(f"已建立索引：{len(index)} 个订单，{len(index.tag_products)} 个标签，用时 {time.perf_counter() - started:.1f} 秒")
+    finally:
+        if not args.export_file and not args.keep_export:
+            export_path.unlink()
+
+    queries = random_order_queries(index, args.queries, seed=args.seed)
+    orders = check_order_queries(index, admin_token, queries, full_check_limit=args.full_check_limit)
+    tags = check_tag_queries(index, admin_token, args.tag_samples, seed=args.seed) if args.tag_samples else None
+    print(format_oracle_report(orders, tags))
+    if args.output:
+        path = save_report({"orders": orders, "tags": tags}, args.output)
+        print(f"✓ 搜索校验报告已保存: {path}")
+    if orders["mismatches"] or (tags and tags["mismatches"]):
+        sys.exit(1)
+
+
+def run_batch_tag(args):
+    """批量打标签规模测试"""
+    admin_token = require_admin_token()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    # 每次请求都新建标签，使用临时店铺，结束后依次删除商品、标签和店铺
+    with temporary_shop(admin_token) as shop:
+        shop_id = shop.shop_id
+        shop_owner_token = workloads.login(shop.owner_username, shop.owner_password)
+        targets = batch_targets(admin_token, shop_owner_token)
+        targets = {name: target for name, target in targets.items() if name in args.endpoints.split(",")}
+        print(f"创建 {max(sizes)} 个商品...")
+        with suppress_stdout(not args.verbose):
+            product_ids = create_products(admin_token, shop_id, max(sizes), concurrency=args.concurrency)
+        print(f"已创建 {len(product_ids)} 个商品，批量端点: {', '.join(targets)}")
+
+        def new_tag():
+            with suppress_stdout(not args.verbose):
+                return admin_tag_actions.create_tag(admin_token, shop_id=shop_id)
+
+        rows = benchmark_batch_sizes(
+            targets, admin_token, shop_id, product_ids, new_tag,
+            sizes=sizes, repeats=args.repeats, samples=args.samples, timeout=args.timeout, seed=args.seed,
+        )
+
+    policy = recommend_chunk_size(rows, bound_ms=args.bound_ms)
+    print(format_batch_report(rows, policy, bound_ms=args.bound_ms))
+    if args.output:
+        path = save_report({"results": rows, "policy": policy}, args.output)
+        print(f"✓ 批量打标签报告已保存: {path}")
+
+
+def run_lifecycle_bench(args):
+    """订单生命周期吞吐"""
+    admin_token = require_admin_token()
+    # 状态流转配置在店铺上，使用临时店铺，结束后依次删除订单、商品和店铺，以及临时注册的用户
+    with temporary_shop(admin_token) as shop:
+        shop_id = shop.shop_id
+        with suppress_stdout(not args.verbose):
+            tokens = [workloads.login(shop.owner_username, shop.owner_password)
+                      for _ in range(args.sessions)]
+        if not all(tokens):
+            print("❌ 店主登录失败")
+            sys.exit(1)
+        if not shop_owner_shop_actions.update_order_status_flow(tokens[0], shop_id, DEFAULT_STATUS_FLOW):
+            print("❌ 配置订单状态流转失败")
+            sys.exit(1)
+        with suppress_stdout(not args.verbose):
+            user_ids, product_ids = seed_identities(admin_token, shop_id, args)
+            if not args.user_pool:
+                shop.user_ids.extend(user_ids)
+        if not user_ids or not product_ids:
+            print("❌ 准备下单用户或商品失败")
+            sys.exit(1)
+
+        def create(index):
+            items = [{"product_id": str(product_ids[index % len(product_ids)]), "quantity": 1, "price": 100}]
+            return admin_order_actions.create_order(admin_token, shop_id, user_ids[index % len(user_ids)], items)
+
+        print(f"创建 {args.orders} 个订单...")
+        with suppress_stdout(not args.verbose), ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            order_ids = [order_id for order_id in executor.map(create, range(args.orders)) if order_id]
+        print(f"已创建 {len(order_ids)} 个订单，{args.sessions} 个会话开始推进")
+
+        report = run_lifecycle(
+            tokens, shop_id, order_ids, flow_transitions(DEFAULT_STATUS_FLOW),
+            initial_status=DEFAULT_STATUS_FLOW[0]["value"], hot_orders=args.hot_orders,
+            max_seconds=args.max_seconds, seed=args.seed,
+        )
+        verification = (verify_states(tokens[0], shop_id, report["ledger"], samples=args.verify_samples, seed=args.seed)
+                        if args.verify_samples else None)
+
+    print(format_lifecycle_report(report, verification))
+    if args.output:
+        path = save_report({"shop_id": shop_id, "results": report, "verification": verification}, args.output)
+        print(f"✓ 订单生命周期报告已保存: {path}")
+
+
+def run_tenants(args):
+    """多租户扇出"""
+    admin_token = require_admin_token()
+    user_id = args.user_id or workloads.get_first_user_id(admin_token)
+    if not user_id:
+        print("❌ 未找到下单用户")
+        sys.exit(1)
+    tenants = []
+
+    def prepare(admin_token, count, products, existing):
+        print(f"创建店铺到 {count} 个，每个店铺 {products} 个商品...")
+        with suppress_stdout(not args.verbose):
+            tenants[:] = seed_tenants(admin_token, count, products, existing, concurrency=args.concurrency)
+        return list(tenants)
+
+    try:
+        result = run_tenant_benchmark(
+            admin_token, [int(count) for count in args.shop_counts.split(",")], args.products, user_id,
+            rate=args.rate, duration=args.duration, distributions=args.distributions.split(","),
+            max_workers=args.workers, seed=args.seed, prepare_tenants=prepare,
+        )
+    finally:
+        if not args.keep:
+            with suppress_stdout(not args.verbose):
+                leftover = cleanup_tenants(admin_token, tenants, concurrency=args.concurrency)
+            if leftover:
+                print(f"⚠ {len(leftover)} 个店铺未能删除，请手动清理: {', '.join(map(str, leftover))}")
+
+    analysis = analyze_tenants(result["rows"], contention_factor=args.contention_factor, scan_growth=args.scan_growth)
+    print(format_tenant_report(result["rows"], analysis))
+    if args.output:
+        path = save_report({"results": result["rows"], "analysis": analysis}, args.output)
+        print(f"✓ 多租户报告已保存: {path}")
+
+
+def run_fuzz_slow(args):
+    """慢输入模糊测试和语料回放"""
+    admin_token = require_admin_token()
+    shop_owner_token = (workloads.login(args.owner_username, args.owner_password)
+                        if args.owner_username else None)
+
+    def token_for(path):
+        if path.startswith("/shopOwner"):
+            return shop_owner_token
+        return admin_token if path.startswith("/admin") else None
+
+    if args.replay:
+        corpus = load_corpus(args.corpus)
+        if not corpus:
+            print(f"语料 {args.corpus} 为空")
+            return
+        rows = replay_corpus(corpus, token_for, threshold_ms=args.threshold_ms, repeats=args.repeats)
+        print(format_replay_report(rows))
+        if args.output:
+            path = save_report({"results": rows}, args.output)
+            print(f"✓ 语料回放报告已保存: {path}")
+        if any(row["slow"] for row in rows):
+            sys.exit(1)
+        return
+
+    threshold_ms = args.threshold_ms or DEFAULT_THRESHOLD_MS
+    schema = load_schema(args.schema or default_schema_url())
+    operations = select_operations(schema, methods=args.methods.split(","), include=args.include,
+                                   exclude=[word for word in args.exclude.split(",") if word])
+    print(f"共 {len(operations)} 个端点，每个端点 {args.examples} 个随机输入")
+    results = fuzz_operations(operations, token_for, examples=args.examples, threshold_ms=threshold_ms,
+                              repeats=args.repeats, seed=args.seed)
+    print(format_fuzz_report(results, threshold_ms))
+    corpus = merge_corpus(load_corpus(args.corpus), results, threshold_ms=threshold_ms)
+    print(f"✓ 语料已保存: {save_corpus(corpus, args.corpus)}，共 {len(corpus)} 个输入")
+    if args.output:
+        path = save_report({"threshold_ms": threshold_ms, "results": results}, args.output)
+        print(f"✓ 模糊测试报告已保存: {path}")
+
+
+def run_endpoints(args):
+    """GET 端点自动基准"""
+    admin_token, shop_id = prepare_admin_context(args)
+    shop_owner_token = (workloads.login(args.owner_username, args.owner_password)
+                        if args.owner_username else None)
+    with suppress_stdout(not args.verbose):
+        admin_context = build_id_context(admin_token, shop_id)
+        # 商家端点只能访问自己的店铺，使用店主店铺中的数据
+        owner_context = (build_id_context(admin_token, args.owner_shop_id)
+                         if shop_owner_token and args.owner_shop_id else None)
+    print(f"ID 上下文: {admin_context}")
+
+    def token_for(path):
+        if path.startswith("/shopOwner"):
+            return shop_owner_token
+        return admin_token if path.startswith("/admin") else None
+
+    def context_for(path):
+        if path.startswith("/shopOwner"):
+            return owner_context
+        return admin_context
+
+    schema = load_schema(args.schema or default_schema_url())
+    operations = select_operations(schema, methods=["GET"], include=args.include,
+                                   exclude=[word for word in args.exclude.split(",") if word])
+    overrides = dict(item.split("=", 1) for item in args.param)
+    templates, skipped = build_templates(operations, context_for, overrides)
+    print(f"共 {len(operations)} 个 GET 端点，生成 {len(templates)} 个请求模板")
+    rows = benchmark_templates(templates, token_for, warmup=args.warmup, iterations=args.iterations)
+    slower = store_endpoint_results(ResultsStore(args.store), rows, label=args.label,
+                                    threshold=args.growth_threshold)
+    print(format_endpoint_report(rows, skipped, slower))
+    if args.output:
+        path = save_report({"results": rows, "skipped": skipped, "slower": slower}, args.output)
+        print(f"✓ 端点基准报告已保存: {path}")
+
+
+def run_replay_log(args):
+    """HAProxy 访问日志回放"""
+    admin_token, shop_id = prepare_admin_context(args)
+    shop_owner_token = (workloads.login(args.owner_username, args.owner_password)
+                        if args.owner_username else None)
+    identities = UserPool.load(args.user_pool).identities() if args.user_pool else []
+    with suppress_stdout(not args.verbose):
+        pools = build_id_pools(admin_token, shop_id, size=args.pool_size)
+    print(f"ID 池: { {key: len(pool) for key, pool in pools.items()} }，前端身份 {len(identities)} 个")
+
+    stats = {}
+    entries = iter_log_entries(open_log(args.log), methods=args.methods.split(","), include=args.include,
+                               limit=args.limit, stats=stats)
+    report = replay_log(entries, make_token_resolver(admin_token, shop_owner_token, identities), pools,
+                        speed=args.speed, max_workers=args.workers)
+    print(format_replay_report(report, stats))
+    if args.output:
+        path = save_report({"stats": stats, **report}, args.output)
+        print(f"✓ 日志回放报告已保存: {path}")
+
+
+def run_fit_model(args):
+    """从录制的流量拟合工作负载模型"""
+    model = fit_model(iter_traffic(args.source, methods=args.methods.split(",")), session_gap=args.session_gap)
+    print(format_model_report(model))
+    path = save_model(model, args.output)
+    print(f"✓ 工作负载模型已保存: {path}")
+
+
+def run_synthesize(args):
+    """按工作负载模型生成流量"""
+    model = load_model(args.model)
+    admin_token, shop_id = prepare_admin_context(args)
+    shop_owner_token = (workloads.login(args.owner_username, args.owner_password)
+                        if args.owner_username else None)
+    identities = UserPool.load(args.user_pool).identities() if args.user_pool else []
+    with suppress_stdout(not args.verbose):
+        pools = build_id_pools(admin_token, shop_id, size=args.pool_size)
+    report = run_synthetic(model, pools, make_token_resolver(admin_token, shop_owner_token, identities),
+                           duration=args.duration, session_rate=args.session_rate, scale=args.scale,
+                           max_workers=args.workers, seed=args.seed)
+    print(format_synthetic_report(report))
+    if args.output:
+        path = save_report(report, args.output)
+        print(f"✓ 生成流量报告已保存: {path}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="OrderEase 性能测试工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    load_parser = subparsers.add_parser("load", help="开环恒定到达率压测")
+    load_parser.add_argument("--profile", default="5:30", help="速率曲线，格式 rate:duration[,rate:duration...]")
+    load_parser.add_argument("--workers", type=int, default=64, help="最大并发线程数")
+    load_parser.add_argument("--shop-id", help="店铺ID，默认使用第一个店铺")
+    load_parser.add_argument("--mix", default="browse", help="负载组合: " + ",".join(workloads.WORKLOAD_MIXES))
+    load_parser.add_argument("--product-id", help="商品ID，默认使用店铺第一个商品")
+    load_parser.add_argument("--user-id", help="下单用户ID，默认使用第一个用户")
+    load_parser.add_argument("--user-pool", help="前端用户池文件（customer / storefront 负载使用）")
+    add_client_cache_arguments(load_parser)
+    load_parser.add_argument("--seed", type=int, help="随机种子")
+    load_parser.add_argument("--output", help="JSON报告输出路径")
+    load_parser.set_defaults(func=run_load)
+
+    capacity_parser = subparsers.add_parser("capacity", help="在 p99 SLO 下探测最大可持续吞吐")
+    capacity_parser.add_argument("--mix", default="browse", help="负载组合，逗号分隔: " + ",".join(workloads.WORKLOAD_MIXES))
+    capacity_parser.add_argument("--mode", choices=["step", "binary"], default="binary", help="探测方式")
+    capacity_parser.add_argument("--slo-p99", type=float, default=500.0, help="p99 延迟上限（毫秒）")
+    capacity_parser.add_argument("--max-error-rate", type=float, default=0.01, help="允许的最大错误率")
+    capacity_parser.add_argument("--start-rate", type=float, default=1.0, help="起始速率")
+    capacity_parser.add_argument("--max-rate", type=float, default=500.0, help="最大探测速率")
+    capacity_parser.add_argument("--increment", type=float, default=5.0, help="step 模式速率增量")
+    capacity_parser.add_argument("--step-duration", type=float, default=20.0, help="每个测试点持续时间（秒）")
+    capacity_parser.add_argument("--confirm-duration", type=float, default=60.0, help="复测持续时间（秒）")
+    capacity_parser.add_argument("--workers", type=int, default=128, help="最大并发线程数")
+    capacity_parser.add_argument("--label", default="default", help="部署配置标签")
+    capacity_parser.add_argument("--shop-id", help="店铺ID，默认使用第一个店铺")
+    capacity_parser.add_argument("--product-id", help="商品ID，默认使用店铺第一个商品")
+    capacity_parser.add_argument("--user-id", help="下单用户ID，默认使用第一个用户")
+    capacity_parser.add_argument("--user-pool", help="前端用户池文件（customer / storefront 负载使用）")
+    add_client_cache_arguments(capacity_parser)
+    capacity_parser.add_argument("--output", help="JSON报告输出路径")
+    capacity_parser.set_defaults(func=run_capacity)
+
+    compare_parser = subparsers.add_parser("capacity-compare", help="比较不同部署配置的容量报告")
+    compare_parser.add_argument("reports", nargs="+", help="容量报告JSON路径")
+    compare_parser.set_defaults(func=run_capacity_compare)
+
+    probe_parser = subparsers.add_parser("pool-probe", help="数据库连接池耗尽探测")
+    probe_parser.add_argument("--levels", default=",".join(str(level) for level in DEFAULT_CONCURRENCY_LEVELS),
+                              help="并发级别，逗号分隔")
+    probe_parser.add_argument("--duration", type=float, default=15.0, help="每个级别持续时间（秒）")
+    probe_parser.add_argument("--max-error-rate", type=float, default=0.01, help="错误拐点阈值")
+    probe_parser.add_argument("--latency-factor", type=float, default=2.0, help="排队拐点的 p50 基线倍数")
+    probe_parser.add_argument("--shop-id", help="店铺ID，默认使用第一个店铺")
+    probe_parser.add_argument("--output", help="JSON报告输出路径")
+    probe_parser.set_defaults(func=run_pool_probe)
+
+    soak_parser = subparsers.add_parser("soak", help="长稳测试，检测延迟漂移和内存泄漏")
+    soak_parser.add_argument("--mix", default="ordering", help="负载组合: " + ",".join(workloads.WORKLOAD_MIXES))
+    soak_parser.add_argument("--rate", type=float, default=5.0, help="固定到达速率(rps)")
+    soak_parser.add_argument("--hours", type=float, default=4.0, help="运行时长（小时）")
+    soak_parser.add_argument("--window", type=float, default=60.0, help="汇总窗口长度（秒）")
+    soak_parser.add_argument("--refresh-interval", type=float, default=3600.0, help="重新登录构造负载的间隔（秒）")
+    soak_parser.add_argument("--workers", type=int, default=64, help="最大并发线程数")
+    soak_parser.add_argument("--container", default="orderease-app", help="采样内存的容器名称")
+    soak_parser.add_argument("--cgroup-file", help="cgroup 内存文件路径（无 Docker 时使用）")
+    soak_parser.add_argument("--no-memory", action="store_true", help="不采样容器内存")
+    soak_parser.add_argument("--shop-id", help="店铺ID，默认使用第一个店铺")
+    soak_parser.add_argument("--product-id", help="商品ID，默认使用店铺第一个商品")
+    soak_parser.add_argument("--user-id", help="下单用户ID，默认使用第一个用户")
+    soak_parser.add_argument("--user-pool", help="前端用户池文件（customer / storefront 负载使用）")
+    soak_parser.add_argument("--output", help="JSON报告输出路径")
+    soak_parser.set_defaults(func=run_soak_test)
+
+    auth_parser = subparsers.add_parser("auth", help="登录认证吞吐压测及登录风暴影响")
+    auth_parser.add_argument("--kinds", default=",".join(LOGIN_KINDS), help="登录类型，逗号分隔: " + ",".join(LOGIN_KINDS))
+    auth_parser.add_argument("--levels", default=",".join(str(level) for level in DEFAULT_AUTH_LEVELS),
+                             help="并发级别，逗号分隔")
+    auth_parser.add_argument("--duration", type=float, default=10.0, help="每个并发级别持续时间（秒）")
+    auth_parser.add_argument("--invalid-ratio", type=float, default=0.2, help="错误凭据请求比例")
+    auth_parser.add_argument("--ordering-rate", type=float, default=5.0, help="下单负载速率(rps)")
+    auth_parser.add_argument("--login-rate", type=float, default=20.0, help="登录风暴速率(rps)，0 表示不测影响")
+    auth_parser.add_argument("--headroom-duration", type=float, default=60.0, help="基线和风暴阶段各自持续时间（秒）")
+    auth_parser.add_argument("--workers", type=int, default=128, help="最大并发线程数")
+    auth_parser.add_argument("--container", default="orderease-app", help="采样 CPU 的容器名称")
+    auth_parser.add_argument("--no-cpu", action="store_true", help="不采样容器 CPU")
+    auth_parser.add_argument("--shop-id", help="下单负载的店铺ID，默认使用第一个店铺")
+    auth_parser.add_argument("--product-id", help="商品ID，默认使用店铺第一个商品")
+    auth_parser.add_argument("--user-id", help="下单用户ID，默认使用第一个用户")
+    auth_parser.add_argument("--output", help="JSON报告输出路径")
+    auth_parser.set_defaults(func=run_auth_benchmark)
+
+    storm_parser = subparsers.add_parser("refresh-storm", help="令牌集中到期时的刷新风暴模拟")
+    storm_parser.add_argument("--role", choices=list(REFRESH_ENDPOINTS), default="admin", help="令牌角色")
+    storm_parser.add_argument("--tokens", type=int, default=200, help="预签发令牌数量")
+    storm_parser.add_argument("--mint-concurrency", type=int, default=8, help="签发令牌的并行登录数")
+    storm_parser.add_argument("--jitters", default=",".join(f"{jitter:g}" for jitter in DEFAULT_JITTERS),
+                              help="刷新分散窗口（秒），逗号分隔")
+    storm_parser.add_argument("--read-rate", type=float, default=5.0, help="后台浏览速率(rps)")
+    storm_parser.add_argument("--warmup", type=float, default=10.0, help="风暴前纯浏览时间（秒）")
+    storm_parser.add_argument("--max-read-p99-increase", type=float, default=100.0,
+                              help="可接受的浏览 p99 增量（毫秒），用于给出建议")
+    storm_parser.add_argument("--workers", type=int, default=256, help="最大并发线程数（不小于令牌数）")
+    storm_parser.add_argument("--shop-id", help="后台浏览的店铺ID，默认使用第一个店铺")
+    storm_parser.add_argument("--output", help="JSON报告输出路径")
+    storm_parser.set_defaults(func=run_refresh_storm_test)
+
+    pool_parser = subparsers.add_parser("user-pool", help="预先注册前端用户并保存令牌")
+    pool_parser.add_argument("--count", type=int, default=1000, help="目标用户数量")
+    pool_parser.add_argument("--path", default=str(DEFAULT_POOL_PATH), help="用户池文件路径")
+    pool_parser.add_argument("--concurrency", type=int, default=8, help="并行注册/登录线程数")
+    pool_parser.add_argument("--min-ttl", type=float, default=1800.0, help="令牌剩余有效期低于该值（秒）时重新登录")
+    pool_parser.add_argument("--verbose", action="store_true", help="显示每个注册/登录请求的输出")
+    pool_parser.set_defaults(func=run_user_pool)
+
+    upload_parser = subparsers.add_parser("upload", help="图片上传吞吐压测（流式 multipart）")
+    upload_parser.add_argument("--endpoints", default=",".join(UPLOAD_ENDPOINTS),
+                               help="上传端点，逗号分隔: " + ",".join(UPLOAD_ENDPOINTS))
+    upload_parser.add_argument("--sizes", default=",".join(format_size(size) for size in DEFAULT_UPLOAD_SIZES),
+                               help="文件大小，逗号分隔，例如 10KB,1MB")
+    upload_parser.add_argument("--levels", default=",".join(str(level) for level in DEFAULT_UPLOAD_LEVELS),
+                               help="并发级别，逗号分隔")
+    upload_parser.add_argument("--duration", type=float, default=10.0, help="每个组合持续时间（秒）")
+    upload_parser.add_argument("--workdir", help="测试文件目录，默认系统临时目录")
+    upload_parser.add_argument("--output", help="JSON报告输出路径")
+    upload_parser.set_defaults(func=run_upload_benchmark)
+
+    cache_parser = subparsers.add_parser("image-cache", help="图片缓存响应头、条件请求检查及回访顾客模拟")
+    cache_parser.add_argument("--customers", type=int, default=20, help="模拟的回访顾客数")
+    cache_parser.add_argument("--visits", type=int, default=5, help="每位顾客的访问次数")
+    cache_parser.add_argument("--visit-interval", type=float, default=600.0, help="两次访问的间隔（虚拟时间，秒）")
+    cache_parser.add_argument("--concurrency", type=int, default=4, help="同时模拟的顾客数")
+    cache_parser.add_argument("--verbose", action="store_true", help="显示准备数据时的操作输出")
+    cache_parser.add_argument("--output", help="JSON报告输出路径")
+    cache_parser.set_defaults(func=run_image_cache_check)
+
+    menu_parser = subparsers.add_parser("menu-page", help="菜单页加载压测（并行请求，页面就绪时间）")
+    menu_parser.add_argument("--products", type=int, default=6, help="临时店铺中带图片的商品数")
+    menu_parser.add_argument("--rate", type=float, default=2.0, help="页面加载速率（页/秒）")
+    menu_parser.add_argument("--duration", type=float, default=60.0, help="持续时间（秒）")
+    menu_parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS_PER_HOST,
+                             help="每个页面对同一主机的最大并行连接数")
+    menu_parser.add_argument("--user-pool", help="前端用户池文件，默认临时注册 --customers 个顾客")
+    menu_parser.add_argument("--customers", type=int, default=8, help="未指定用户池时临时注册的顾客数")
+    menu_parser.add_argument("--workers", type=int, default=64, help="最大并发页面数")
+    menu_parser.add_argument("--verbose", action="store_true", help="显示准备数据时的操作输出")
+    menu_parser.add_argument("--output", help="JSON报告输出路径")
+    menu_parser.set_defaults(func=run_menu_page)
+
+    budget_parser = subparsers.add_parser("call-budget", help="用户旅程的接口调用次数和字节数预算检查")
+    budget_parser.add_argument("--journeys", help="旅程名称，逗号分隔，默认全部: " + ",".join(JOURNEYS))
+    budget_parser.add_argument("--budgets", default=str(BUDGET_PATH), help="预算文件路径")
+    budget_parser.add_argument("--update", action="store_true", help="以本次测量值更新预算文件")
+    budget_parser.add_argument("--verbose", action="store_true", help="显示每个请求的操作输出")
+    budget_parser.set_defaults(func=run_call_budget)
+
+    payload_parser = subparsers.add_parser("payload", help="响应体大小和压缩检查")
+    payload_parser.add_argument("--page-sizes", default=",".join(str(size) for size in DEFAULT_PAGE_SIZES),
+                                help="列表接口的分页大小，逗号分隔")
+    payload_parser.add_argument("--periods", default=",".join(DASHBOARD_PERIODS), help="看板统计周期，逗号分隔")
+    payload_parser.add_argument("--encodings", default=",".join(ENCODINGS), help="请求的 Accept-Encoding，逗号分隔")
+    payload_parser.add_argument("--link", choices=list(THROTTLED_LINKS), default="fast-3g", help="估算传输时间的受限链路")
+    payload_parser.add_argument("--user-pool", help="前端用户池文件，提供时一并检查前端商品列表")
+    payload_parser.add_argument("--shop-id", help="店铺ID，默认使用第一个店铺")
+    payload_parser.add_argument("--store", default=str(DEFAULT_STORE_PATH), help="结果存储文件")
+    payload_parser.add_argument("--label", default="default", help="部署配置标签")
+    payload_parser.add_argument("--growth-threshold", type=float, default=DEFAULT_GROWTH_THRESHOLD,
+                                help="响应体较上次增长超过该比例时标记为膨胀")
+    payload_parser.add_argument("--output", help="JSON报告输出路径")
+    payload_parser.set_defaults(func=run_payload)
+
+    seed_parser = subparsers.add_parser("seed-orders", help="把店铺订单填充到指定规模（只补足差额）")
+    seed_parser.add_argument("--count", type=int, default=10000, help="目标订单总数")
+    seed_parser.add_argument("--shop-id", help="店铺ID，默认使用第一个店铺")
+    seed_parser.add_argument("--users", type=int, default=20, help="下单用户数")
+    seed_parser.add_argument("--user-pool", help="前端用户池文件，提供时从中取用户而不临时注册")
+    seed_parser.add_argument("--products", type=int, default=10, help="下单商品数，不足时在店铺中补建")
+    seed_parser.add_argument("--product-id", help="优先使用的商品ID")
+    seed_parser.add_argument("--concurrency", type=int, default=16, help="并行创建数")
+    seed_parser.add_argument("--verbose", action="store_true", help="显示准备数据时的操作输出")
+    seed_parser.set_defaults(func=run_seed_orders)
+
+    matrix_parser = subparsers.add_parser("search-matrix", help="高级搜索筛选组合的延迟矩阵和索引建议")
+    matrix_parser.add_argument("--shop-id", help="店铺ID，默认使用第一个店铺")
+    matrix_parser.add_argument("--user-id", help="用户筛选使用的用户ID，默认使用第一个用户")
+    matrix_parser.add_argument("--statuses", default="1,2,10", help="状态筛选取值，逗号分隔，第一个用于单状态组合")
+    matrix_parser.add_argument("--date-ranges", default=",".join(DATE_RANGES), help="日期范围，逗号分隔")
+    matrix_parser.add_argument("--paginations", default=",".join(PAGINATIONS), help="分页，逗号分隔")
+    matrix_parser.add_argument("--repeats", type=int, default=5, help="每个组合的请求次数")
+    matrix_parser.add_argument("--sample", type=int, help="只随机抽取该数量的组合")
+    matrix_parser.add_argument("--slow-factor", type=float, default=DEFAULT_SLOW_FACTOR, help="慢于无筛选基线该倍数视为慢组合")
+    matrix_parser.add_argument("--top", type=int, default=20, help="显示最慢的组合数")
+    matrix_parser.add_argument("--seed", type=int, help="随机种子")
+    matrix_parser.add_argument("--output", help="JSON报告输出路径")
+    matrix_parser.set_defaults(func=run_search_matrix_benchmark)
+
+    dashboard_parser = subparsers.add_parser("dashboard", help="数据看板统计按周期和订单规模的开销及缓存检测")
+    dashboard_parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_DATASET_SIZES),
+                                  help="订单规模，逗号分隔，从小到大逐级填充")
+    dashboard_parser.add_argument("--periods", default=",".join(DASHBOARD_PERIODS), help="统计周期，逗号分隔")
+    dashboard_parser.add_argument("--repeats", type=int, default=5, help="首次请求之后的热请求次数")
+    dashboard_parser.add_argument("--no-write-check", action="store_true", help="不通过新建订单检查统计是否被缓存")
+    dashboard_parser.add_argument("--shop-id", help="已填充的店铺ID，默认新建店铺")
+    dashboard_parser.add_argument("--owner-username", help="店铺的店主用户名，用于测量商家统计")
+    dashboard_parser.add_argument("--owner-password", help="店铺的店主密码")
+    dashboard_parser.add_argument("--cleanup", action="store_true", help="结束后删除新建的店铺")
+    dashboard_parser.add_argument("--users", type=int, default=20, help="填充订单的下单用户数")
+    dashboard_parser.add_argument("--user-pool", help="前端用户池文件，提供时从中取用户而不临时注册")
+    dashboard_parser.add_argument("--products", type=int, default=10, help="填充订单的商品数，不足时在店铺中补建")
+    dashboard_parser.add_argument("--product-id", help="优先使用的商品ID")
+    dashboard_parser.add_argument("--concurrency", type=int, default=16, help="填充订单的并行创建数")
+    dashboard_parser.add_argument("--verbose", action="store_true", help="显示准备数据时的操作输出")
+    dashboard_parser.add_argument("--output", help="JSON报告输出路径")
+    dashboard_parser.set_defaults(func=run_dashboard)
+
+    verify_parser = subparsers.add_parser("stats-verify", help="以导出数据独立计算看板统计并与接口对比")
+    verify_parser.add_argument("--shop-id", help="店铺ID，默认使用第一个店铺")
+    verify_parser.add_argument("--periods", default=",".join(PERIOD_DAYS), help="统计周期，逗号分隔")
+    verify_parser.add_argument("--export-file", help="已下载的导出 ZIP，默认从 /admin/data/export 下载")
+    verify_parser.add_argument("--keep-export", action="store_true", help="保留下载的导出文件")
+    verify_parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="数值允许的误差")
+    verify_parser.add_argument("--verbose", action="store_true", help="显示获取统计时的操作输出")
+    verify_parser.add_argument("--output", help="JSON报告输出路径")
+    verify_parser.set_defaults(func=run_stats_verify)
+
+    oracle_parser = subparsers.add_parser("search-oracle", help="以导出数据建立本地索引，批量校验搜索和标签查询结果")
+    oracle_parser.add_argument("--queries", type=int, default=1000, help="随机订单查询数")
+    oracle_parser.add_argument("--tag-samples", type=int, default=100, help="抽样校验的标签数和商品数，0 表示不校验")
+    oracle_parser.add_argument("--full-check-limit", type=int, default=DEFAULT_FULL_CHECK_LIMIT,
+                               help="结果数不超过该值时比较订单ID集合")
+    oracle_parser.add_argument("--export-file", help="已下载的导出 ZIP，默认从 /admin/data/export 下载")
+    oracle_parser.add_argument("--keep-export", action="store_true", help="保留下载的导出文件")
+    oracle_parser.add_argument("--seed", type=int, help="随机种子")
+    oracle_parser.add_argument("--output", help="JSON报告输出路径")
+    oracle_parser.set_defaults(func=run_search_oracle)
+
+    batch_parser = subparsers.add_parser("batch-tag", help="批量打标签按批量大小的延迟和绑定校验，给出分批建议")
+    batch_parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_BATCH_SIZES),
+                              help="批量大小，逗号分隔")
+    batch_parser.add_argument("--endpoints", default="admin,shop_owner", help="批量端点，逗号分隔: admin,shop_owner")
+    batch_parser.add_argument("--repeats", type=int, default=3, help="每个批量大小的请求次数")
+    batch_parser.add_argument("--samples", type=int, default=20, help="每次请求后抽样校验的商品数")
+    batch_parser.add_argument("--bound-ms", type=float, default=DEFAULT_LATENCY_BOUND_MS, help="p95 延迟上限（毫秒）")
+    batch_parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="单个请求的超时时间（秒）")
+    batch_parser.add_argument("--concurrency", type=int, default=8, help="创建商品的并行数")
+    batch_parser.add_argument("--seed", type=int, help="随机种子")
+    batch_parser.add_argument("--verbose", action="store_true", help="显示准备数据时的操作输出")
+    batch_parser.add_argument("--output", help="JSON报告输出路径")
+    batch_parser.set_defaults(func=run_batch_tag)
+
+    lifecycle_parser = subparsers.add_parser("lifecycle", help="多个商家会话按状态流转并发推进订单，测量吞吐和冲突")
+    lifecycle_parser.add_argument("--orders", type=int, default=200, help="订单数")
+    lifecycle_parser.add_argument("--sessions", type=int, default=4, help="商家会话数")
+    lifecycle_parser.add_argument("--hot-orders", type=int, help="会话同时争用的未完成订单数，默认会话数的两倍")
+    lifecycle_parser.add_argument("--max-seconds", type=float, default=300.0, help="运行时间上限（秒）")
+    lifecycle_parser.add_argument("--verify-samples", type=int, default=50, help="结束后抽样核对的订单数，0 表示不核对")
+    lifecycle_parser.add_argument("--users", type=int, default=3, help="下单用户数")
+    lifecycle_parser.add_argument("--user-pool", help="前端用户池文件，提供时从中取用户而不临时注册")
+    lifecycle_parser.add_argument("--products", type=int, default=2, help="下单商品数")
+    lifecycle_parser.add_argument("--product-id", help="优先使用的商品ID")
+    lifecycle_parser.add_argument("--concurrency", type=int, default=8, help="创建订单的并行数")
+    lifecycle_parser.add_argument("--seed", type=int, help="随机种子")
+    lifecycle_parser.add_argument("--verbose", action="store_true", help="显示准备数据时的操作输出")
+    lifecycle_parser.add_argument("--output", help="JSON报告输出路径")
+    lifecycle_parser.set_defaults(func=run_lifecycle_bench)
+
+    tenants_parser = subparsers.add_parser("tenants", help="多个店铺上比较均匀分布和集中到热点店铺的下单负载")
+    tenants_parser.add_argument("--shop-counts", default="1,10,50", help="店铺数的各级，逗号分隔")
+    tenants_parser.add_argument("--products", type=int, default=20, help="每个店铺的商品数")
+    tenants_parser.add_argument("--distributions", default=",".join(DISTRIBUTIONS), help="负载分布，逗号分隔")
+    tenants_parser.add_argument("--rate", type=float, default=10.0, help="总到达速率（每秒）")
+    tenants_parser.add_argument("--duration", type=float, default=60.0, help="每种分布的运行时间（秒）")
+    tenants_parser.add_argument("--workers", type=int, default=64, help="最大并发线程数")
+    tenants_parser.add_argument("--user-id", help="下单用户ID，默认使用第一个用户")
+    tenants_parser.add_argument("--contention-factor", type=float, default=DEFAULT_CONTENTION_FACTOR,
+                                help="热点 p99 超过均匀分布的倍数时判定为租户内争用")
+    tenants_parser.add_argument("--scan-growth", type=float, default=DEFAULT_SCAN_GROWTH,
+                                help="热点店铺 p50 随店铺数增长的倍数超过该值时判定为跨租户扫描")
+    tenants_parser.add_argument("--concurrency", type=int, default=8, help="创建和清理店铺的并行数")
+    tenants_parser.add_argument("--keep", action="store_true", help="结束后保留创建的店铺")
+    tenants_parser.add_argument("--seed", type=int, help="随机种子")
+    tenants_parser.add_argument("--verbose", action="store_true", help="显示准备数据时的操作输出")
+    tenants_parser.add_argument("--output", help="JSON报告输出路径")
+    tenants_parser.set_defaults(func=run_tenants)
+
+    fuzz_parser = subparsers.add_parser("fuzz-slow", help="按 OpenAPI 文档生成输入，找出并简化慢输入，或回放慢输入语料")
+    fuzz_parser.add_argument("--schema", help="Swagger / OpenAPI 文档的 URL 或文件，默认后端的 /swagger/doc.json")
+    fuzz_parser.add_argument("--methods", default="GET", help="测试的 HTTP 方法，逗号分隔；写入类方法会修改数据")
+    fuzz_parser.add_argument("--include", help="只测试路径匹配该正则的端点")
+    fuzz_parser.add_argument("--exclude", default=",".join(DEFAULT_EXCLUDE), help="路径包含这些关键字的端点跳过，逗号分隔")
+    fuzz_parser.add_argument("--examples", type=int, default=DEFAULT_EXAMPLES, help="每个端点的随机输入数")
+    fuzz_parser.add_argument("--threshold-ms", type=float,
+                             help=f"慢输入阈值（毫秒），默认 {DEFAULT_THRESHOLD_MS:g}；回放时默认使用语料记录的阈值")
+    fuzz_parser.add_argument("--repeats", type=int, default=3, help="确认和简化时每个输入的测量次数（取中位数）")
+    fuzz_parser.add_argument("--corpus", default=str(DEFAULT_CORPUS_PATH), help="慢输入语料文件")
+    fuzz_parser.add_argument("--replay", action="store_true", help="回放语料，有输入仍超过阈值时退出码为 1")
+    fuzz_parser.add_argument("--owner-username", help="店主用户名，提供时测试 /shopOwner 端点使用商家令牌")
+    fuzz_parser.add_argument("--owner-password", help="店主密码")
+    fuzz_parser.add_argument("--seed", type=int, help="随机种子")
+    fuzz_parser.add_argument("--output", help="JSON报告输出路径")
+    fuzz_parser.set_defaults(func=run_fuzz_slow)
+
+    endpoints_parser = subparsers.add_parser("endpoints", help="按 OpenAPI 文档为每个 GET 端点生成请求并统一测量")
+    endpoints_parser.add_argument("--schema", help="Swagger / OpenAPI 文档的 URL 或文件，默认后端的 /swagger/doc.json")
+    endpoints_parser.add_argument("--shop-id", help="店铺ID，默认使用第一个店铺")
+    endpoints_parser.add_argument("--include", help="只测量路径匹配该正则的端点")
+    endpoints_parser.add_argument("--exclude", default="logout,refresh-token", help="路径包含这些关键字的端点跳过，逗号分隔")
+    endpoints_parser.add_argument("--param", action="append", default=[], help="指定参数取值，格式 name=value，可重复")
+    endpoints_parser.add_argument("--owner-username", help="店主用户名，提供时测量 /shopOwner 端点")
+    endpoints_parser.add_argument("--owner-password", help="店主密码")
+    endpoints_parser.add_argument("--owner-shop-id", help="店主的店铺ID")
+    endpoints_parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP, help="每个端点的预热请求数")
+    endpoints_parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="每个端点的测量请求数")
+    endpoints_parser.add_argument("--store", default=str(DEFAULT_STORE_PATH), help="结果存储文件")
+    endpoints_parser.add_argument("--label", default="default", help="部署配置标签")
+    endpoints_parser.add_argument("--growth-threshold", type=float, default=0.2, help="p50 相对上一次增长超过该比例时列出")
+    endpoints_parser.add_argument("--verbose", action="store_true", help="显示准备数据时的操作输出")
+    endpoints_parser.add_argument("--output", help="JSON报告输出路径")
+    endpoints_parser.set_defaults(func=run_endpoints)
+
+    replay_parser = subparsers.add_parser("replay-log", help="按 HAProxy HTTP 日志的到达间隔回放真实流量")
+    replay_parser.add_argument("log", help="HAProxy 日志文件，支持 .gz")
+    replay_parser.add_argument("--speed", type=float, default=DEFAULT_SPEED, help="回放倍速，0 表示尽快发送")
+    replay_parser.add_argument("--methods", default="GET", help="回放的请求方法，逗号分隔（日志中没有请求体）")
+    replay_parser.add_argument("--include", help="只回放路径匹配该正则的请求")
+    replay_parser.add_argument("--limit", type=int, help="最多回放的请求数")
+    replay_parser.add_argument("--shop-id", help="ID 映射使用的店铺ID，默认使用第一个店铺")
+    replay_parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE, help="每个实体的ID池大小")
+    replay_parser.add_argument("--owner-username", help="店主用户名，提供时回放 /shopOwner 请求带上店主令牌")
+    replay_parser.add_argument("--owner-password", help="店主密码")
+    replay_parser.add_argument("--user-pool", help="前端用户池文件，前端请求按客户端IP分配身份")
+    replay_parser.add_argument("--workers", type=int, default=64, help="最大并发线程数")
+    replay_parser.add_argument("--verbose", action="store_true", help="显示准备数据时的操作输出")
+    replay_parser.add_argument("--output", help="JSON报告输出路径")
+    replay_parser.set_defaults(func=run_replay_log)
+
+    fit_parser = subparsers.add_parser("fit-model", help="从录制的流量（HAProxy 日志或磁带）拟合用户旅程的马尔可夫模型")
+    fit_parser.add_argument("source", help="HAProxy 日志或 record_cassette 录制的磁带，支持 .gz")
+    fit_parser.add_argument("--methods", default="GET", help="建模的请求方法，逗号分隔")
+    fit_parser.add_argument("--session-gap", type=float, default=DEFAULT_SESSION_GAP, help="会话切分间隔（秒）")
+    fit_parser.add_argument("--output", default="perf_results/workload_model.json", help="模型输出路径")
+    fit_parser.set_defaults(func=run_fit_model)
+
+    synthesize_parser = subparsers.add_parser("synthesize", help="按工作负载模型以任意规模生成流量")
+    synthesize_parser.add_argument("--model", default="perf_results/workload_model.json", help="模型文件")
+    synthesize_parser.add_argument("--duration", type=float, default=60.0, help="启动会话的时长（秒）")
+    synthesize_parser.add_argument("--session-rate", type=float, help="每秒启动的会话数，默认录制速率乘以 --scale")
+    synthesize_parser.add_argument("--scale", type=float, default=1.0, help="相对录制会话到达率的倍数")
+    synthesize_parser.add_argument("--shop-id", help="ID 池使用的店铺ID，默认使用第一个店铺")
+    synthesize_parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE, help="每个实体的ID池大小")
+    synthesize_parser.add_argument("--owner-username", help="店主用户名，提供时 /shopOwner 请求带上店主令牌")
+    synthesize_parser.add_argument("--owner-password", help="店主密码")
+    synthesize_parser.add_argument("--user-pool", help="前端用户池文件，每个会话分配一个身份")
+    synthesize_parser.add_argument("--workers", type=int, default=64, help="最大并发线程数")
+    synthesize_parser.add_argument("--seed", type=int, help="随机种子")
+    synthesize_parser.add_argument("--verbose", action="store_true", help="显示准备数据时的操作输出")
+    synthesize_parser.add_argument("--output", help="JSON报告输出路径")
+    synthesize_parser.set_defaults(func=run_synthesize)
+
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    args.func(args)
@@ -172,35 +172,38 @@ def update_shop(shop_owner_token, shop_id, name="Updated Shop Name", description
         return False
 
 
-def update_order_status_flow(shop_owner_token, shop_id):
+def update_order_status_flow(shop_owner_token, shop_id, statuses=None):
     """更新订单状态流转
 
     Args:
         shop_owner_token: 商家令牌
         shop_id: 店铺ID
+        statuses: 状态列表，默认只配置 pending -> processing 一步
 
     Returns:
         bool: 成功返回True，失败返回False
     """
     url = f"{API_BASE_URL}/shopOwner/shop/update-order-status-flow"
+    if statuses is None:
+        statuses = [
+            {
+                "value": 1,
+                "label": "pending",
+                "type": "normal",
+                "isFinal": False,
+                "actions": [
+                    {
+                        "name": "accept",
+                        "nextStatus": 2,
+                        "nextStatusLabel": "processing"
+                    }
+                ]
+            }
+        ]
     payload = {
         "shop_id": shop_id,
         "order_status_flow": {
-            "statuses": [
-                {
-                    "value": 1,
-                    "label": "pending",
-                    "type": "normal",
-                    "isFinal": False,
-                    "actions": [
-                        {
-                            "name": "accept",
-                            "nextStatus": 2,
-                            "nextStatusLabel": "processing"
-                        }
-                    ]
-                }
-            ]
+            "statuses": statuses
         }
     }
     headers = {"Authorization": f"Bearer {shop_owner_token}"}
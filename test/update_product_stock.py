@@ -1 +1,81 @@
-    check_product_stock()
+"""
+批量设置商品库存 - 通过 admin/bulk_actions.py 并发更新店铺内商品的库存，完成后逐个核对
+
+用法:
+    python update_product_stock.py --stock 100
+    python update_product_stock.py --stock 0 --shop-id 1 --product-ids 1001,1002 --concurrency 16
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# 添加当前目录到 sys.path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from admin import bulk_actions, product_actions
+from perf import workloads
+from perf.load_generator import suppress_stdout
+
+
+def iter_products(admin_token, shop_id, page_size=100):
+    """逐页读取店铺的全部商品"""
+    page = 1
+    while True:
+        with suppress_stdout():
+            products = product_actions.get_product_list(admin_token, shop_id, page=page, page_size=page_size)
+        yield from products
+        if len(products) < page_size:
+            return
+        page += 1
+
+
+def check_product_stock(admin_token, shop_id, stock, product_ids=None):
+    """重新读取商品列表，返回库存与目标值不一致的商品 [(商品ID, 库存)]"""
+    wanted = {str(product_id) for product_id in product_ids} if product_ids else None
+    mismatched = []
+    for product in iter_products(admin_token, shop_id):
+        product_id = str(product.get("id"))
+        if wanted is not None and product_id not in wanted:
+            continue
+        if product.get("stock") != stock:
+            mismatched.append((product_id, product.get("stock")))
+    return mismatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量设置商品库存")
+    parser.add_argument("--stock", type=int, required=True, help="目标库存")
+    parser.add_argument("--shop-id", help="店铺ID（默认第一个店铺）")
+    parser.add_argument("--product-ids", help="逗号分隔的商品ID（默认店铺内全部商品）")
+    parser.add_argument("--concurrency", type=int, default=bulk_actions.DEFAULT_CONCURRENCY, help="并发数")
+    args = parser.parse_args()
+
+    admin_token = workloads.get_admin_token()
+    if not admin_token:
+        print("❌ 管理员登录失败")
+        return False
+    shop_id = args.shop_id or workloads.get_first_shop_id(admin_token)
+    if not shop_id:
+        print("❌ 未找到可用的店铺")
+        return False
+
+    if args.product_ids:
+        product_ids = [item.strip() for item in args.product_ids.split(",") if item.strip()]
+    else:
+        product_ids = [product.get("id") for product in iter_products(admin_token, shop_id)]
+    operations = (bulk_actions.BulkOperation("update_product", product_id, shop_id, {"stock": args.stock})
+                  for product_id in product_ids)
+
+    print(f"更新店铺 {shop_id} 的 {len(product_ids)} 个商品，库存设为 {args.stock}")
+    report = bulk_actions.run_bulk(admin_token, operations, concurrency=args.concurrency)
+    print(bulk_actions.format_bulk_report(report))
+
+    mismatched = check_product_stock(admin_token, shop_id, args.stock, product_ids)
+    for product_id, stock in mismatched[:20]:
+        print(f"  ✗ 商品 {product_id} 库存为 {stock}")
+    print(f"核对完成，{len(mismatched)} 个商品库存不一致")
+    return report["failed"] == 0 and not mismatched
+
+
+if __name__ == "__main__":
+    exit(0 if main() else 1)